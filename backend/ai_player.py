@@ -5,13 +5,25 @@ AI玩家决策引擎
 实现智能AI来玩璀璨宝石宝可梦
 """
 
+import logging
 import random
 import sys
 import os
 from typing import List, Dict, Optional
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from splendor_pokemon import BallType, PokemonCard, Player, Rarity, SplendorPokemonGame
+from splendor_pokemon import (BallType, PokemonCard, Player, Rarity, SplendorPokemonGame,
+                              BALL_TYPES, COLOR_SLOTS, MASTER_SLOT, MOVE_TAKE_BALLS)
+from card_catalog import CardFeatures, get_card_catalog
+from game_logging import get_logger, log_context
+from mcts import DEFAULT_BUDGET_MS, mcts_search
+
+logger = get_logger("ai")
+
+
+def _card_features() -> CardFeatures:
+    """进程级卡牌静态特征表（随卡牌目录只计算一次）"""
+    return get_card_catalog().features
 
 
 class AIPlayer:
@@ -21,18 +33,38 @@ class AIPlayer:
     EASY = "简单"
     MEDIUM = "中等"
     HARD = "困难"
+    EXPERT = "专家"  # 限时蒙特卡洛树搜索
     
-    def __init__(self, difficulty: str = MEDIUM):
+    def __init__(self, difficulty: str = MEDIUM, seed: Optional[int] = None,
+                 time_budget_ms: float = DEFAULT_BUDGET_MS, search_workers: int = 1):
+        """
+        Args:
+            difficulty: 难度（简单/中等/困难/专家）
+            seed: 随机种子，AI的所有随机决策都来自自己的随机数生成器（同一种子决策可复现）
+            time_budget_ms: 专家难度每步的思考时间上限（毫秒）
+            search_workers: 专家难度搜索使用的进程数（1为在当前进程内搜索）
+        """
         self.difficulty = difficulty
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.time_budget_ms = time_budget_ms
+        self.search_workers = search_workers
+        self.last_search_stats = None  # 最近一次搜索的统计（模拟次数、每秒模拟次数等）
         self.name_prefix = {
             self.EASY: "机器人·初学者",
             self.MEDIUM: "机器人·训练家",
-            self.HARD: "机器人·大师"
+            self.HARD: "机器人·大师",
+            self.EXPERT: "机器人·冠军"
         }.get(difficulty, "机器人")
         # 追踪购买失败的卡牌，避免重复尝试
         self.failed_purchase_attempts = {}  # {card_name: fail_count}
         self.last_action = None  # 记录上次动作
         
+    def reseed(self, seed: int):
+        """重新设置随机种子（开局时由房间按对局种子派生）"""
+        self.seed = seed
+        self.rng.seed(seed)
+        
     def generate_name(self, existing_players: List[str]) -> str:
         """生成AI玩家名称"""
         bot_names = [
@@ -42,8 +74,7 @@ class AIPlayer:
         ]
         
         # 随机打乱名字顺序
-        import random
-        random.shuffle(bot_names)
+        self.rng.shuffle(bot_names)
         
         # 找一个未使用的名字
         for name in bot_names:
@@ -64,13 +95,16 @@ class AIPlayer:
         AI做出决策
         返回: {"action": "take_balls/buy_card/reserve_card", "data": {...}}
         """
-        # 根据难度调整策略
-        if self.difficulty == self.EASY:
-            return self._easy_strategy(game, player)
-        elif self.difficulty == self.HARD:
-            return self._hard_strategy(game, player)
-        else:
-            return self._medium_strategy(game, player)
+        # 根据难度调整策略（决策过程中的日志都带上玩家字段）
+        with log_context(player=player.name):
+            if self.difficulty == self.EASY:
+                return self._easy_strategy(game, player)
+            elif self.difficulty == self.HARD:
+                return self._hard_strategy(game, player)
+            elif self.difficulty == self.EXPERT:
+                return self._expert_strategy(game, player)
+            else:
+                return self._medium_strategy(game, player)
     
     def _easy_strategy(self, game: SplendorPokemonGame, player: Player) -> Dict:
         """简单策略 - 随机但合法的决策"""
@@ -78,8 +112,8 @@ class AIPlayer:
         
         # 40% 概率尝试购买卡牌
         buyable_cards = self._get_buyable_cards(game, player)
-        if buyable_cards and random.random() < 0.4:
-            card = random.choice(buyable_cards)
+        if buyable_cards and self.rng.random() < 0.4:
+            card = self.rng.choice(buyable_cards)
             actions.append({
                 "action": "buy_card",
                 "data": {
@@ -90,10 +124,10 @@ class AIPlayer:
             })
         
         # 30% 概率保留卡牌（仅Lv1-3）
-        if not actions and len(player.reserved_cards) < 3 and random.random() < 0.3:
+        if not actions and len(player.reserved_cards) < 3 and self.rng.random() < 0.3:
             reservable_cards = self._get_all_tableau_cards(game)
             if reservable_cards:
-                card = random.choice(reservable_cards)
+                card = self.rng.choice(reservable_cards)
                 actions.append({
                     "action": "reserve_card",
                     "data": {
@@ -114,7 +148,7 @@ class AIPlayer:
         
         # 如果仍然没有动作，强制拿球
         if not actions:
-            print(f"警告：AI玩家 {player.name} 没有可用的动作，尝试拿球")
+            logger.warning("AI玩家 %s 没有可用的动作，尝试拿球", player.name)
             # 尝试找任何可用的球
             available_balls = [ball for ball, count in game.ball_pool.items() 
                              if count > 0 and ball != BallType.MASTER]
@@ -138,17 +172,18 @@ class AIPlayer:
         # DEBUG: 关键状态输出
         total_balls = player.get_total_balls()
         if total_balls >= 7 or colored_balls_in_pool <= 6:
-            print(f"  🔍 [中等AI调试] {player.name}: 持球={total_balls}, 球池彩球={colored_balls_in_pool}, 预购={len(player.reserved_cards)}")
+            logger.debug("🔍 [中等AI调试] %s: 持球=%d, 球池彩球=%d, 预购=%d",
+                         player.name, total_balls, colored_balls_in_pool, len(player.reserved_cards))
         
         # 如果球池彩色球<=6，启动简化版破局策略（与困难AI一致）
         if colored_balls_in_pool <= 6:
-            print(f"  ⚠️ [中等AI] 球池枯竭(彩球={colored_balls_in_pool})，启动破局策略")
+            logger.debug("⚠️ [中等AI] 球池枯竭(彩球=%s)，启动破局策略", colored_balls_in_pool)
             
             # 破局策略1：如果预购区未满，优先预购获取大师球
             if len(player.reserved_cards) < 3:
                 best_card = self._find_best_card_to_reserve(game, player, favor_high_points=False)
                 if best_card:
-                    print(f"  → 预购 {best_card.name} 获取大师球")
+                    logger.debug("→ 预购 %s 获取大师球", best_card.name)
                     return {
                         "action": "reserve_card",
                         "data": {
@@ -213,7 +248,8 @@ class AIPlayer:
                 best = max(buyable_cards, key=score_card)
                 best_score = score_card(best)
                 
-                print(f"  → 买 {best.name}({best.victory_points}分, 评分{best_score:.0f}) {'[目标友好]' if best_score >= 100 else '[加分]' if best.victory_points > 0 else '[折扣]'}")
+                logger.debug("→ 买 %s(%d分, 评分%.0f) %s", best.name, best.victory_points, best_score,
+                             '[目标友好]' if best_score >= 100 else '[加分]' if best.victory_points > 0 else '[折扣]')
                 return {
                     "action": "buy_card",
                     "data": {"card": {"card_id": best.card_id}}
@@ -223,7 +259,7 @@ class AIPlayer:
             if player.get_total_balls() < 9:
                 balls = self._get_smart_balls(game, player)
                 if balls:
-                    print(f"  → 拿球（持球数<9）")
+                    logger.debug("→ 拿球（持球数<9）")
                     return {
                         "action": "take_balls",
                         "data": {"ball_types": [b.value for b in balls]}
@@ -233,8 +269,8 @@ class AIPlayer:
         buyable_cards = self._get_buyable_cards(game, player)
         
         # DEBUG: 输出buyable_cards
-        if total_balls >= 7 and buyable_cards:
-            print(f"  🔍 [中等AI] buyable_cards: {[c.name for c in buyable_cards]}")
+        if total_balls >= 7 and buyable_cards and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 [中等AI] buyable_cards: %s", [c.name for c in buyable_cards])
         
         if buyable_cards:
             # 标记哪些卡在预购区
@@ -262,10 +298,10 @@ class AIPlayer:
                 reserved_buyable = [c for c in buyable_cards if c.name in reserved_card_names]
                 if reserved_buyable:
                     # 优先买预购区最便宜的卡
-                    cheapest = min(reserved_buyable, key=lambda c: sum(c.cost.values()))
+                    cheapest = min(reserved_buyable, key=self._cost_total)
                 else:
                     # 没有预购区的卡，买场上最便宜的
-                    cheapest = min(buyable_cards, key=lambda c: sum(c.cost.values()))
+                    cheapest = min(buyable_cards, key=self._cost_total)
                 return {
                     "action": "buy_card",
                     "data": {
@@ -276,12 +312,12 @@ class AIPlayer:
                 }
             
             # 策略3：30%概率买便宜卡（增加随机性），优先预购区
-            if random.random() < 0.3:
+            if self.rng.random() < 0.3:
                 reserved_buyable = [c for c in buyable_cards if c.name in reserved_card_names]
                 if reserved_buyable:
-                    cheapest = min(reserved_buyable, key=lambda c: sum(c.cost.values()))
+                    cheapest = min(reserved_buyable, key=self._cost_total)
                 else:
-                    cheapest = min(buyable_cards, key=lambda c: sum(c.cost.values()))
+                    cheapest = min(buyable_cards, key=self._cost_total)
                 return {
                     "action": "buy_card",
                     "data": {
@@ -318,8 +354,8 @@ class AIPlayer:
                 # 目标球充足，选前3个（必须3个不同颜色）
                 selected = available_needed[:3]
                 # 加入20%随机因素，打乱顺序
-                if random.random() < 0.2:
-                    random.shuffle(selected)
+                if self.rng.random() < 0.2:
+                    self.rng.shuffle(selected)
                 return {
                     "action": "take_balls",
                     "data": {"ball_types": [b.value for b in selected]}
@@ -332,8 +368,8 @@ class AIPlayer:
         balls = self._get_smart_balls(game, player)
         if balls:
             # 30%概率改变拿球顺序，增加随机性
-            if random.random() < 0.3:
-                random.shuffle(balls)
+            if self.rng.random() < 0.3:
+                self.rng.shuffle(balls)
             return {
                 "action": "take_balls",
                 "data": {"ball_types": [b.value for b in balls]}
@@ -354,10 +390,8 @@ class AIPlayer:
                 }
         
         # 最后的兜底：空过回合
-        print(f"警告：AI玩家 {player.name} 无法决策，跳过回合")
-        print(f"  - 预购区: {len(player.reserved_cards)}/3")
-        print(f"  - 持球数: {player.get_total_balls()}")
-        print(f"  - 球池状态: {dict(game.ball_pool)}")
+        logger.warning("AI玩家 %s 无法决策，跳过回合（预购区: %d/3，持球数: %d，球池状态: %s）",
+                       player.name, len(player.reserved_cards), player.get_total_balls(), dict(game.ball_pool))
         return None
     
     def _hard_strategy(self, game: SplendorPokemonGame, player: Player) -> Dict:
@@ -370,7 +404,7 @@ class AIPlayer:
         
         # === 死锁检测与破局机制 ===
         if self._detect_deadlock(player, game):
-            print(f"⚠️ 检测到死锁状态，启动破局策略: {player.name}")
+            logger.info("⚠️ 检测到死锁状态，启动破局策略: %s", player.name)
             deadlock_action = self._break_deadlock(player, game)
             if deadlock_action:
                 return deadlock_action
@@ -416,7 +450,7 @@ class AIPlayer:
         
         # ⚠️ 特殊策略：如果预购区满了且持球>=9，必须买卡释放资源（避免死循环）
         if len(player.reserved_cards) == 3 and player.get_total_balls() >= 9:
-            print(f"  💡 {player.name}: 预购区满+持球多({player.get_total_balls()})，必须买卡释放资源")
+            logger.debug("💡 %s: 预购区满+持球多(%s)，必须买卡释放资源", player.name, player.get_total_balls())
             
             # 策略1：检查是否有距离<=1的卡可以立即买（预购区优先）
             reserved_cards_with_distance = [(c, self._calculate_card_distance(c, player)) 
@@ -426,7 +460,7 @@ class AIPlayer:
             if very_close_reserved:
                 # 优先买预购区中距离<=1的卡（有分数的优先）
                 best = max(very_close_reserved, key=lambda c: c.victory_points)
-                print(f"  → 买预购区的 {best.name}({best.victory_points}分，距离<=1)")
+                logger.debug("→ 买预购区的 %s(%s分，距离<=1)", best.name, best.victory_points)
                 return {
                     "action": "buy_card",
                     "data": {"card": {"card_id": best.card_id}}
@@ -439,15 +473,15 @@ class AIPlayer:
                 with_points = [c for c in all_buyable if c.victory_points > 0]
                 if with_points:
                     best = max(with_points, key=lambda c: c.victory_points)
-                    print(f"  → 买场上的 {best.name}({best.victory_points}分) 释放资源")
+                    logger.debug("→ 买场上的 %s(%s分) 释放资源", best.name, best.victory_points)
                     return {
                         "action": "buy_card",
                         "data": {"card": {"card_id": best.card_id}}
                     }
                 else:
                     # 买最便宜的0分卡，获得永久折扣
-                    cheapest = min(all_buyable, key=lambda c: sum(c.cost.values()))
-                    print(f"  → 买最便宜的 {cheapest.name} 获得永久折扣")
+                    cheapest = min(all_buyable, key=self._cost_total)
+                    logger.debug("→ 买最便宜的 %s 获得永久折扣", cheapest.name)
                     return {
                         "action": "buy_card",
                         "data": {"card": {"card_id": cheapest.card_id}}
@@ -460,7 +494,7 @@ class AIPlayer:
             
             if min_distance > 1:
                 # 目标卡距离>1，拿球会导致还球循环，跳过回合
-                print(f"  → 目标 {cheapest_reserved.name} 距离={min_distance}>1，跳过拿球避免循环")
+                logger.debug("→ 目标 %s 距离=%s>1，跳过拿球避免循环", cheapest_reserved.name, min_distance)
                 # 不拿球，直接跳到预购逻辑（如果预购区未满）或跳过回合
         
         # 战略性保留卡牌
@@ -479,7 +513,7 @@ class AIPlayer:
         
         # ⚠️ 拿球前检查：如果持球>=9且预购区满，不要拿球（避免还球循环）
         if player.get_total_balls() >= 9 and len(player.reserved_cards) == 3:
-            print(f"  ⚠️ {player.name}: 持球({player.get_total_balls()})>=9且预购区满，跳过拿球")
+            logger.debug("⚠️ %s: 持球(%s)>=9且预购区满，跳过拿球", player.name, player.get_total_balls())
             # 跳过拿球，尝试预购或跳过回合
         else:
             # 最优球选择
@@ -505,9 +539,8 @@ class AIPlayer:
                 }
         
         # 最后的兜底：空过回合（不应该发生）
-        print(f"警告：AI玩家 {player.name} 无法决策，跳过回合")
-        print(f"  - 预购区: {len(player.reserved_cards)}/3")
-        print(f"  - 持球数: {player.get_total_balls()}")
+        logger.warning("AI玩家 %s 无法决策，跳过回合（预购区: %d/3，持球数: %d）",
+                       player.name, len(player.reserved_cards), player.get_total_balls())
         return None
     
     def _hard_2player_strategy(self, game: SplendorPokemonGame, player: Player) -> Dict:
@@ -515,7 +548,7 @@ class AIPlayer:
         
         # === 死锁检测与破局机制（最高优先级） ===
         if self._detect_deadlock(player, game):
-            print(f"⚠️ 检测到死锁状态，启动破局策略: {player.name}")
+            logger.info("⚠️ 检测到死锁状态，启动破局策略: %s", player.name)
             deadlock_action = self._break_deadlock(player, game)
             if deadlock_action:
                 return deadlock_action
@@ -527,7 +560,7 @@ class AIPlayer:
         
         # 如果球池彩色球<=6，说明资源严重短缺，必须通过预购或购买来破局
         if colored_balls_in_pool <= 6:
-            print(f"  ⚠️ 球池枯竭(彩球={colored_balls_in_pool})，启动破局策略")
+            logger.debug("⚠️ 球池枯竭(彩球=%s)，启动破局策略", colored_balls_in_pool)
             
             # 策略1：优先预购（获得大师球）
             if len(player.reserved_cards) < 3:
@@ -536,7 +569,7 @@ class AIPlayer:
                     # 选择最有价值的卡牌预购
                     best_card = self._find_best_card_to_reserve(game, player, favor_high_points=False)
                     if best_card:
-                        print(f"  → 预购 {best_card.name} 获取大师球")
+                        logger.debug("→ 预购 %s 获取大师球", best_card.name)
                         return {
                             "action": "reserve_card",
                             "data": {
@@ -558,14 +591,14 @@ class AIPlayer:
                     with_points = [c for c in reserved_buyable if c.victory_points > 0]
                     if with_points:
                         best = max(with_points, key=lambda c: c.victory_points)
-                        print(f"  → 买预购区的 {best.name}({best.victory_points}分) 释放槽位")
+                        logger.debug("→ 买预购区的 %s(%s分) 释放槽位", best.name, best.victory_points)
                         return {
                             "action": "buy_card",
                             "data": {"card": {"card_id": best.card_id}}
                         }
                     else:
-                        cheapest = min(reserved_buyable, key=lambda c: sum(c.cost.values()))
-                        print(f"  → 买预购区的 {cheapest.name} 释放槽位")
+                        cheapest = min(reserved_buyable, key=self._cost_total)
+                        logger.debug("→ 买预购区的 %s 释放槽位", cheapest.name)
                         return {
                             "action": "buy_card",
                             "data": {"card": {"card_id": cheapest.card_id}}
@@ -578,13 +611,13 @@ class AIPlayer:
                     best = max(with_points, key=lambda c: (
                         c.victory_points * 10 + 
                         c.level * 2 - 
-                        sum(c.cost.values()) * 0.5
+                        self._cost_total(c) * 0.5
                     ))
-                    print(f"  → 买 {best.name}({best.victory_points}分) 获得分数")
+                    logger.debug("→ 买 %s(%s分) 获得分数", best.name, best.victory_points)
                 else:
                     # 没有分数的卡，买最便宜的获得永久折扣
-                    cheapest = min(buyable_cards, key=lambda c: sum(c.cost.values()))
-                    print(f"  → 买 {cheapest.name} 增加永久折扣")
+                    cheapest = min(buyable_cards, key=self._cost_total)
+                    logger.debug("→ 买 %s 增加永久折扣", cheapest.name)
                 
                 return {
                     "action": "buy_card",
@@ -595,14 +628,14 @@ class AIPlayer:
             if player.get_total_balls() < 9:  # 只有持球<9时才拿球
                 balls = self._get_optimal_balls(game, player)
                 if balls:
-                    print(f"  → 拿球（持球数<9）")
+                    logger.debug("→ 拿球（持球数<9）")
                     return {
                         "action": "take_balls",
                         "data": {"ball_types": [b.value for b in balls]}
                     }
             
             # 策略4：无法操作，跳过回合
-            print(f"  → 无可行操作，跳过回合")
+            logger.debug("→ 无可行操作，跳过回合")
             return None
         
         # === 优先级1: 购买卡牌（更激进，预购区优先） ===
@@ -648,9 +681,9 @@ class AIPlayer:
                 # 优先买预购区的卡
                 reserved_buyable = [c for c in buyable_cards if c.name in reserved_card_names]
                 if reserved_buyable:
-                    cheapest = min(reserved_buyable, key=lambda c: sum(c.cost.values()))
+                    cheapest = min(reserved_buyable, key=self._cost_total)
                 else:
-                    cheapest = min(buyable_cards, key=lambda c: sum(c.cost.values()))
+                    cheapest = min(buyable_cards, key=self._cost_total)
                 return {
                     "action": "buy_card",
                     "data": {
@@ -716,70 +749,39 @@ class AIPlayer:
                 }
         
         # 最后的兜底：空过回合
-        print(f"警告：2人局困难AI {player.name} 无法决策，跳过回合")
-        print(f"  - 预购区: {len(player.reserved_cards)}/3")
-        print(f"  - 持球数: {player.get_total_balls()}")
-        print(f"  - 可购买卡: {len(self._get_buyable_cards(game, player))}")
+        logger.warning("2人局困难AI %s 无法决策，跳过回合（预购区: %d/3，持球数: %d，可购买卡: %d）",
+                       player.name, len(player.reserved_cards), player.get_total_balls(),
+                       len(self._get_buyable_cards(game, player)))
         return None
     
     # ===== 辅助方法 =====
     
+    def _expert_strategy(self, game: SplendorPokemonGame, player: Player) -> Dict:
+        """专家策略 - 在思考时间内做蒙特卡洛树搜索（牌堆顺序按未知处理），选访问次数最多的行动"""
+        move, stats = mcts_search(game, budget_ms=self.time_budget_ms, seed=self.rng.randrange(2 ** 32),
+                                  workers=self.search_workers)
+        self.last_search_stats = stats
+        logger.debug("🌲 [专家AI] %s: 模拟%d次，用时%sms，%.0f次/秒",
+                     player.name, stats['rollouts'], stats['elapsed_ms'], stats['rollouts_per_second'])
+        
+        decision = move.to_decision() if move else None
+        if decision is None:
+            # 没有可走的行动（或搜索失败）时按困难策略兜底
+            return self._hard_strategy(game, player)
+        return decision
+    
     def _get_buyable_cards(self, game: SplendorPokemonGame, player: Player) -> List[PokemonCard]:
-        """获取所有可购买的卡牌 - 使用Player的can_afford作为唯一判断标准"""
-        buyable = []
-        
-        # 检查场上卡牌
-        for tier, cards in game.tableau.items():
-            for card in cards:
-                # 只使用Player.can_afford判断（与game.buy_card一致）
-                if player.can_afford(card):
-                    buyable.append(card)
-        
-        # 检查稀有/传说卡
-        if game.rare_card and player.can_afford(game.rare_card):
-            buyable.append(game.rare_card)
-        if game.legendary_card and player.can_afford(game.legendary_card):
-            buyable.append(game.legendary_card)
-        
-        # 检查保留的卡牌
-        for card in player.reserved_cards:
-            if player.can_afford(card):
-                buyable.append(card)
-        
-        return buyable
+        """获取所有可购买的卡牌（场上、稀有/传说、预购区）- 与game.buy_card同一判断标准（Player.can_afford）"""
+        return list(game.buyable_cards(player))
     
     def _can_really_afford(self, player: Player, card: PokemonCard) -> bool:
         """
         二次检查是否真的能买卡牌
         解决can_afford因永久球折扣导致的误判问题
         """
-        permanent = player.get_permanent_balls()
-        needed_master_balls = 0
-        
-        for ball_type, cost in card.cost.items():
-            if ball_type == BallType.MASTER:
-                needed_master_balls += cost
-                continue
-            
-            # 计算扣除永久球后的实际成本
-            discount = permanent.get(ball_type, 0)
-            actual_cost = max(0, cost - discount)
-            
-            # 计算需要从手上支付的球数
-            has_this_color = player.balls.get(ball_type, 0)
-            need_from_hand = min(actual_cost, has_this_color)  # 能从这个颜色支付的
-            need_from_master = actual_cost - need_from_hand  # 需要用大师球补的
-            needed_master_balls += need_from_master
-        
-        # 检查大师球是否足够
-        has_master_balls = player.balls.get(BallType.MASTER, 0)
-        
-        # 额外检查：如果needed_master_balls > 持球总数，肯定买不起
-        total_balls = player.get_total_balls()
-        if needed_master_balls > total_balls:
-            return False
-        
-        return has_master_balls >= needed_master_balls
+        # 大师球需求 = 大师球成本 + 各颜色缺口（扣除永久球和手上的球后）
+        needed_master_balls = card.cost_vector[MASTER_SLOT] + player.get_ball_gap(card)
+        return player.balls[BallType.MASTER] >= needed_master_balls
     
     def _can_afford(self, player: Player, card: PokemonCard, game: SplendorPokemonGame) -> bool:
         """检查是否能支付卡牌"""
@@ -797,77 +799,38 @@ class AIPlayer:
         return all_cards
     
     def _get_random_balls(self, game: SplendorPokemonGame) -> List[BallType]:
-        """随机获取球（遵守新规则）"""
-        available_balls = [ball for ball, count in game.ball_pool.items() 
-                          if count > 0 and ball != BallType.MASTER]
-        
-        if not available_balls:
+        """随机获取球：在合法的拿球方式中随机选择，能拿2个同色时按概率拿（≥3色时30%，只剩2色时50%）"""
+        takes = [move.balls for move in game.legal_moves() if move.action == MOVE_TAKE_BALLS]
+        if not takes:
             return []
         
-        # 计算场上有多少种颜色的球大于0
-        remained_color = len(available_balls)
-        
-        if remained_color >= 3:
-            # 球充足：随机选择拿2个同色(如果某色≥4)或3个不同色
-            colors_with_4_plus = [ball for ball in available_balls 
-                                 if game.ball_pool.get(ball, 0) >= 4]
-            
-            if colors_with_4_plus and random.random() < 0.3:
-                # 30%概率拿2个同色
-                ball_type = random.choice(colors_with_4_plus)
-                return [ball_type, ball_type]
-            else:
-                # 否则拿3个不同色
-                return random.sample(available_balls, 3)
-        
-        elif remained_color == 2:
-            # 2个颜色：检查是否有≥4个的
-            colors_with_4_plus = [ball for ball in available_balls 
-                                 if game.ball_pool.get(ball, 0) >= 4]
-            
-            if colors_with_4_plus:
-                # 有≥4个的颜色，随机选择拿2个同色或2个不同色各1个
-                if random.random() < 0.5:
-                    # 50%概率拿2个同色
-                    ball_type = random.choice(colors_with_4_plus)
-                    return [ball_type, ball_type]
-                else:
-                    # 50%概率拿2个不同色各1个
-                    return list(available_balls)
-            else:
-                # 所有颜色都<4个：拿2个不同色各1个
-                return list(available_balls)
-        
-        elif remained_color == 1:
-            # 1个颜色
-            ball_type = available_balls[0]
-            count = game.ball_pool.get(ball_type, 0)
-            
-            if count >= 4:
-                # ≥4个：拿2个同色
-                return [ball_type, ball_type]
-            else:
-                # <4个：拿1个
-                return [ball_type]
-        
-        return []
+        pairs = [balls for balls in takes if len(balls) == 2 and balls[0] == balls[1]]
+        others = [balls for balls in takes if not (len(balls) == 2 and balls[0] == balls[1])]
+        if pairs:
+            colors = len({ball for balls in takes for ball in balls})
+            if not others or self.rng.random() < (0.3 if colors >= 3 else 0.5):
+                return list(self.rng.choice(pairs))
+        return list(self.rng.choice(others))
     
     def _get_smart_balls(self, game: SplendorPokemonGame, player: Player) -> List[BallType]:
         """智能选择球 - 基于需要"""
         # 统计需要哪些球
-        ball_needs = {ball: 0 for ball in BallType if ball != BallType.MASTER}
+        features = _card_features()
+        hand = player.balls.counts
+        permanent = player.display_area.vector
+        needs = [0] * len(BALL_TYPES)
         
         # 看看桌面上有哪些卡牌值得买
         for tier, cards in game.tableau.items():
             for card in cards:
-                if not self._can_afford(player, card, game):
-                    # 计算还需要多少球
-                    for ball_type, cost in card.cost.items():
-                        if ball_type != BallType.MASTER:
-                            has = player.balls.get(ball_type, 0)
-                            permanent = player.get_permanent_balls().get(ball_type, 0)
-                            needed = max(0, cost - has - permanent)
-                            ball_needs[ball_type] += needed * (card.victory_points + 1)
+                # 计算还需要多少球（缺口用大师球补得上就是能买，与Player.can_afford一致）
+                row = features.row(card)
+                shortfall = features.shortfall(row, hand, permanent)
+                if hand[MASTER_SLOT] < card.cost_vector[MASTER_SLOT] + sum(short for _, short in shortfall):
+                    weight = features.point_weight[row]
+                    for slot, short in shortfall:
+                        needs[slot] += short * weight
+        ball_needs = {BALL_TYPES[slot]: needs[slot] for slot in COLOR_SLOTS}
         
         # 选择需求最高的球
         available_balls = [(ball, need) for ball, need in ball_needs.items() 
@@ -895,7 +858,7 @@ class AIPlayer:
             
             if other_balls:
                 # 有其他颜色可以凑成3个：拿需要的2个+随机1个其他颜色
-                selected = needed_balls + [random.choice(other_balls)]
+                selected = needed_balls + [self.rng.choice(other_balls)]
                 return selected
             else:
                 # 只有这2种颜色，检查是否有≥4个的
@@ -924,7 +887,7 @@ class AIPlayer:
             
             if len(other_balls) >= 2:
                 # 有至少2种其他颜色，凑成3个不同色
-                selected = [needed_ball] + random.sample(other_balls, 2)
+                selected = [needed_ball] + self.rng.sample(other_balls, 2)
                 return selected
             elif len(other_balls) == 1:
                 # 有1种其他颜色（总共2种颜色）
@@ -969,7 +932,7 @@ class AIPlayer:
         if not balls:
             balls = self._get_any_available_balls(game)
             if balls:
-                print(f"  ℹ️ {player.name}: 智能拿球失败，降级为强制拿球")
+                logger.debug("ℹ️ %s: 智能拿球失败，降级为强制拿球", player.name)
         
         return balls
     
@@ -1014,7 +977,7 @@ class AIPlayer:
                 
                 # 如果没有真正能买的卡，也算死锁
                 if not has_affordable:
-                    print(f"  ⚠️ 检测到虚假可买死锁: buyable={len(buyable_cards)}, 持球={player.get_total_balls()}")
+                    logger.debug("⚠️ 检测到虚假可买死锁: buyable=%s, 持球=%s", len(buyable_cards), player.get_total_balls())
                     is_deadlocked = True
         
         return is_deadlocked
@@ -1036,7 +999,7 @@ class AIPlayer:
             
             # 如果有勉强能买的卡（距离<=玩家持有的大师球+可用球数）
             if cheapest and min_distance <= 5:
-                print(f"  → 破局策略1: 尝试买预购区的卡 {cheapest.name} (距离: {min_distance})")
+                logger.debug("→ 破局策略1: 尝试买预购区的卡 %s (距离: %s)", cheapest.name, min_distance)
                 # 即使买不起，也返回这个动作（让游戏逻辑判断）
                 # 注意：这里不会真的买成功，只是表达意图
         
@@ -1048,7 +1011,7 @@ class AIPlayer:
         # 如果持球数==10且预购区满，拿球会被立即还球，形成死循环
         # 或者持球数>=9且预购区满，拿球也会很快导致还球
         if current_balls >= 9 and reserve_full:
-            print(f"  → 破局策略2跳过: 持球={current_balls}>=9且预购区满，拿球会循环")
+            logger.debug("→ 破局策略2跳过: 持球=%s>=9且预购区满，拿球会循环", current_balls)
             # 直接跳到策略3
         else:
             balls = self._get_any_available_balls(game)
@@ -1061,60 +1024,33 @@ class AIPlayer:
                         balls = balls[:-1]
                 
                 if balls and (current_balls + len(balls)) <= 10:
-                    print(f"  → 破局策略2: 强制拿球 {[b.value for b in balls]}")
+                    logger.debug("→ 破局策略2: 强制拿球 %s", [b.value for b in balls])
                     return {
                         "action": "take_balls",
                         "data": {"ball_types": [b.value for b in balls]}
                     }
         
         # 策略3: 如果实在无法拿球，跳过回合（让对手有机会释放资源）
-        print(f"  → 破局策略3: 跳过回合，等待对手释放资源")
-        print(f"警告：AI玩家 {player.name} 无法决策，跳过回合")
-        print(f"  - 预购区: {len(player.reserved_cards)}/3")
-        print(f"  - 持球数: {player.get_total_balls()}")
+        logger.debug("→ 破局策略3: 跳过回合，等待对手释放资源")
+        logger.warning("AI玩家 %s 无法决策，跳过回合（预购区: %d/3，持球数: %d）",
+                       player.name, len(player.reserved_cards), player.get_total_balls())
         return None
     
+    def _cost_total(self, card: PokemonCard) -> int:
+        """卡牌购买成本合计（含大师球，查静态特征表）"""
+        features = _card_features()
+        return features.cost_total[features.row(card)]
+    
     def _calculate_card_distance(self, card: PokemonCard, player: Player) -> int:
         """计算购买卡牌所需的额外球数（考虑永久折扣）"""
-        distance = 0
-        permanent = player.get_permanent_balls()
-        
-        for ball_type, cost in card.cost.items():
-            if ball_type != BallType.MASTER:
-                has = player.balls.get(ball_type, 0)
-                discount = permanent.get(ball_type, 0)
-                needed = max(0, cost - has - discount)
-                distance += needed
-        
-        return distance
+        features = _card_features()
+        return features.ball_gap(features.row(card), player.balls.counts, player.display_area.vector)
     
     def _get_any_available_balls(self, game: SplendorPokemonGame) -> List[BallType]:
-        """获取任何可用的球（破局用，不考虑最优性）"""
-        available = [bt for bt in BallType 
-                     if bt != BallType.MASTER and game.ball_pool[bt] > 0]
-        
-        if not available:
-            return []
-        
-        # 按照游戏规则拿球
-        if len(available) >= 3:
-            # 优先拿3个不同色
-            return available[:3]
-        elif len(available) == 2:
-            # 检查是否有≥4个的颜色，如果有就拿2个同色
-            for bt in available:
-                if game.ball_pool[bt] >= 4:
-                    return [bt, bt]
-            # 否则拿2个不同色各1个
-            return available
-        elif len(available) == 1:
-            # 只剩1种颜色
-            bt = available[0]
-            if game.ball_pool[bt] >= 4:
-                return [bt, bt]
-            else:
-                return [bt]
-        
+        """获取任何可用的球（破局用，不考虑最优性）：按规则优先拿3个不同色，其次2个同色"""
+        for move in game.legal_moves():
+            if move.action == MOVE_TAKE_BALLS:
+                return list(move.balls)
         return []
     
     def _find_valuable_card(self, game: SplendorPokemonGame, player: Player) -> Optional[PokemonCard]:
@@ -1128,7 +1064,7 @@ class AIPlayer:
         if valuable:
             return max(valuable, key=lambda c: c.victory_points * 2 + c.level)
         
-        return random.choice(all_cards) if all_cards else None
+        return self.rng.choice(all_cards) if all_cards else None
     
     def _evaluate_best_card(self, cards: List[PokemonCard], player: Player, game: SplendorPokemonGame) -> Optional[PokemonCard]:
         """评估最佳卡牌（预购区的卡优先）"""
@@ -1138,6 +1074,7 @@ class AIPlayer:
         best_score = -1
         best_card = None
         reserved_card_names = {c.name for c in player.reserved_cards}
+        features = _card_features()
         
         # 2人局特殊处理：如果预购区满了，强制优先买预购区的卡
         num_players = len(game.players)
@@ -1148,15 +1085,8 @@ class AIPlayer:
                 return max(reserved_cards, key=lambda c: c.victory_points * 10 + c.level)
         
         for card in cards:
-            score = 0
-            # 胜利点数权重最高
-            score += card.victory_points * 10
-            
-            # 卡牌等级也重要
-            score += card.level * 2
-            
-            # 永久球的价值
-            score += sum(card.permanent_balls.values()) * 3
+            # 胜利点数权重最高，其次是卡牌等级和永久球的价值（静态评分，查表）
+            score = features.buy_value[features.row(card)]
             
             # 预购区的卡额外加分（释放预购席位的价值）
             if card.name in reserved_card_names:
@@ -1193,28 +1123,28 @@ class AIPlayer:
                     return affordable_soon[0][0]
             
             # 前2张预购：70%概率选高分卡，30%概率选中分卡
-            if random.random() < 0.7:
+            if self.rng.random() < 0.7:
                 high_point_cards = [c for c in all_cards if c.victory_points >= 3]
                 if high_point_cards:
-                    return random.choice(high_point_cards)
+                    return self.rng.choice(high_point_cards)
             
             # 选择中分卡（1-2分）
             mid_point_cards = [c for c in all_cards if 1 <= c.victory_points <= 2]
             if mid_point_cards:
-                return random.choice(mid_point_cards)
+                return self.rng.choice(mid_point_cards)
         
         # 4人局：保持原有策略
         # 优先保留高分卡
         high_point_cards = [c for c in all_cards if c.victory_points >= 3]
         if high_point_cards:
-            return random.choice(high_point_cards)
+            return self.rng.choice(high_point_cards)
         
         # 其次保留高级别卡
         high_level_cards = [c for c in all_cards if c.level >= 2]
         if high_level_cards:
-            return random.choice(high_level_cards)
+            return self.rng.choice(high_level_cards)
         
-        return random.choice(all_cards) if all_cards else None
+        return self.rng.choice(all_cards) if all_cards else None
     
     def _find_target_card_for_balls(self, game: SplendorPokemonGame, player: Player) -> Optional[PokemonCard]:
         """找到最接近能买的高分卡作为拿球目标"""
@@ -1227,26 +1157,20 @@ class AIPlayer:
         if not all_cards:
             return None
         
-        # 过滤掉已经能买的卡
-        unaffordable_cards = [c for c in all_cards if not self._can_afford(player, c, game)]
-        
-        if not unaffordable_cards:
-            return None
-        
-        # 计算每张卡的"距离"（还需要多少个球，考虑大师球）
+        # 计算每张卡的"距离"（还需要多少个球，考虑大师球），过滤掉已经能买的卡
+        features = _card_features()
+        hand = player.balls.counts
+        permanent = player.display_area.vector
         card_distances = []
-        for card in unaffordable_cards:
-            distance = 0
-            for ball_type, cost in card.cost.items():
-                if ball_type != BallType.MASTER:
-                    has = player.balls.get(ball_type, 0)
-                    permanent = player.get_permanent_balls().get(ball_type, 0)
-                    needed = max(0, cost - has - permanent)
-                    distance += needed
+        for card in all_cards:
+            row = features.row(card)
+            distance = features.ball_gap(row, hand, permanent)
+            if hand[MASTER_SLOT] >= card.cost_vector[MASTER_SLOT] + distance:
+                continue
             
             # 综合评分：距离越近越好，分数越高越好
             # 使用 (分数+1)*10 - 距离 作为评分
-            score = (card.victory_points + 1) * 10 - distance
+            score = features.point_weight[row] * 10 - distance
             card_distances.append((card, distance, score))
         
         # 按评分排序，选择最佳目标
@@ -1257,16 +1181,10 @@ class AIPlayer:
     
     def _calculate_needed_balls(self, player: Player, card: PokemonCard) -> List[BallType]:
         """计算购买指定卡牌还需要哪些球（按需求量排序）"""
-        needed = {}
-        permanent = player.get_permanent_balls()
-        
-        for ball_type, cost in card.cost.items():
-            if ball_type != BallType.MASTER:
-                has = player.balls.get(ball_type, 0)
-                perm = permanent.get(ball_type, 0)
-                need = max(0, cost - has - perm)
-                if need > 0:
-                    needed[ball_type] = need
+        # 按卡牌成本的顺序收集（同需求量时保持原有顺序）
+        features = _card_features()
+        shortfall = features.shortfall(features.row(card), player.balls.counts, player.display_area.vector)
+        needed = {BALL_TYPES[slot]: short for slot, short in shortfall}
         
         # 按需求量排序，需求多的优先
         sorted_balls = sorted(needed.items(), key=lambda x: x[1], reverse=True)
@@ -1305,33 +1223,27 @@ class AIPlayer:
         """
         all_cards = self._get_all_tableau_cards(game)
         if not all_cards:
-            print(f"⚠️ {player.name}: 场上没有可预购的普通卡牌")
-            print(f"   场面状态: Lv1={len(game.tableau.get(1,[]))}, Lv2={len(game.tableau.get(2,[]))}, Lv3={len(game.tableau.get(3,[]))}")
+            logger.info("⚠️ %s: 场上没有可预购的普通卡牌（场面状态: Lv1=%d, Lv2=%d, Lv3=%d）", player.name,
+                        len(game.tableau.get(1, [])), len(game.tableau.get(2, [])), len(game.tableau.get(3, [])))
             return None
         
         best_card = None
         best_score = -float('inf')
-        
-        permanent_balls = player.get_permanent_balls()
+        features = _card_features()
+        hand = player.balls.counts
+        permanent = player.display_area.vector
+        pool = game.ball_pool.counts
         
         for card in all_cards:
-            # 计算还需要多少个球（球差距）
-            ball_gap = 0
-            needed_balls_detail = {}  # 记录每种球需要多少
-            
-            for ball_type, cost in card.cost.items():
-                if ball_type != BallType.MASTER:
-                    has = player.balls.get(ball_type, 0)
-                    perm = permanent_balls.get(ball_type, 0)
-                    needed = max(0, cost - has - perm)
-                    ball_gap += needed
-                    if needed > 0:
-                        needed_balls_detail[ball_type] = needed
+            row = features.row(card)
+            # 计算还需要多少个球（球差距），以及每种球需要多少
+            shortfall = features.shortfall(row, hand, permanent)
+            ball_gap = sum(needed for _, needed in shortfall)
             
             # 计算球池可得性（需要的球在球池的剩余数量）
             pool_availability = 0
-            for ball_type, needed in needed_balls_detail.items():
-                available_in_pool = game.ball_pool.get(ball_type, 0)
+            for slot, needed in shortfall:
+                available_in_pool = pool[slot]
                 # 如果球池有这种球，加分；球越多加分越高
                 if available_in_pool > 0:
                     # 归一化：可用性得分 = min(needed, available) / needed
@@ -1348,7 +1260,7 @@ class AIPlayer:
             level_bonus = 1.0  # 等级奖励
             
             score = (
-                vp_weight * (card.victory_points + 1) +  # +1避免0分卡被完全忽略
+                vp_weight * features.point_weight[row] +  # 分数+1，避免0分卡被完全忽略
                 level_bonus * card.level +
                 pool_bonus * pool_availability -
                 gap_penalty * ball_gap
@@ -1359,7 +1271,7 @@ class AIPlayer:
                 score += 8
             
             # 特殊加成：如果是进化卡，根据进化价值加分
-            if hasattr(card, 'evolution') and card.evolution:
+            if features.evolution_stages[row] > 0:
                 score += 3  # 进化卡有额外价值
             
             if score > best_score:
@@ -1370,6 +1282,6 @@ class AIPlayer:
 
 
 # 创建不同难度的AI实例
-def create_ai_player(difficulty: str = AIPlayer.MEDIUM) -> AIPlayer:
-    """创建AI玩家"""
-    return AIPlayer(difficulty)
+def create_ai_player(difficulty: str = AIPlayer.MEDIUM, seed: Optional[int] = None, **search_options) -> AIPlayer:
+    """创建AI玩家（search_options: 专家难度的time_budget_ms/search_workers）"""
+    return AIPlayer(difficulty, seed=seed, **search_options)
@@ -0,0 +1,112 @@
+"""
+AI回合调度器 - 所有房间共用一个调度线程和一个有界工作线程池
+每个房间最多排队一个待执行的AI回合，重复触发（轮询、推送、连续AI回合）会被合并
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Set
+
+from game_logging import get_logger, log_context
+
+logger = get_logger("scheduler")
+
+
+class AITurnScheduler:
+    """AI回合调度器
+
+    - schedule: 登记房间的AI回合，think_delay秒后执行；房间已有待执行回合时忽略
+    - cancel: 取消房间的待执行回合（房间删除时调用）
+    - 同一房间的回合串行执行：上一个回合执行中时，新登记的回合等它结束后才开始
+    """
+
+    def __init__(self, run_turn: Callable[[str], None], think_delay: float = 1.0, max_workers: int = 2):
+        """
+        Args:
+            run_turn: 执行一个AI回合的函数，参数为room_id
+            think_delay: AI"思考"延迟（秒），让玩家看清上一步
+            max_workers: 同时执行AI回合的最大线程数
+        """
+        self._run_turn = run_turn
+        self.think_delay = think_delay
+        self._condition = threading.Condition()
+        self._pending: Dict[str, float] = {}  # room_id -> 到期时间（time.monotonic）
+        self._running: Set[str] = set()
+        self._executed = 0
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-turn")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="ai-scheduler", daemon=True)
+        self._dispatcher.start()
+
+    def schedule(self, room_id: str) -> bool:
+        """登记AI回合，返回是否新登记（已有待执行回合时返回False）"""
+        with self._condition:
+            if self._stopped or room_id in self._pending:
+                return False
+            self._pending[room_id] = time.monotonic() + self.think_delay
+            self._condition.notify_all()
+            return True
+
+    def cancel(self, room_id: str) -> bool:
+        """取消房间的待执行回合（正在执行的回合不受影响）"""
+        with self._condition:
+            return self._pending.pop(room_id, None) is not None
+
+    def is_pending(self, room_id: str) -> bool:
+        """房间是否有待执行的AI回合"""
+        with self._condition:
+            return room_id in self._pending
+
+    def queue_depth(self) -> int:
+        """待执行的AI回合数"""
+        with self._condition:
+            return len(self._pending)
+
+    def stats(self) -> dict:
+        """调度器状态（健康检查用）"""
+        with self._condition:
+            return {
+                "queue_depth": len(self._pending),
+                "running": len(self._running),
+                "executed": self._executed,
+                "think_delay": self.think_delay
+            }
+
+    def shutdown(self):
+        """停止调度（丢弃所有待执行回合，等待执行中的回合结束）"""
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._condition.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def _dispatch_loop(self):
+        with self._condition:
+            while not self._stopped:
+                now = time.monotonic()
+                next_due = None
+                for room_id, due in list(self._pending.items()):
+                    if room_id in self._running:
+                        continue
+                    if due <= now:
+                        del self._pending[room_id]
+                        self._running.add(room_id)
+                        self._executor.submit(self._run, room_id)
+                    elif next_due is None or due < next_due:
+                        next_due = due
+                timeout = None if next_due is None else next_due - now
+                self._condition.wait(timeout)
+
+    def _run(self, room_id: str):
+        try:
+            with log_context(room_id=room_id):
+                self._run_turn(room_id)
+        except Exception as e:
+            with log_context(room_id=room_id):
+                logger.exception("❌ AI回合执行异常: %s", e)
+        finally:
+            with self._condition:
+                self._running.discard(room_id)
+                self._executed += 1
+                self._condition.notify_all()
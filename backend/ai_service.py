@@ -0,0 +1,169 @@
+"""
+AI决策服务 - 在进程池中计算AI决策，不占用房间锁和Flask工作线程
+调用方在房间锁内提交（提交时即对对局和AI做快照），锁外等待结果，再回到锁内按版本号校验后应用
+"""
+import copy
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from splendor_pokemon import SplendorPokemonGame
+from card_catalog import get_card_catalog
+from ai_player import AIPlayer
+from game_logging import configure_logging, current_log_context, log_context
+
+LATENCY_WINDOW = 1000  # 计算延迟分位数使用的最近决策数
+
+
+def _init_worker():
+    """工作进程初始化：配置日志（只输出到控制台，轮转文件由主进程独占），预加载卡牌目录"""
+    configure_logging(log_file="")
+    get_card_catalog()
+
+
+def _decide(ai: AIPlayer, game: SplendorPokemonGame,
+            context: Optional[Dict] = None) -> Tuple[Optional[Dict], AIPlayer]:
+    """在快照上做决策，连同决策后的AI一起返回（AI的随机数状态等随决策推进）
+
+    context: 提交方的日志上下文（房间、对局、回合），工作进程里的日志也带上这些字段
+    """
+    with log_context(**(context or {})):
+        decision = ai.make_decision(game, game.get_current_player())
+    return decision, ai
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """最近秩法分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class AIDecisionService:
+    """AI决策服务
+
+    - submit: 对当前轮到的AI做快照并提交决策，返回Future（结果为 (决策, 决策后的AI)）；进程池损坏等提交失败时直接抛出
+    - decide / decide_many: 提交一个或多个房间的决策并等待结果
+    - record_stale: 调用方发现结果过期（计算期间房间状态已变化）时登记
+    - record_timeout: 调用方等待决策超时时登记（工作进程卡住；决策本身的异常在完成时自动计入failed）
+    - stats: 决策数、失败数、过期数、超时数、进行中数量和延迟分位数（健康检查用）
+    """
+
+    def __init__(self, workers: int = 2):
+        """
+        Args:
+            workers: 进程数，0表示在调用线程内直接计算（测试或单核环境）
+        """
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)  # 最近决策的延迟（毫秒）
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._stale = 0
+        self._timed_out = 0
+
+    def submit(self, ai: AIPlayer, game: SplendorPokemonGame) -> Future:
+        """提交一次决策（调用方需持有房间锁：快照在这里完成，之后房间可以继续变化）"""
+        snapshot = game.clone()
+        ai_snapshot = copy.deepcopy(ai)
+        context = current_log_context()
+        started = time.perf_counter()
+
+        if self.workers <= 0:
+            future = Future()
+            try:
+                future.set_result(_decide(ai_snapshot, snapshot, context))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            try:
+                future = self._get_executor().submit(_decide, ai_snapshot, snapshot, context)
+            except BrokenProcessPool:
+                with self._lock:
+                    self._executor = None  # 进程池已损坏，下次提交时重建
+                raise
+        # 提交成功后才计数，提交失败时异常直接抛给调用方，不留下永远"进行中"的决策
+        with self._lock:
+            self._submitted += 1
+        future.add_done_callback(lambda done: self._record(done, started))
+        return future
+
+    def decide(self, ai: AIPlayer, game: SplendorPokemonGame,
+               timeout: Optional[float] = None) -> Tuple[Optional[Dict], AIPlayer]:
+        """提交并等待一次决策"""
+        return self.submit(ai, game).result(timeout)
+
+    def decide_many(self, requests: List[Tuple[AIPlayer, SplendorPokemonGame]],
+                    timeout: Optional[float] = None) -> List[Tuple[Optional[Dict], AIPlayer]]:
+        """同时提交多个房间的决策，按提交顺序返回结果（并行计算）"""
+        futures = [self.submit(ai, game) for ai, game in requests]
+        return [future.result(timeout) for future in futures]
+
+    def record_stale(self):
+        """登记一次过期结果（计算期间房间状态已变化，结果被丢弃）"""
+        with self._lock:
+            self._stale += 1
+
+    def record_timeout(self):
+        """登记一次等待超时（结果之后即使算出也不再使用）"""
+        with self._lock:
+            self._timed_out += 1
+
+    def stats(self) -> dict:
+        """服务状态（健康检查用）"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "workers": self.workers,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "stale": self._stale,
+                "timed_out": self._timed_out,
+                "in_flight": self._submitted - self._completed - self._failed,
+                "latency_ms": {
+                    "p50": round(_percentile(latencies, 50), 1),
+                    "p90": round(_percentile(latencies, 90), 1),
+                    "p99": round(_percentile(latencies, 99), 1),
+                    "max": round(latencies[-1], 1) if latencies else 0.0
+                }
+            }
+
+    def shutdown(self):
+        """关闭进程池（等待进行中的决策结束）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # 第一次提交时创建；用spawn启动，避免在多线程的服务器进程里fork
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_init_worker)
+            return self._executor
+
+    def _record(self, future: Future, started: float):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # 等待超时后被调用方取消的决策计为失败（超时另由record_timeout登记）
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            if future.cancelled() or error is not None:
+                self._failed += 1
+                if isinstance(error, BrokenProcessPool):
+                    self._executor = None  # 工作进程异常退出，下次提交时重建进程池
+            else:
+                self._completed += 1
+                self._latencies.append(elapsed_ms)
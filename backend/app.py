@@ -5,23 +5,37 @@
 用于微信小程序的后端服务
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import json
 import uuid
+import random
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import threading
 import time
 import sys
 import os
+import atexit
 
 # 添加父目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from splendor_pokemon import BallType, Rarity, PokemonCard, Player, SplendorPokemonGame
+from splendor_pokemon import (BallType, Rarity, PokemonCard, Player, SplendorPokemonGame, Move,
+                              MOVE_TAKE_BALLS, MOVE_BUY_CARD, MOVE_RESERVE_CARD, balls_to_json, derive_seed, new_seed)
+from card_catalog import get_card_catalog
 from ai_player import AIPlayer, create_ai_player
-from game_history import GameHistory
+from game_history import GameHistory, FORMAT_SUFFIXES, FORMAT_TURNS
+from game_state import board_state
+from replay_engine import ReplayEngine, ReplayError
+from room_events import RoomEventBroker
+from ai_scheduler import AITurnScheduler
+from ai_service import AIDecisionService
 from database import game_db
+from history_writer import HistoryWriter
+from game_logging import configure_logging, log_context
 
 app = Flask(__name__)
 CORS(app)  # 允许跨域请求
@@ -60,7 +74,63 @@ user_lock = threading.Lock()
 # 游戏房间管理
 game_rooms = {}
 player_to_room = {}  # 玩家名 -> 房间ID 的映射，防止一个玩家同时在多个房间
-room_lock = threading.Lock()
+room_lock = threading.Lock()  # 注册表锁：只保护game_rooms/player_to_room的成员关系，对局状态由各房间的room.lock保护
+
+STATE_SNAPSHOT_LIMIT = 8  # 每个房间保留的已下发状态快照数（增量响应基准）
+HISTORY_PAGE_SIZE = 50  # 历史记录列表默认每页条数
+HISTORY_PAGE_LIMIT = 200  # 历史记录列表每页最大条数
+REPLAY_KEYFRAME_INTERVAL = 10  # 复盘重演的关键帧间隔（回合数），跳到任一回合最多重演这么多回合
+REPLAY_CACHE_SIZE = 8  # 保留重演器（含关键帧）的对局数
+# 历史文件格式：turns逐回合随机访问（默认，复盘单回合不用读整局）/ compact紧凑压缩（体积最小）/ json
+HISTORY_FORMAT = os.environ.get("SPLENDOR_HISTORY_FORMAT", FORMAT_TURNS)
+if HISTORY_FORMAT not in FORMAT_SUFFIXES:
+    raise ValueError(f"SPLENDOR_HISTORY_FORMAT无效: {HISTORY_FORMAT}（可选 {', '.join(FORMAT_SUFFIXES)}）")
+
+class StateCacheStats:
+    """房间状态缓存的命中统计（所有房间合计，健康检查用）"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+state_cache_stats = StateCacheStats()
+
+# 房间状态推送（SSE）
+room_events = RoomEventBroker()
+EVENT_KEEPALIVE_SECONDS = 15  # 推送通道心跳间隔（秒）
+
+# AI回合调度（调度器在execute_ai_turn定义后创建）
+AI_THINK_DELAY_SECONDS = 1.0  # AI"思考"延迟，让玩家看到上一步
+AI_TURN_WORKERS = 8  # 同时执行AI回合的最大线程数（决策在进程池中计算，线程大多只是等待结果）
+AI_DECISION_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))  # 计算AI决策的进程数
+AI_DECISION_TIMEOUT_SECONDS = 30  # 等待一次AI决策的最长时间（工作进程卡住时不再占用调度线程）
+AI_DECISION_RETRIES = 2  # 决策失败/超时后重新登记的次数，用尽后跳过该AI的回合
+
+# AI决策服务：决策在进程池中计算，不占用房间锁
+ai_service = AIDecisionService(workers=AI_DECISION_WORKERS)
+
+# 历史记录后台写入：对局结束时只提交快照，文件和数据库由写入线程完成；上次未写完的任务启动时重放
+HISTORY_DIR = "game_history"
+HISTORY_FLUSH_TIMEOUT = 10  # 进程退出时等待写入队列的最长秒数（超时的任务留在spool中）
+history_writer = HistoryWriter(db=game_db, spool_dir=os.path.join(HISTORY_DIR, "spool"))
+history_writer.recover()
+atexit.register(history_writer.close, HISTORY_FLUSH_TIMEOUT)
 
 class GameRoom:
     """游戏房间类"""
@@ -69,6 +139,7 @@ class GameRoom:
         self.creator_name = creator_name
         self.players = [creator_name]
         self.ai_players = {}  # 存储AI玩家实例 {player_name: AIPlayer}
+        self.ai_decision_failures = 0  # 当前AI回合连续决策失败的次数
         self.game = None
         self.status = "waiting"  # waiting, playing, finished
         self.created_at = datetime.now()
@@ -79,6 +150,13 @@ class GameRoom:
         self.turn_number = 0  # 回合数
         # 历史记录
         self.history = None  # GameHistory实例
+        # 房间锁：保护对局状态的修改和读取（锁层级见locked_room）
+        self.lock = threading.Lock()
+        self.closed = False  # 房间已从game_rooms中删除
+        # 状态版本号：每次状态变更+1，用于ETag和增量响应
+        self.state_version = 0
+        self._state_snapshots = OrderedDict()  # 版本号 -> 已下发过的状态（增量响应的基准）
+        self._state_cache = None  # (版本号, 状态, 编码后的JSON文本, 编码后的JSON字节)，状态变更时作废
         
     def add_player(self, player_name, is_ai=False, ai_difficulty="中等"):
         """添加玩家"""
@@ -103,14 +181,24 @@ class GameRoom:
             return True
         return False
         
-    def start_game(self):
-        """开始游戏 - 必须达到配置的玩家数量"""
+    def start_game(self, seed=None):
+        """开始游戏 - 必须达到配置的玩家数量
+
+        座位洗牌、发牌和每个AI的随机决策都由对局种子派生（种子记录在历史中，对局可完整复现）
+        """
         if len(self.players) == self.max_players:
+            if seed is None:
+                seed = new_seed()
+            
             # 随机打乱玩家顺序（座位随机化）
-            import random
-            random.shuffle(self.players)
+            random.Random(derive_seed(seed, "seats")).shuffle(self.players)
             
-            self.game = SplendorPokemonGame(self.players, victory_points=self.victory_points)
+            # AI按座位派生种子
+            for seat, name in enumerate(self.players):
+                if name in self.ai_players:
+                    self.ai_players[name].reseed(derive_seed(seed, f"ai:{seat}"))
+            
+            self.game = SplendorPokemonGame(self.players, victory_points=self.victory_points, seed=seed)
             self.status = "playing"
             self.turn_number = 1  # 第一回合
             
@@ -120,7 +208,8 @@ class GameRoom:
                 game_id=game_id,
                 room_id=self.room_id,
                 players=self.players.copy(),
-                victory_points_goal=self.victory_points
+                victory_points_goal=self.victory_points,
+                seed=seed
             )
             # 记录初始状态 - 直接调用实例方法，避免死锁
             initial_state = self.get_game_state()
@@ -137,7 +226,7 @@ class GameRoom:
         if self.history and self.game:
             current_player = self.game.get_current_player()
             player_state = self._get_player_state_dict(current_player)
-            ball_pool = {bt.value: count for bt, count in self.game.ball_pool.items()}
+            ball_pool = self.game.ball_pool.to_json()
             
             # 如果是新的回合，开始新回合记录
             if action_type in ["take_balls", "buy_card", "reserve_card"] and not self.history.turns[-1].get("states_before"):
@@ -152,7 +241,7 @@ class GameRoom:
         if self.history and self.game:
             current_player = self.game.get_current_player()
             player_state = self._get_player_state_dict(current_player)
-            ball_pool = {bt.value: count for bt, count in self.game.ball_pool.items()}
+            ball_pool = self.game.ball_pool.to_json()
             
             self.history.record_state_after_action(current_player.name, player_state, ball_pool)
             
@@ -162,52 +251,43 @@ class GameRoom:
                 next_player = self.game.get_current_player()
                 self.history.start_turn(self.turn_number, next_player.name)
     
+    def finish_ai_turn(self):
+        """AI回合end_turn之后调用：记录回合结束，对局因此结束时提交历史记录"""
+        self.record_turn_end()
+        if self.game.game_over and self.history:
+            self.end_game_and_save_history(self.game.winner.name, self.game.get_final_rankings())
+    
     def end_game_and_save_history(self, winner: str, rankings: list) -> str:
-        """结束游戏并保存历史记录，并保存到数据库"""
+        """结束游戏并提交历史记录（文件和真人玩家的数据库记录由后台写入线程完成），返回写入任务ID"""
         if self.history:
             self.history.end_game(winner, rankings)
-            filepath = self.history.save_to_file()
-            print(f"✅ 游戏历史已保存到: {filepath}")
             
-            # 保存到数据库（只为真人玩家，不包括AI）
-            try:
-                game_id = self.history.game_id
-                game_start_time = self.history.start_time
-                game_end_time = self.history.end_time
-                total_turns = len(self.history.turns)
-                
-                # 为每个玩家保存参与记录
-                for rank_info in rankings:
-                    player_name = rank_info['player_name']
-                    
-                    # 跳过AI玩家（AI玩家名称通常包含"AI·"）
-                    if self.is_ai_player(player_name):
-                        continue
-                    
-                    # 保存真人玩家的参与记录
-                    game_db.record_game_participation(
-                        username=player_name,  # 使用玩家名作为用户名
-                        game_id=game_id,
-                        game_history_file=filepath,
-                        player_name=player_name,
-                        final_rank=rank_info['rank'],
-                        final_score=rank_info['victory_points'],
-                        is_winner=(player_name == winner),
-                        game_start_time=game_start_time,
-                        game_end_time=game_end_time,
-                        total_turns=total_turns
-                    )
-                    print(f"  💾 玩家 {player_name} 的数据已保存到数据库")
-            except Exception as e:
-                print(f"⚠️ 保存到数据库时出错: {e}")
-            
-            return filepath
+            # 只为真人玩家记录参与（AI玩家名称通常包含"AI·"）
+            participations = [
+                {
+                    "username": rank_info['player_name'],  # 使用玩家名作为用户名
+                    "game_id": self.history.game_id,
+                    "player_name": rank_info['player_name'],
+                    "final_rank": rank_info['rank'],
+                    "final_score": rank_info['victory_points'],
+                    "is_winner": rank_info['player_name'] == winner,
+                    "game_start_time": self.history.start_time,
+                    "game_end_time": self.history.end_time,
+                    "total_turns": len(self.history.turns)
+                }
+                for rank_info in rankings
+                if not self.is_ai_player(rank_info['player_name'])
+            ]
+            job_id = history_writer.submit(self.history.to_dict(), participations,
+                                           history_dir=HISTORY_DIR, fmt=HISTORY_FORMAT)
+            print(f"📝 游戏历史已提交后台保存（{len(participations)} 名真人玩家，任务 {job_id}）")
+            return job_id
         return None
     
     def _get_player_state_dict(self, player: Player) -> dict:
         """获取玩家状态字典"""
         return {
-            "balls": {bt.value: count for bt, count in player.balls.items()},
+            "balls": player.balls.to_json(),
             "victory_points": player.get_victory_points(),
             "owned_cards_count": len(player.display_area),
             "reserved_cards_count": len(player.reserved_cards)
@@ -221,10 +301,60 @@ class GameRoom:
             self.victory_points = max(10, min(30, victory_points))  # 限制在10-30分
         return True
         
+    def bump_state_version(self):
+        """状态变更后递增版本号（同时作废缓存的状态）"""
+        self.state_version += 1
+        self._state_cache = None
+    
+    def state_etag(self) -> str:
+        """当前状态的ETag"""
+        return f"{self.room_id}-{self.state_version}"
+    
+    def cached_state(self):
+        """当前版本的状态及其JSON编码（每个版本只序列化一次，同房间的轮询和推送共享）
+
+        返回 (状态, JSON文本, JSON字节)；调用方不能修改返回的状态
+        只能用于下发：版本号变更前修改状态又立即读取的场景（如开局记录历史）应直接调用get_game_state
+        """
+        cache = self._state_cache
+        hit = cache is not None and cache[0] == self.state_version
+        state_cache_stats.record(hit)
+        if not hit:
+            state = self.get_game_state()
+            text = json.dumps(state, ensure_ascii=False)
+            cache = self._state_cache = (self.state_version, state, text, text.encode("utf-8"))
+        return cache[1:]
+    
+    def get_versioned_state(self, since=None) -> dict:
+        """获取游戏状态；提供since且该版本的状态仍在快照缓存中时，返回相对该版本的增量"""
+        return self._versioned(self.cached_state()[0], since)
+    
+    def get_versioned_payload(self, since=None) -> bytes:
+        """get_versioned_state的JSON编码（全量响应直接复用缓存的编码）"""
+        state, _, payload = self.cached_state()
+        versioned = self._versioned(state, since)
+        if versioned is state:
+            return payload
+        return json.dumps(versioned, ensure_ascii=False).encode("utf-8")
+    
+    def _versioned(self, state, since):
+        # 记录本次下发的状态，作为客户端下次请求增量的基准
+        self._state_snapshots[self.state_version] = state
+        self._state_snapshots.move_to_end(self.state_version)
+        while len(self._state_snapshots) > STATE_SNAPSHOT_LIMIT:
+            self._state_snapshots.popitem(last=False)
+        
+        if since is not None and since != self.state_version:
+            base = self._state_snapshots.get(since)
+            if base is not None:
+                return build_state_delta(base, state, since)
+        return state
+    
     def get_game_state(self):
         """获取游戏状态"""
         if not self.game:
             return {
+                "state_version": self.state_version,
                 "status": self.status,
                 "players": self.players,
                 "room_id": self.room_id,
@@ -233,103 +363,102 @@ class GameRoom:
                 "creator_name": self.creator_name
             }
             
-        current_player = self.game.get_current_player()
-        
         return {
+            "state_version": self.state_version,
             "status": self.status,
             "room_id": self.room_id,
             "players": self.players,
-            "current_player": current_player.name,
-            "game_over": self.game.game_over,
-            "winner": self.game.winner.name if self.game.winner else None,
-            "rankings": self.game.get_final_rankings() if self.game.game_over else None,
-            "final_round": self.game.final_round_triggered,
             "max_players": self.max_players,
             "victory_points": self.victory_points,
             "turn_number": self.turn_number,
-            "ball_pool": {ball.value: count for ball, count in self.game.ball_pool.items()},
-            "tableau": {
-                str(tier): [
-                    {
-                        "card_id": card.card_id,  # 唯一ID
-                        "name": card.name,  # 显示名称
-                        "level": card.level,
-                        "rarity": card.rarity.value,
-                        "cost": {ball.value: amount for ball, amount in card.cost.items() if amount > 0},
-                        "victory_points": card.victory_points,
-                        "permanent_balls": {ball.value: amount for ball, amount in card.permanent_balls.items() if amount > 0},
-                        # 进化信息（仅1/2级卡牌）
-                        "evolution_target": card.evolution.target_name if card.evolution else None,
-                        "evolution_requirement": {ball.value: amount for ball, amount in card.evolution.required_balls.items() if amount > 0} if card.evolution else None
-                    }
-                    for card in cards
-                ]
-                for tier, cards in self.game.tableau.items()
-            },
-            "lv1_deck_size": len(self.game.deck_lv1),
-            "lv2_deck_size": len(self.game.deck_lv2),
-            "lv3_deck_size": len(self.game.deck_lv3),
-            "rare_deck_size": len(self.game.rare_deck),
-            "legendary_deck_size": len(self.game.legendary_deck),
-            "rare_card": {
-                "card_id": self.game.rare_card.card_id,  # 唯一ID
-                "name": self.game.rare_card.name,
-                "level": self.game.rare_card.level,
-                "rarity": self.game.rare_card.rarity.value,
-                "victory_points": self.game.rare_card.victory_points,
-                "cost": {ball.value: amount for ball, amount in self.game.rare_card.cost.items() if amount > 0},
-                "permanent_balls": {ball.value: amount for ball, amount in self.game.rare_card.permanent_balls.items() if amount > 0}
-            } if self.game.rare_card else None,
-            "legendary_card": {
-                "card_id": self.game.legendary_card.card_id,  # 唯一ID
-                "name": self.game.legendary_card.name,
-                "level": self.game.legendary_card.level,
-                "rarity": self.game.legendary_card.rarity.value,
-                "victory_points": self.game.legendary_card.victory_points,
-                "cost": {ball.value: amount for ball, amount in self.game.legendary_card.cost.items() if amount > 0},
-                "permanent_balls": {ball.value: amount for ball, amount in self.game.legendary_card.permanent_balls.items() if amount > 0}
-            } if self.game.legendary_card else None,
-            "player_states": {
-                player.name: {
-                    "balls": {ball.value: count for ball, count in player.balls.items() if count > 0},
-                    "display_area": [
-                        {
-                            "card_id": card.card_id,  # 唯一ID
-                            "name": card.name,
-                            "level": card.level,
-                            "rarity": card.rarity.value,
-                            "cost": {ball.value: amount for ball, amount in card.cost.items() if amount > 0},
-                            "victory_points": card.victory_points,
-                            "permanent_balls": {ball.value: amount for ball, amount in card.permanent_balls.items() if amount > 0},
-                            # 进化信息（仅1/2级卡牌）
-                            "evolution_target": card.evolution.target_name if card.evolution else None,
-                            "evolution_requirement": {ball.value: amount for ball, amount in card.evolution.required_balls.items() if amount > 0} if card.evolution else None
-                        }
-                        for card in player.display_area
-                    ],
-                    "reserved_cards": [
-                        {
-                            "card_id": card.card_id,  # 唯一ID
-                            "name": card.name,
-                            "level": card.level,
-                            "cost": {ball.value: amount for ball, amount in card.cost.items() if amount > 0},
-                            "victory_points": card.victory_points,
-                            "permanent_balls": {ball.value: amount for ball, amount in card.permanent_balls.items() if amount > 0},
-                            # 进化信息（仅1/2级卡牌）
-                            "evolution_target": card.evolution.target_name if card.evolution else None,
-                            "evolution_requirement": {ball.value: amount for ball, amount in card.evolution.required_balls.items() if amount > 0} if card.evolution else None
-                        }
-                        for card in player.reserved_cards
-                    ],
-                    "victory_points": player.get_victory_points(),
-                    "permanent_balls": {ball.value: count for ball, count in player.get_permanent_balls().items() if count > 0},
-                    "needs_return_balls": player.needs_return_balls,
-                    "last_action": player.last_action,
-                    "has_left": player.has_left
-                }
-                for player in self.game.players
-            }
+            **board_state(self.game)
+        }
+
+def build_state_delta(old_state: dict, new_state: dict, since_version: int) -> dict:
+    """计算两个状态之间的增量
+
+    格式：
+    - changed: 发生变化的顶层字段（球池、回合数、当前玩家等）
+    - removed: 被删除的顶层字段
+    - player_states: 发生变化的玩家状态（整个玩家条目）
+    - tableau: 发生变化的场面等级 {等级: {"size": 卡牌数, "slots": {位置: 卡牌}}}
+    """
+    delta = {
+        "delta": True,
+        "since": since_version,
+        "state_version": new_state["state_version"],
+        "changed": {},
+        "removed": [key for key in old_state if key not in new_state]
+    }
+    
+    for key, value in new_state.items():
+        if key in ("player_states", "tableau"):
+            continue
+        if key not in old_state or old_state[key] != value:
+            delta["changed"][key] = value
+    
+    if "player_states" in new_state:
+        old_players = old_state.get("player_states") or {}
+        new_players = new_state["player_states"]
+        delta["player_states"] = {
+            name: player_state for name, player_state in new_players.items()
+            if old_players.get(name) != player_state
         }
+        delta["removed_players"] = [name for name in old_players if name not in new_players]
+    
+    if "tableau" in new_state:
+        old_tableau = old_state.get("tableau") or {}
+        tableau_delta = {}
+        for tier, cards in new_state["tableau"].items():
+            old_cards = old_tableau.get(tier, [])
+            slots = {
+                str(idx): card for idx, card in enumerate(cards)
+                if idx >= len(old_cards) or old_cards[idx] != card
+            }
+            if slots or len(cards) != len(old_cards):
+                tableau_delta[tier] = {"size": len(cards), "slots": slots}
+        delta["tableau"] = tableau_delta
+    
+    return delta
+
+@contextmanager
+def locked_room(room_id, membership=False):
+    """查找并锁定房间，房间不存在（或已删除）时得到None
+
+    锁层级：room_lock（注册表锁）→ room.lock（房间锁），只能按此顺序获取
+    - 默认：只在查找时短暂持有注册表锁，之后只持有房间锁，不同房间的请求互不阻塞
+    - membership=True：整个代码块同时持有注册表锁（离开、踢人、删除房间等会修改映射的操作）
+    """
+    if membership:
+        with room_lock:
+            room = game_rooms.get(room_id)
+            if room is None:
+                yield None
+                return
+            with room.lock, _room_log_context(room):
+                yield room
+        return
+    
+    with room_lock:
+        room = game_rooms.get(room_id)
+    if room is None:
+        yield None
+        return
+    with room.lock, _room_log_context(room):
+        yield None if room.closed else room
+
+def _room_log_context(room):
+    """房间锁内的日志都带上房间、对局和回合字段"""
+    game_id = room.history.game_id if room.history else None
+    return log_context(room_id=room.room_id, game_id=game_id, turn=room.turn_number or None)
+
+def remove_room(room_id):
+    """从注册表删除房间（调用方需持有room_lock），并结束推送、取消待执行的AI回合"""
+    room = game_rooms.pop(room_id, None)
+    if room is not None:
+        room.closed = True
+    room_events.close(room_id)
+    ai_scheduler.cancel(room_id)
 
 def cleanup_old_rooms():
     """清理过期房间"""
@@ -351,7 +480,7 @@ def cleanup_old_rooms():
                             if p in player_to_room and player_to_room[p] == room_id:
                                 del player_to_room[p]
                     
-                    del game_rooms[room_id]
+                    remove_room(room_id)
                     print(f"清理过期房间: {room_id}")
                     
         except Exception as e:
@@ -359,6 +488,22 @@ def cleanup_old_rooms():
             
         time.sleep(3600)  # 每小时清理一次
 
+def notify_room_changed(room):
+    """房间状态变更后调用（调用方需持有room.lock）
+
+    - 递增状态版本号（ETag/增量响应依赖它，所有状态变更都必须经过这里）
+    - 向订阅了推送通道的客户端发布最新状态（一次序列化，所有订阅者共享）
+    - 如果轮到AI玩家，登记AI回合（调度器合并重复登记，连续的AI回合依次执行）
+    """
+    room.bump_state_version()
+    
+    if room_events.has_subscribers(room.room_id):
+        room_events.publish(room.room_id, room.cached_state()[1])
+    
+    if room.game and not room.game.game_over:
+        if room.is_ai_player(room.game.get_current_player().name):
+            ai_scheduler.schedule(room.room_id)
+
 # 启动清理线程
 cleanup_thread = threading.Thread(target=cleanup_old_rooms, daemon=True)
 cleanup_thread.start()
@@ -366,7 +511,14 @@ cleanup_thread.start()
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """健康检查"""
-    return jsonify({"status": "ok", "message": "璀璨宝石宝可梦API服务正常"})
+    return jsonify({
+        "status": "ok",
+        "message": "璀璨宝石宝可梦API服务正常",
+        "ai_scheduler": ai_scheduler.stats(),
+        "ai_service": ai_service.stats(),
+        "state_cache": state_cache_stats.stats(),
+        "history_writer": history_writer.stats()
+    })
 
 @app.route('/api/login', methods=['POST'])
 def login():
@@ -599,14 +751,17 @@ def join_room(room_id):
                             users[player_name].current_room_id = None
         
         room = game_rooms[room_id]
-        if room.status != "waiting":
-            return jsonify({"error": "房间已开始游戏"}), 400
+        with room.lock:
+            if room.status != "waiting":
+                return jsonify({"error": "房间已开始游戏"}), 400
+                
+            if not room.add_player(player_name):
+                return jsonify({"error": "无法加入房间"}), 400
             
-        if not room.add_player(player_name):
-            return jsonify({"error": "无法加入房间"}), 400
-        
-        player_to_room[player_name] = room_id
-        room.last_activity = datetime.now()
+            player_to_room[player_name] = room_id
+            room.last_activity = datetime.now()
+            notify_room_changed(room)
+            players = list(room.players)
         
         # 更新用户的当前房间和状态
         with user_lock:
@@ -616,20 +771,19 @@ def join_room(room_id):
         
     return jsonify({
         "message": "成功加入房间",
-        "players": room.players
+        "players": players
     })
 
 @app.route('/api/rooms/<room_id>/add_bot', methods=['POST'])
 def add_bot(room_id):
     """添加AI机器人到房间"""
     data = request.get_json()
-    difficulty = data.get('difficulty', '中等')  # 简单/中等/困难
+    difficulty = data.get('difficulty', '中等')  # 简单/中等/困难/专家
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         if room.status != "waiting":
             return jsonify({"error": "房间已开始游戏"}), 400
         
@@ -645,6 +799,7 @@ def add_bot(room_id):
             return jsonify({"error": "无法添加机器人"}), 400
             
         room.last_activity = datetime.now()
+        notify_room_changed(room)
         
     return jsonify({
         "message": f"成功添加机器人: {bot_name}",
@@ -660,17 +815,16 @@ def add_all_bots(room_id):
     print(f"{'='*60}")
     
     data = request.get_json()
-    difficulty = data.get('difficulty', '中等')  # 简单/中等/困难
+    difficulty = data.get('difficulty', '中等')  # 简单/中等/困难/专家
     
     print(f"房间ID: {room_id}")
     print(f"难度: {difficulty}")
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             print(f"❌ 房间不存在: {room_id}")
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         print(f"房间信息:")
         print(f"  - 当前玩家数: {len(room.players)}")
         print(f"  - 配置玩家数: {room.max_players}")
@@ -706,6 +860,7 @@ def add_all_bots(room_id):
         print(f"{'='*60}\n")
         
         room.last_activity = datetime.now()
+        notify_room_changed(room)
         
     return jsonify({
         "message": f"成功添加 {len(added_bots)} 个机器人（补满到{room.max_players}人）",
@@ -720,11 +875,10 @@ def kick_player(room_id):
     kicker_name = data.get('kicker_name')  # 发起踢人的玩家
     target_name = data.get('target_name')  # 被踢的玩家
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id, membership=True) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         
         # 检查是否是房主
         if room.creator_name != kicker_name:
@@ -750,6 +904,7 @@ def kick_player(room_id):
                 users[target_name].current_room_id = None
             
         room.last_activity = datetime.now()
+        notify_room_changed(room)
         
     return jsonify({
         "message": f"已踢出玩家: {target_name}",
@@ -762,11 +917,10 @@ def leave_room(room_id):
     data = request.get_json()
     player_name = data.get('player_name')
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id, membership=True) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         
         # 等待状态：正常离开逻辑
         if room.status == "waiting":
@@ -780,7 +934,7 @@ def leave_room(room_id):
                         if p in users:
                             users[p].current_room_id = None
                             users[p].status = UserStatus.ONLINE
-                del game_rooms[room_id]
+                remove_room(room_id)
                 return jsonify({
                     "message": "房主离开，房间已解散",
                     "room_deleted": True
@@ -799,6 +953,7 @@ def leave_room(room_id):
                     users[player_name].status = UserStatus.ONLINE
                 
             room.last_activity = datetime.now()
+            notify_room_changed(room)
             
             return jsonify({
                 "message": "已离开房间",
@@ -820,6 +975,7 @@ def leave_room(room_id):
                 
                 if not leaving_player:
                     return jsonify({"error": "玩家不在游戏中"}), 400
+                room.record_action("player_left", {"player": player_name}, True, f"{player_name} 退出游戏")
                 
                 # 计算剩余真人玩家数量（不包括机器人和已退出的玩家）
                 remaining_humans = 0
@@ -854,9 +1010,10 @@ def leave_room(room_id):
                     if room.history:
                         try:
                             rankings = room.game.get_final_rankings()
+                            room.record_action("game_aborted", {}, True, "所有真人玩家退出")
                             room.history.end_game("所有真人玩家退出", rankings)
-                            filepath = room.history.save_to_file()
-                            print(f"💾 游戏历史已保存: {filepath}")
+                            history_writer.submit(room.history.to_dict(), history_dir=HISTORY_DIR, fmt=HISTORY_FORMAT)
+                            print(f"💾 游戏历史已提交后台保存")
                         except Exception as e:
                             print(f"⚠️ 保存游戏历史失败: {e}")
                     
@@ -868,7 +1025,7 @@ def leave_room(room_id):
                             if p in users:
                                 users[p].current_room_id = None
                                 users[p].status = UserStatus.ONLINE
-                    del game_rooms[room_id]
+                    remove_room(room_id)
                     
                     return jsonify({
                         "message": "你已退出游戏，所有真人玩家退出，游戏结束",
@@ -877,6 +1034,7 @@ def leave_room(room_id):
                     })
                 
                 # 还有其他真人玩家，游戏继续
+                notify_room_changed(room)
                 return jsonify({
                     "message": "已退出游戏（你的回合将被自动跳过，无法重连）",
                     "room_deleted": False,
@@ -903,11 +1061,10 @@ def delete_room(room_id):
     data = request.get_json()
     player_name = data.get('player_name')
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id, membership=True) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         
         # 检查是否是房主
         if room.creator_name != player_name:
@@ -922,7 +1079,7 @@ def delete_room(room_id):
                     users[p].current_room_id = None
         
         # 删除房间
-        del game_rooms[room_id]
+        remove_room(room_id)
         
     return jsonify({
         "message": "房间已删除"
@@ -936,11 +1093,10 @@ def update_room_config(room_id):
     max_players = data.get('max_players')
     victory_points = data.get('victory_points')
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         
         # 检查是否是房主
         if room.creator_name != player_name:
@@ -953,6 +1109,7 @@ def update_room_config(room_id):
         # 更新配置
         room.update_config(max_players=max_players, victory_points=victory_points)
         room.last_activity = datetime.now()
+        notify_room_changed(room)
         
     return jsonify({
         "message": "配置更新成功",
@@ -973,12 +1130,11 @@ def start_game(room_id):
     print(f"房间ID: {room_id}")
     print(f"玩家名: {player_name}")
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             print(f"❌ 房间不存在: {room_id}")
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         print(f"房间信息:")
         print(f"  - 房主: {room.creator_name}")
         print(f"  - 当前玩家数: {len(room.players)}")
@@ -1006,6 +1162,7 @@ def start_game(room_id):
             print(f"{'='*60}\n")
             
             room.last_activity = datetime.now()
+            notify_room_changed(room)
             
             # 更新所有玩家状态为游戏中
             with user_lock:
@@ -1029,32 +1186,80 @@ def start_game(room_id):
 
 @app.route('/api/rooms/<room_id>/state', methods=['GET'])
 def get_game_state(room_id):
-    """获取游戏状态"""
-    with room_lock:
-        if room_id not in game_rooms:
+    """获取游戏状态
+
+    - 响应带ETag（房间状态版本号），If-None-Match命中时返回304
+    - since=<版本号>：返回相对该版本的增量（该版本快照已过期时返回全量）
+    """
+    since = request.args.get('since', type=int)
+    
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         room.last_activity = datetime.now()
         
-        # 如果游戏进行中且当前玩家是AI，触发AI回合
+        # 如果游戏进行中且当前玩家是AI，确保AI回合已登记（已登记时为空操作）
         if room.game and not room.game.game_over:
             current_player_name = room.game.get_current_player().name
             if room.is_ai_player(current_player_name):
-                # 异步执行AI回合
-                threading.Thread(target=execute_ai_turn, args=(room_id,), daemon=True).start()
+                ai_scheduler.schedule(room_id)
         
-    return jsonify(room.get_game_state())
+        etag = room.state_etag()
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(room.get_versioned_payload(since), mimetype="application/json")
+    
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.route('/api/rooms/<room_id>/events', methods=['GET'])
+def room_event_stream(room_id):
+    """房间状态推送通道（Server-Sent Events）
+
+    连接后立即推送一次当前状态，之后仅在状态变更时推送；房间删除时推送deleted事件并关闭
+    """
+    with locked_room(room_id) as room:
+        if room is None:
+            return jsonify({"error": "房间不存在"}), 404
+        
+        room.last_activity = datetime.now()
+        start_seq = room_events.subscribe(room_id)
+        initial_payload = room.cached_state()[1]
+    
+    def generate():
+        seq = start_seq
+        try:
+            yield f"retry: 3000\nevent: state\ndata: {initial_payload}\n\n"
+            while True:
+                seq, payload, closed = room_events.wait(room_id, seq, timeout=EVENT_KEEPALIVE_SECONDS)
+                if closed:
+                    yield "event: deleted\ndata: {}\n\n"
+                    break
+                if payload is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: state\ndata: {payload}\n\n"
+        finally:
+            room_events.unsubscribe(room_id)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
 
 def execute_ai_turn(room_id):
-    """执行AI回合"""
-    time.sleep(1)  # 延迟1秒，让玩家看到AI在"思考"
+    """执行AI回合（由ai_scheduler在思考延迟后调用）
     
-    with room_lock:
-        if room_id not in game_rooms:
+    房间锁内只做快照和应用结果，决策由ai_service在锁外计算；
+    计算期间房间状态有变化（版本号不同）时丢弃结果，重新登记AI回合
+    """
+    with locked_room(room_id) as room:
+        if room is None:
             return
             
-        room = game_rooms[room_id]
         if not room.game or room.game.game_over:
             return
         
@@ -1062,18 +1267,58 @@ def execute_ai_turn(room_id):
         if not room.is_ai_player(current_player.name):
             return
         
-        # 获取AI实例
-        ai = room.ai_players[current_player.name]
+        # 提交时即对对局和AI做快照
+        game = room.game
+        version = room.state_version
+        try:
+            future = ai_service.submit(room.ai_players[current_player.name], game)
+        except Exception as e:
+            future = None
+            submit_error = e
+    
+    if future is None:
+        # 提交失败（进程池损坏、快照失败等）与决策失败一样处理，失败处理需要重新获取房间锁
+        print(f"❌ 房间 {room_id} 的AI决策提交失败: {submit_error!r}")
+        handle_ai_decision_failure(room_id, game, version)
+        return
+    
+    # AI做决策（锁外等待，其他请求不受影响）
+    try:
+        decision, ai = future.result(timeout=AI_DECISION_TIMEOUT_SECONDS)
+    except Exception as e:
+        if isinstance(e, FutureTimeoutError):
+            future.cancel()
+            ai_service.record_timeout()
+            print(f"❌ 房间 {room_id} 的AI决策超过{AI_DECISION_TIMEOUT_SECONDS}秒未返回")
+        else:
+            print(f"❌ 房间 {room_id} 的AI决策失败: {e!r}")
+        handle_ai_decision_failure(room_id, game, version)
+        return
+    
+    with locked_room(room_id) as room:
+        if room is None:
+            return
         
-        # AI做决策
-        decision = ai.make_decision(room.game, current_player)
+        if room.game is not game or room.state_version != version:
+            ai_service.record_stale()
+            print(f"⚠️ 房间 {room_id} 在AI思考期间状态已变化，丢弃本次决策")
+            if room.game and not room.game.game_over and room.is_ai_player(room.game.get_current_player().name):
+                ai_scheduler.schedule(room_id)
+            return
+        
+        # 决策推进了AI的随机数状态等，用决策后的AI替换
+        current_player = room.game.get_current_player()
+        room.ai_players[current_player.name] = ai
+        room.ai_decision_failures = 0
         
         # 验证decision不为None
         if not decision:
             print(f"警告：AI玩家 {current_player.name} 返回了空决策，强制结束回合")
             current_player.last_action = "⚠️ 无有效决策，跳过行动"
             room.game.end_turn()
+            room.finish_ai_turn()
             room.last_activity = datetime.now()
+            notify_room_changed(room)
             return
         
         try:
@@ -1102,7 +1347,9 @@ def execute_ai_turn(room_id):
                         # 没有球可拿，跳过
                         print(f"警告：没有可用的球，AI跳过此回合")
                         room.game.end_turn()
+                        room.finish_ai_turn()
                         room.last_activity = datetime.now()
+                        notify_room_changed(room)
                         return
                 
                 ball_enum_types = []
@@ -1111,7 +1358,10 @@ def execute_ai_turn(room_id):
                         if ball_type.value == ball_str:
                             ball_enum_types.append(ball_type)
                             break
-                room.game.take_balls(ball_enum_types)
+                result = room.game.take_balls(ball_enum_types)
+                room.record_action("take_balls", {
+                    "ball_types": [bt.value for bt in ball_enum_types]
+                }, result, "拿取球" if result else "拿取球失败")
                 
                 # 记录AI行动
                 ball_emoji_map = {
@@ -1135,6 +1385,14 @@ def execute_ai_turn(room_id):
                 
                 if target_card:
                     success = room.game.buy_card(target_card)
+                    room.record_action("buy_card", {
+                        "card": {
+                            "card_id": target_card.card_id,
+                            "name": target_card.name,
+                            "level": target_card.level,
+                            "victory_points": target_card.victory_points
+                        }
+                    }, success, f"购买{target_card.name}" if success else "购买卡牌失败")
                     if success:
                         # 记录AI行动
                         current_player.last_action = f"💰 购买卡牌: {target_card.name} (Lv{target_card.level}, {target_card.victory_points}VP)"
@@ -1151,6 +1409,15 @@ def execute_ai_turn(room_id):
                 
                 if target_card:
                     success = room.game.reserve_card(target_card)
+                    # AI只预购场上的牌（按card_id定位），不从牌堆顶盲取
+                    room.record_action("reserve_card", {
+                        "card": {
+                            "card_id": target_card.card_id,
+                            "name": target_card.name,
+                            "level": target_card.level
+                        },
+                        "blind": False
+                    }, success, f"预购{target_card.name}" if success else "预购卡牌失败")
                     if success:
                         # 记录AI行动
                         blind = data.get('blind', False)
@@ -1172,8 +1439,10 @@ def execute_ai_turn(room_id):
             
             # end_turn 包含了进化检查、球数上限检查等
             room.game.end_turn()
+            room.finish_ai_turn()
             
             room.last_activity = datetime.now()
+            notify_room_changed(room)
             
         except Exception as e:
             print(f"AI执行回合时出错: {e}")
@@ -1185,8 +1454,38 @@ def execute_ai_turn(room_id):
             try:
                 if not room.game.game_over:
                     room.game.end_turn()
+                    room.finish_ai_turn()
             except:
                 pass
+            notify_room_changed(room)
+
+def handle_ai_decision_failure(room_id, game, version):
+    """AI决策抛异常或超时：状态未变时重新登记该回合，连续失败AI_DECISION_RETRIES次后跳过，避免房间卡在AI回合"""
+    with locked_room(room_id) as room:
+        if room is None or not room.game or room.game.game_over:
+            return
+        
+        if room.game is not game or room.state_version != version:
+            # 等待期间状态已变化，按过期结果处理
+            if room.is_ai_player(room.game.get_current_player().name):
+                ai_scheduler.schedule(room_id)
+            return
+        
+        room.ai_decision_failures += 1
+        if room.ai_decision_failures <= AI_DECISION_RETRIES:
+            print(f"🔁 房间 {room_id} 重新登记AI回合（第{room.ai_decision_failures}次重试）")
+            ai_scheduler.schedule(room_id)
+            return
+        
+        room.ai_decision_failures = 0
+        current_player = room.game.get_current_player()
+        current_player.last_action = "⚠️ AI决策失败，跳过行动"
+        room.game.end_turn()
+        room.finish_ai_turn()
+        room.last_activity = datetime.now()
+        notify_room_changed(room)
+
+ai_scheduler = AITurnScheduler(execute_ai_turn, think_delay=AI_THINK_DELAY_SECONDS, max_workers=AI_TURN_WORKERS)
 
 @app.route('/api/rooms/<room_id>/take_gems', methods=['POST'])
 def take_gems(room_id):
@@ -1195,11 +1494,10 @@ def take_gems(room_id):
     player_name = data.get('player_name')
     gem_types = data.get('gem_types', [])  # 保持兼容前端接口名
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         if not room.game or room.game.get_current_player().name != player_name:
             return jsonify({"error": "不是你的回合"}), 400
             
@@ -1210,8 +1508,10 @@ def take_gems(room_id):
                 if ball_type.value == ball_str:
                     ball_types.append(ball_type)
                     break
-                    
-        result = room.game.take_balls(ball_types)
+        
+        # 先按合法行动列表校验（与AI/模拟器同一套规则），再执行
+        result = (room.game.is_legal_move(Move(MOVE_TAKE_BALLS, tuple(ball_types)))
+                  and room.game.take_balls(ball_types))
         
         # 记录历史
         room.record_action("take_balls", {
@@ -1234,6 +1534,7 @@ def take_gems(room_id):
             room.game.get_current_player().last_action = f"🎨 拿取球: {ball_desc}"
             
             room.last_activity = datetime.now()
+            notify_room_changed(room)
             return jsonify({
                 "success": True,
                 "message": "成功拿取球"
@@ -1251,11 +1552,10 @@ def buy_card(room_id):
     player_name = data.get('player_name')
     card_info = data.get('card')
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         if not room.game or room.game.get_current_player().name != player_name:
             return jsonify({"error": "不是你的回合"}), 400
             
@@ -1266,26 +1566,8 @@ def buy_card(room_id):
             card_name = card_info.get('name')
             if card_name:
                 # 通过name查找（向后兼容）
-                target_card = None
-                for tier, cards in room.game.tableau.items():
-                    for card in cards:
-                        if card.name == card_name:
-                            target_card = card
-                            break
-                    if target_card:
-                        break
-                
-                if not target_card and room.game.rare_card and room.game.rare_card.name == card_name:
-                    target_card = room.game.rare_card
-                elif not target_card and room.game.legendary_card and room.game.legendary_card.name == card_name:
-                    target_card = room.game.legendary_card
-                
-                if not target_card:
-                    player = room.game.get_current_player()
-                    for card in player.reserved_cards:
-                        if card.name == card_name:
-                            target_card = card
-                            break
+                player = room.game.get_current_player()
+                target_card = room.game.find_card_by_name(card_name, player)
             else:
                 return jsonify({"error": "缺少card_id或name"}), 400
         else:
@@ -1295,7 +1577,8 @@ def buy_card(room_id):
         if not target_card:
             return jsonify({"error": "卡牌不存在"}), 400
             
-        result = room.game.buy_card(target_card)
+        result = (room.game.is_legal_move(Move(MOVE_BUY_CARD, card_id=target_card.card_id))
+                  and room.game.buy_card(target_card))
         
         # 记录历史（包含card_id用于准确回放）
         room.record_action("buy_card", {
@@ -1313,6 +1596,7 @@ def buy_card(room_id):
             player.last_action = f"💰 购买卡牌: {target_card.name} (Lv{target_card.level}, {target_card.victory_points}VP)"
             
             room.last_activity = datetime.now()
+            notify_room_changed(room)
             return jsonify({
                 "success": True,
                 "message": "成功购买卡牌"
@@ -1332,15 +1616,15 @@ def reserve_card(room_id):
     blind = data.get('blind', False)  # 是否盲预购
     level = data.get('level')  # 盲预购时指定等级
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         if not room.game or room.game.get_current_player().name != player_name:
             return jsonify({"error": "不是你的回合"}), 400
             
         target_card = None
+        from_deck = False  # 是否真的从牌堆顶取牌（blind但未指定等级时按场面卡牌处理）
         
         # 盲预购牌堆顶
         if blind and level:
@@ -1352,6 +1636,7 @@ def reserve_card(room_id):
             deck = getattr(room.game, deck_name, [])
             if deck:
                 target_card = deck.pop(0)  # 从牌堆顶移除卡牌
+                from_deck = True
             else:
                 return jsonify({"error": f"Lv{level}牌堆已空"}), 400
         else:
@@ -1361,13 +1646,7 @@ def reserve_card(room_id):
                 # 兼容旧的name方式
                 card_name = card_info.get('name')
                 if card_name:
-                    for tier, cards in room.game.tableau.items():
-                        for card in cards:
-                            if card.name == card_name:
-                                target_card = card
-                                break
-                        if target_card:
-                            break
+                    target_card = room.game.find_card_by_name(card_name)
                 else:
                     return jsonify({"error": "缺少card_id或name"}), 400
             else:
@@ -1381,7 +1660,15 @@ def reserve_card(room_id):
             if target_card.level >= 4:
                 return jsonify({"error": "稀有/传说卡牌（Lv4/Lv5）不可预购"}), 400
             
-        result = room.game.reserve_card(target_card)
+        if from_deck:
+            # 盲预购的牌来自牌堆顶，不在合法行动列表中，由引擎直接校验
+            result = room.game.reserve_card(target_card)
+        else:
+            result = (room.game.is_legal_move(Move(MOVE_RESERVE_CARD, card_id=target_card.card_id))
+                      and room.game.reserve_card(target_card))
+        if not result and from_deck:
+            # 预购失败时把牌放回牌堆顶，失败的请求不改变状态
+            deck.insert(0, target_card)
         
         # 记录历史（包含card_id用于准确回放）
         room.record_action("reserve_card", {
@@ -1390,18 +1677,19 @@ def reserve_card(room_id):
                 "name": target_card.name,
                 "level": target_card.level
             },
-            "blind": blind
+            "blind": from_deck
         }, result, f"预购{target_card.name}" if result else "预购卡牌失败")
         
         if result:
             # 记录玩家行动描述
             player = room.game.get_current_player()
-            if blind:
+            if from_deck:
                 player.last_action = f"📦 盲预购: Lv{target_card.level}牌堆 → {target_card.name}"
             else:
                 player.last_action = f"📦 预购卡牌: {target_card.name} (Lv{target_card.level})"
             
             room.last_activity = datetime.now()
+            notify_room_changed(room)
             return jsonify({
                 "success": True,
                 "message": "成功保留卡牌"
@@ -1422,11 +1710,10 @@ def evolve_card(room_id):
     base_card_id = data.get('card_id')
     base_card_name = data.get('card_name')
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         if not room.game or room.game.get_current_player().name != player_name:
             return jsonify({"error": "不是你的回合"}), 400
         
@@ -1452,70 +1739,17 @@ def evolve_card(room_id):
         if not base_card.evolution:
             return jsonify({"error": "该卡牌无法进化"}), 400
         
-        # 查找进化目标卡（场上或预购区）
-        target_card = None
+        # 查找进化目标卡（场上、稀有/传说、预购区，按进化图直接定位）
         target_name = base_card.evolution.target_name
-        
-        # 先检查场上
-        for level, cards in room.game.tableau.items():
-            for card in cards:
-                if card.name == target_name:
-                    target_card = card
-                    break
-            if target_card:
-                break
-        
-        # 检查稀有/传说
-        if not target_card:
-            if room.game.rare_card and room.game.rare_card.name == target_name:
-                target_card = room.game.rare_card
-            elif room.game.legendary_card and room.game.legendary_card.name == target_name:
-                target_card = room.game.legendary_card
-        
-        # 检查预购区
-        if not target_card:
-            for card in player.reserved_cards:
-                if card.name == target_name:
-                    target_card = card
-                    break
+        target_card = room.game.find_evolution_target(base_card, player)
         
         if not target_card:
             return jsonify({"error": f"未找到进化目标卡牌: {target_name}"}), 400
         
         # 执行进化
         if player.evolve(base_card, target_card):
-            # 从场上或预购区移除目标卡（在原位置补充新牌）
-            # 使用card_id进行更安全的比较，避免引用问题
-            card_removed = False
-            for level, cards in room.game.tableau.items():
-                for idx, c in enumerate(cards):
-                    if c.card_id == target_card.card_id:
-                        cards.pop(idx)  # 移除卡牌
-                        # 补充场上卡牌
-                        deck = [room.game.deck_lv1, room.game.deck_lv2, room.game.deck_lv3][level-1]
-                        if deck:
-                            cards.insert(idx, deck.pop())  # 在原位置插入
-                        card_removed = True
-                        break
-                if card_removed:
-                    break
-            
-            # 稀有/传说卡处理（使用card_id比较）
-            if room.game.rare_card and room.game.rare_card.card_id == target_card.card_id:
-                room.game.rare_card = None
-                if room.game.rare_deck:
-                    room.game.rare_card = room.game.rare_deck.pop()
-            
-            if room.game.legendary_card and room.game.legendary_card.card_id == target_card.card_id:
-                room.game.legendary_card = None
-                if room.game.legendary_deck:
-                    room.game.legendary_card = room.game.legendary_deck.pop()
-            
-            # 从预购区移除（使用card_id比较）
-            for idx, c in enumerate(player.reserved_cards):
-                if c.card_id == target_card.card_id:
-                    player.reserved_cards.pop(idx)
-                    break
+            # 从场上、稀有/传说或预购区移除目标卡（在原位置补充新牌）
+            room.game.take_card(target_card, player)
             
             # 记录进化历史（包含card_id用于准确回放）
             room.record_action("evolve_card", {
@@ -1538,6 +1772,7 @@ def evolve_card(room_id):
             player.last_action += f" ║ ⚡ 进化: {base_card.name} → {target_card.name}"
             
             room.last_activity = datetime.now()
+            notify_room_changed(room)
             
             return jsonify({
                 "success": True,
@@ -1553,11 +1788,10 @@ def return_balls(room_id):
     player_name = data.get('player_name')
     balls_to_return = data.get('balls_to_return', {})  # {球类型: 数量}
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         if not room.game or room.game.get_current_player().name != player_name:
             return jsonify({"error": "不是你的回合"}), 400
         
@@ -1591,6 +1825,7 @@ def return_balls(room_id):
             player.last_action += f" ║ ↩️ 放回球: {ball_desc}"
             
             room.last_activity = datetime.now()
+            notify_room_changed(room)
             return jsonify({
                 "success": True,
                 "message": "成功放回球"
@@ -1607,11 +1842,10 @@ def end_turn(room_id):
     data = request.get_json()
     player_name = data.get('player_name')
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
             
-        room = game_rooms[room_id]
         if not room.game or room.game.get_current_player().name != player_name:
             return jsonify({"error": "不是你的回合"}), 400
             
@@ -1643,6 +1877,7 @@ def end_turn(room_id):
                 )
             
         room.last_activity = datetime.now()
+        notify_room_changed(room)
         
     return jsonify({
         "success": True,
@@ -1655,64 +1890,18 @@ def end_turn(room_id):
 def get_cards():
     """获取所有卡牌数据（用于卡库展示）"""
     try:
-        import csv
-        import os
-        
-        # 读取CSV文件
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'card_library', 'cards_data.csv')
         cards = []
-        
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # 解析成本
-                cost = {}
-                for ball_color in ['黑', '粉', '黄', '蓝', '红', '大师球']:
-                    key = f'购买成本_{ball_color}'
-                    if key in row and row[key] and row[key].strip():
-                        amount = int(row[key])
-                        if amount > 0:
-                            cost[ball_color] = amount
-                
-                # 解析永久球
-                permanent = {}
-                if row.get('永久球颜色') and row['永久球颜色'].strip() and row['永久球颜色'] != '无':
-                    ball_color = row['永久球颜色']
-                    ball_amount = int(row.get('永久球数量', 0))
-                    if ball_amount > 0:
-                        permanent[ball_color] = ball_amount
-                
-                # 解析进化信息
-                evolution_target = None
-                evolution_requirement = {}
-                if row.get('进化后卡牌') and row['进化后卡牌'].strip() and row['进化后卡牌'] != '无':
-                    evolution_target = row['进化后卡牌']
-                    if row.get('进化所需球颜色') and row['进化所需球颜色'] != '无':
-                        evo_color = row['进化所需球颜色']
-                        evo_amount = int(row.get('进化所需球个数', 0))
-                        if evo_amount > 0:
-                            evolution_requirement[evo_color] = evo_amount
-                
-                # 确定稀有度
-                level = int(row['卡牌等级'])
-                if level == 4:
-                    rarity = '稀有'
-                elif level == 5:
-                    rarity = '传说'
-                else:
-                    rarity = '普通'
-                
-                card = {
-                    'name': row['卡牌名称'],
-                    'level': level,
-                    'rarity': rarity,
-                    'victory_points': int(row['胜利点数']),
-                    'cost': cost,
-                    'permanent': permanent,
-                    'evolution_target': evolution_target,
-                    'evolution_requirement': evolution_requirement
-                }
-                cards.append(card)
+        for card in get_card_catalog().cards:
+            cards.append({
+                'name': card.name,
+                'level': card.level,
+                'rarity': card.rarity.value,
+                'victory_points': card.victory_points,
+                'cost': balls_to_json(card.cost),
+                'permanent': balls_to_json(card.permanent_balls),
+                'evolution_target': card.evolution.target_name if card.evolution else None,
+                'evolution_requirement': balls_to_json(card.evolution.required_balls) if card.evolution else {}
+            })
         
         return jsonify({"success": True, "cards": cards})
     except Exception as e:
@@ -1724,13 +1913,16 @@ def get_cards():
 def list_rooms():
     """获取房间列表"""
     with room_lock:
-        rooms = []
-        for room_id, room in game_rooms.items():
+        registered_rooms = list(game_rooms.items())
+    
+    rooms = []
+    for room_id, room in registered_rooms:
+        with room.lock:
             if room.status == "waiting":
                 rooms.append({
                     "room_id": room_id,
                     "creator": room.creator_name,
-                    "players": room.players,
+                    "players": list(room.players),
                     "player_count": len(room.players),
                     "max_players": room.max_players,
                     "created_at": room.created_at.isoformat()
@@ -1744,12 +1936,18 @@ def list_rooms():
 
 @app.route('/api/history/list', methods=['GET'])
 def list_game_histories():
-    """获取所有历史记录列表"""
+    """获取历史记录列表（分页：offset=<起始位置>&limit=<条数>，最新的在前）"""
     try:
-        histories = GameHistory.list_all_histories()
+        offset = max(0, request.args.get('offset', 0, type=int))
+        limit = max(1, min(HISTORY_PAGE_LIMIT, request.args.get('limit', HISTORY_PAGE_SIZE, type=int)))
+        histories, total = GameHistory.list_histories(offset, limit, HISTORY_DIR)
         return jsonify({
             "success": True,
-            "histories": histories
+            "histories": histories,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "has_more": offset + len(histories) < total
         })
     except Exception as e:
         return jsonify({
@@ -1759,24 +1957,25 @@ def list_game_histories():
 
 @app.route('/api/history/<game_id>', methods=['GET'])
 def get_game_history(game_id):
-    """获取指定游戏的详细历史记录"""
+    """获取指定游戏的详细历史记录（outline=1时每回合只含回合号和玩家，回合内容按需从turn接口获取）"""
     try:
-        # 查找对应的历史文件
-        histories = GameHistory.list_all_histories()
-        target_file = None
-        for history in histories:
-            if history['game_id'] == game_id:
-                target_file = history['filepath']
-                break
-        
-        if not target_file:
+        # 查找对应的历史文件（索引）
+        summary = GameHistory.find_history(game_id, HISTORY_DIR)
+        if not summary:
             return jsonify({
                 "success": False,
                 "error": "历史记录不存在"
             }), 404
         
+        if request.args.get('outline', type=int):
+            return jsonify({
+                "success": True,
+                "history": GameHistory.read_outline(summary['filepath']),
+                "outline": True
+            })
+        
         # 加载完整历史
-        history = GameHistory.load_from_file(target_file)
+        history = GameHistory.load_from_file(summary['filepath'])
         return jsonify({
             "success": True,
             "history": history.to_dict()
@@ -1791,28 +1990,15 @@ def get_game_history(game_id):
 def get_game_history_turn(game_id, turn_number):
     """获取指定游戏的某一回合详细信息"""
     try:
-        histories = GameHistory.list_all_histories()
-        target_file = None
-        for history in histories:
-            if history['game_id'] == game_id:
-                target_file = history['filepath']
-                break
-        
-        if not target_file:
+        summary = GameHistory.find_history(game_id, HISTORY_DIR)
+        if not summary:
             return jsonify({
                 "success": False,
                 "error": "历史记录不存在"
             }), 404
         
-        history = GameHistory.load_from_file(target_file)
-        
-        # 查找指定回合
-        turn_data = None
-        for turn in history.turns:
-            if turn['turn'] == turn_number:
-                turn_data = turn
-                break
-        
+        # 逐回合格式直接定位到该回合，不读整局
+        turn_data = GameHistory.read_turn(summary['filepath'], turn_number)
         if not turn_data:
             return jsonify({
                 "success": False,
@@ -1829,6 +2015,59 @@ def get_game_history_turn(game_id, turn_number):
             "error": str(e)
         }), 500
 
+replay_engines = OrderedDict()  # 历史文件路径 -> ReplayEngine（最近使用的在后）
+replay_lock = threading.Lock()
+
+def get_replay_engine(filepath: str) -> ReplayEngine:
+    """获取历史文件的重演器（按文件缓存，关键帧在多次请求间复用）"""
+    with replay_lock:
+        engine = replay_engines.get(filepath)
+        if engine is not None:
+            replay_engines.move_to_end(filepath)
+            return engine
+    engine = ReplayEngine.from_file(filepath, REPLAY_KEYFRAME_INTERVAL)
+    with replay_lock:
+        engine = replay_engines.setdefault(filepath, engine)
+        replay_engines.move_to_end(filepath)
+        while len(replay_engines) > REPLAY_CACHE_SIZE:
+            replay_engines.popitem(last=False)
+    return engine
+
+@app.route('/api/history/<game_id>/board/<int:turn_number>', methods=['GET'])
+def get_game_history_board(game_id, turn_number):
+    """获取指定游戏第turn_number回合结束时的完整牌面（0为开局），由动作日志重演得到"""
+    try:
+        summary = GameHistory.find_history(game_id, HISTORY_DIR)
+        if not summary:
+            return jsonify({
+                "success": False,
+                "error": "历史记录不存在"
+            }), 404
+        
+        engine = get_replay_engine(summary['filepath'])
+        if not 0 <= turn_number <= engine.total_turns:
+            return jsonify({
+                "success": False,
+                "error": f"回合{turn_number}不存在"
+            }), 404
+        
+        return jsonify({
+            "success": True,
+            "turn": turn_number,
+            "total_turns": engine.total_turns,
+            "board": engine.state_at(turn_number)
+        })
+    except ReplayError as e:
+        return jsonify({
+            "success": False,
+            "error": f"该对局无法重演: {e}"
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 # ============ 用户数据库API ============
 
 @app.route('/api/users/<username>', methods=['GET'])
@@ -1972,11 +2211,10 @@ def debug_adjust_score(room_id):
     player_name = data.get('player_name')
     delta = data.get('delta', 0)
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
         
-        room = game_rooms[room_id]
         if not room.game:
             return jsonify({"error": "游戏未开始"}), 400
         
@@ -1996,6 +2234,7 @@ def debug_adjust_score(room_id):
         new_total = player.get_victory_points()
         
         room.last_activity = datetime.now()
+        notify_room_changed(room)
         
         return jsonify({
             "success": True,
@@ -2011,11 +2250,10 @@ def debug_adjust_balls(room_id):
     ball_type_str = data.get('ball_type')
     delta = data.get('delta', 0)
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
         
-        room = game_rooms[room_id]
         if not room.game:
             return jsonify({"error": "游戏未开始"}), 400
         
@@ -2053,6 +2291,7 @@ def debug_adjust_balls(room_id):
             room.game.ball_pool[ball_type] += abs(actual_delta)
         
         room.last_activity = datetime.now()
+        notify_room_changed(room)
         
         return jsonify({
             "success": True,
@@ -2070,11 +2309,10 @@ def debug_adjust_permanent_balls(room_id):
     ball_type_str = data.get('ball_type')
     delta = data.get('delta', 0)
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
         
-        room = game_rooms[room_id]
         if not room.game:
             return jsonify({"error": "游戏未开始"}), 400
         
@@ -2098,36 +2336,36 @@ def debug_adjust_permanent_balls(room_id):
         if not ball_type or ball_type == BallType.MASTER:
             return jsonify({"error": "球类型无效（永久折扣不包括大师球）"}), 400
         
-        # 创建一个虚拟卡牌来提供永久折扣
-        # 实际上直接在已有的卡牌上修改会更合理，但为了简化，我们添加一个隐形卡牌
-        if delta > 0:
-            # 添加虚拟卡牌
-            from copy import deepcopy
-            virtual_card = PokemonCard(
+        def make_virtual_card(amount):
+            return PokemonCard(
                 card_id=9999,  # 使用特殊ID
                 name=f"调试折扣({ball_type_str})",
                 level=1,
                 rarity=Rarity.NORMAL,
                 victory_points=0,
                 cost={},
-                permanent_balls={ball_type: abs(delta)}
+                permanent_balls={ball_type: amount}
             )
-            player.display_area.append(virtual_card)
+        
+        # 创建一个虚拟卡牌来提供永久折扣
+        # 实际上直接在已有的卡牌上修改会更合理，但为了简化，我们添加一个隐形卡牌
+        if delta > 0:
+            # 添加虚拟卡牌
+            player.display_area.append(make_virtual_card(abs(delta)))
         else:
-            # 减少折扣：移除虚拟卡牌
+            # 减少折扣：移除虚拟卡牌（折扣有剩余时换成较小的虚拟卡，展示区的永久球合计随之更新）
             for card in player.display_area[:]:
                 if card.card_id == 9999 and ball_type in card.permanent_balls:
-                    if card.permanent_balls[ball_type] <= abs(delta):
-                        player.display_area.remove(card)
-                        break
-                    else:
-                        card.permanent_balls[ball_type] -= abs(delta)
-                        break
+                    player.display_area.remove(card)
+                    remaining = card.permanent_balls[ball_type] - abs(delta)
+                    if remaining > 0:
+                        player.display_area.append(make_virtual_card(remaining))
+                    break
         
-        # 重新计算永久折扣
         permanent = player.get_permanent_balls()
         
         room.last_activity = datetime.now()
+        notify_room_changed(room)
         
         return jsonify({
             "success": True,
@@ -2144,11 +2382,10 @@ def debug_add_card(room_id):
     card_type = data.get('card_type')  # 'owned' or 'reserved'
     source = data.get('source')  # 'tableau'
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
         
-        room = game_rooms[room_id]
         if not room.game:
             return jsonify({"error": "游戏未开始"}), 400
         
@@ -2181,38 +2418,11 @@ def debug_add_card(room_id):
                 return jsonify({"error": "预定卡牌已满（最多3张）"}), 400
             player.reserved_cards.append(card_copy)
         
-        # 从场上移除并补充（在原位置补充新牌）
-        # 使用card_id进行更安全的比较，避免引用问题
-        removed = False
-        for level, cards in room.game.tableau.items():
-            for idx, c in enumerate(cards):
-                if c.card_id == target_card.card_id:
-                    cards.pop(idx)  # 移除卡牌
-                    # 补充卡牌
-                    deck = [room.game.deck_lv1, room.game.deck_lv2, room.game.deck_lv3][level-1]
-                    if deck:
-                        cards.insert(idx, deck.pop())  # 在原位置插入
-                    removed = True
-                    break
-            if removed:
-                break
-        
-        # 检查稀有/传说卡（使用card_id比较）
-        if not removed:
-            if room.game.rare_card and room.game.rare_card.card_id == target_card.card_id:
-                if room.game.rare_deck:
-                    room.game.rare_card = room.game.rare_deck.pop()
-                else:
-                    room.game.rare_card = None
-                removed = True
-            elif room.game.legendary_card and room.game.legendary_card.card_id == target_card.card_id:
-                if room.game.legendary_deck:
-                    room.game.legendary_card = room.game.legendary_deck.pop()
-                else:
-                    room.game.legendary_card = None
-                removed = True
+        # 从场上或稀有/传说位移除并补充（在原位置补充新牌）
+        room.game.take_card(target_card)
         
         room.last_activity = datetime.now()
+        notify_room_changed(room)
         
         return jsonify({
             "success": True,
@@ -2228,11 +2438,10 @@ def debug_add_card_from_deck(room_id):
     level = data.get('level')
     card_type = data.get('card_type')  # 'owned' or 'reserved'
     
-    with room_lock:
-        if room_id not in game_rooms:
+    with locked_room(room_id) as room:
+        if room is None:
             return jsonify({"error": "房间不存在"}), 404
         
-        room = game_rooms[room_id]
         if not room.game:
             return jsonify({"error": "游戏未开始"}), 400
         
@@ -2275,6 +2484,7 @@ def debug_add_card_from_deck(room_id):
             player.reserved_cards.append(card)
         
         room.last_activity = datetime.now()
+        notify_room_changed(room)
         
         return jsonify({
             "success": True,
@@ -2310,6 +2520,7 @@ def load_users_from_database():
         print(f"⚠️  加载用户时出错: {e}")
 
 if __name__ == '__main__':
+    configure_logging()
     print("🌟 璀璨宝石宝可梦API服务启动中...")
     
     # 从数据库加载用户
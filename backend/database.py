@@ -184,6 +184,66 @@ class GameDatabase:
             conn.close()
             return True
     
+    def record_game_participations(self, records: List[Dict[str, Any]]) -> int:
+        """
+        批量记录一局中各玩家的参与（一个连接、一个事务，全部成功或全部回滚）
+        
+        records中每项的字段同record_game_participation的参数。
+        同一局同一玩家名已有记录时跳过，因此失败重试或重复提交不会重复计分。
+        
+        Returns:
+            新写入的记录数
+        """
+        if not records:
+            return 0
+        with db_lock:
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                inserted = 0
+                for record in records:
+                    cursor.execute(
+                        'SELECT 1 FROM game_participations WHERE game_id = ? AND player_name = ?',
+                        (record['game_id'], record['player_name'])
+                    )
+                    if cursor.fetchone():
+                        continue
+                    
+                    cursor.execute('SELECT id FROM users WHERE username = ?', (record['username'],))
+                    user = cursor.fetchone()
+                    if user:
+                        user_id = user['id']
+                    else:
+                        cursor.execute('INSERT INTO users (username) VALUES (?)', (record['username'],))
+                        user_id = cursor.lastrowid
+                    
+                    cursor.execute('''
+                        INSERT INTO game_participations 
+                        (user_id, game_id, game_history_file, player_name, 
+                         final_rank, final_score, is_winner, 
+                         game_start_time, game_end_time, total_turns)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        user_id, record['game_id'], record['game_history_file'], record['player_name'],
+                        record['final_rank'], record['final_score'], record['is_winner'],
+                        record['game_start_time'], record['game_end_time'], record['total_turns']
+                    ))
+                    cursor.execute('''
+                        UPDATE users 
+                        SET total_games = total_games + 1,
+                            total_wins = total_wins + ?,
+                            total_points = total_points + ?
+                        WHERE id = ?
+                    ''', (1 if record['is_winner'] else 0, record['final_score'], user_id))
+                    inserted += 1
+                conn.commit()
+                return inserted
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+    
     def get_user_game_history(
         self, 
         username: str, 
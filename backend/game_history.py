@@ -1,30 +1,449 @@
 """
 游戏历史记录系统 - 用于保存和回放对局
 """
+import gzip
 import json
 import os
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from game_logging import get_logger
+
+logger = get_logger("history")
+
+INDEX_FILENAME = "index.sqlite3"  # 历史目录下的索引文件
+
+# 历史文件格式
+FORMAT_JSON = "json"  # 整局一个JSON（缩进排版，旧格式）
+FORMAT_TURNS = "turns"  # 逐回合JSON行 + 偏移表，可直接读取某一回合
+FORMAT_COMPACT = "compact"  # 动作日志 + 状态差分，gzip压缩（体积最小，读取需整体解码）
+FORMAT_SUFFIXES = {FORMAT_JSON: ".json", FORMAT_TURNS: ".jsonl", FORMAT_COMPACT: ".hist.gz"}
+
+
+class CompactCodec:
+    """紧凑历史编码 - 与整局JSON字典无损互转
+
+    - 头部（种子、初始状态等）原样保存，初始状态即完整场面的检查点
+    - 每回合编码为 [回合号, 玩家, 动作列表, 动作前状态, 动作后状态, 其他字段]：
+      玩家用座位序号；动作时间戳存为与上一个时间戳的微秒差；
+      状态只存与该玩家上一次状态（以及上一次球池）不同的字段
+    - 整体用紧凑JSON + gzip保存
+    无法按规则编码的值（非标准格式的时间戳、未知字段等）原样保存，保证解码结果与原字典相等
+    """
+
+    VERSION = 1
+    TURN_KEYS = ("turn", "player", "actions", "states_before", "states_after")
+    ACTION_KEYS = ("timestamp", "type", "data", "result", "message")
+
+    @staticmethod
+    def encode(data: Dict[str, Any]) -> bytes:
+        """历史记录字典 -> gzip压缩的紧凑编码"""
+        header = {key: None if key == "turns" else value for key, value in data.items()}  # turns占位，保持字段顺序
+        players = list(data.get("players") or [])
+        clock = [CompactCodec._parse_time(data.get("start_time"))]
+        last_players: Dict[str, Dict] = {}
+        last_pool = [{}]
+        turns = []
+        for turn in data.get("turns", []):
+            actions = [CompactCodec._encode_action(action, clock) for action in turn.get("actions", [])]
+            extra = {key: value for key, value in turn.items() if key not in CompactCodec.TURN_KEYS}
+            record = [
+                turn.get("turn"),
+                CompactCodec._encode_player(turn.get("player"), players),
+                actions,
+                CompactCodec._encode_state(turn.get("states_before"), players, last_players, last_pool),
+                CompactCodec._encode_state(turn.get("states_after"), players, last_players, last_pool)
+            ]
+            if extra or any(key not in turn for key in CompactCodec.TURN_KEYS):
+                record.append({"extra": extra, "missing": [key for key in CompactCodec.TURN_KEYS if key not in turn]})
+            turns.append(record)
+        document = {"version": CompactCodec.VERSION, "header": header, "turns": turns}
+        raw = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return gzip.compress(raw, compresslevel=9, mtime=0)
+
+    @staticmethod
+    def decode(blob: bytes) -> Dict[str, Any]:
+        """gzip压缩的紧凑编码 -> 历史记录字典（与编码前相等）"""
+        document = json.loads(gzip.decompress(blob))
+        if document.get("version") != CompactCodec.VERSION:
+            raise ValueError(f"不支持的紧凑历史版本: {document.get('version')}")
+        header = document["header"]
+        players = list(header.get("players") or [])
+        clock = [CompactCodec._parse_time(header.get("start_time"))]
+        last_players: Dict[str, Dict] = {}
+        last_pool = [{}]
+        turns = []
+        for record in document["turns"]:
+            number, player, actions, before, after = record[:5]
+            turn = {
+                "turn": number,
+                "player": CompactCodec._decode_player(player, players),
+                "actions": [CompactCodec._decode_action(action, clock) for action in actions],
+                "states_before": CompactCodec._decode_state(before, players, last_players, last_pool),
+                "states_after": CompactCodec._decode_state(after, players, last_players, last_pool)
+            }
+            if len(record) > 5:
+                for key in record[5]["missing"]:
+                    del turn[key]
+                turn.update(record[5]["extra"])
+            turns.append(turn)
+        data = dict(header)
+        if "turns" in data:
+            data["turns"] = turns
+        return data
+
+    @staticmethod
+    def _parse_time(value: Any) -> Optional[datetime]:
+        """只接受isoformat()能原样还原的时间戳"""
+        if not isinstance(value, str):
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        return parsed if parsed.isoformat() == value else None
+
+    @staticmethod
+    def _encode_action(action: Dict[str, Any], clock: List[Optional[datetime]]) -> List[Any]:
+        if list(action) != list(CompactCodec.ACTION_KEYS):
+            return [action]  # 字段不标准的动作原样保存
+        timestamp = CompactCodec._parse_time(action["timestamp"])
+        if timestamp is not None and clock[0] is not None and timestamp.tzinfo == clock[0].tzinfo:
+            delta = timestamp - clock[0]
+            encoded_time = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+            clock[0] = timestamp
+        else:
+            encoded_time = action["timestamp"]
+            if timestamp is not None:
+                clock[0] = timestamp
+        return [encoded_time, action["type"], action["data"], action["result"], action["message"]]
+
+    @staticmethod
+    def _decode_action(encoded: List[Any], clock: List[Optional[datetime]]) -> Dict[str, Any]:
+        if len(encoded) == 1:
+            return encoded[0]
+        encoded_time, action_type, data, result, message = encoded
+        if isinstance(encoded_time, int):
+            clock[0] = clock[0] + timedelta(microseconds=encoded_time)
+            timestamp = clock[0].isoformat()
+        else:
+            timestamp = encoded_time
+            parsed = CompactCodec._parse_time(timestamp)
+            if parsed is not None:
+                clock[0] = parsed
+        return {"timestamp": timestamp, "type": action_type, "data": data, "result": result, "message": message}
+
+    @staticmethod
+    def _encode_player(name: Any, players: List[str]) -> Any:
+        return players.index(name) if isinstance(name, str) and name in players else [name]
+
+    @staticmethod
+    def _decode_player(encoded: Any, players: List[str]) -> Any:
+        return players[encoded] if isinstance(encoded, int) else encoded[0]
+
+    @staticmethod
+    def _encode_state(state: Any, players: List[str], last_players: Dict[str, Dict],
+                      last_pool: List[Dict]) -> Any:
+        """{"player": {...}, "ball_pool": {...}} -> [玩家, 玩家字段差分, 球池差分]，其他形式原样保存"""
+        if (not isinstance(state, dict) or list(state) != ["player", "ball_pool"]
+                or not isinstance(state["player"], dict) or not isinstance(state["ball_pool"], dict)
+                or not isinstance(state["player"].get("name"), str)):
+            return {"raw": state}
+        player = state["player"]
+        name = player["name"]
+        encoded = [CompactCodec._encode_player(name, players),
+                   CompactCodec._diff(last_players.get(name, {}), player),
+                   CompactCodec._diff(last_pool[0], state["ball_pool"])]
+        last_players[name] = player
+        last_pool[0] = state["ball_pool"]
+        return encoded
+
+    @staticmethod
+    def _decode_state(encoded: Any, players: List[str], last_players: Dict[str, Dict],
+                      last_pool: List[Dict]) -> Any:
+        if isinstance(encoded, dict):
+            return encoded["raw"]
+        name = CompactCodec._decode_player(encoded[0], players)
+        player = CompactCodec._patch(last_players.get(name, {}), encoded[1])
+        pool = CompactCodec._patch(last_pool[0], encoded[2])
+        last_players[name] = player
+        last_pool[0] = pool
+        return {"player": player, "ball_pool": pool}
+
+    @staticmethod
+    def _diff(old: Dict[str, Any], new: Dict[str, Any]) -> List[Any]:
+        """[新字典的键顺序, 变化的字段]；键顺序与旧字典相同时省略为0"""
+        changed = {key: value for key, value in new.items() if key not in old or old[key] != value}
+        order = 0 if list(new) == list(old) else list(new)
+        return [order, changed]
+
+    @staticmethod
+    def _patch(old: Dict[str, Any], diff: List[Any]) -> Dict[str, Any]:
+        order, changed = diff
+        keys = list(old) if order == 0 else order
+        return {key: changed[key] if key in changed else old[key] for key in keys}
+
+
+class TurnFile:
+    """逐回合随机访问的历史文件
+
+    布局（UTF-8文本，每条记录一行）：
+    - 第1行：头部，历史记录中除turns外的字段（含total_turns，turns为占位的null）
+    - 之后每回合一行
+    - 倒数第2行：偏移表 {"turns": [[回合号, 玩家, 偏移, 长度], ...]}
+    - 最后一行：偏移表的字节偏移（定长十进制），从文件尾直接定位
+
+    读取某一回合只需读文件尾、偏移表和该回合所在的一行；偏移表按文件缓存
+    """
+
+    FOOTER_WIDTH = 20
+    _CACHE_LIMIT = 64  # 缓存偏移表的文件数
+    _offset_cache: Dict[Tuple[str, int, int], List[List[Any]]] = {}
+    _cache_lock = threading.Lock()
+
+    @staticmethod
+    def write(filepath: str, data: Dict[str, Any]):
+        """把历史记录字典写成逐回合文件"""
+        header = {key: None if key == "turns" else value for key, value in data.items()}  # turns占位，保持字段顺序
+        offsets = []
+        with open(filepath, 'wb') as f:
+            f.write(TurnFile._line(header))
+            for turn in data.get("turns", []):
+                line = TurnFile._line(turn)
+                offsets.append([turn.get("turn"), turn.get("player"), f.tell(), len(line)])
+                f.write(line)
+            trailer_offset = f.tell()
+            f.write(TurnFile._line({"turns": offsets}))
+            f.write(f"{trailer_offset:0{TurnFile.FOOTER_WIDTH}d}\n".encode('ascii'))
+
+    @staticmethod
+    def read_header(filepath: str) -> Dict[str, Any]:
+        """只读取头部（不含turns）"""
+        with open(filepath, 'rb') as f:
+            header = json.loads(f.readline())
+        header.pop("turns", None)
+        return header
+
+    @staticmethod
+    def read_turn(filepath: str, turn_number: int) -> Optional[Dict[str, Any]]:
+        """直接读取指定回合号的回合（同号时取第一个），不存在时返回None"""
+        with open(filepath, 'rb') as f:
+            for number, _, offset, length in TurnFile._offsets(filepath, f):
+                if number == turn_number:
+                    f.seek(offset)
+                    return json.loads(f.read(length))
+        return None
+
+    @staticmethod
+    def read_outline(filepath: str) -> Dict[str, Any]:
+        """头部 + 各回合的回合号和玩家（只读头部和偏移表，不读回合内容）"""
+        with open(filepath, 'rb') as f:
+            header = json.loads(f.readline())
+            header["turns"] = [{"turn": number, "player": player}
+                               for number, player, _, _ in TurnFile._offsets(filepath, f)]
+        return header
+
+    @staticmethod
+    def read_all(filepath: str) -> Dict[str, Any]:
+        """读取完整历史记录（与整局JSON的字典相同）"""
+        with open(filepath, 'rb') as f:
+            data = json.loads(f.readline())
+            count = len(TurnFile._offsets(filepath, f))
+            f.seek(0)
+            f.readline()
+            data["turns"] = [json.loads(f.readline()) for _ in range(count)]
+        return data
+
+    @staticmethod
+    def _line(value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n"
+
+    @staticmethod
+    def _offsets(filepath: str, f) -> List[List[Any]]:
+        stat = os.fstat(f.fileno())
+        key = (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+        with TurnFile._cache_lock:
+            offsets = TurnFile._offset_cache.get(key)
+        if offsets is None:
+            f.seek(stat.st_size - TurnFile.FOOTER_WIDTH - 1)
+            f.seek(int(f.read(TurnFile.FOOTER_WIDTH)))
+            offsets = json.loads(f.readline())["turns"]
+            with TurnFile._cache_lock:
+                if len(TurnFile._offset_cache) >= TurnFile._CACHE_LIMIT:
+                    TurnFile._offset_cache.pop(next(iter(TurnFile._offset_cache)))
+                TurnFile._offset_cache[key] = offsets
+        return offsets
+
+
+class HistoryIndex:
+    """历史记录索引 - game_id -> 文件路径和摘要字段（SQLite，存放在历史目录下）
+
+    - save_to_file保存后写入索引，按game_id查找和分页列表都不再逐个打开历史文件
+    - 索引文件不存在时（首次使用或被删除）扫描目录中已有的历史文件重建一次
+    - 同一game_id重复保存时以最后一次为准，列表按保存顺序倒序
+    """
+
+    _instances: Dict[str, 'HistoryIndex'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, history_dir: str = "game_history"):
+        self.history_dir = Path(history_dir)
+        self.db_path = self.history_dir / INDEX_FILENAME
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @classmethod
+    def for_dir(cls, history_dir: str = "game_history") -> 'HistoryIndex':
+        """获取历史目录对应的索引（每个目录一个实例）"""
+        key = os.path.abspath(history_dir)
+        with cls._instances_lock:
+            index = cls._instances.get(key)
+            if index is None:
+                index = cls._instances[key] = cls(history_dir)
+            return index
+
+    def add(self, summary: Dict[str, Any]):
+        """写入（或覆盖）一条历史记录摘要，summary需包含filepath"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                self._upsert(conn, summary)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """按game_id查找摘要；文件已被删除时移除索引项并返回None"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute('SELECT * FROM histories WHERE game_id = ?', (game_id,)).fetchone()
+                if row is None:
+                    return None
+                if not os.path.exists(row['filepath']):
+                    conn.execute('DELETE FROM histories WHERE game_id = ?', (game_id,))
+                    conn.commit()
+                    return None
+                return self._summary(row)
+            finally:
+                conn.close()
+
+    def list(self, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """分页列出摘要（最新保存的在前），返回 (本页摘要, 总数)"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                total = conn.execute('SELECT COUNT(*) FROM histories').fetchone()[0]
+                rows = conn.execute('SELECT * FROM histories ORDER BY seq DESC LIMIT ? OFFSET ?',
+                                    (-1 if limit is None else limit, max(0, offset))).fetchall()
+                return [self._summary(row) for row in rows], total
+            finally:
+                conn.close()
+
+    def rebuild(self) -> int:
+        """扫描目录中的历史文件重建索引，返回收录的记录数"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM histories')
+                count = self._scan(conn)
+                conn.commit()
+                return count
+            finally:
+                conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开索引（调用方需持有self._lock）；首次打开时建表，新建的索引扫描已有文件"""
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        created = not self.db_path.exists()
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        if not self._ready or created:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS histories (
+                    game_id TEXT PRIMARY KEY,
+                    seq INTEGER NOT NULL,
+                    filepath TEXT NOT NULL,
+                    room_id TEXT,
+                    players TEXT,
+                    winner TEXT,
+                    start_time TEXT,
+                    end_time TEXT,
+                    total_turns INTEGER
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_histories_seq ON histories(seq DESC)')
+            if created:
+                self._scan(conn)
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def _scan(self, conn: sqlite3.Connection) -> int:
+        count = 0
+        for filepath in sorted(self.history_dir.glob("game_*")):  # 文件名带时间戳，按保存顺序收录
+            if GameHistory.file_format(str(filepath)) is None:
+                continue
+            try:
+                data = GameHistory.read_header(str(filepath))
+                self._upsert(conn, GameHistory.summary_of(data, str(filepath)))
+                count += 1
+            except Exception as e:
+                logger.warning("读取历史记录文件失败 %s: %s", filepath, e)
+        return count
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, summary: Dict[str, Any]):
+        seq = conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM histories').fetchone()[0]
+        conn.execute('''
+            INSERT OR REPLACE INTO histories
+            (game_id, seq, filepath, room_id, players, winner, start_time, end_time, total_turns)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            summary["game_id"], seq, summary["filepath"], summary["room_id"],
+            json.dumps(summary["players"], ensure_ascii=False), summary["winner"],
+            summary["start_time"], summary["end_time"], summary["total_turns"]
+        ))
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "game_id": row["game_id"],
+            "room_id": row["room_id"],
+            "players": json.loads(row["players"]),
+            "winner": row["winner"],
+            "start_time": row["start_time"],
+            "end_time": row["end_time"],
+            "total_turns": row["total_turns"],
+            "filepath": row["filepath"]
+        }
+
 
 class GameHistory:
     """游戏历史记录类"""
     
-    def __init__(self, game_id: str, room_id: str, players: List[str], victory_points_goal: int):
+    def __init__(self, game_id: str, room_id: str, players: List[str], victory_points_goal: int,
+                 seed: Optional[int] = None):
         """
         初始化游戏历史
         
         Args:
             game_id: 游戏唯一ID（使用时间戳）
             room_id: 房间ID
-            players: 玩家列表
+            players: 玩家列表（座位顺序）
             victory_points_goal: 胜利分数目标
+            seed: 对局种子（同一种子+座位顺序可复现发牌和AI决策）
         """
         self.game_id = game_id
         self.room_id = room_id
         self.players = players
         self.victory_points_goal = victory_points_goal
+        self.seed = seed
         self.start_time = datetime.now().isoformat()
         self.end_time = None
         self.winner = None
@@ -128,6 +547,7 @@ class GameHistory:
             "room_id": self.room_id,
             "players": self.players,
             "victory_points_goal": self.victory_points_goal,
+            "seed": self.seed,
             "start_time": self.start_time,
             "end_time": self.end_time,
             "winner": self.winner,
@@ -137,30 +557,36 @@ class GameHistory:
             "final_rankings": getattr(self, 'final_rankings', [])
         }
     
-    def save_to_file(self, history_dir: str = "game_history") -> str:
+    def save_to_file(self, history_dir: str = "game_history", fmt: str = FORMAT_JSON) -> str:
         """
         保存历史记录到文件
         
         Args:
             history_dir: 历史记录目录
+            fmt: 文件格式（FORMAT_JSON整局JSON / FORMAT_TURNS逐回合随机访问 / FORMAT_COMPACT紧凑压缩）
             
         Returns:
             保存的文件路径
         """
-        # 创建历史记录目录
+        filepath = self.new_filepath(self.game_id, history_dir, fmt)
+        self.save_data(filepath, self.to_dict(), fmt)
+        return filepath
+    
+    @staticmethod
+    def new_filepath(game_id: str, history_dir: str = "game_history", fmt: str = FORMAT_JSON) -> str:
+        """生成新历史文件的路径：game_YYYYMMDD_HHMMSS_gameid.<格式后缀>（会创建目录）"""
+        if fmt not in FORMAT_SUFFIXES:
+            raise ValueError(f"未知的历史文件格式: {fmt}")
         history_path = Path(history_dir)
         history_path.mkdir(exist_ok=True)
-        
-        # 生成文件名：game_YYYYMMDD_HHMMSS_gameid.json
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"game_{timestamp}_{self.game_id}.json"
-        filepath = history_path / filename
-        
-        # 保存为JSON
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
-        
-        return str(filepath)
+        return str(history_path / f"game_{timestamp}_{game_id}{FORMAT_SUFFIXES[fmt]}")
+    
+    @staticmethod
+    def save_data(filepath: str, data: Dict[str, Any], fmt: str = FORMAT_JSON):
+        """把整局字典写到filepath并更新所在目录的索引（重复写同一路径是安全的）"""
+        GameHistory.write_data(filepath, data, fmt)
+        HistoryIndex.for_dir(os.path.dirname(filepath) or ".").add(GameHistory.summary_of(data, filepath))
     
     @staticmethod
     def load_from_file(filepath: str) -> 'GameHistory':
@@ -173,15 +599,15 @@ class GameHistory:
         Returns:
             GameHistory对象
         """
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = GameHistory.read_data(filepath)
         
         # 重建GameHistory对象
         history = GameHistory(
             game_id=data["game_id"],
             room_id=data["room_id"],
             players=data["players"],
-            victory_points_goal=data["victory_points_goal"]
+            victory_points_goal=data["victory_points_goal"],
+            seed=data.get("seed")
         )
         history.start_time = data["start_time"]
         history.end_time = data["end_time"]
@@ -192,6 +618,121 @@ class GameHistory:
         
         return history
     
+    @staticmethod
+    def file_format(filepath: str) -> Optional[str]:
+        """按后缀判断历史文件格式，不是历史文件时返回None"""
+        for fmt, suffix in FORMAT_SUFFIXES.items():
+            if filepath.endswith(suffix):
+                return fmt
+        return None
+    
+    @staticmethod
+    def write_data(filepath: str, data: Dict[str, Any], fmt: str = FORMAT_JSON):
+        """把历史记录字典写成指定格式的文件"""
+        if fmt == FORMAT_TURNS:
+            TurnFile.write(filepath, data)
+        elif fmt == FORMAT_COMPACT:
+            with open(filepath, 'wb') as f:
+                f.write(CompactCodec.encode(data))
+        else:
+            with open(filepath, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+    
+    @staticmethod
+    def read_data(filepath: str) -> Dict[str, Any]:
+        """读取历史文件的完整字典（任意格式）"""
+        fmt = GameHistory.file_format(filepath)
+        if fmt == FORMAT_TURNS:
+            return TurnFile.read_all(filepath)
+        if fmt == FORMAT_COMPACT:
+            with open(filepath, 'rb') as f:
+                return CompactCodec.decode(f.read())
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    @staticmethod
+    def convert_file(filepath: str, fmt: str, remove_source: bool = False) -> str:
+        """
+        把历史文件转换为另一种格式（同一目录，文件名只换后缀），索引指向新文件
+        
+        Returns:
+            新文件路径
+        """
+        source_fmt = GameHistory.file_format(filepath)
+        if source_fmt is None or fmt not in FORMAT_SUFFIXES:
+            raise ValueError(f"无法转换: {filepath} -> {fmt}")
+        if source_fmt == fmt:
+            return filepath
+        target = filepath[:-len(FORMAT_SUFFIXES[source_fmt])] + FORMAT_SUFFIXES[fmt]
+        data = GameHistory.read_data(filepath)
+        GameHistory.write_data(target, data, fmt)
+        HistoryIndex.for_dir(os.path.dirname(target) or ".").add(GameHistory.summary_of(data, target))
+        if remove_source:
+            os.remove(filepath)
+        return target
+    
+    @staticmethod
+    def read_header(filepath: str) -> Dict[str, Any]:
+        """读取历史文件中除turns外的字段（逐回合格式只读第1行）"""
+        if GameHistory.file_format(filepath) == FORMAT_TURNS:
+            return TurnFile.read_header(filepath)
+        data = GameHistory.read_data(filepath)
+        data.pop("turns", None)
+        return data
+    
+    @staticmethod
+    def read_outline(filepath: str) -> Dict[str, Any]:
+        """读取历史概要：除turns外的字段 + 每回合只含回合号和玩家（复盘页按需再取回合）"""
+        if GameHistory.file_format(filepath) == FORMAT_TURNS:
+            return TurnFile.read_outline(filepath)
+        data = GameHistory.read_data(filepath)
+        data["turns"] = [{"turn": turn.get("turn"), "player": turn.get("player")} for turn in data["turns"]]
+        return data
+    
+    @staticmethod
+    def read_turn(filepath: str, turn_number: int) -> Optional[Dict[str, Any]]:
+        """读取指定回合号的回合（逐回合格式直接定位），不存在时返回None"""
+        if GameHistory.file_format(filepath) == FORMAT_TURNS:
+            return TurnFile.read_turn(filepath, turn_number)
+        for turn in GameHistory.read_data(filepath)["turns"]:
+            if turn['turn'] == turn_number:
+                return turn
+        return None
+    
+    @staticmethod
+    def summary_of(data: Dict[str, Any], filepath: str) -> Dict[str, Any]:
+        """从历史记录字典提取摘要信息（列表和索引使用）"""
+        return {
+            "game_id": data["game_id"],
+            "room_id": data["room_id"],
+            "players": data["players"],
+            "winner": data["winner"],
+            "start_time": data["start_time"],
+            "end_time": data["end_time"],
+            "total_turns": data["total_turns"],
+            "filepath": filepath
+        }
+    
+    @staticmethod
+    def find_history(game_id: str, history_dir: str = "game_history") -> Optional[Dict[str, Any]]:
+        """按game_id查找历史记录摘要（走索引，不打开历史文件）"""
+        if not Path(history_dir).exists():
+            return None
+        return HistoryIndex.for_dir(history_dir).get(game_id)
+    
+    @staticmethod
+    def list_histories(offset: int = 0, limit: Optional[int] = None,
+                       history_dir: str = "game_history") -> Tuple[List[Dict[str, Any]], int]:
+        """
+        分页列出历史记录（最新保存的在前）
+        
+        Returns:
+            (本页摘要列表, 总数)
+        """
+        if not Path(history_dir).exists():
+            return [], 0
+        return HistoryIndex.for_dir(history_dir).list(offset, limit)
+    
     @staticmethod
     def list_all_histories(history_dir: str = "game_history") -> List[Dict[str, Any]]:
         """
@@ -203,32 +744,7 @@ class GameHistory:
         Returns:
             历史记录摘要列表
         """
-        history_path = Path(history_dir)
-        if not history_path.exists():
-            return []
-        
-        histories = []
-        for filepath in sorted(history_path.glob("game_*.json"), reverse=True):
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # 只返回摘要信息
-                histories.append({
-                    "game_id": data["game_id"],
-                    "room_id": data["room_id"],
-                    "players": data["players"],
-                    "winner": data["winner"],
-                    "start_time": data["start_time"],
-                    "end_time": data["end_time"],
-                    "total_turns": data["total_turns"],
-                    "filepath": str(filepath)
-                })
-            except Exception as e:
-                print(f"读取历史记录文件失败 {filepath}: {e}")
-                continue
-        
-        return histories
+        return GameHistory.list_histories(history_dir=history_dir)[0]
     
     def get_summary(self) -> Dict[str, Any]:
         """获取游戏摘要"""
@@ -255,3 +771,17 @@ class GameHistory:
         except:
             return None
 
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="历史记录文件格式转换")
+    parser.add_argument("files", nargs="+", help="历史文件（.json / .jsonl / .hist.gz）")
+    parser.add_argument("--format", default=FORMAT_COMPACT, choices=sorted(FORMAT_SUFFIXES), help="目标格式")
+    parser.add_argument("--remove-source", action="store_true", help="转换后删除原文件")
+    args = parser.parse_args()
+
+    for source in args.files:
+        source_size = os.path.getsize(source)
+        target = GameHistory.convert_file(source, args.format, args.remove_source)
+        print(f"✅ {source} -> {target}（{source_size} → {os.path.getsize(target)} 字节）")
@@ -0,0 +1,44 @@
+"""
+对局牌面序列化 - 房间状态接口和复盘重演共用同一份字段
+"""
+from typing import Any, Dict
+
+from splendor_pokemon import SplendorPokemonGame, balls_to_json
+from card_catalog import get_card_catalog
+
+
+def board_state(game: SplendorPokemonGame) -> Dict[str, Any]:
+    """对局的完整牌面：当前玩家、胜负、球池、场面、牌堆数量、稀有/传说和每个玩家的状态"""
+    payloads = get_card_catalog().payloads  # 卡牌片段在目录加载时已拼好，这里只引用
+    return {
+        "current_player": game.get_current_player().name,
+        "game_over": game.game_over,
+        "winner": game.winner.name if game.winner else None,
+        "rankings": game.get_final_rankings() if game.game_over else None,
+        "final_round": game.final_round_triggered,
+        "ball_pool": game.ball_pool.to_json(),
+        "tableau": {
+            str(tier): [payloads.card(card) for card in cards]
+            for tier, cards in game.tableau.items()
+        },
+        "lv1_deck_size": len(game.deck_lv1),
+        "lv2_deck_size": len(game.deck_lv2),
+        "lv3_deck_size": len(game.deck_lv3),
+        "rare_deck_size": len(game.rare_deck),
+        "legendary_deck_size": len(game.legendary_deck),
+        "rare_card": payloads.special(game.rare_card) if game.rare_card else None,
+        "legendary_card": payloads.special(game.legendary_card) if game.legendary_card else None,
+        "player_states": {
+            player.name: {
+                "balls": player.balls.to_json(skip_zero=True),
+                "display_area": [payloads.card(card) for card in player.display_area],
+                "reserved_cards": [payloads.reserved(card) for card in player.reserved_cards],
+                "victory_points": player.get_victory_points(),
+                "permanent_balls": balls_to_json(player.get_permanent_balls()),
+                "needs_return_balls": player.needs_return_balls,
+                "last_action": player.last_action,
+                "has_left": player.has_left
+            }
+            for player in game.players
+        }
+    }
@@ -0,0 +1,204 @@
+"""
+历史记录后台持久化 - 一局结束后的文件写入和数据库记录交给一个写入线程
+请求线程只把整局快照放进队列就返回，最后一步和其他操作一样快；
+写入线程先把任务落盘到spool目录，再写历史文件、在一个事务里批量写参与记录，
+失败按退避重试，成功后删除spool文件。进程崩溃后留在spool里的任务在下次启动时重放。
+"""
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from game_history import GameHistory, FORMAT_JSON
+from game_logging import get_logger
+
+logger = get_logger("history")
+
+SPOOL_SUFFIX = ".job.json"
+
+
+class HistoryWriter:
+    """历史记录写入队列
+
+    - submit: 提交一局的整局字典和参与记录，立即返回任务ID
+    - recover: 重放spool目录中未完成的任务（启动时调用）
+    - flush: 等待队列写完（测试和退出时使用）
+    - 同一任务重试时复用第一次生成的文件路径，数据库写入按(game_id, player_name)去重，重放是安全的
+    """
+
+    def __init__(self, db=None, spool_dir: str = os.path.join("game_history", "spool"),
+                 max_attempts: int = 5, retry_delay: float = 0.5):
+        """
+        Args:
+            db: 提供record_game_participations的数据库对象，None表示不写数据库
+            spool_dir: 待写任务的落盘目录
+            max_attempts: 每个任务最多尝试次数，用尽后留在spool中等下次启动重放
+            retry_delay: 首次重试前的等待秒数，之后每次翻倍
+        """
+        self.db = db
+        self.spool_dir = spool_dir
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._condition = threading.Condition()
+        self._jobs: Deque[Dict[str, Any]] = deque()
+        self._busy = False
+        self._stopped = False
+        self._stats = {"submitted": 0, "written": 0, "retries": 0, "failed": 0, "recovered": 0}
+        self._worker = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._worker.start()
+
+    def submit(self, data: Dict[str, Any], participations: Optional[List[Dict[str, Any]]] = None,
+               history_dir: str = "game_history", fmt: str = FORMAT_JSON) -> str:
+        """
+        提交一局历史记录，提交时复制一份快照，之后调用方继续修改原对象不影响写入的内容
+
+        Args:
+            data: GameHistory.to_dict()的结果
+            participations: 要写入数据库的参与记录（字段同record_game_participation，game_history_file除外）
+            history_dir: 历史记录目录
+            fmt: 文件格式
+
+        Returns:
+            任务ID
+        """
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "history_dir": history_dir,
+            "fmt": fmt,
+            "filepath": None,
+            "data": copy.deepcopy(data),
+            "participations": copy.deepcopy(list(participations or [])),
+        }
+        self._enqueue(job)
+        with self._condition:
+            self._stats["submitted"] += 1
+        return job["job_id"]
+
+    def recover(self) -> int:
+        """把spool目录中未完成的任务重新放入队列，返回任务数"""
+        if not os.path.isdir(self.spool_dir):
+            return 0
+        count = 0
+        for name in sorted(os.listdir(self.spool_dir)):
+            if not name.endswith(SPOOL_SUFFIX):
+                continue
+            path = os.path.join(self.spool_dir, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error("无法读取spool任务 %s: %s", path, e)
+                os.replace(path, path + ".bad")
+                continue
+            job["_spooled"] = True
+            self._enqueue(job)
+            count += 1
+        if count:
+            with self._condition:
+                self._stats["recovered"] += count
+            logger.warning("重放 %d 个未完成的历史记录写入任务", count)
+        return count
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已提交的任务全部处理完（成功或用尽重试），超时返回False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._jobs or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """处理完队列后停止写入线程；未完成的任务仍在spool中"""
+        done = self.flush(timeout)
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        return done
+
+    def stats(self) -> Dict[str, int]:
+        """写入统计（健康检查用）"""
+        with self._condition:
+            return dict(self._stats, queued=len(self._jobs) + (1 if self._busy else 0))
+
+    def _enqueue(self, job: Dict[str, Any]):
+        with self._condition:
+            self._jobs.append(job)
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._jobs and not self._stopped:
+                    self._condition.wait()
+                if not self._jobs:
+                    return
+                job = self._jobs.popleft()
+                self._busy = True
+            try:
+                self._process(job)
+            except Exception as e:
+                logger.exception("历史记录写入线程异常（任务 %s）: %s", job.get("job_id"), e)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _process(self, job: Dict[str, Any]):
+        spooled = job.pop("_spooled", False)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if not spooled:
+                    self._spool(job)
+                    spooled = True
+                self._persist(job)
+                break
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    with self._condition:
+                        self._stats["failed"] += 1
+                    if spooled:
+                        logger.error("历史记录 %s 写入失败（已尝试%d次），保留在spool中等待重放: %s",
+                                     job["data"].get("game_id"), attempt, e)
+                    else:
+                        logger.error("历史记录 %s 无法写入spool（已尝试%d次），任务丢失: %s",
+                                     job["data"].get("game_id"), attempt, e)
+                    return
+                with self._condition:
+                    self._stats["retries"] += 1
+                logger.warning("历史记录 %s 第%d次写入失败，稍后重试: %s", job["data"].get("game_id"), attempt, e)
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+        os.remove(self._spool_path(job))
+        with self._condition:
+            self._stats["written"] += 1
+
+    def _persist(self, job: Dict[str, Any]):
+        """写历史文件和数据库；文件路径第一次生成后写回spool，重试和重放都写同一个文件"""
+        if job["filepath"] is None:
+            job["filepath"] = GameHistory.new_filepath(job["data"]["game_id"], job["history_dir"], job["fmt"])
+            self._spool(job)
+        GameHistory.save_data(job["filepath"], job["data"], job["fmt"])
+        if self.db is not None and job["participations"]:
+            self.db.record_game_participations(
+                [dict(record, game_history_file=job["filepath"]) for record in job["participations"]]
+            )
+
+    def _spool_path(self, job: Dict[str, Any]) -> str:
+        return os.path.join(self.spool_dir, job["job_id"] + SPOOL_SUFFIX)
+
+    def _spool(self, job: Dict[str, Any]):
+        """原子地写入spool文件（先写临时文件并fsync，再改名）"""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = self._spool_path(job)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
@@ -0,0 +1,180 @@
+"""
+对局重演 - 按历史记录的种子和动作日志重新执行对局，得到任意回合结束时的完整牌面
+每keyframe_interval回合缓存一个关键帧（对局副本），跳到第N回合只需从最近的关键帧重演不超过K个回合；
+对局进行中不需要保存整局牌面，历史记录里的动作日志就是全部输入
+"""
+import threading
+from typing import Any, Dict, List
+
+from splendor_pokemon import BallType, SplendorPokemonGame
+from game_history import GameHistory
+from game_state import board_state
+
+KEYFRAME_INTERVAL = 10  # 默认每10回合一个关键帧
+ACTION_SEPARATOR = " ║ "  # 同一回合多个动作说明之间的分隔符（与对局中的last_action一致）
+
+
+class ReplayError(Exception):
+    """历史记录无法重演（没有种子、初始牌面或动作结果与记录不一致）"""
+
+
+class ReplayEngine:
+    """历史记录重演器
+
+    - 用记录的座位顺序、胜利分数和种子新建对局，先核对初始牌面与记录一致
+    - 按顺序执行每回合成功的动作，回合有结束记录（states_after）时调用end_turn，并核对球池
+    - 关键帧按需生成，线程安全；返回的牌面中last_action为记录的动作说明
+    """
+
+    def __init__(self, data: Dict[str, Any], keyframe_interval: int = KEYFRAME_INTERVAL):
+        """
+        Args:
+            data: 整局历史字典（GameHistory.to_dict()或read_data的结果）
+            keyframe_interval: 关键帧间隔（回合数）
+        """
+        if data.get("seed") is None:
+            raise ReplayError("历史记录没有对局种子，无法重演")
+        self.game_id = data.get("game_id")
+        self.turns: List[Dict[str, Any]] = data.get("turns") or []
+        self.keyframe_interval = max(1, keyframe_interval)
+
+        game = SplendorPokemonGame(list(data["players"]), victory_points=data["victory_points_goal"],
+                                   seed=data["seed"])
+        game.quiet = True
+        self._check_initial(game, data.get("initial_state") or {})
+        self._keyframes: Dict[int, SplendorPokemonGame] = {0: game}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, filepath: str, keyframe_interval: int = KEYFRAME_INTERVAL) -> 'ReplayEngine':
+        """从历史文件（任意格式）创建"""
+        return cls(GameHistory.read_data(filepath), keyframe_interval)
+
+    @property
+    def total_turns(self) -> int:
+        return len(self.turns)
+
+    def game_at(self, turn: int) -> SplendorPokemonGame:
+        """第turn回合结束时的对局（0为开局），返回独立副本"""
+        if not 0 <= turn <= len(self.turns):
+            raise IndexError(f"回合{turn}不存在")
+        with self._lock:
+            base = self._ensure_keyframes(turn)
+            game = self._keyframes[base].clone()
+        for number in range(base + 1, turn + 1):
+            self._apply_turn(game, number)
+        return game
+
+    def state_at(self, turn: int) -> Dict[str, Any]:
+        """第turn回合结束时的完整牌面（字段同房间状态中的牌面部分）"""
+        return board_state(self.game_at(turn))
+
+    def keyframe_count(self) -> int:
+        """已生成的关键帧数（含开局）"""
+        with self._lock:
+            return len(self._keyframes)
+
+    def _ensure_keyframes(self, turn: int) -> int:
+        """生成turn之前的所有关键帧，返回不超过turn的最近关键帧回合号（需持有锁）"""
+        base = turn - turn % self.keyframe_interval
+        last = max(self._keyframes)
+        if base > last:
+            game = self._keyframes[last].clone()
+            for number in range(last + 1, base + 1):
+                self._apply_turn(game, number)
+                if number % self.keyframe_interval == 0:
+                    self._keyframes[number] = game.clone()
+        return base
+
+    @staticmethod
+    def _check_initial(game: SplendorPokemonGame, initial_state: Dict[str, Any]):
+        """核对种子发出的初始场面与记录一致（不一致说明记录来自不同的发牌逻辑）"""
+        tableau = initial_state.get("tableau")
+        if not tableau:
+            return
+        for tier, cards in game.tableau.items():
+            recorded = [card.get("card_id") for card in tableau.get(str(tier), [])]
+            if recorded != [card.card_id for card in cards]:
+                raise ReplayError("按种子发出的初始场面与记录不一致，无法重演")
+
+    def _apply_turn(self, game: SplendorPokemonGame, number: int):
+        """重演第number回合（从1开始）"""
+        entry = self.turns[number - 1]
+        player = game.get_current_player()
+        if entry.get("player") != player.name:
+            raise ReplayError(f"第{number}回合应由{player.name}行动，记录为{entry.get('player')}")
+
+        player.last_action = ""
+        for action in entry.get("actions", []):
+            if not action.get("result"):
+                continue  # 失败的动作不改变对局
+            try:
+                applied = self._apply_action(game, action)
+            except (KeyError, TypeError, ValueError) as e:
+                raise ReplayError(f"第{number}回合的{action.get('type')}动作记录不完整: {e}")
+            if not applied:
+                raise ReplayError(f"第{number}回合的{action.get('type')}动作无法重演，记录与规则不一致")
+            if action.get("message") and action.get("type") != "player_left":
+                actor = game.get_current_player()
+                actor.last_action = (actor.last_action + ACTION_SEPARATOR if actor.last_action else "") + action["message"]
+
+        after = entry.get("states_after")
+        if after:
+            game.end_turn()
+            if "ball_pool" in after and after["ball_pool"] != game.ball_pool.to_json():
+                raise ReplayError(f"第{number}回合重演后的球池与记录不一致")
+
+    @staticmethod
+    def _apply_action(game: SplendorPokemonGame, action: Dict[str, Any]) -> bool:
+        """执行一个成功的动作（与对应接口的执行方式相同），返回是否执行成功"""
+        kind = action.get("type")
+        data = action.get("data") or {}
+        player = game.get_current_player()
+
+        if kind == "take_balls":
+            return game.take_balls([BallType(value) for value in data["ball_types"]])
+
+        if kind == "buy_card":
+            card = game.find_card_by_id(data["card"]["card_id"], player)
+            return card is not None and game.buy_card(card)
+
+        if kind == "reserve_card":
+            card_id = data["card"]["card_id"]
+            if data.get("blind"):
+                # 盲预购从牌堆顶取牌
+                deck = getattr(game, f"deck_lv{data['card']['level']}")
+                if not deck or deck[0].card_id != card_id:
+                    return False
+                card = deck.pop(0)
+            else:
+                card = game.find_card_by_id(card_id)
+            return card is not None and game.reserve_card(card)
+
+        if kind == "evolve_card":
+            base_id = data["base_card"]["card_id"]
+            base_card = next((card for card in player.display_area if card.card_id == base_id), None)
+            target_card = game.find_evolution_target(base_card, player) if base_card else None
+            if target_card is None or target_card.card_id != data["target_card"]["card_id"]:
+                return False
+            if not player.evolve(base_card, target_card):
+                return False
+            game.take_card(target_card, player)
+            return True
+
+        if kind == "return_balls":
+            return game.return_balls({BallType(value): amount for value, amount in data["balls_returned"].items()})
+
+        if kind == "player_left":
+            leaving = next((p for p in game.players if p.name == data["player"]), None)
+            if leaving is None:
+                return False
+            leaving.has_left = True
+            leaving.last_action = "🚪 已退出游戏"
+            return True
+
+        if kind == "game_aborted":
+            game.game_over = True
+            game._calculate_final_rankings()
+            return True
+
+        raise ReplayError(f"未知的动作类型: {kind}")
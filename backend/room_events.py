@@ -0,0 +1,107 @@
+"""
+房间事件推送 - 为每个房间提供服务端推送通道（Server-Sent Events）
+状态变更后由接口发布一次序列化好的状态，所有订阅者共享同一份数据，不再各自轮询
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+
+class _RoomChannel:
+    """单个房间的推送通道"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.seq = 0  # 每发布一次+1
+        self.payload: Optional[str] = None  # 最近一次发布的状态（JSON字符串）
+        self.closed = False  # 房间已删除
+        self.subscribers = 0
+
+
+class RoomEventBroker:
+    """房间事件代理
+
+    - publish: 状态变更后发布最新状态（只保留最新一份，慢订阅者会直接跳到最新状态）
+    - wait: 订阅者阻塞等待比 last_seq 更新的状态
+    - close: 房间删除时唤醒所有订阅者并结束推送
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels: Dict[str, _RoomChannel] = {}
+
+    def _get_channel(self, room_id: str) -> _RoomChannel:
+        with self._lock:
+            channel = self._channels.get(room_id)
+            if channel is None:
+                channel = _RoomChannel()
+                self._channels[room_id] = channel
+            return channel
+
+    def has_subscribers(self, room_id: str) -> bool:
+        """房间是否有订阅者（没有订阅者时无需序列化状态）"""
+        with self._lock:
+            channel = self._channels.get(room_id)
+            return channel is not None and channel.subscribers > 0
+
+    def subscriber_count(self) -> int:
+        """所有房间的订阅者总数"""
+        with self._lock:
+            return sum(channel.subscribers for channel in self._channels.values())
+
+    def subscribe(self, room_id: str) -> int:
+        """登记订阅者，返回当前seq"""
+        channel = self._get_channel(room_id)
+        with channel.condition:
+            channel.subscribers += 1
+            return channel.seq
+
+    def unsubscribe(self, room_id: str):
+        """注销订阅者，房间无订阅者时回收通道"""
+        with self._lock:
+            channel = self._channels.get(room_id)
+            if channel is None:
+                return
+            with channel.condition:
+                channel.subscribers -= 1
+                if channel.subscribers <= 0:
+                    del self._channels[room_id]
+
+    def publish(self, room_id: str, payload: str):
+        """发布房间最新状态"""
+        with self._lock:
+            channel = self._channels.get(room_id)
+        if channel is None:
+            return
+        with channel.condition:
+            channel.seq += 1
+            channel.payload = payload
+            channel.condition.notify_all()
+
+    def close(self, room_id: str):
+        """关闭房间通道（房间已删除）"""
+        with self._lock:
+            channel = self._channels.pop(room_id, None)
+        if channel is None:
+            return
+        with channel.condition:
+            channel.closed = True
+            channel.condition.notify_all()
+
+    def wait(self, room_id: str, last_seq: int, timeout: float) -> Tuple[int, Optional[str], bool]:
+        """
+        等待新状态
+
+        Returns:
+            (seq, payload, closed) - 超时未变化时seq等于last_seq、payload为None
+        """
+        with self._lock:
+            channel = self._channels.get(room_id)
+        if channel is None:
+            return last_seq, None, True
+        with channel.condition:
+            channel.condition.wait_for(lambda: channel.closed or channel.seq != last_seq, timeout=timeout)
+            if channel.closed:
+                return channel.seq, None, True
+            if channel.seq == last_seq:
+                return last_seq, None, False
+            return channel.seq, channel.payload, False
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡牌目录 - 进程级共享的只读卡牌库
+cards_data.csv 在每个进程中只解析、校验一次，引擎、AI和API共享同一份不可变的PokemonCard记录
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from splendor_pokemon import BallType, PokemonCard, Rarity, balls_to_json, load_cards_from_csv
+from game_logging import get_logger
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'card_library', 'cards_data.csv')
+
+logger = get_logger("catalog")
+
+
+class CardCatalog:
+    """卡牌目录（只读）
+
+    索引：
+    - by_id: card_id -> PokemonCard
+    - by_name: 卡牌名称 -> 同名卡牌元组（同名卡可能有多张）
+    - by_level: 等级 -> 该等级卡牌元组（按card_id排序）
+    - by_rarity: 稀有度 -> 该稀有度卡牌元组（按card_id排序）
+    - features: 卡牌静态特征表（AI评分用）
+    - evolution: 进化图（基础卡 -> 进化目标卡）
+    - payloads: 卡牌的API片段（状态序列化用）
+    """
+
+    def __init__(self, cards: List[PokemonCard]):
+        self.validate(cards)
+
+        self.cards: Tuple[PokemonCard, ...] = tuple(sorted(cards, key=lambda c: c.card_id))
+        self.by_id: Dict[int, PokemonCard] = {card.card_id: card for card in self.cards}
+
+        by_name: Dict[str, List[PokemonCard]] = {}
+        by_level: Dict[int, List[PokemonCard]] = {}
+        by_rarity: Dict[Rarity, List[PokemonCard]] = {rarity: [] for rarity in Rarity}
+        for card in self.cards:
+            by_name.setdefault(card.name, []).append(card)
+            by_level.setdefault(card.level, []).append(card)
+            by_rarity[card.rarity].append(card)
+
+        self.by_name: Dict[str, Tuple[PokemonCard, ...]] = {k: tuple(v) for k, v in by_name.items()}
+        self.by_level: Dict[int, Tuple[PokemonCard, ...]] = {k: tuple(v) for k, v in by_level.items()}
+        self.by_rarity: Dict[Rarity, Tuple[PokemonCard, ...]] = {k: tuple(v) for k, v in by_rarity.items()}
+        self.features = CardFeatures(self)
+        self.evolution = EvolutionGraph(self)
+        self.payloads = CardPayloads(self)
+
+    @staticmethod
+    def validate(cards: List[PokemonCard]):
+        """校验卡牌数据，数据有误时抛出ValueError"""
+        seen_ids = set()
+        names = {card.name for card in cards}
+        for card in cards:
+            if card.card_id in seen_ids:
+                raise ValueError(f"卡牌ID重复: {card.card_id}")
+            seen_ids.add(card.card_id)
+
+            if card.level not in (1, 2, 3, 4, 5):
+                raise ValueError(f"卡牌等级无效: {card.name}(ID={card.card_id}) level={card.level}")
+
+            if any(amount < 0 for amount in card.cost.values()):
+                raise ValueError(f"卡牌成本为负: {card.name}(ID={card.card_id})")
+
+            if card.evolution and card.evolution.target_name not in names:
+                raise ValueError(f"进化目标不存在: {card.name} → {card.evolution.target_name}")
+
+    @classmethod
+    def from_csv(cls, csv_path: str = CSV_PATH) -> 'CardCatalog':
+        """从CSV文件构建卡牌目录"""
+        return cls(load_cards_from_csv(csv_path))
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def get(self, card_id: int) -> Optional[PokemonCard]:
+        """根据card_id获取卡牌"""
+        return self.by_id.get(card_id)
+
+    def owns(self, card: PokemonCard) -> bool:
+        """是否为目录中的卡牌（跨进程传递或深拷贝后内容相同也算；测试/调试接口临时构造的卡牌不算）"""
+        known = self.by_id.get(card.card_id)
+        return known is card or (known is not None and known == card)
+
+    def cards_by_name(self, name: str) -> Tuple[PokemonCard, ...]:
+        """根据名称获取所有同名卡牌"""
+        return self.by_name.get(name, ())
+
+    def cards_by_level(self, level: int) -> Tuple[PokemonCard, ...]:
+        """获取指定等级的所有卡牌"""
+        return self.by_level.get(level, ())
+
+    def cards_by_rarity(self, rarity: Rarity) -> Tuple[PokemonCard, ...]:
+        """获取指定稀有度的所有卡牌"""
+        return self.by_rarity.get(rarity, ())
+
+    def ids_by_level(self, level: int) -> List[int]:
+        """获取指定等级的所有card_id（新列表，可直接洗牌）"""
+        return [card.card_id for card in self.cards_by_level(level)]
+
+
+class CardFeatures:
+    """卡牌静态特征表 - 每个目录只计算一次，按card_id索引的并行数组
+
+    AI每回合只需把这些特征和玩家当前的手上球/永久球向量组合，不再逐张重算：
+    - cost_total: 购买成本合计（含大师球）
+    - cost_slots: 有彩色成本的槽位（按card.cost的顺序），计算缺口时只看这些槽位
+    - permanent_total: 提供的永久球合计
+    - point_weight: 胜利点数+1（拿球需求、目标卡评分的权重）
+    - buy_value: 购买评分（分数×10 + 等级×2 + 永久球×3）
+    - evolution_stages: 进化链剩余阶段数（0表示不能进化）
+
+    目录外的卡牌（测试或调试接口临时构造的）首次查询时按对象追加到表尾
+    """
+
+    def __init__(self, catalog: CardCatalog):
+        self._catalog = catalog
+        size = max((card.card_id for card in catalog.cards), default=0) + 1
+        self.cards: List[Optional[PokemonCard]] = [None] * size
+        self.cost_total: List[int] = [0] * size
+        self.cost_slots: List[Tuple[int, ...]] = [()] * size
+        self.permanent_total: List[int] = [0] * size
+        self.point_weight: List[int] = [0] * size
+        self.buy_value: List[int] = [0] * size
+        self.evolution_stages: List[int] = [0] * size
+        self._stages_by_name: Dict[str, int] = {}
+        self._extra_rows: Dict[int, int] = {}  # id(目录外卡牌) -> 行号
+        self._lock = threading.Lock()
+        for card in catalog.cards:
+            self._fill(card.card_id, card)
+
+    def row(self, card: PokemonCard) -> int:
+        """卡牌在特征表中的行号（目录卡牌即card_id）"""
+        card_id = card.card_id
+        if 0 <= card_id < len(self.cards) and self.cards[card_id] is card:
+            return card_id  # 目录卡牌深拷贝和跨进程传递后仍是同一个对象
+        return self._extra_row(card)
+
+    def ball_gap(self, row: int, hand, permanent) -> int:
+        """购买该行卡牌还差的彩色球总数（与Player.get_ball_gap一致，只遍历有成本的槽位）"""
+        cost = self.cards[row].cost_vector
+        gap = 0
+        for slot in self.cost_slots[row]:
+            short = cost[slot] - permanent[slot] - hand[slot]
+            if short > 0:
+                gap += short
+        return gap
+
+    def shortfall(self, row: int, hand, permanent) -> List[Tuple[int, int]]:
+        """该行卡牌各颜色还差的球数，只列出缺球的槽位：[(槽位, 缺口)]，按card.cost的顺序"""
+        cost = self.cards[row].cost_vector
+        result = []
+        for slot in self.cost_slots[row]:
+            short = cost[slot] - permanent[slot] - hand[slot]
+            if short > 0:
+                result.append((slot, short))
+        return result
+
+    def _extra_row(self, card: PokemonCard) -> int:
+        with self._lock:
+            row = self._extra_rows.get(id(card))
+            if row is None:  # 表中保留卡牌引用，id不会被复用
+                row = len(self.cards)
+                for column in (self.cards, self.cost_total, self.cost_slots, self.permanent_total,
+                               self.point_weight, self.buy_value, self.evolution_stages):
+                    column.append(None)
+                self._fill(row, card)
+                self._extra_rows[id(card)] = row
+            return row
+
+    def _fill(self, row: int, card: PokemonCard):
+        self.cards[row] = card
+        self.cost_total[row] = sum(card.cost.values())
+        self.cost_slots[row] = tuple(ball.slot for ball, amount in card.cost.items()
+                                     if ball != BallType.MASTER and amount > 0)
+        self.permanent_total[row] = sum(card.permanent_balls.values())
+        self.point_weight[row] = card.victory_points + 1
+        self.buy_value[row] = card.victory_points * 10 + card.level * 2 + self.permanent_total[row] * 3
+        self.evolution_stages[row] = self._evolution_stages(card, set())
+
+    def _evolution_stages(self, card: PokemonCard, visiting: set) -> int:
+        if not card.evolution:
+            return 0
+        target = card.evolution.target_name
+        if target not in self._stages_by_name:
+            if target in visiting:  # 数据成环时截断
+                return 1
+            visiting.add(target)
+            self._stages_by_name[target] = max((self._evolution_stages(evolved, visiting)
+                                                for evolved in self._catalog.cards_by_name(target)), default=0)
+        return 1 + self._stages_by_name[target]
+
+
+class EvolutionGraph:
+    """进化图 - 目录加载时构建一次，按card_id索引
+
+    - targets: 基础卡card_id -> 进化目标card_id元组（同名目标可能有多张）
+    - required: 基础卡card_id -> 进化所需永久球向量（6槽位）
+    - bases: 目标卡card_id -> 能进化为它的基础卡card_id元组
+    """
+
+    def __init__(self, catalog: CardCatalog):
+        self._catalog = catalog
+        self.targets: Dict[int, Tuple[int, ...]] = {}
+        self.required: Dict[int, Tuple[int, ...]] = {}
+        bases: Dict[int, List[int]] = {}
+        for card in catalog.cards:
+            if not card.evolution:
+                continue
+            targets = tuple(target.card_id for target in catalog.cards_by_name(card.evolution.target_name))
+            self.targets[card.card_id] = targets
+            self.required[card.card_id] = card.evolution.required_vector
+            for target_id in targets:
+                bases.setdefault(target_id, []).append(card.card_id)
+        self.bases: Dict[int, Tuple[int, ...]] = {k: tuple(v) for k, v in bases.items()}
+
+    def covers(self, card: PokemonCard) -> bool:
+        """图中是否有这张卡（目录外的卡牌需要按名称查找进化目标）"""
+        return self._catalog.owns(card)
+
+    def can_reach(self, card: PokemonCard, permanent) -> bool:
+        """永久球向量是否满足该卡的进化门槛（不能进化的卡返回False）"""
+        required = self.required.get(card.card_id)
+        if required is None:
+            return False
+        for slot, amount in enumerate(required):
+            if permanent[slot] < amount:
+                return False
+        return True
+
+
+class CardPayloads:
+    """卡牌的API片段 - 每个目录只构建一次，按card_id索引
+
+    卡牌不可变，状态序列化时直接引用这些字典，不再逐张拼装（调用方不能修改返回的字典）：
+    - card: 场上/展示区的卡牌（含稀有度和进化信息）
+    - reserved: 预购区的卡牌（不含稀有度）
+    - special: 稀有/传说卡（不含进化信息）
+
+    目录外的卡牌（测试或调试接口临时构造的）每次现拼，不缓存
+    """
+
+    def __init__(self, catalog: CardCatalog):
+        self._catalog = catalog
+        size = max((card.card_id for card in catalog.cards), default=0) + 1
+        self._cards: List[Optional[PokemonCard]] = [None] * size
+        self._card: List[Optional[Dict]] = [None] * size
+        self._reserved: List[Optional[Dict]] = [None] * size
+        self._special: List[Optional[Dict]] = [None] * size
+        for card in catalog.cards:
+            card_id = card.card_id
+            self._cards[card_id] = card
+            self._card[card_id], self._reserved[card_id], self._special[card_id] = self.build(card)
+
+    def card(self, card: PokemonCard) -> Dict:
+        """场上/展示区卡牌的片段"""
+        return self._lookup(card, self._card, 0)
+
+    def reserved(self, card: PokemonCard) -> Dict:
+        """预购区卡牌的片段"""
+        return self._lookup(card, self._reserved, 1)
+
+    def special(self, card: PokemonCard) -> Dict:
+        """稀有/传说卡的片段"""
+        return self._lookup(card, self._special, 2)
+
+    def _lookup(self, card: PokemonCard, column: List[Optional[Dict]], kind: int) -> Dict:
+        card_id = card.card_id
+        if 0 <= card_id < len(self._cards) and self._cards[card_id] is card:
+            return column[card_id]  # 目录卡牌深拷贝和跨进程传递后仍是同一个对象
+        return self.build(card)[kind]
+
+    @staticmethod
+    def build(card: PokemonCard) -> Tuple[Dict, Dict, Dict]:
+        """拼装一张卡的三种片段（字段顺序与API一致）"""
+        cost = balls_to_json(card.cost)
+        permanent = balls_to_json(card.permanent_balls)
+        # 进化信息（仅1/2级卡牌）
+        evolution_target = card.evolution.target_name if card.evolution else None
+        evolution_requirement = balls_to_json(card.evolution.required_balls) if card.evolution else None
+        full = {
+            "card_id": card.card_id,  # 唯一ID
+            "name": card.name,  # 显示名称
+            "level": card.level,
+            "rarity": card.rarity.value,
+            "cost": cost,
+            "victory_points": card.victory_points,
+            "permanent_balls": permanent,
+            "evolution_target": evolution_target,
+            "evolution_requirement": evolution_requirement
+        }
+        reserved = {key: value for key, value in full.items() if key != "rarity"}
+        special = {
+            "card_id": card.card_id,
+            "name": card.name,
+            "level": card.level,
+            "rarity": card.rarity.value,
+            "victory_points": card.victory_points,
+            "cost": cost,
+            "permanent_balls": permanent
+        }
+        return full, reserved, special
+
+
+_catalog: Optional[CardCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_card_catalog() -> CardCatalog:
+    """获取进程级卡牌目录（首次调用时加载）"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                catalog = CardCatalog.from_csv(CSV_PATH)
+                logger.info("✅ 卡牌目录已加载: 共%d张 (Lv1=%d, Lv2=%d, Lv3=%d, 稀有=%d, 传说=%d)", len(catalog),
+                            *(len(catalog.cards_by_level(level)) for level in range(1, 6)))
+                _catalog = catalog
+    return _catalog
+
+
+def is_catalog_card(card: PokemonCard) -> bool:
+    """是否为进程级卡牌目录中的卡牌对象本身（目录未加载时为False，不触发加载）"""
+    catalog = _catalog
+    return catalog is not None and catalog.by_id.get(card.card_id) is card
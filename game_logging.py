@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结构化分级日志 - 引擎、AI和卡牌目录的日志（替代print）
+
+- get_logger(name): 模块日志器（splendor.<name>）
+- 结构化字段 room_id/game_id/player/turn：调用方用 log_context(...) 绑定到当前上下文（线程/协程隔离），
+  单条日志也可以用 extra={"player": ...} 覆盖，未提供的字段输出为"-"
+- 未开启的级别是空操作：热点路径使用 %s 参数延迟格式化，或先判断 isEnabledFor
+- configure_logging(): 控制台 + 按大小轮转的日志文件，级别默认取环境变量
+  SPLENDOR_LOG_LEVEL（默认WARNING），文件默认取 SPLENDOR_LOG_FILE（未设置则不写文件）
+
+未调用configure_logging时只有WARNING及以上会输出到stderr（Python默认行为）
+"""
+
+import contextvars
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Optional, Union
+
+LOGGER_ROOT = "splendor"
+CONTEXT_FIELDS = ("room_id", "game_id", "player", "turn")
+LOG_FORMAT = ("%(asctime)s %(levelname)s %(name)s "
+              "[room=%(room_id)s game=%(game_id)s player=%(player)s turn=%(turn)s] %(message)s")
+LOG_MAX_BYTES = 10 * 1024 * 1024  # 单个日志文件上限
+LOG_BACKUP_COUNT = 5  # 保留的轮转文件数
+
+_context: contextvars.ContextVar = contextvars.ContextVar("splendor_log_context", default={})
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取模块日志器"""
+    return logging.getLogger(f"{LOGGER_ROOT}.{name}")
+
+
+@contextmanager
+def log_context(**fields):
+    """在代码块内为日志绑定结构化字段（值为None的字段不覆盖外层）"""
+    merged = dict(_context.get())
+    merged.update((key, value) for key, value in fields.items() if value is not None)
+    token = _context.set(merged)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_log_context() -> Dict:
+    """当前绑定的结构化字段（跨进程提交任务时随任务传递）"""
+    return dict(_context.get())
+
+
+class ContextFilter(logging.Filter):
+    """把当前上下文的结构化字段填到日志记录上（extra中已有的字段优先）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _context.get()
+        for field in CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, context.get(field, "-"))
+        return True
+
+
+def configure_logging(level: Union[str, int, None] = None, log_file: Optional[str] = None,
+                      console: bool = True, console_level: Union[str, int] = logging.WARNING) -> logging.Logger:
+    """
+    配置splendor.*日志（可重复调用，会替换之前配置的处理器）
+
+    Args:
+        level: 日志级别，默认取SPLENDOR_LOG_LEVEL，未设置为WARNING
+        log_file: 日志文件（按大小轮转），默认取SPLENDOR_LOG_FILE，空字符串表示不写文件
+        console: 是否输出到stderr（只输出console_level及以上，避免刷屏）
+        console_level: 控制台级别
+    """
+    root = logging.getLogger(LOGGER_ROOT)
+    level = level or os.environ.get("SPLENDOR_LOG_LEVEL", "WARNING")
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setLevel(console_level.upper() if isinstance(console_level, str) else console_level)
+        handlers.append(stream)
+    if log_file is None:
+        log_file = os.environ.get("SPLENDOR_LOG_FILE")
+    if log_file:
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        handlers.append(RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES,
+                                            backupCount=LOG_BACKUP_COUNT, encoding="utf-8"))
+    if not handlers:
+        handlers.append(logging.NullHandler())  # 完全关闭输出（也不走Python默认的stderr输出）
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.addFilter(ContextFilter())
+        root.addHandler(handler)
+    return root
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+蒙特卡洛树搜索（ISMCTS）- 专家难度AI的限时搜索
+每次迭代在对局副本上把未公开的牌堆顺序重新洗一遍（确定化），沿搜索树选择行动，
+再用快速策略模拟若干回合，按局面估值回传；按毫秒预算停止，可用进程池并行（根并行）
+"""
+import atexit
+import math
+import random
+import time
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+from splendor_pokemon import Move, MOVE_PASS, MOVE_TAKE_BALLS, SplendorPokemonGame
+
+DEFAULT_BUDGET_MS = 1000  # 默认每步思考时间（毫秒）
+EXPLORATION = 0.7  # UCB探索系数
+ROLLOUT_ROUNDS = 3  # 模拟阶段最多再走几轮（之后按局面估值）
+POOL_OVERHEAD_MS = 30  # 进程池分发/汇总预留的时间（毫秒）
+
+PASS = Move(MOVE_PASS)
+
+_pool = None
+_pool_workers = 0
+
+
+class SearchNode:
+    """搜索树节点：value为走到该节点的玩家（mover）累计的收益"""
+    __slots__ = ("move", "mover", "parent", "children", "visits", "value", "available")
+
+    def __init__(self, move: Optional[Move], mover: Optional[int], parent: Optional['SearchNode']):
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children: Dict[Move, SearchNode] = {}
+        self.visits = 0
+        self.value = 0.0
+        self.available = 0  # 该行动在确定化局面中合法的次数（ISMCTS用它代替父节点访问数）
+
+    def ucb(self, exploration: float) -> float:
+        return self.value / self.visits + exploration * math.sqrt(math.log(self.available) / self.visits)
+
+
+def mcts_search(game: SplendorPokemonGame, budget_ms: Optional[float] = DEFAULT_BUDGET_MS,
+                max_iterations: Optional[int] = None, seed: Optional[int] = None,
+                workers: int = 1) -> Tuple[Optional[Move], Dict]:
+    """为当前玩家搜索一步行动
+
+    Args:
+        game: 当前对局（不会被修改）
+        budget_ms: 思考时间上限（毫秒），None表示只按迭代次数停止
+        max_iterations: 迭代次数上限（每个进程），None表示只按时间停止；两者都给出时先到先停
+        seed: 搜索随机种子（只按迭代次数停止时结果可复现）
+        workers: 进程数，大于1时在进程池中各自独立搜索后合并根节点统计
+
+    Returns:
+        (访问次数最多的行动, 统计{"rollouts", "elapsed_ms", "rollouts_per_second", "workers"})；
+        对局已结束时行动为None
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    if budget_ms is None and max_iterations is None:
+        max_iterations = 1000
+
+    if workers > 1:
+        worker_budget = max(1.0, budget_ms - POOL_OVERHEAD_MS) if budget_ms is not None else None
+        tasks = [(game, worker_budget, max_iterations, rng.randrange(2 ** 32)) for _ in range(workers)]
+        results = _get_pool(workers).map(_search_task, tasks)
+    else:
+        results = [search_root(game, budget_ms, max_iterations, rng.randrange(2 ** 32))]
+
+    totals: Dict[Move, List[float]] = {}
+    rollouts = 0
+    for children, iterations in results:
+        rollouts += iterations
+        for move, (visits, value) in children.items():
+            total = totals.setdefault(move, [0, 0.0])
+            total[0] += visits
+            total[1] += value
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "rollouts": rollouts,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "rollouts_per_second": rollouts / elapsed if elapsed > 0 else 0.0,
+        "workers": workers
+    }
+    if not totals:
+        return None, stats
+    best = max(totals, key=lambda move: (totals[move][0], totals[move][1]))
+    return best, stats
+
+
+def search_root(game: SplendorPokemonGame, budget_ms: Optional[float], max_iterations: Optional[int],
+                seed: int, exploration: float = EXPLORATION) -> Tuple[Dict[Move, Tuple[int, float]], int]:
+    """在本进程内搜索一棵树，返回 ({根节点行动: (访问次数, 累计收益)}, 迭代次数)"""
+    if game.game_over:
+        return {}, 0
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + budget_ms / 1000 if budget_ms is not None else None
+    rollout_plies = ROLLOUT_ROUNDS * len(game.players)
+    root = SearchNode(None, None, None)
+
+    iterations = 0
+    while max_iterations is None or iterations < max_iterations:
+        if deadline is not None and iterations and time.perf_counter() >= deadline:
+            break
+        sim = game.clone()
+        sim.quiet = True
+        for deck in (sim.deck_lv1, sim.deck_lv2, sim.deck_lv3, sim.rare_deck, sim.legendary_deck):
+            rng.shuffle(deck)  # 牌堆顺序对所有玩家未知
+
+        # 选择/扩展：只在本次确定化下合法的行动中选择
+        node = root
+        while not sim.game_over:
+            moves = sim.legal_moves() or (PASS,)
+            untried = []
+            for move in moves:
+                child = node.children.get(move)
+                if child is None:
+                    untried.append(move)
+                else:
+                    child.available += 1
+            if untried:
+                move = rng.choice(untried)
+                child = SearchNode(move, sim.current_player_index, node)
+                child.available = 1
+                node.children[move] = child
+                sim.apply(move)
+                node = child
+                break
+            node = max((node.children[move] for move in moves), key=lambda child: child.ucb(exploration))
+            sim.apply(node.move)
+
+        # 模拟
+        for _ in range(rollout_plies):
+            if sim.game_over:
+                break
+            sim.apply(_rollout_move(sim, rng))
+
+        # 回传
+        rewards = evaluate(sim)
+        while node is not None:
+            node.visits += 1
+            if node.mover is not None:
+                node.value += rewards[node.mover]
+            node = node.parent
+        iterations += 1
+
+    return {move: (child.visits, child.value) for move, child in root.children.items()}, iterations
+
+
+def evaluate(game: SplendorPokemonGame) -> List[float]:
+    """各座位的收益（0~1）：对局结束时胜者为1；否则按分数、永久球和手上的球与最强对手比较"""
+    if game.game_over and game.winner is not None:
+        return [1.0 if player is game.winner else 0.0 for player in game.players]
+    strength = [player.get_victory_points() + 0.4 * sum(player.display_area.vector) + 0.1 * player.get_total_balls()
+                for player in game.players]
+    rewards = []
+    for seat, own in enumerate(strength):
+        rival = max(strength[:seat] + strength[seat + 1:], default=0.0)
+        rewards.append(1.0 / (1.0 + math.exp((rival - own) / 2.0)))
+    return rewards
+
+
+def _rollout_move(game: SplendorPokemonGame, rng: random.Random) -> Move:
+    """模拟阶段的快速策略：多数时候买分数最高的卡，否则随机拿球"""
+    buyable = game.buyable_cards()
+    if buyable and rng.random() < 0.9:
+        card = max(buyable, key=lambda card: card.victory_points + rng.random())
+        return Move.buy(card.card_id)
+    moves = game.legal_moves()
+    takes = [move for move in moves if move.action == MOVE_TAKE_BALLS]
+    if takes:
+        return rng.choice(takes)
+    return rng.choice(moves) if moves else PASS
+
+
+def _search_task(task) -> Tuple[Dict[Move, Tuple[int, float]], int]:
+    return search_root(*task)
+
+
+def _get_pool(workers: int) -> Pool:
+    """进程池在第一次并行搜索时创建，之后复用（进程数变化时重建）"""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = Pool(processes=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    """关闭搜索进程池"""
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.terminate()
+        _pool.join()
+        _pool = None
+        _pool_workers = 0
+
+
+atexit.register(shutdown_pool)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无界面自对弈模拟器 - 多进程批量运行AI对局，用于卡牌平衡和AI难度调优
+每局只输出一行紧凑结果（CSV），不打印对局过程、不保存GameHistory
+
+使用方法：
+python simulate.py --games 10000 --players 4 --difficulty 中等,困难 --victory-points 18 \\
+    --seed-start 0 --workers 8 --output simulation_results.csv
+python simulate.py --games 200 --players 2 --difficulty 困难,专家 --ai-budget-ms 100
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from multiprocessing import Pool
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from splendor_pokemon import BallType, Move, MOVE_TAKE_BALLS, Player, SplendorPokemonGame, derive_seed
+from card_catalog import get_card_catalog
+from game_logging import configure_logging
+from ai_player import AIPlayer
+from mcts import DEFAULT_BUDGET_MS
+
+MAX_TURNS = 500  # 超过该行动数视为僵局（与测试脚本一致）
+
+RESULT_FIELDS = [
+    "seed", "players", "difficulties", "victory_points_goal",
+    "winner", "winner_difficulty", "turns", "rounds", "scores",
+    "deadlock", "empty_decisions", "failed_actions", "error", "duration_ms"
+]
+
+
+def seat_difficulties(difficulty_mix: List[str], num_players: int, seed: int) -> List[str]:
+    """按座位分配AI难度（按seed轮换，避免某个难度总坐先手）"""
+    return [difficulty_mix[(seat + seed) % len(difficulty_mix)] for seat in range(num_players)]
+
+
+def apply_ai_decision(game: SplendorPokemonGame, player: Player, decision: Optional[Dict]) -> bool:
+    """执行AI决策（与后端execute_ai_turn的处理一致，先按legal_moves校验），返回动作是否成功"""
+    if not decision:
+        return False
+
+    move = Move.from_decision(decision)
+    if move.action == MOVE_TAKE_BALLS and not move.balls:
+        # 与后端相同的兜底：拿最多3个不同色
+        available_balls = [ball for ball, count in game.ball_pool.items()
+                           if count > 0 and ball != BallType.MASTER]
+        move = Move(MOVE_TAKE_BALLS, tuple(available_balls[:3]))
+
+    if not game.is_legal_move(move, player):
+        return False
+    return game.perform_move(move)
+
+
+def play_to_end(game: SplendorPokemonGame, ai_players: List[AIPlayer]) -> Dict:
+    """按座位让AI下完一局（超过MAX_TURNS个行动视为僵局），返回行动数、空决策数、失败动作数和异常"""
+    stats = {"turns": 0, "empty_decisions": 0, "failed_actions": 0, "error": ""}
+    try:
+        while not game.game_over and stats["turns"] < MAX_TURNS:
+            stats["turns"] += 1
+            seat = game.current_player_index
+            player = game.players[seat]
+
+            decision = ai_players[seat].make_decision(game, player)
+            if not decision:
+                stats["empty_decisions"] += 1
+            elif not apply_ai_decision(game, player, decision):
+                stats["failed_actions"] += 1
+
+            game.end_turn()
+    except Exception as e:
+        stats["error"] = f"{type(e).__name__}: {e}"[:200]
+    return stats
+
+
+def play_game(seed: int, num_players: int, difficulty_mix: List[str], victory_points: int,
+              ai_budget_ms: float = DEFAULT_BUDGET_MS) -> Dict:
+    """运行一局完整的AI对局，返回紧凑结果（ai_budget_ms: 专家难度每步思考时间）"""
+    started = time.perf_counter()
+
+    difficulties = seat_difficulties(difficulty_mix, num_players, seed)
+    # 名称包含"机器人"，超过10球时由引擎自动弃球（与房间内的AI一致）
+    player_names = [f"机器人{seat + 1}" for seat in range(num_players)]
+    # AI种子与房间开局的派生方式一致
+    ai_players = [AIPlayer(difficulty, seed=derive_seed(seed, f"ai:{seat}"), time_budget_ms=ai_budget_ms)
+                  for seat, difficulty in enumerate(difficulties)]
+
+    result = {
+        "seed": seed,
+        "players": num_players,
+        "difficulties": "|".join(difficulties),
+        "victory_points_goal": victory_points,
+        "winner": "",
+        "winner_difficulty": "",
+        "turns": 0,
+        "rounds": 0,
+        "scores": "",
+        "deadlock": 0,
+        "empty_decisions": 0,
+        "failed_actions": 0,
+        "error": ""
+    }
+
+    game = SplendorPokemonGame(player_names, victory_points=victory_points, seed=seed)
+    result.update(play_to_end(game, ai_players))
+
+    result["deadlock"] = int(not game.game_over and not result["error"])
+    result["rounds"] = (result["turns"] + num_players - 1) // num_players
+    result["scores"] = "|".join(str(p.get_victory_points()) for p in game.players)
+    if game.game_over and game.winner:
+        winner_seat = game.players.index(game.winner)
+        result["winner"] = winner_seat + 1
+        result["winner_difficulty"] = difficulties[winner_seat]
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def _init_worker():
+    """工作进程初始化：屏蔽引擎和AI的打印和日志，预加载卡牌目录"""
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    configure_logging(console=False, log_file="")
+    get_card_catalog()
+
+
+def _play_game_task(args) -> Dict:
+    return play_game(*args)
+
+
+def _run_quietly(func, task) -> Dict:
+    """在当前进程里运行一局，屏蔽引擎和AI的打印（单进程模式用；循环赛也复用）"""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+        return func(*task)
+
+
+def _play_quietly(task) -> Dict:
+    return _run_quietly(play_game, task)
+
+
+def run_simulation(games: int, num_players: int, difficulty_mix: List[str], victory_points: int,
+                   seed_start: int = 0, workers: Optional[int] = None, output: Optional[str] = None,
+                   progress_every: int = 1000, ai_budget_ms: float = DEFAULT_BUDGET_MS) -> Dict:
+    """
+    批量运行对局，结果逐行写入CSV
+
+    Returns:
+        汇总统计（对局数、耗时、每秒对局数、各难度胜率、僵局数等）
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(seed, num_players, difficulty_mix, victory_points, ai_budget_ms)
+             for seed in range(seed_start, seed_start + games)]
+
+    summary = {
+        "games": 0,
+        "deadlocks": 0,
+        "errors": 0,
+        "total_turns": 0,
+        "wins": {difficulty: 0 for difficulty in difficulty_mix},
+        "seats": {difficulty: 0 for difficulty in difficulty_mix}
+    }
+
+    output_file = open(output, "w", newline="", encoding="utf-8") if output else None
+    writer = csv.DictWriter(output_file, fieldnames=RESULT_FIELDS) if output_file else None
+    if writer:
+        writer.writeheader()
+
+    pool = None
+    started = time.perf_counter()
+    try:
+        if workers == 1:
+            with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+                get_card_catalog()
+            results = (_play_quietly(task) for task in tasks)
+        else:
+            pool = Pool(processes=workers, initializer=_init_worker)
+            chunksize = max(1, min(64, games // (workers * 8)))
+            results = pool.imap_unordered(_play_game_task, tasks, chunksize=chunksize)
+
+        for result in results:
+            if writer:
+                writer.writerow(result)
+            summary["games"] += 1
+            summary["total_turns"] += result["turns"]
+            summary["deadlocks"] += result["deadlock"]
+            summary["errors"] += int(bool(result["error"]))
+            for difficulty in result["difficulties"].split("|"):
+                summary["seats"][difficulty] += 1
+            if result["winner_difficulty"]:
+                summary["wins"][result["winner_difficulty"]] += 1
+
+            if progress_every and summary["games"] % progress_every == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  ⏳ {summary['games']}/{games} 局，{summary['games'] / elapsed:.1f} 局/秒")
+
+        if pool:
+            pool.close()
+            pool.join()
+    finally:
+        if pool:
+            pool.terminate()
+        if output_file:
+            output_file.close()
+
+    summary["elapsed_seconds"] = time.perf_counter() - started
+    summary["games_per_second"] = summary["games"] / summary["elapsed_seconds"] if summary["elapsed_seconds"] else 0.0
+    return summary
+
+
+def main():
+    configure_logging(console=False)  # 批量对局不在控制台输出日志，需要时设置SPLENDOR_LOG_FILE
+    parser = argparse.ArgumentParser(description="无界面AI自对弈模拟器")
+    parser.add_argument("--games", type=int, default=1000, help="对局数")
+    parser.add_argument("--players", type=int, default=4, choices=[2, 3, 4], help="每局玩家数")
+    parser.add_argument("--difficulty", default=AIPlayer.MEDIUM,
+                        help="AI难度组合，逗号分隔，按座位轮换分配（如 中等,困难）")
+    parser.add_argument("--victory-points", type=int, default=18, help="胜利分数")
+    parser.add_argument("--ai-budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="专家难度每步思考时间（毫秒）")
+    parser.add_argument("--seed-start", type=int, default=0, help="起始种子（第i局使用 seed-start+i）")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认CPU核数，1为单进程）")
+    parser.add_argument("--output", default="simulation_results.csv", help="结果CSV文件")
+    args = parser.parse_args()
+
+    difficulty_mix = [d.strip() for d in args.difficulty.split(",") if d.strip()]
+    valid = [AIPlayer.EASY, AIPlayer.MEDIUM, AIPlayer.HARD, AIPlayer.EXPERT]
+    invalid = [d for d in difficulty_mix if d not in valid]
+    if invalid:
+        parser.error(f"未知难度: {', '.join(invalid)}（可选: {'/'.join(valid)}）")
+
+    print("=" * 60)
+    print(f"🎮 自对弈模拟: {args.games}局 × {args.players}人，难度[{', '.join(difficulty_mix)}]，"
+          f"胜利分数{args.victory_points}，种子{args.seed_start}起")
+    print("=" * 60)
+
+    summary = run_simulation(args.games, args.players, difficulty_mix, args.victory_points,
+                             seed_start=args.seed_start, workers=args.workers, output=args.output,
+                             progress_every=max(1, args.games // 10), ai_budget_ms=args.ai_budget_ms)
+
+    print(f"\n✅ 完成 {summary['games']} 局，用时 {summary['elapsed_seconds']:.1f}秒，"
+          f"{summary['games_per_second']:.1f} 局/秒")
+    if summary["games"]:
+        print(f"平均行动数: {summary['total_turns'] / summary['games']:.1f}")
+    print(f"僵局: {summary['deadlocks']}，异常: {summary['errors']}")
+    for difficulty in difficulty_mix:
+        seats = summary["seats"][difficulty]
+        win_rate = summary["wins"][difficulty] / seats * 100 if seats else 0.0
+        print(f"  {difficulty}: 胜 {summary['wins'][difficulty]} / 座位 {seats}（每座胜率 {win_rate:.1f}%）")
+    print(f"📄 结果已写入: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,12 +6,21 @@
 """
 
 import csv
+import logging
 import os
 import random
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from itertools import combinations
+from collections.abc import MutableMapping
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+from game_logging import get_logger
+
+logger = get_logger("engine")
+
 class BallType(Enum):
     """精灵球类型（对应原游戏中的宝石）"""
     BLACK = "黑"    # 黑色/岩地系
@@ -21,44 +30,445 @@ class BallType(Enum):
     RED = "红"      # 红色/火系
     MASTER = "大师球"  # 万能球（只能通过预定获得）
 
+# 球向量的槽位：按BallType定义顺序，大师球在最后
+BALL_TYPES: Tuple[BallType, ...] = tuple(BallType)
+NUM_BALL_TYPES = len(BALL_TYPES)
+MASTER_SLOT = BALL_TYPES.index(BallType.MASTER)
+COLOR_SLOTS: Tuple[int, ...] = tuple(slot for slot, ball in enumerate(BALL_TYPES) if ball != BallType.MASTER)
+for _slot, _ball in enumerate(BALL_TYPES):
+    _ball.slot = _slot  # 槽位下标（普通属性访问，避免Enum的__hash__开销）
+
+def ball_vector(balls: Mapping[BallType, int]) -> Tuple[int, ...]:
+    """Dict[BallType, int] -> 6槽位元组（缺失的球为0）"""
+    counts = [0] * NUM_BALL_TYPES
+    for ball, count in balls.items():
+        counts[ball.slot] += count
+    return tuple(counts)
+
+class BallVector:
+    """6槽位球数向量（手上的球、球池）
+
+    按BallType顺序存放在列表counts中；保留Dict[BallType, int]的读写接口
+    （balls[BallType.RED] += 1、items()、get()等），引擎和AI的热点路径直接按槽位读写counts
+
+    与被替换的字典一致，6种球始终都是键（数量为0也算）：`ball in balls`对任何BallType为True，
+    迭代/keys()总是给出全部6种；判断"有没有这种球"请用balls[ball] > 0
+    """
+    __slots__ = ("counts",)
+    
+    def __init__(self, counts=None):
+        if counts is None:
+            self.counts = [0] * NUM_BALL_TYPES
+        elif hasattr(counts, "items"):
+            self.counts = list(ball_vector(counts))
+        else:
+            self.counts = list(counts)
+    
+    def __getitem__(self, ball: BallType) -> int:
+        return self.counts[ball.slot]
+    
+    def __setitem__(self, ball: BallType, count: int):
+        self.counts[ball.slot] = count
+    
+    def get(self, ball: BallType, default: int = 0) -> int:
+        return self.counts[ball.slot] if isinstance(ball, BallType) else default
+    
+    def __contains__(self, ball) -> bool:
+        # 与原字典{ball: 0 for ball in BallType}相同：键集合固定，不看数量
+        return isinstance(ball, BallType)
+    
+    def __iter__(self):
+        return iter(BALL_TYPES)
+    
+    def __len__(self) -> int:
+        return NUM_BALL_TYPES
+    
+    def keys(self) -> Tuple[BallType, ...]:
+        return BALL_TYPES
+    
+    def values(self) -> List[int]:
+        return list(self.counts)
+    
+    def items(self) -> List[Tuple[BallType, int]]:
+        return list(zip(BALL_TYPES, self.counts))
+    
+    def total(self) -> int:
+        return sum(self.counts)
+    
+    def copy(self) -> 'BallVector':
+        return BallVector(self.counts)
+    
+    def to_json(self, skip_zero: bool = False) -> Dict[str, int]:
+        """转换为 {球中文名: 数量}（API/历史记录边界使用）"""
+        return {ball.value: count for ball, count in zip(BALL_TYPES, self.counts)
+                if count > 0 or not skip_zero}
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, BallVector):
+            return self.counts == other.counts
+        if hasattr(other, "items"):
+            try:
+                return tuple(self.counts) == ball_vector(other)
+            except AttributeError:
+                return False
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return f"BallVector({dict(self.items())})"
+
+MutableMapping.register(BallVector)
+
+def balls_to_json(balls: Mapping[BallType, int], skip_zero: bool = True) -> Dict[str, int]:
+    """Dict[BallType, int] -> {球中文名: 数量}（卡牌成本/永久球/进化条件等的API边界）"""
+    return {ball.value: count for ball, count in balls.items() if count > 0 or not skip_zero}
+
 class Rarity(Enum):
     """稀有度"""
     NORMAL = "普通"
     RARE = "稀有"
     LEGENDARY = "传说"
 
-@dataclass
+@dataclass(frozen=True)
 class Evolution:
     """进化信息"""
     target_name: str  # 进化目标名称
-    required_balls: Dict[BallType, int]  # 需要的永久球（展示区）
+    required_balls: Mapping[BallType, int]  # 需要的永久球（展示区），构造时拷贝为只读映射
+    required_vector: Tuple[int, ...] = field(init=False, repr=False, compare=False)  # required_balls的6槽位形式
+    
+    def __post_init__(self):
+        object.__setattr__(self, "required_balls", MappingProxyType(dict(self.required_balls)))
+        object.__setattr__(self, "required_vector", ball_vector(self.required_balls))
+    
+    def __reduce__(self):
+        # 只读映射不能直接序列化，按普通字典重建（跨进程传递）
+        return (Evolution, (self.target_name, dict(self.required_balls)))
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self  # 不可变，拷贝时共享
 
-@dataclass
+@dataclass(frozen=True)
 class PokemonCard:
-    """宝可梦卡牌"""
+    """宝可梦卡牌（不可变，由卡牌目录在进程内共享）"""
     card_id: int  # 唯一ID（1-90）
     name: str
     level: int  # 1-3 或特殊（稀有/传说）
     rarity: Rarity
     victory_points: int
-    cost: Dict[BallType, int]  # 购买成本
-    permanent_balls: Dict[BallType, int]  # 提供的永久球（折扣）
+    cost: Mapping[BallType, int]  # 购买成本（构造时拷贝为只读映射）
+    permanent_balls: Mapping[BallType, int]  # 提供的永久球（折扣，构造时拷贝为只读映射）
     evolution: Optional[Evolution] = None  # 进化信息（Lv1/Lv2可进化）
     needs_master_ball: bool = False  # 稀有/传说需要额外大师球
+    # cost/permanent_balls的6槽位形式（构造时计算，引擎和AI的热点路径使用）
+    cost_vector: Tuple[int, ...] = field(init=False, repr=False, compare=False)
+    permanent_vector: Tuple[int, ...] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, "cost", MappingProxyType(dict(self.cost)))
+        object.__setattr__(self, "permanent_balls", MappingProxyType(dict(self.permanent_balls)))
+        object.__setattr__(self, "cost_vector", ball_vector(self.cost))
+        object.__setattr__(self, "permanent_vector", ball_vector(self.permanent_balls))
+    
+    def __reduce__(self):
+        # 目录卡牌按card_id还原成接收进程目录里的同一个对象（AI工作进程里按身份查特征表/片段仍然命中）；
+        # 其他卡牌的只读映射不能直接序列化，按普通字典重建
+        from card_catalog import is_catalog_card
+        if is_catalog_card(self):
+            return (_catalog_card, (self.card_id,))
+        return (PokemonCard, (self.card_id, self.name, self.level, self.rarity, self.victory_points,
+                              dict(self.cost), dict(self.permanent_balls), self.evolution, self.needs_master_ball))
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self  # 不可变，拷贝时共享（深拷贝对局后目录卡牌仍是同一个对象）
     
     def __str__(self):
         cost_str = ", ".join([f"{ball.value}{amount}" for ball, amount in self.cost.items() if amount > 0])
         perm_str = ", ".join([f"{ball.value}{amount}" for ball, amount in self.permanent_balls.items() if amount > 0])
         return f"{self.name} (Lv{self.level}) VP:{self.victory_points} 费用:{cost_str} 永久:{perm_str}"
 
+def _catalog_card(card_id: int) -> PokemonCard:
+    """反序列化目录卡牌：取本进程卡牌目录中的同一张卡"""
+    from card_catalog import get_card_catalog
+    return get_card_catalog().by_id[card_id]
+
+class DisplayArea(list):
+    """展示区卡牌列表，增删卡牌时同步维护永久球合计（读取O(1)、不分配新对象）
+
+    购买、进化、调试接口和测试都直接修改display_area，所有修改列表的方法都会同步合计
+    """
+    
+    def __init__(self, cards=()):
+        super().__init__()
+        self._permanent: Dict[BallType, int] = {ball: 0 for ball in BallType if ball != BallType.MASTER}
+        self.permanent = MappingProxyType(self._permanent)  # 只读视图
+        self.vector: List[int] = [0] * NUM_BALL_TYPES  # 永久球的6槽位形式（大师球槽位恒为0）
+        self.extend(cards)
+    
+    def __reduce__(self):
+        # 按卡牌重建（拷贝/跨进程传递时合计随之重建）
+        return (DisplayArea, (list(self),))
+    
+    def copy(self) -> 'DisplayArea':
+        """拷贝卡牌列表和合计（共享卡牌对象，不逐张重算）"""
+        area = DisplayArea.__new__(DisplayArea)
+        list.extend(area, self)
+        area._permanent = dict(self._permanent)
+        area.permanent = MappingProxyType(area._permanent)
+        area.vector = list(self.vector)
+        return area
+    
+    def _count(self, card: PokemonCard, sign: int):
+        for ball, count in card.permanent_balls.items():
+            if ball != BallType.MASTER:
+                self._permanent[ball] += sign * count
+                self.vector[ball.slot] += sign * count
+    
+    def _recount(self):
+        for ball in self._permanent:
+            self._permanent[ball] = 0
+        self.vector[:] = [0] * NUM_BALL_TYPES
+        for card in self:
+            self._count(card, 1)
+    
+    def append(self, card: PokemonCard):
+        super().append(card)
+        self._count(card, 1)
+    
+    def extend(self, cards):
+        for card in cards:
+            self.append(card)
+    
+    def insert(self, index, card: PokemonCard):
+        super().insert(index, card)
+        self._count(card, 1)
+    
+    def remove(self, card: PokemonCard):
+        super().remove(card)
+        self._count(card, -1)
+    
+    def pop(self, index=-1) -> PokemonCard:
+        card = super().pop(index)
+        self._count(card, -1)
+        return card
+    
+    def clear(self):
+        super().clear()
+        self._recount()
+    
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._recount()
+    
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._recount()
+    
+    def __iadd__(self, cards):
+        self.extend(cards)
+        return self
+    
+    def __imul__(self, times):
+        super().__imul__(times)
+        self._recount()
+        return self
+
+# 卡牌所在区域（查找时按此顺序优先）
+ZONE_TABLEAU = "tableau"
+ZONE_RARE = "rare"
+ZONE_LEGENDARY = "legendary"
+ZONE_RESERVED = "reserved"
+ZONE_ORDER = {ZONE_TABLEAU: 0, ZONE_RARE: 1, ZONE_LEGENDARY: 2, ZONE_RESERVED: 3}
+
+class CardLocation(NamedTuple):
+    """卡牌在场上/预购区的位置"""
+    zone: str            # 区域（ZONE_*）
+    tier: Optional[int]  # 场上为卡牌等级，预购区为玩家座位号，稀有/传说为None
+    slot: int            # 在该排中的下标
+
+def _zone_rank(key: Tuple[str, Optional[int]]) -> Tuple[int, int]:
+    return (ZONE_ORDER[key[0]], key[1] or 0)
+
+class CardIndex:
+    """卡牌位置索引：card_id -> 所在区域(zone, tier)，卡牌名称 -> card_id
+
+    只记录卡牌在哪一排（场上每排最多4张、预购区最多3张），排内下标查找时再定位，
+    这样增删卡牌只需O(1)更新，不必在补牌/移除后重排下标
+    """
+    __slots__ = ("zones", "names", "version")
+    
+    def __init__(self):
+        self.zones: Dict[int, List[Tuple[str, Optional[int]]]] = {}
+        self.names: Dict[str, List[int]] = {}
+        self.version = 0  # 每次增删卡牌加1（场面/预购区版本，用于缓存失效）
+    
+    def add(self, card: PokemonCard, key: Tuple[str, Optional[int]]):
+        self.version += 1
+        keys = self.zones.get(card.card_id)
+        if keys is None:
+            self.zones[card.card_id] = [key]
+            self.names.setdefault(card.name, []).append(card.card_id)
+        else:
+            keys.append(key)
+    
+    def copy(self) -> 'CardIndex':
+        index = CardIndex.__new__(CardIndex)
+        index.zones = {card_id: list(keys) for card_id, keys in self.zones.items()}
+        index.names = {name: list(card_ids) for name, card_ids in self.names.items()}
+        index.version = self.version
+        return index
+    
+    def discard(self, card: PokemonCard, key: Tuple[str, Optional[int]]):
+        self.version += 1
+        keys = self.zones[card.card_id]
+        if len(keys) > 1:
+            keys.remove(key)
+            return
+        del self.zones[card.card_id]
+        card_ids = self.names[card.name]
+        card_ids.remove(card.card_id)
+        if not card_ids:
+            del self.names[card.name]
+
+class CardZone(list):
+    """场上一排卡牌或玩家预购区，增删卡牌时同步所属游戏的卡牌位置索引
+
+    购买、预购、进化、调试接口和测试都直接修改这些列表，所有修改列表的方法都会同步索引
+    """
+    
+    def __init__(self, cards=(), zone: str = ZONE_RESERVED, tier: Optional[int] = None):
+        super().__init__(cards)
+        self.zone = zone
+        self.tier = tier
+        self.key = (zone, tier)  # 在索引中的区域键
+        self.card_index: Optional[CardIndex] = None  # 绑定到游戏后才维护索引
+    
+    def __reduce__(self):
+        # 先按卡牌重建列表再恢复索引引用（索引随游戏一起拷贝，已包含这些卡牌）
+        return (CardZone, (list(self), self.zone, self.tier), {"card_index": self.card_index})
+    
+    def copy(self, card_index: Optional[CardIndex] = None) -> 'CardZone':
+        """拷贝这一排并直接挂到card_index（该索引应已包含这些卡牌，如CardIndex.copy()的结果）"""
+        zone = CardZone(self, self.zone, self.tier)
+        zone.card_index = card_index
+        return zone
+    
+    def bind(self, card_index: Optional[CardIndex], tier: Optional[int]):
+        self._unindex_all()
+        self.card_index = card_index
+        self.tier = tier
+        self.key = (self.zone, tier)
+        self._index_all()
+    
+    def _index_all(self):
+        if self.card_index is not None:
+            for card in self:
+                self.card_index.add(card, self.key)
+    
+    def _unindex_all(self):
+        if self.card_index is not None:
+            for card in self:
+                self.card_index.discard(card, self.key)
+    
+    def append(self, card: PokemonCard):
+        super().append(card)
+        if self.card_index is not None:
+            self.card_index.add(card, self.key)
+    
+    def extend(self, cards):
+        for card in cards:
+            self.append(card)
+    
+    def insert(self, index, card: PokemonCard):
+        super().insert(index, card)
+        if self.card_index is not None:
+            self.card_index.add(card, self.key)
+    
+    def remove(self, card: PokemonCard):
+        removed = self[self.index(card)]
+        super().remove(card)
+        if self.card_index is not None:
+            self.card_index.discard(removed, self.key)
+    
+    def pop(self, index=-1) -> PokemonCard:
+        card = super().pop(index)
+        if self.card_index is not None:
+            self.card_index.discard(card, self.key)
+        return card
+    
+    def clear(self):
+        self._unindex_all()
+        super().clear()
+    
+    def __setitem__(self, index, value):
+        self._unindex_all()
+        super().__setitem__(index, value)
+        self._index_all()
+    
+    def __delitem__(self, index):
+        self._unindex_all()
+        super().__delitem__(index)
+        self._index_all()
+    
+    def __iadd__(self, cards):
+        self.extend(cards)
+        return self
+    
+    def __imul__(self, times):
+        self._unindex_all()
+        super().__imul__(times)
+        self._index_all()
+        return self
+    
+    def replace(self, index: int, card: PokemonCard) -> PokemonCard:
+        """原位替换一张卡牌（补牌），返回被替换的卡牌"""
+        old = self[index]
+        super().__setitem__(index, card)
+        if self.card_index is not None:
+            self.card_index.discard(old, self.key)
+            self.card_index.add(card, self.key)
+        return old
+
+class Tableau(dict):
+    """场面（等级 -> CardZone），整排替换时同样绑定到索引"""
+    
+    def __init__(self, card_index: CardIndex):
+        super().__init__()
+        self.card_index = card_index
+    
+    def __reduce__(self):
+        return (Tableau, (self.card_index,), None, None, iter(self.items()))
+    
+    def copy(self, card_index: CardIndex) -> 'Tableau':
+        """拷贝各排到已包含这些卡牌的索引副本上"""
+        tableau = Tableau(card_index)
+        for tier, cards in self.items():
+            dict.__setitem__(tableau, tier, cards.copy(card_index))
+        return tableau
+    
+    def __setitem__(self, tier: int, cards: List[PokemonCard]):
+        previous = self.get(tier)
+        if previous is not None and previous is not cards:
+            previous.bind(None, tier)
+        zone = cards if isinstance(cards, CardZone) and cards.zone == ZONE_TABLEAU else CardZone(cards, ZONE_TABLEAU)
+        super().__setitem__(tier, zone)
+        if zone.card_index is not self.card_index or zone.tier != tier:
+            zone.bind(self.card_index, tier)
+
 class Player:
     """训练家玩家"""
     def __init__(self, name: str):
         self.name = name
-        self.balls: Dict[BallType, int] = {ball: 0 for ball in BallType}
-        self.display_area: List[PokemonCard] = []  # 展示区（已抓宝可梦）
+        self.balls = BallVector()  # 手上的球
+        self.display_area = DisplayArea()  # 展示区（已抓宝可梦）
         self.evolved_cards: List[PokemonCard] = []  # 被替换的进化前卡（用于平分判定）
-        self.reserved_cards: List[PokemonCard] = []  # 手牌（预定的卡）
+        self.reserved_cards = CardZone()  # 手牌（预定的卡）
         self.victory_points = 0
         self.extra_victory_points = 0  # 额外分数（调试用）
         self.has_evolved_this_turn = False  # 本回合是否已进化
@@ -66,70 +476,117 @@ class Player:
         self.last_action = ""  # 记录最后一次行动的描述
         self.has_left = False  # 是否已主动退出游戏
     
+    @property
+    def display_area(self) -> DisplayArea:
+        return self._display_area
+    
+    @display_area.setter
+    def display_area(self, cards: List[PokemonCard]):
+        self._display_area = cards if isinstance(cards, DisplayArea) else DisplayArea(cards)
+    
+    @property
+    def reserved_cards(self) -> CardZone:
+        return self._reserved_cards
+    
+    @reserved_cards.setter
+    def reserved_cards(self, cards: List[PokemonCard]):
+        # 整体替换时沿用原预购区与游戏的绑定
+        previous = getattr(self, "_reserved_cards", None)
+        zone = cards if isinstance(cards, CardZone) else CardZone(cards)
+        self._reserved_cards = zone
+        if previous is not None and previous.card_index is not None:
+            card_index = previous.card_index
+            previous.bind(None, previous.tier)
+            zone.bind(card_index, previous.tier)
+    
+    def clone(self, card_index: Optional[CardIndex] = None) -> 'Player':
+        """拷贝玩家状态（共享卡牌对象），预购区挂到card_index（已包含这些卡牌的索引副本）"""
+        player = Player.__new__(Player)
+        player.name = self.name
+        player.balls = self.balls.copy()
+        player._display_area = self._display_area.copy()
+        player.evolved_cards = list(self.evolved_cards)
+        player._reserved_cards = self._reserved_cards.copy(card_index)
+        player.victory_points = self.victory_points
+        player.extra_victory_points = self.extra_victory_points
+        player.has_evolved_this_turn = self.has_evolved_this_turn
+        player.needs_return_balls = self.needs_return_balls
+        player.last_action = self.last_action
+        player.has_left = self.has_left
+        return player
+    
     def get_victory_points(self) -> int:
         """获取总分数（包括额外分数）"""
         return self.victory_points + self.extra_victory_points
         
-    def get_permanent_balls(self) -> Dict[BallType, int]:
-        """获取展示区永久球数量"""
-        permanent = {ball: 0 for ball in BallType if ball != BallType.MASTER}
-        for card in self.display_area:
-            for ball, count in card.permanent_balls.items():
-                if ball != BallType.MASTER:
-                    permanent[ball] += count
-        return permanent
+    def get_permanent_balls(self) -> Mapping[BallType, int]:
+        """获取展示区永久球数量（只读视图，随展示区变化自动更新）"""
+        return self._display_area.permanent
     
     def get_total_balls(self) -> int:
         """获取手上球总数"""
-        return sum(self.balls.values())
+        return sum(self.balls.counts)
+    
+    def get_shortfall(self, card: PokemonCard) -> List[int]:
+        """各颜色还差的球数（扣除永久折扣和手上的球，6槽位，大师球槽位为0）"""
+        hand = self.balls.counts
+        permanent = self._display_area.vector
+        cost = card.cost_vector
+        shortfall = [0] * NUM_BALL_TYPES
+        for slot in COLOR_SLOTS:
+            short = cost[slot] - permanent[slot] - hand[slot]
+            if short > 0:
+                shortfall[slot] = short
+        return shortfall
+    
+    def get_ball_gap(self, card: PokemonCard) -> int:
+        """购买卡牌还差的彩色球总数（不计大师球）"""
+        hand = self.balls.counts
+        permanent = self._display_area.vector
+        cost = card.cost_vector
+        gap = 0
+        for slot in COLOR_SLOTS:
+            short = cost[slot] - permanent[slot] - hand[slot]
+            if short > 0:
+                gap += short
+        return gap
     
     def can_afford(self, card: PokemonCard) -> bool:
-        """检查是否能购买卡牌"""
-        permanent = self.get_permanent_balls()
-        needed_master_balls = 0
-        
-        for ball, cost in card.cost.items():
-            # 大师球成本直接累加
-            if ball == BallType.MASTER:
-                needed_master_balls += cost
-                continue
-            
-            # 永久球提供折扣
-            discount = permanent.get(ball, 0)
-            actual_cost = max(0, cost - discount)
-            # 需要用手上的球支付（可用大师球替代）
-            if self.balls[ball] < actual_cost:
-                needed_master_balls += actual_cost - self.balls[ball]
-        
-        return self.balls[BallType.MASTER] >= needed_master_balls
+        """检查是否能购买卡牌：彩色球缺口 max(0, 成本-折扣-手上) 用大师球补，加上大师球成本"""
+        hand = self.balls.counts
+        return hand[MASTER_SLOT] >= card.cost_vector[MASTER_SLOT] + self.get_ball_gap(card)
     
     def buy_card(self, card: PokemonCard, return_balls_to_pool) -> bool:
         """购买卡牌"""
         if not self.can_afford(card):
             return False
         
-        permanent = self.get_permanent_balls()
+        hand = self.balls.counts
+        permanent = self._display_area.vector
+        cost = card.cost_vector
+        
+        # 大师球成本直接扣除
+        if cost[MASTER_SLOT] > 0:
+            hand[MASTER_SLOT] -= cost[MASTER_SLOT]
+            return_balls_to_pool(BallType.MASTER, cost[MASTER_SLOT])
         
         # 支付球
-        for ball, cost in card.cost.items():
-            # 大师球成本直接扣除
-            if ball == BallType.MASTER:
-                self.balls[BallType.MASTER] -= cost
-                return_balls_to_pool(BallType.MASTER, cost)
+        for slot in COLOR_SLOTS:
+            # 永久球提供折扣
+            actual_cost = cost[slot] - permanent[slot]
+            if actual_cost <= 0:
                 continue
             
-            discount = permanent.get(ball, 0)
-            actual_cost = max(0, cost - discount)
-            
             # 先用对应颜色的球
-            paid_from_ball = min(actual_cost, self.balls[ball])
-            self.balls[ball] -= paid_from_ball
-            return_balls_to_pool(ball, paid_from_ball)
+            paid_from_ball = min(actual_cost, hand[slot])
+            if paid_from_ball > 0:
+                hand[slot] -= paid_from_ball
+                return_balls_to_pool(BALL_TYPES[slot], paid_from_ball)
             
             # 不够用大师球补
             remaining = actual_cost - paid_from_ball
             if remaining > 0:
-                self.balls[BallType.MASTER] -= remaining
+                hand[MASTER_SLOT] -= remaining
                 return_balls_to_pool(BallType.MASTER, remaining)
         
         # 添加到展示区
@@ -147,9 +604,10 @@ class Player:
             return False
         
         # 检查展示区永久球是否满足进化门槛
-        permanent = self.get_permanent_balls()
-        for ball, required in base_card.evolution.required_balls.items():
-            if permanent.get(ball, 0) < required:
+        permanent = self._display_area.vector
+        required = base_card.evolution.required_vector
+        for slot in range(NUM_BALL_TYPES):
+            if permanent[slot] < required[slot]:
                 return False
         return True
     
@@ -169,12 +627,13 @@ class Player:
         self.has_evolved_this_turn = True
         return True
     
-    def check_ball_limit(self, return_balls_to_pool):
+    def check_ball_limit(self, return_balls_to_pool, verbose: bool = True):
         """检查并处理10球上限"""
         total = self.get_total_balls()
         if total > 10:
             excess = total - 10
-            print(f"{self.name} 超过10球上限，需要弃{excess}个球")
+            if verbose:
+                logger.info("%s 超过10球上限，需要弃%d个球", self.name, excess, extra={"player": self.name})
             # 简化处理：优先弃非大师球
             for ball in BallType:
                 if ball != BallType.MASTER and excess > 0:
@@ -202,7 +661,7 @@ def load_cards_from_csv(csv_path: str) -> List[PokemonCard]:
     }
     
     if not os.path.exists(csv_path):
-        print(f"警告：CSV文件不存在: {csv_path}")
+        logger.warning("CSV文件不存在: %s", csv_path)
         return cards
     
     try:
@@ -274,19 +733,120 @@ def load_cards_from_csv(csv_path: str) -> List[PokemonCard]:
                 )
                 cards.append(card)
                 
-    except Exception as e:
-        print(f"加载CSV文件出错: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("加载CSV文件出错: %s", csv_path)
     
     return cards
 
+def new_seed() -> int:
+    """生成新的对局种子"""
+    return random.randrange(2 ** 32)
+
+def derive_seed(seed: int, label: str) -> int:
+    """从对局种子派生子种子（座位洗牌、各AI等），同一对局种子派生结果固定"""
+    return random.Random(f"{seed}:{label}").randrange(2 ** 32)
+
+# 行动类型（与AI决策的action字段一致）
+MOVE_TAKE_BALLS = "take_balls"
+MOVE_BUY_CARD = "buy_card"
+MOVE_RESERVE_CARD = "reserve_card"
+MOVE_PASS = "pass"
+
+class Move(NamedTuple):
+    """一步行动（AI搜索用），由SplendorPokemonGame.apply执行"""
+    action: str                       # MOVE_*
+    balls: Tuple[BallType, ...] = ()  # 拿球时拿的球
+    card_id: Optional[int] = None     # 购买/预购的卡牌
+    
+    @classmethod
+    def from_decision(cls, decision: Optional[Dict]) -> 'Move':
+        """从AI决策字典（{"action": ..., "data": {...}}）转换"""
+        if not decision:
+            return cls(MOVE_PASS)
+        action = decision.get("action")
+        data = decision.get("data", {})
+        if action == MOVE_TAKE_BALLS or action == "take_gems":  # 兼容旧名称
+            ball_types_str = data.get("ball_types", data.get("gem_types", []))
+            return cls(MOVE_TAKE_BALLS, balls=tuple(BallType(ball_str) for ball_str in ball_types_str))
+        if action in (MOVE_BUY_CARD, MOVE_RESERVE_CARD):
+            return cls(action, card_id=(data.get("card") or {}).get("card_id"))
+        return cls(MOVE_PASS)
+    
+    @staticmethod
+    def buy(card_id: int) -> 'Move':
+        """购买某张卡牌的行动（共享同一个对象）"""
+        return _moves_for_card(card_id)[0]
+    
+    @staticmethod
+    def reserve(card_id: int) -> 'Move':
+        """预购某张卡牌的行动（共享同一个对象）"""
+        return _moves_for_card(card_id)[1]
+    
+    def to_decision(self) -> Optional[Dict]:
+        """转换为AI决策字典（跳过返回None）"""
+        if self.action == MOVE_TAKE_BALLS:
+            return {"action": MOVE_TAKE_BALLS, "data": {"ball_types": [ball.value for ball in self.balls]}}
+        if self.action in (MOVE_BUY_CARD, MOVE_RESERVE_CARD):
+            return {"action": self.action, "data": {"card": {"card_id": self.card_id}}}
+        return None
+
+@lru_cache(maxsize=4096)
+def _take_ball_moves(pool: Tuple[int, ...]) -> Tuple[Move, ...]:
+    """球池状态下所有合法的拿球方式（只取决于球池，按球池计数缓存）"""
+    available = [slot for slot in COLOR_SLOTS if pool[slot] > 0]
+    moves = [Move(MOVE_TAKE_BALLS, tuple(BALL_TYPES[slot] for slot in combo)) for combo in combinations(available, 3)]
+    for slot in available:
+        if pool[slot] >= 4:
+            moves.append(Move(MOVE_TAKE_BALLS, (BALL_TYPES[slot], BALL_TYPES[slot])))
+    if len(available) == 2:
+        moves.append(Move(MOVE_TAKE_BALLS, tuple(BALL_TYPES[slot] for slot in available)))
+    elif len(available) == 1 and pool[available[0]] < 4:
+        moves.append(Move(MOVE_TAKE_BALLS, (BALL_TYPES[available[0]],)))
+    return tuple(moves)
+
+_card_moves: Dict[int, Tuple[Move, Move]] = {}  # card_id -> (购买, 预购)，每张卡只创建一次
+
+def _moves_for_card(card_id: int) -> Tuple[Move, Move]:
+    moves = _card_moves.get(card_id)
+    if moves is None:
+        moves = _card_moves[card_id] = (Move(MOVE_BUY_CARD, card_id=card_id), Move(MOVE_RESERVE_CARD, card_id=card_id))
+    return moves
+
+class UndoToken:
+    """apply()返回的撤销令牌：记录这一步可能改动的状态
+
+    一步只会改动当前玩家、球池、场面、每个牌堆最多摸走的1张牌和回合状态，
+    所以只保存这些（卡牌对象共享），不拷贝整个对局
+    """
+    __slots__ = ("move", "applied", "seat", "balls", "display_size", "reserved",
+                 "player_state", "pool", "rows", "rare_card", "legendary_card", "decks", "turn_state")
+
+def _same_cards(cards: List[PokemonCard], saved: Tuple[PokemonCard, ...]) -> bool:
+    if len(cards) != len(saved):
+        return False
+    for card, saved_card in zip(cards, saved):
+        if card is not saved_card:
+            return False
+    return True
+
+def _evolution_graph():
+    """进程级进化图（卡牌目录依赖本模块，延迟导入）"""
+    from card_catalog import get_card_catalog
+    return get_card_catalog().evolution
+
+
 class SplendorPokemonGame:
     """璀璨宝石宝可梦游戏"""
     
-    CSV_PATH = os.path.join(os.path.dirname(__file__), 'card_library', 'cards_data.csv')
-    
-    def __init__(self, player_names: List[str], victory_points: int = 18):
+    def __init__(self, player_names: List[str], victory_points: int = 18, seed: Optional[int] = None):
+        """
+        Args:
+            player_names: 玩家名称（按座位顺序）
+            victory_points: 胜利分数
+            seed: 对局种子，洗牌只使用本局的随机数生成器（同一种子发牌完全相同）；不提供时随机生成
+        """
+        self.seed = seed if seed is not None else new_seed()
+        self.rng = random.Random(self.seed)
         self.players = [Player(name) for name in player_names]
         self.current_player_index = 0
         self.game_over = False
@@ -294,27 +854,37 @@ class SplendorPokemonGame:
         self.final_round_triggered = False
         self.final_round_starter = None
         self.victory_points_goal = victory_points  # 胜利目标分数
+        self.final_rankings = None  # 最终排名（游戏结束时计算）
+        self.quiet = False  # 为True时不记录对局日志（AI搜索中的模拟对局）
+        
+        # 卡牌位置索引（场上/稀有/传说/预购区），随各区域增删同步更新
+        self.card_index = CardIndex()
+        self._legal_cache = None  # legal_moves的缓存：(状态键, 结果)
         
         # 初始化球池
         self.ball_pool = self._init_ball_pool()
         
-        # 初始化卡牌
+        # 初始化卡牌（卡牌目录进程内只加载一次，这里只洗牌）
         self.deck_lv1, self.deck_lv2, self.deck_lv3 = self._init_decks()
         self.rare_deck, self.legendary_deck = self._init_special_decks()
         
         # 场面（12宫格 + 稀有 + 传说）
-        self.tableau = {1: [], 2: [], 3: []}
+        self.tableau = Tableau(self.card_index)
+        for level in [1, 2, 3]:
+            self.tableau[level] = []
         self.rare_card = None
         self.legendary_card = None
+        for seat, player in enumerate(self.players):
+            player.reserved_cards.bind(self.card_index, seat)
         
         self._setup_tableau()
     
-    def _init_ball_pool(self) -> Dict[BallType, int]:
+    def _init_ball_pool(self) -> BallVector:
         """初始化球池"""
         num_players = len(self.players)
         color_balls = 4 if num_players == 2 else (5 if num_players == 3 else 7)
         
-        pool = {}
+        pool = BallVector()
         for ball in BallType:
             if ball == BallType.MASTER:
                 pool[ball] = 5  # 大师球固定5个
@@ -322,38 +892,27 @@ class SplendorPokemonGame:
                 pool[ball] = color_balls
         return pool
     
+    def _shuffled_deck(self, level: int) -> List[PokemonCard]:
+        """洗牌：打乱指定等级的card_id列表，再映射为共享的卡牌对象"""
+        from card_catalog import get_card_catalog
+        catalog = get_card_catalog()
+        
+        card_ids = catalog.ids_by_level(level)
+        self.rng.shuffle(card_ids)
+        return [catalog.by_id[card_id] for card_id in card_ids]
+    
     def _init_decks(self) -> Tuple[List[PokemonCard], List[PokemonCard], List[PokemonCard]]:
-        """从CSV加载Lv1/Lv2/Lv3牌堆"""
-        all_cards = load_cards_from_csv(self.CSV_PATH)
-        
-        lv1 = [card for card in all_cards if card.level == 1]
-        lv2 = [card for card in all_cards if card.level == 2]
-        lv3 = [card for card in all_cards if card.level == 3]
-        
-        random.shuffle(lv1)
-        random.shuffle(lv2)
-        random.shuffle(lv3)
-        
-        print(f"✅ 从CSV加载卡牌: Lv1={len(lv1)}张, Lv2={len(lv2)}张, Lv3={len(lv3)}张")
-        return lv1, lv2, lv3
+        """洗Lv1/Lv2/Lv3牌堆"""
+        return self._shuffled_deck(1), self._shuffled_deck(2), self._shuffled_deck(3)
     
     def _init_special_decks(self) -> Tuple[List[PokemonCard], List[PokemonCard]]:
-        """从CSV加载稀有和传说牌堆"""
-        all_cards = load_cards_from_csv(self.CSV_PATH)
-        
-        rares = [card for card in all_cards if card.level == 4]
-        legendaries = [card for card in all_cards if card.level == 5]
-        
-        random.shuffle(rares)
-        random.shuffle(legendaries)
-        
-        print(f"✅ 从CSV加载特殊卡牌: 稀有={len(rares)}张, 传说={len(legendaries)}张")
-        return rares, legendaries
+        """洗稀有和传说牌堆"""
+        return self._shuffled_deck(4), self._shuffled_deck(5)
     
     def _setup_tableau(self):
         """设置场面"""
         for level in [1, 2, 3]:
-            deck = [self.deck_lv1, self.deck_lv2, self.deck_lv3][level-1]
+            deck = self._deck_for_tier(level)
             self.tableau[level] = [deck.pop() for _ in range(min(4, len(deck)))]
         
         if self.rare_deck:
@@ -361,6 +920,185 @@ class SplendorPokemonGame:
         if self.legendary_deck:
             self.legendary_card = self.legendary_deck.pop()
     
+    @property
+    def rare_card(self) -> Optional[PokemonCard]:
+        return self._rare_card
+    
+    @rare_card.setter
+    def rare_card(self, card: Optional[PokemonCard]):
+        self._set_special_card("_rare_card", (ZONE_RARE, None), card)
+    
+    @property
+    def legendary_card(self) -> Optional[PokemonCard]:
+        return self._legendary_card
+    
+    @legendary_card.setter
+    def legendary_card(self, card: Optional[PokemonCard]):
+        self._set_special_card("_legendary_card", (ZONE_LEGENDARY, None), card)
+    
+    def _set_special_card(self, attr: str, key: Tuple[str, None], card: Optional[PokemonCard]):
+        previous = getattr(self, attr, None)
+        if previous:
+            self.card_index.discard(previous, key)
+        setattr(self, attr, card)
+        if card:
+            self.card_index.add(card, key)
+    
+    def clone(self) -> 'SplendorPokemonGame':
+        """快速拷贝对局（AI搜索用）
+        
+        卡牌对象不可变，在副本之间共享；只拷贝球数、各区域的卡牌列表、位置索引、随机数状态和回合状态，
+        副本与原对局互不影响
+        """
+        game = SplendorPokemonGame.__new__(SplendorPokemonGame)
+        game.seed = self.seed
+        game.rng = random.Random()
+        game.rng.setstate(self.rng.getstate())
+        game.card_index = self.card_index.copy()
+        game._legal_cache = None
+        game.players = [player.clone(game.card_index) for player in self.players]
+        game.current_player_index = self.current_player_index
+        game.game_over = self.game_over
+        # winner/final_rankings引用的是原对局的玩家，副本中换成同一座位的玩家
+        game.winner = game.players[self.players.index(self.winner)] if self.winner is not None else None
+        game.final_round_triggered = self.final_round_triggered
+        game.final_round_starter = self.final_round_starter
+        game.victory_points_goal = self.victory_points_goal
+        game.quiet = self.quiet
+        game.final_rankings = ([(seat, game.players[seat]) for seat, _ in self.final_rankings]
+                               if getattr(self, "final_rankings", None) else None)
+        game.ball_pool = self.ball_pool.copy()
+        game.deck_lv1, game.deck_lv2, game.deck_lv3 = list(self.deck_lv1), list(self.deck_lv2), list(self.deck_lv3)
+        game.rare_deck, game.legendary_deck = list(self.rare_deck), list(self.legendary_deck)
+        game.tableau = self.tableau.copy(game.card_index)
+        game._rare_card = self._rare_card
+        game._legendary_card = self._legendary_card
+        return game
+    
+    def apply(self, move: Move) -> UndoToken:
+        """当前玩家执行一步行动并结束回合（与AI回合流程一致：行动 → end_turn），返回撤销令牌
+        
+        行动不合法时同样结束回合（视为跳过），令牌的applied为False；
+        令牌需要按与apply相反的顺序交给undo
+        """
+        seat = self.current_player_index
+        player = self.players[seat]
+        
+        token = UndoToken()
+        token.move = move
+        token.seat = seat
+        token.balls = tuple(player.balls.counts)
+        token.display_size = len(player.display_area)
+        token.reserved = tuple(player.reserved_cards)
+        token.player_state = (player.victory_points, player.has_evolved_this_turn, player.needs_return_balls)
+        token.pool = tuple(self.ball_pool.counts)
+        token.rows = tuple(tuple(self.tableau[tier]) for tier in (1, 2, 3))
+        token.rare_card = self._rare_card
+        token.legendary_card = self._legendary_card
+        token.decks = tuple((len(deck), deck[-1] if deck else None) for deck in self._all_decks())
+        token.turn_state = (self.current_player_index, self.game_over, self.winner, self.final_round_triggered,
+                            self.final_round_starter, self.final_rankings)
+        
+        token.applied = self.perform_move(move)
+        self.end_turn()
+        return token
+    
+    def perform_move(self, move: Move) -> bool:
+        """当前玩家执行一步行动（不结束回合），返回是否成功"""
+        if move.action == MOVE_TAKE_BALLS:
+            return self.take_balls(list(move.balls))
+        if move.action == MOVE_BUY_CARD or move.action == MOVE_RESERVE_CARD:
+            card = self.find_card_by_id(move.card_id, self.get_current_player())
+            if card is None:
+                return False
+            return self.buy_card(card) if move.action == MOVE_BUY_CARD else self.reserve_card(card)
+        return False
+    
+    def undo(self, token: UndoToken):
+        """撤销apply执行的一步，恢复到执行前的状态（包括卡牌位置索引）"""
+        player = self.players[token.seat]
+        player.balls.counts[:] = token.balls
+        display = player.display_area
+        while len(display) > token.display_size:  # 一步最多新增一张展示区卡牌
+            display.pop()
+        if not _same_cards(player.reserved_cards, token.reserved):
+            player.reserved_cards[:] = token.reserved
+        player.victory_points, player.has_evolved_this_turn, player.needs_return_balls = token.player_state
+        
+        self.ball_pool.counts[:] = token.pool
+        for tier, saved in zip((1, 2, 3), token.rows):
+            if not _same_cards(self.tableau[tier], saved):
+                self.tableau[tier][:] = saved
+        if self._rare_card is not token.rare_card:
+            self.rare_card = token.rare_card
+        if self._legendary_card is not token.legendary_card:
+            self.legendary_card = token.legendary_card
+        for deck, (size, last_card) in zip(self._all_decks(), token.decks):
+            if len(deck) < size:  # 一步每个牌堆最多摸走一张
+                deck.append(last_card)
+        
+        (self.current_player_index, self.game_over, self.winner, self.final_round_triggered,
+         self.final_round_starter, self.final_rankings) = token.turn_state
+    
+    def legal_moves(self, player: Player = None) -> Tuple[Move, ...]:
+        """列出该玩家（默认当前玩家）轮到行动时所有合法的拿球/购买/预购行动
+        
+        顺序：拿3个不同色 → 拿2个同色 → 球池只剩2色/1色时的拿法 → 购买（场上、稀有、传说、预购区）→ 预购场上卡牌；
+        结果按状态缓存，手上/球池的球、永久球或场面变化后才重新生成（盲预购牌堆顶只在API中处理）
+        """
+        return self._legal_state(player or self.get_current_player())[0]
+    
+    def buyable_cards(self, player: Player = None) -> Tuple[PokemonCard, ...]:
+        """该玩家（默认当前玩家）现在能购买的卡牌，顺序同legal_moves"""
+        return self._legal_state(player or self.get_current_player())[1]
+    
+    def is_legal_move(self, move: Move, player: Player = None) -> bool:
+        """检查行动是否合法（拿球不区分顺序）"""
+        if move.action == MOVE_TAKE_BALLS:
+            move = move._replace(balls=tuple(sorted(move.balls, key=lambda ball: ball.slot)))
+        state = self._legal_state(player or self.get_current_player())
+        if state[2] is None:
+            state[2] = frozenset(state[0])
+        return move in state[2]
+    
+    def _legal_state(self, player: Player) -> list:
+        """[行动列表, 可购买的卡牌, 行动集合（is_legal_move首次使用时生成）]"""
+        pool = tuple(self.ball_pool.counts)
+        key = (player, self.card_index.version, tuple(player.balls.counts), pool,
+               tuple(player.display_area.vector), tuple(card.card_id for card in player.reserved_cards),
+               self.game_over)
+        cached = self._legal_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        moves = []
+        buyable = []
+        if not self.game_over:
+            moves.extend(_take_ball_moves(pool))
+            candidates = [card for tier in (1, 2, 3) for card in self.tableau[tier]]
+            candidates += [card for card in (self._rare_card, self._legendary_card) if card]
+            candidates += player.reserved_cards
+            buyable = [card for card in candidates if player.can_afford(card)]
+            moves.extend(_moves_for_card(card.card_id)[0] for card in buyable)
+            
+            if len(player.reserved_cards) < 3:
+                moves.extend(_moves_for_card(card.card_id)[1]
+                             for tier in (1, 2, 3) for card in self.tableau[tier] if card.rarity == Rarity.NORMAL)
+        
+        state = [tuple(moves), tuple(buyable), None]
+        self._legal_cache = (key, state)
+        return state
+    
+    def _all_decks(self) -> Tuple[List[PokemonCard], ...]:
+        return (self.deck_lv1, self.deck_lv2, self.deck_lv3, self.rare_deck, self.legendary_deck)
+    
+    def _log(self, message: str, *args, level: int = logging.INFO, player: Optional[Player] = None):
+        """记录对局日志（quiet的搜索副本和未开启的级别直接跳过，参数按%s延迟格式化）"""
+        if self.quiet or not logger.isEnabledFor(level):
+            return
+        player = player or self.get_current_player()
+        logger.log(level, message, *args, extra={"player": player.name})
+    
     def get_current_player(self) -> Player:
         """获取当前玩家"""
         return self.players[self.current_player_index]
@@ -375,26 +1113,130 @@ class SplendorPokemonGame:
         Returns:
             找到的卡牌，如果未找到返回None
         """
-        # 在场上tableau中查找
-        for tier, cards in self.tableau.items():
-            for card in cards:
-                if card.card_id == card_id:
-                    return card
-        
-        # 在稀有/传说卡中查找
-        if self.rare_card and self.rare_card.card_id == card_id:
-            return self.rare_card
-        if self.legendary_card and self.legendary_card.card_id == card_id:
-            return self.legendary_card
-        
-        # 如果提供了玩家，在预购区查找
-        if player:
-            for card in player.reserved_cards:
-                if card.card_id == card_id:
-                    return card
+        found = self._locate(card_id, player)
+        return found[3] if found else None
+    
+    def find_card_by_name(self, name: str, player: Player = None,
+                          include_special: bool = True) -> Optional[PokemonCard]:
+        """根据名称查找卡牌（进化目标等），查找顺序同find_card_by_id
         
+        Args:
+            name: 卡牌名称
+            player: 如果提供，也会在该玩家的预购区查找
+            include_special: 是否包含稀有/传说卡
+        """
+        return self._first_located(self.card_index.names.get(name, ()), player, include_special)
+    
+    def find_evolution_target(self, base_card: PokemonCard, player: Player = None,
+                              include_special: bool = True) -> Optional[PokemonCard]:
+        """查找基础卡的进化目标：按进化图的目标card_id直接在位置索引中定位，查找顺序同find_card_by_name
+        
+        目录外的卡牌（测试/调试接口构造）不在进化图中，按进化目标名称查找
+        """
+        if not base_card.evolution:
+            return None
+        graph = _evolution_graph()
+        if not graph.covers(base_card):
+            return self.find_card_by_name(base_card.evolution.target_name, player, include_special)
+        return self._first_located(graph.targets[base_card.card_id], player, include_special)
+    
+    def evolution_options(self, player: Player = None, include_special: bool = False) -> List[Tuple[PokemonCard, PokemonCard]]:
+        """玩家现在能完成的进化 [(基础卡, 目标卡)]，按展示区顺序
+        
+        先用永久球向量比对进化图中的门槛，满足的才去位置索引里找目标卡（不再逐张扫描场面）
+        """
+        player = player or self.get_current_player()
+        if player.has_evolved_this_turn:
+            return []
+        graph = _evolution_graph()
+        permanent = player.display_area.vector
+        options = []
+        for base_card in player.display_area:
+            if not base_card.evolution:
+                continue
+            if graph.covers(base_card) and not graph.can_reach(base_card, permanent):
+                continue
+            target_card = self.find_evolution_target(base_card, player, include_special)
+            if target_card and player.can_evolve(target_card, base_card):
+                options.append((base_card, target_card))
+        return options
+    
+    def _first_located(self, card_ids, player: Optional[Player], include_special: bool) -> Optional[PokemonCard]:
+        """在这些card_id中取查找顺序最靠前的一张（场上 → 稀有 → 传说 → 预购区）"""
+        best = None
+        for card_id in card_ids:
+            found = self._locate(card_id, player)
+            if found is None or (not include_special and found[0] in (ZONE_RARE, ZONE_LEGENDARY)):
+                continue
+            if best is None or (_zone_rank(found), found[2]) < (_zone_rank(best), best[2]):
+                best = found
+        return best[3] if best else None
+    
+    def locate_card(self, card_id: int, player: Player = None) -> Optional[CardLocation]:
+        """查找卡牌位置：场上 → 稀有 → 传说 → 该玩家预购区（按索引直达所在的一排，不扫描场面）"""
+        found = self._locate(card_id, player)
+        return CardLocation(*found[:3]) if found else None
+    
+    def _locate(self, card_id: int, player: Optional[Player]) -> Optional[Tuple[str, Optional[int], int, PokemonCard]]:
+        """返回 (区域, 等级/座位, 下标, 卡牌)"""
+        keys = self.card_index.zones.get(card_id)
+        reserved = player.reserved_cards if player is not None else None
+        seat = reserved.tier if reserved is not None and reserved.card_index is self.card_index else None
+        
+        best = None
+        if keys:
+            for key in keys:
+                if key[0] == ZONE_RESERVED and (seat is None or key[1] != seat):
+                    continue
+                if best is None or _zone_rank(key) < _zone_rank(best):
+                    best = key
+        if best is None:
+            if reserved is None or seat is not None:
+                return None
+            # 不属于本局的玩家（测试中单独构造）只能逐张查找
+            best = (ZONE_RESERVED, None)
+        
+        zone, tier = best
+        if zone == ZONE_TABLEAU:
+            cards = self.tableau[tier]
+        elif zone == ZONE_RESERVED:
+            cards = reserved
+        else:
+            return (zone, None, 0, self._rare_card if zone == ZONE_RARE else self._legendary_card)
+        for slot, card in enumerate(cards):
+            if card.card_id == card_id:
+                return (zone, tier, slot, card)
         return None
     
+    def take_card(self, card: PokemonCard, player: Player = None, refill: bool = True) -> bool:
+        """把卡牌从所在位置移除（查找顺序同find_card_by_id），场上/稀有/传说空位从对应牌堆原位补充
+        
+        Returns:
+            是否找到并移除
+        """
+        found = self._locate(card.card_id, player)
+        if found is None:
+            return False
+        zone, tier, slot, _ = found
+        
+        if zone == ZONE_TABLEAU:
+            cards = self.tableau[tier]
+            deck = self._deck_for_tier(tier)
+            if refill and deck:
+                cards.replace(slot, deck.pop())  # 在原位置补充
+            else:
+                cards.pop(slot)
+        elif zone == ZONE_RARE:
+            self.rare_card = self.rare_deck.pop() if refill and self.rare_deck else None
+        elif zone == ZONE_LEGENDARY:
+            self.legendary_card = self.legendary_deck.pop() if refill and self.legendary_deck else None
+        else:
+            player.reserved_cards.pop(slot)
+        return True
+    
+    def _deck_for_tier(self, tier: int) -> List[PokemonCard]:
+        return [self.deck_lv1, self.deck_lv2, self.deck_lv3][tier - 1]
+    
     def _check_ball_limit_after_action(self):
         """检查并处理10球上限"""
         player = self.get_current_player()
@@ -405,12 +1247,13 @@ class SplendorPokemonGame:
             if "机器人" in player.name:
                 def return_balls_to_pool(ball_type, amount):
                     self.ball_pool[ball_type] += amount
-                player.check_ball_limit(return_balls_to_pool)
-                print(f"🤖 {player.name} 球数超过10个，已自动弃球")
+                player.check_ball_limit(return_balls_to_pool, verbose=not self.quiet)
+                self._log("🤖 %s 球数超过10个，已自动弃球", player.name)
             # 人类玩家需要手动选择放回
             else:
                 player.needs_return_balls = True
-                print(f"⚠️ {player.name} 球数超过10个({player.get_total_balls()})，需要手动放回{player.get_total_balls() - 10}个球")
+                self._log("⚠️ %s 球数超过10个(%d)，需要手动放回%d个球",
+                          player.name, player.get_total_balls(), player.get_total_balls() - 10)
     
     def return_balls(self, balls_to_return: Dict[BallType, int]) -> bool:
         """玩家手动放回球（超过10个时）"""
@@ -431,13 +1274,14 @@ class SplendorPokemonGame:
         
         # 检查放回数量是否正确
         if actual_return != needed_return:
-            print(f"❌ 放回数量不正确：需要放回{needed_return}个，实际{actual_return}个")
+            self._log("❌ 放回数量不正确：需要放回%d个，实际%d个", needed_return, actual_return, level=logging.WARNING)
             return False
         
         # 检查玩家是否有足够的球
         for ball_type, amount in balls_to_return.items():
             if amount > 0 and player.balls.get(ball_type, 0) < amount:
-                print(f"❌ {ball_type.value}球不足：需要{amount}个，只有{player.balls.get(ball_type, 0)}个")
+                self._log("❌ %s球不足：需要%d个，只有%d个", ball_type.value, amount, player.balls.get(ball_type, 0),
+                          level=logging.WARNING)
                 return False
         
         # 执行放回
@@ -445,10 +1289,10 @@ class SplendorPokemonGame:
             if amount > 0:
                 player.balls[ball_type] -= amount
                 self.ball_pool[ball_type] += amount
-                print(f"  放回 {ball_type.value} × {amount}")
+                self._log("  放回 %s × %d", ball_type.value, amount, level=logging.DEBUG)
         
         player.needs_return_balls = False
-        print(f"✅ {player.name} 成功放回{actual_return}个球，当前球数：{player.get_total_balls()}")
+        self._log("✅ %s 成功放回%d个球，当前球数：%d", player.name, actual_return, player.get_total_balls())
         return True
     
     def take_balls(self, ball_types: List[BallType]) -> bool:
@@ -566,19 +1410,9 @@ class SplendorPokemonGame:
             player.balls[BallType.MASTER] += 1
         
         # 从场上移除并补充（在原位置补充新牌）
-        # 使用card_id进行更安全的比较，避免引用问题
-        card_removed = False
-        for level, cards in self.tableau.items():
-            for idx, c in enumerate(cards):
-                if c.card_id == card.card_id:
-                    cards.pop(idx)  # 移除卡牌
-                    deck = [self.deck_lv1, self.deck_lv2, self.deck_lv3][level-1]
-                    if deck:
-                        cards.insert(idx, deck.pop())  # 在原位置插入
-                    card_removed = True
-                    break
-            if card_removed:
-                break
+        found = self._locate(card.card_id, None)
+        if found and found[0] == ZONE_TABLEAU:
+            self.take_card(card)
         
         # 检查球数上限（预购获得大师球后可能超过10个）
         self._check_ball_limit_after_action()
@@ -594,84 +1428,24 @@ class SplendorPokemonGame:
         if not player.buy_card(card, return_balls):
             return False
         
-        # 从场上或手牌移除（在原位置补充新牌）
-        # 使用card_id进行更安全的比较，避免引用问题
-        card_removed = False
-        for level, cards in self.tableau.items():
-            for idx, c in enumerate(cards):
-                if c.card_id == card.card_id:
-                    cards.pop(idx)  # 移除卡牌
-                    deck = [self.deck_lv1, self.deck_lv2, self.deck_lv3][level-1]
-                    if deck:
-                        cards.insert(idx, deck.pop())  # 在原位置插入
-                    card_removed = True
-                    break
-            if card_removed:
-                break
-        
-        # 从预购区移除（如果存在）
-        for idx, c in enumerate(player.reserved_cards):
-            if c.card_id == card.card_id:
-                player.reserved_cards.pop(idx)
-                break
-        
-        # 稀有/传说补充（使用card_id比较）
-        if self.rare_card and self.rare_card.card_id == card.card_id:
-            self.rare_card = self.rare_deck.pop() if self.rare_deck else None
-        elif self.legendary_card and self.legendary_card.card_id == card.card_id:
-            self.legendary_card = self.legendary_deck.pop() if self.legendary_deck else None
-        
+        # 从场上/稀有/传说或手牌移除（在原位置补充新牌）
+        self.take_card(card, player)
         return True
     
     def check_evolution(self):
         """检查并执行进化（回合结束时）"""
         player = self.get_current_player()
         
-        if player.has_evolved_this_turn:
+        # 展示区中第一张满足门槛、且目标卡在场上或手牌的卡进化（每回合最多进化1次）
+        options = self.evolution_options(player, include_special=False)
+        if not options:
             return
         
-        # 检查展示区每张卡是否可进化
-        for base_card in player.display_area[:]:  # 复制列表避免修改时出错
-            if not base_card.evolution:
-                continue
-            
-            # 查找进化目标卡（场上或手牌）
-            target_card = None
-            for level, cards in self.tableau.items():
-                for card in cards:
-                    if card.name == base_card.evolution.target_name:
-                        target_card = card
-                        break
-                if target_card:
-                    break
-            
-            # 也检查手牌
-            if not target_card:
-                for card in player.reserved_cards:
-                    if card.name == base_card.evolution.target_name:
-                        target_card = card
-                        break
-            
-            if target_card and player.can_evolve(target_card, base_card):
-                # 执行进化
-                if player.evolve(base_card, target_card):
-                    # 从场上或手牌移除进化后的卡（使用card_id比较，避免引用问题）
-                    card_removed = False
-                    for level, cards in self.tableau.items():
-                        for idx, c in enumerate(cards):
-                            if c.card_id == target_card.card_id:
-                                cards.pop(idx)
-                                card_removed = True
-                                break
-                        if card_removed:
-                            break
-                    # 从预购区移除（使用card_id比较）
-                    for idx, c in enumerate(player.reserved_cards):
-                        if c.card_id == target_card.card_id:
-                            player.reserved_cards.pop(idx)
-                            break
-                    print(f"{player.name} 进化：{base_card.name} → {target_card.name}")
-                    return  # 每回合最多进化1次
+        base_card, target_card = options[0]
+        if player.evolve(base_card, target_card):
+            # 从场上或手牌移除进化后的卡（场上不补牌）
+            self.take_card(target_card, player, refill=False)
+            self._log("%s 进化：%s → %s", player.name, base_card.name, target_card.name)
     
     def end_turn(self):
         """结束回合（自动调用，不需要手动触发）
@@ -694,7 +1468,7 @@ class SplendorPokemonGame:
                 
                 if is_last_player:
                     # 最后一个玩家触发胜利分数，游戏直接结束
-                    print(f"{player.name}（最后玩家）达到{player.get_victory_points()}分，游戏结束！")
+                    self._log("%s（最后玩家）达到%d分，游戏结束！", player.name, player.get_victory_points())
                     self.game_over = True
                     self._calculate_final_rankings()
                     return  # 直接结束，不切换玩家
@@ -702,7 +1476,7 @@ class SplendorPokemonGame:
                     # 非最后玩家触发胜利分数，进入最后一轮
                     self.final_round_triggered = True
                     self.final_round_starter = current_player_idx
-                    print(f"{player.name} 达到{player.get_victory_points()}分！游戏进入最后一轮")
+                    self._log("%s 达到%d分！游戏进入最后一轮", player.name, player.get_victory_points())
         
         # 2. 重置回合状态
         player.has_evolved_this_turn = False
@@ -720,7 +1494,7 @@ class SplendorPokemonGame:
                 # 所有玩家都退出了，游戏结束
                 self.game_over = True
                 self._calculate_final_rankings()
-                print(f"所有玩家都已退出，游戏结束")
+                self._log("所有玩家都已退出，游戏结束")
                 return
         
         # 5. 检查游戏是否结束（最后一轮且回到起始玩家）
@@ -729,7 +1503,7 @@ class SplendorPokemonGame:
             if self.current_player_index == 0:  # 回到第一个玩家，说明最后一个玩家刚结束
                 self.game_over = True
                 self._calculate_final_rankings()
-                print(f"最后一轮结束！游戏结束")
+                self._log("最后一轮结束！游戏结束")
     
     def _calculate_final_rankings(self):
         """计算最终排名
@@ -751,10 +1525,11 @@ class SplendorPokemonGame:
         self.final_rankings = players_with_index
         
         # 打印排名
-        print("\n=== 最终排名 ===")
+        self._log("=== 最终排名 ===")
         for rank, (original_idx, player) in enumerate(players_with_index, 1):
             medal = {1: "🥇", 2: "🥈", 3: "🥉"}.get(rank, f"{rank}️⃣")
-            print(f"{medal} 第{rank}名：{player.name}（玩家{original_idx + 1}），{player.get_victory_points()}分")
+            self._log("%s 第%d名：%s（玩家%d），%d分", medal, rank, player.name, original_idx + 1,
+                      player.get_victory_points(), player=player)
     
     def get_final_rankings(self):
         """获取最终排名列表
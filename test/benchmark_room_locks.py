@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+房间锁争用基准测试
+比较全局锁（旧设计）和房间锁（当前设计）下，状态请求吞吐量随房间数的变化
+
+每个房间有一个模拟AI线程反复持锁think_ms毫秒（模拟AI决策期间持有锁），
+以及若干客户端线程不断请求 /api/rooms/<room_id>/state。
+- 全局锁模式：AI和所有请求都串行在同一把锁上（模拟旧的全局room_lock）
+- 房间锁模式：AI只持有自己房间的room.lock，其他房间的请求不受影响
+
+运行方式：
+python test/benchmark_room_locks.py --rooms 1,2,4,8 --seconds 2 --think-ms 50
+"""
+
+import sys
+import os
+import argparse
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from backend.app import app, game_rooms, room_lock, GameRoom, remove_room
+
+
+def run_once(room_count: int, mode: str, seconds: float, think_ms: float, clients_per_room: int) -> float:
+    """运行一轮基准测试，返回每秒完成的状态请求数"""
+    global_lock = threading.Lock()
+    stop = threading.Event()
+    counts = []
+    room_ids = [f"bench_{mode}_{room_count}_{i}" for i in range(room_count)]
+
+    for room_id in room_ids:
+        room = GameRoom(room_id, f"{room_id}_A")
+        room.max_players = 2
+        room.add_player(f"{room_id}_B")
+        room.start_game()
+        with room_lock:
+            game_rooms[room_id] = room
+
+    def ai_loop(room_id):
+        lock = global_lock if mode == "global" else game_rooms[room_id].lock
+        while not stop.is_set():
+            with lock:
+                time.sleep(think_ms / 1000)
+            time.sleep(think_ms / 1000)
+
+    def client_loop(room_id, slot):
+        client = app.test_client()
+        done = 0
+        while not stop.is_set():
+            if mode == "global":
+                with global_lock:
+                    client.get(f"/api/rooms/{room_id}/state")
+            else:
+                client.get(f"/api/rooms/{room_id}/state")
+            done += 1
+        counts[slot] = done
+
+    threads = []
+    for room_id in room_ids:
+        threads.append(threading.Thread(target=ai_loop, args=(room_id,)))
+        for _ in range(clients_per_room):
+            counts.append(0)
+            threads.append(threading.Thread(target=client_loop, args=(room_id, len(counts) - 1)))
+
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with room_lock:
+        for room_id in room_ids:
+            remove_room(room_id)
+
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="房间锁争用基准测试")
+    parser.add_argument("--rooms", default="1,2,4,8", help="房间数列表，逗号分隔")
+    parser.add_argument("--seconds", type=float, default=2.0, help="每轮持续时间（秒）")
+    parser.add_argument("--think-ms", type=float, default=50.0, help="模拟AI每次持锁时间（毫秒）")
+    parser.add_argument("--clients", type=int, default=2, help="每个房间的客户端线程数")
+    args = parser.parse_args()
+
+    room_counts = [int(n) for n in args.rooms.split(",")]
+
+    print("=" * 60)
+    print(f"🏁 房间锁争用基准测试（AI持锁{args.think_ms:.0f}ms，每房间{args.clients}个客户端）")
+    print("=" * 60)
+    print(f"{'房间数':>6} {'全局锁 req/s':>14} {'房间锁 req/s':>14} {'加速比':>8}")
+    for room_count in room_counts:
+        global_rps = run_once(room_count, "global", args.seconds, args.think_ms, args.clients)
+        room_rps = run_once(room_count, "per-room", args.seconds, args.think_ms, args.clients)
+        speedup = room_rps / global_rps if global_rps else float("inf")
+        print(f"{room_count:>6} {global_rps:>14.1f} {room_rps:>14.1f} {speedup:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI回合调度器测试
+验证每个房间最多一个待执行回合、思考延迟、同房间串行执行、取消，以及回合异常写入日志
+"""
+
+import sys
+import os
+import logging
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from backend.ai_scheduler import AITurnScheduler
+from game_logging import current_log_context, get_logger
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_duplicate_schedules_are_merged():
+    """测试重复登记只执行一次"""
+    calls = []
+    scheduler = AITurnScheduler(calls.append, think_delay=0.1)
+    try:
+        assert scheduler.schedule("room1")
+        for _ in range(10):
+            assert not scheduler.schedule("room1")
+        assert scheduler.queue_depth() == 1
+
+        assert _wait_until(lambda: scheduler.stats()["executed"] == 1)
+        time.sleep(0.2)
+        assert calls == ["room1"]
+        assert scheduler.queue_depth() == 0
+    finally:
+        scheduler.shutdown()
+    print("  ✅ 重复登记被合并")
+
+
+def test_think_delay():
+    """测试思考延迟"""
+    started = []
+    scheduler = AITurnScheduler(lambda room_id: started.append(time.monotonic()), think_delay=0.2)
+    try:
+        scheduled_at = time.monotonic()
+        scheduler.schedule("room1")
+        assert _wait_until(lambda: started)
+        assert started[0] - scheduled_at >= 0.2
+    finally:
+        scheduler.shutdown()
+    print("  ✅ 思考延迟生效")
+
+
+def test_back_to_back_turns_run_serially():
+    """测试回合内登记下一回合（连续AI回合）时同房间串行执行"""
+    active = []
+    overlaps = []
+    turns = []
+    lock = threading.Lock()
+    scheduler = None
+
+    def run_turn(room_id):
+        with lock:
+            if room_id in active:
+                overlaps.append(room_id)
+            active.append(room_id)
+        turns.append(room_id)
+        if len(turns) < 3:
+            scheduler.schedule(room_id)  # 下一个AI玩家
+        time.sleep(0.05)
+        with lock:
+            active.remove(room_id)
+
+    scheduler = AITurnScheduler(run_turn, think_delay=0, max_workers=4)
+    try:
+        scheduler.schedule("room1")
+        assert _wait_until(lambda: scheduler.stats()["executed"] == 3)
+        assert turns == ["room1"] * 3
+        assert overlaps == []
+    finally:
+        scheduler.shutdown()
+    print("  ✅ 连续AI回合串行执行")
+
+
+def test_cancel_pending_turn():
+    """测试取消待执行回合（房间删除）"""
+    calls = []
+    scheduler = AITurnScheduler(calls.append, think_delay=0.2)
+    try:
+        scheduler.schedule("room1")
+        scheduler.schedule("room2")
+        assert scheduler.cancel("room1")
+        assert not scheduler.cancel("room1")
+        assert _wait_until(lambda: calls == ["room2"])
+        time.sleep(0.3)
+        assert calls == ["room2"]
+    finally:
+        scheduler.shutdown()
+    print("  ✅ 取消待执行回合")
+
+
+class _ListHandler(logging.Handler):
+    """记录日志和当时的上下文字段"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record, current_log_context()))
+
+
+def test_turn_error_logged():
+    """测试AI回合抛异常时带房间字段和堆栈写入日志，调度器继续工作"""
+    def run_turn(room_id):
+        if room_id == "broken":
+            raise RuntimeError("进程池已损坏")
+        calls.append(room_id)
+
+    calls = []
+    handler = _ListHandler()
+    logger = get_logger("scheduler")
+    logger.addHandler(handler)
+    scheduler = AITurnScheduler(run_turn, think_delay=0.01)
+    try:
+        scheduler.schedule("broken")
+        assert _wait_until(lambda: handler.records)
+        record, context = handler.records[0]
+        assert record.levelno == logging.ERROR and record.exc_info and "进程池已损坏" in record.getMessage()
+        assert context["room_id"] == "broken"
+        scheduler.schedule("room1")
+        assert _wait_until(lambda: calls == ["room1"])
+    finally:
+        scheduler.shutdown()
+        logger.removeHandler(handler)
+    print("  ✅ 回合异常写入日志")
+
+
+if __name__ == '__main__':
+    test_duplicate_schedules_are_merged()
+    test_think_delay()
+    test_back_to_back_turns_run_serially()
+    test_cancel_pending_turn()
+    test_turn_error_logged()
+    print("\n✅ AI回合调度器测试全部通过")
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI决策服务测试
+验证进程池决策与直接调用一致、提交时做快照、批量决策、延迟统计，以及房间状态变化时丢弃过期结果
+"""
+
+import sys
+import os
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from splendor_pokemon import *
+from ai_player import AIPlayer
+from ai_service import AIDecisionService
+from backend import app as server
+
+
+def _games(count):
+    return [SplendorPokemonGame(["机器人1", "机器人2", "机器人3"], seed=seed) for seed in range(count)]
+
+
+def test_pool_matches_direct_decisions():
+    """测试进程池和线程内的决策都与直接调用一致，并返回推进后的AI"""
+    for workers in (0, 2):
+        service = AIDecisionService(workers=workers)
+        try:
+            for game in _games(3):
+                direct_ai = AIPlayer("困难", seed=7)
+                expected = direct_ai.make_decision(game, game.get_current_player())
+
+                ai = AIPlayer("困难", seed=7)
+                decision, updated_ai = service.decide(ai, game, timeout=30)
+                assert decision == expected
+                assert updated_ai.rng.getstate() == direct_ai.rng.getstate()
+                assert ai.rng.getstate() == AIPlayer("困难", seed=7).rng.getstate()  # 原AI不受影响
+        finally:
+            service.shutdown()
+    print("  ✅ 决策与直接调用一致")
+
+
+def test_snapshot_and_batch():
+    """测试提交时做快照（之后修改对局不影响结果），批量决策并统计延迟分位数"""
+    service = AIDecisionService(workers=2)
+    try:
+        games = _games(6)
+        expected = [AIPlayer("中等", seed=1).make_decision(game, game.get_current_player()) for game in games]
+
+        futures = [service.submit(AIPlayer("中等", seed=1), game) for game in games]
+        for game in games:
+            game.ball_pool.counts[:] = [0] * NUM_BALL_TYPES
+            game.tableau[1].clear()
+        assert [future.result(30)[0] for future in futures] == expected
+
+        results = service.decide_many([(AIPlayer("中等", seed=1), game) for game in _games(6)], timeout=30)
+        assert [decision for decision, _ in results] == expected
+
+        stats = service.stats()
+        assert stats["submitted"] == stats["completed"] == 12
+        assert stats["in_flight"] == 0 and stats["failed"] == 0
+        latency = stats["latency_ms"]
+        assert 0 < latency["p50"] <= latency["p90"] <= latency["p99"] <= latency["max"]
+    finally:
+        service.shutdown()
+    print("  ✅ 快照、批量决策和延迟分位数")
+
+
+def _start_ai_room(room_id):
+    room = server.GameRoom(room_id, "玩家A")
+    for name in ("机器人·训练家·小智", "机器人·训练家·小霞", "机器人·训练家·小刚"):
+        room.add_player(name, is_ai=True)
+    assert room.start_game(seed=5)
+    room.game.current_player_index = next(seat for seat, name in enumerate(room.players) if name in room.ai_players)
+    with server.room_lock:
+        server.game_rooms[room_id] = room
+    return room
+
+
+def test_stale_result_discarded():
+    """测试AI思考期间房间状态变化时丢弃结果，否则应用结果并替换AI"""
+    class ChangingService(AIDecisionService):
+        """提交后立即修改房间状态（模拟AI思考期间有玩家操作）"""
+        def submit(self, ai, game):
+            future = super().submit(ai, game)
+            room.bump_state_version()
+            return future
+
+    original_service = server.ai_service
+    room_id = "ai_service_room"
+    room = _start_ai_room(room_id)
+    try:
+        server.ai_service = ChangingService(workers=0)
+        seat = room.game.current_player_index
+        version = room.state_version
+        server.execute_ai_turn(room_id)
+        assert room.game.current_player_index == seat
+        assert room.state_version == version + 1
+        assert server.ai_service.stats()["stale"] == 1
+
+        server.ai_service = AIDecisionService(workers=0)
+        name = room.players[seat]
+        ai_before = room.ai_players[name]
+        server.execute_ai_turn(room_id)
+        assert room.game.current_player_index != seat
+        assert room.ai_players[name] is not ai_before
+        assert server.ai_service.stats()["completed"] == 1
+    finally:
+        server.ai_service = original_service
+        with server.room_lock:
+            server.remove_room(room_id)
+    print("  ✅ 过期结果被丢弃")
+
+
+class _RecordingScheduler:
+    """记录登记的房间，不真正执行"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule(self, room_id):
+        self.scheduled.append(room_id)
+        return True
+
+
+def test_failed_decision_retried_then_skipped():
+    """测试决策异常或超时时重新登记AI回合，连续失败用尽重试后跳过该回合，房间不会卡住"""
+    class BrokenService(AIDecisionService):
+        def submit(self, ai, game):
+            future = Future()
+            future.set_exception(BrokenProcessPool("工作进程异常退出"))
+            return future
+
+    class HangingService(AIDecisionService):
+        def submit(self, ai, game):
+            return Future()  # 永远不返回
+
+    class UnsubmittableService(AIDecisionService):
+        def submit(self, ai, game):
+            raise BrokenProcessPool("进程池已损坏")
+
+    original = (server.ai_service, server.ai_scheduler, server.AI_DECISION_TIMEOUT_SECONDS)
+    room_id = "ai_failure_room"
+    room = _start_ai_room(room_id)
+    try:
+        server.ai_scheduler = _RecordingScheduler()
+        server.ai_service = HangingService(workers=0)
+        server.AI_DECISION_TIMEOUT_SECONDS = 0.05
+        seat = room.game.current_player_index
+        server.execute_ai_turn(room_id)
+        assert server.ai_service.stats()["timed_out"] == 1
+        assert server.ai_scheduler.scheduled == [room_id] and room.game.current_player_index == seat
+
+        server.ai_service = BrokenService(workers=0)
+        server.execute_ai_turn(room_id)
+        assert server.ai_scheduler.scheduled == [room_id] * 2 and room.game.current_player_index == seat
+
+        server.ai_service = UnsubmittableService(workers=0)  # 提交本身失败也计入重试
+        server.execute_ai_turn(room_id)
+        assert room.game.current_player_index != seat  # 重试用尽，跳过该回合
+        assert room.game.players[seat].last_action == "⚠️ AI决策失败，跳过行动"
+        assert room.history.turns[0]["states_after"] and room.ai_decision_failures == 0
+    finally:
+        server.ai_service, server.ai_scheduler, server.AI_DECISION_TIMEOUT_SECONDS = original
+        with server.room_lock:
+            server.remove_room(room_id)
+    print("  ✅ 决策失败时重试并跳过")
+
+
+def test_failed_submit_and_cancel_counted():
+    """测试进程池提交失败不计入进行中，超时后取消的决策计为失败"""
+    class _Executor:
+        def __init__(self, broken):
+            self.broken = broken
+            self.futures = []
+
+        def submit(self, *args):
+            if self.broken:
+                raise BrokenProcessPool("进程池已损坏")
+            self.futures.append(Future())
+            return self.futures[-1]
+
+    game = SplendorPokemonGame(["机器人A", "机器人B"], seed=5)
+    ai = AIPlayer("中等")
+    service = AIDecisionService(workers=1)
+    service._executor = _Executor(broken=True)
+    try:
+        service.submit(ai, game)
+        assert False, "提交失败时应抛出异常"
+    except BrokenProcessPool:
+        pass
+    stats = service.stats()
+    assert stats["submitted"] == 0 and stats["in_flight"] == 0
+    assert service._executor is None  # 下次提交时重建进程池
+
+    service._executor = _Executor(broken=False)
+    future = service.submit(ai, game)
+    assert service.stats()["in_flight"] == 1
+    assert future.cancel()
+    stats = service.stats()
+    assert stats["failed"] == 1 and stats["in_flight"] == 0 and stats["completed"] == 0
+    print("  ✅ 提交失败和取消的决策计数正确")
+
+
+if __name__ == '__main__':
+    test_pool_matches_direct_decisions()
+    test_snapshot_and_batch()
+    test_stale_result_discarded()
+    test_failed_decision_retried_then_skipped()
+    test_failed_submit_and_cancel_counted()
+    print("\n✅ AI决策服务测试全部通过")
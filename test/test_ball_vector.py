@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+球向量测试
+验证BallVector兼容字典读写，以及向量化的支付判断与逐色计算一致
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from splendor_pokemon import *
+from card_catalog import get_card_catalog
+
+
+def _can_afford_by_dict(player, card):
+    """逐色计算的支付判断（原实现）"""
+    permanent = player.get_permanent_balls()
+    needed_master_balls = 0
+    for ball, cost in card.cost.items():
+        if ball == BallType.MASTER:
+            needed_master_balls += cost
+            continue
+        actual_cost = max(0, cost - permanent.get(ball, 0))
+        if player.balls[ball] < actual_cost:
+            needed_master_balls += actual_cost - player.balls[ball]
+    return player.balls[BallType.MASTER] >= needed_master_balls
+
+
+def test_dict_compatibility():
+    """测试BallVector的字典接口"""
+    balls = BallVector()
+    balls[BallType.RED] += 2
+    balls[BallType.MASTER] = 1
+
+    assert balls[BallType.RED] == 2
+    assert balls.get(BallType.BLUE) == 0
+    assert list(balls.keys()) == list(BallType)
+    assert dict(balls) == {ball: (2 if ball == BallType.RED else 1 if ball == BallType.MASTER else 0)
+                           for ball in BallType}
+    assert balls == {BallType.RED: 2, BallType.MASTER: 1}
+    assert sum(balls.values()) == balls.total() == 3
+    assert balls.to_json(skip_zero=True) == {"红": 2, "大师球": 1}
+    assert len(balls.to_json()) == 6
+
+    # 键集合与原字典{ball: 0 for ball in BallType}相同：数量为0的球也是键
+    original = {ball: 0 for ball in BallType}
+    assert all((ball in balls) == (ball in original) for ball in BallType)
+    assert list(balls) == list(original) and "红" not in balls
+
+    clone = balls.copy()
+    clone[BallType.RED] = 0
+    assert balls[BallType.RED] == 2
+    print("  ✅ 字典接口兼容")
+
+
+def test_vectorized_affordability_matches_dict():
+    """测试向量化支付判断与逐色计算一致，支付后球数守恒"""
+    rng = random.Random(99)
+    cards = get_card_catalog().cards
+
+    for _ in range(500):
+        game = SplendorPokemonGame(["训练家", "对手"], seed=rng.randrange(10 ** 6))
+        player = game.players[0]
+        for ball in BallType:
+            player.balls[ball] = rng.randint(0, 3)
+        player.display_area.extend(rng.sample(cards, rng.randint(0, 6)))
+
+        card = rng.choice(cards)
+        expected = _can_afford_by_dict(player, card)
+        assert player.can_afford(card) == expected
+
+        before = player.get_total_balls() + sum(game.ball_pool.values())
+        assert game.buy_card(card) == expected
+        assert player.get_total_balls() + sum(game.ball_pool.values()) == before
+        assert all(count >= 0 for count in player.balls.values())
+    print("  ✅ 向量化支付判断一致")
+
+
+def test_card_vectors():
+    """测试卡牌的6槽位向量"""
+    for card in get_card_catalog().cards:
+        assert card.cost_vector == ball_vector(card.cost)
+        assert card.permanent_vector == ball_vector(card.permanent_balls)
+        if card.evolution:
+            assert card.evolution.required_vector == ball_vector(card.evolution.required_balls)
+    print("  ✅ 卡牌向量正确")
+
+
+if __name__ == '__main__':
+    test_dict_compatibility()
+    test_vectorized_affordability_matches_dict()
+    test_card_vectors()
+    print("\n✅ 球向量测试全部通过")
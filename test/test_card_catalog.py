@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡牌目录测试
+验证CSV只加载一次、卡牌不可变、索引完整，以及开局只洗牌不重新解析
+"""
+
+import sys
+import os
+import dataclasses
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import splendor_pokemon
+from splendor_pokemon import *
+from card_catalog import CardCatalog, get_card_catalog
+
+
+def test_catalog_indexes():
+    """测试目录索引"""
+    catalog = get_card_catalog()
+
+    assert len(catalog) == 90
+    assert len(catalog.cards_by_level(1)) == 35
+    assert len(catalog.cards_by_level(2)) == 30
+    assert len(catalog.cards_by_level(3)) == 15
+    assert len(catalog.cards_by_rarity(Rarity.RARE)) == 5
+    assert len(catalog.cards_by_rarity(Rarity.LEGENDARY)) == 5
+
+    for card in catalog.cards:
+        assert catalog.get(card.card_id) is card
+        assert card in catalog.cards_by_name(card.name)
+    print("  ✅ 索引完整")
+
+
+def test_cards_are_frozen():
+    """测试卡牌不可变"""
+    card = get_card_catalog().cards[0]
+    try:
+        card.victory_points = 99
+        assert False, "卡牌应为只读"
+    except dataclasses.FrozenInstanceError:
+        pass
+    print("  ✅ 卡牌只读")
+
+
+def test_catalog_loaded_once():
+    """测试开局不再解析CSV，并且卡牌对象在游戏间共享"""
+    get_card_catalog()
+
+    original_loader = splendor_pokemon.load_cards_from_csv
+    calls = []
+
+    def counting_loader(path):
+        calls.append(path)
+        return original_loader(path)
+
+    splendor_pokemon.load_cards_from_csv = counting_loader
+    try:
+        game1 = SplendorPokemonGame(["P1", "P2"])
+        game2 = SplendorPokemonGame(["P1", "P2"])
+    finally:
+        splendor_pokemon.load_cards_from_csv = original_loader
+
+    assert calls == []
+
+    catalog = get_card_catalog()
+    for game in (game1, game2):
+        all_cards = (game.deck_lv1 + game.deck_lv2 + game.deck_lv3 +
+                     game.tableau[1] + game.tableau[2] + game.tableau[3])
+        assert len(all_cards) == 80
+        for card in all_cards:
+            assert catalog.get(card.card_id) is card
+    print("  ✅ 开局只洗牌，卡牌对象共享")
+
+
+def test_validation_rejects_duplicate_ids():
+    """测试重复ID校验"""
+    card = get_card_catalog().cards[0]
+    try:
+        CardCatalog([card, card])
+        assert False, "重复ID应校验失败"
+    except ValueError:
+        pass
+    print("  ✅ 重复ID被拒绝")
+
+
+if __name__ == '__main__':
+    test_catalog_indexes()
+    test_cards_are_frozen()
+    test_catalog_loaded_once()
+    test_validation_rejects_duplicate_ids()
+    print("\n✅ 卡牌目录测试全部通过")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡牌静态特征表测试
+验证按card_id索引的特征与逐张计算一致、缺口计算与Player一致，以及拷贝后的目录卡牌和目录外卡牌的处理
+"""
+
+import sys
+import os
+import copy
+import pickle
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from splendor_pokemon import *
+from card_catalog import get_card_catalog
+
+
+def test_features_match_cards():
+    """测试每张卡的静态特征与直接计算一致"""
+    catalog = get_card_catalog()
+    features = catalog.features
+    for card in catalog.cards:
+        row = features.row(card)
+        assert row == card.card_id and features.cards[row] is card
+        assert features.cost_total[row] == sum(card.cost.values())
+        assert features.permanent_total[row] == sum(card.permanent_balls.values())
+        assert features.point_weight[row] == card.victory_points + 1
+        assert features.buy_value[row] == (card.victory_points * 10 + card.level * 2 +
+                                           sum(card.permanent_balls.values()) * 3)
+        assert (features.evolution_stages[row] > 0) == bool(card.evolution)
+        assert all(card.cost_vector[slot] > 0 for slot in features.cost_slots[row])
+    print("  ✅ 静态特征与逐张计算一致")
+
+
+def test_evolution_stages():
+    """测试进化链阶段数：能进化两次的卡为2，其进化目标为1"""
+    catalog = get_card_catalog()
+    features = catalog.features
+    two_stage = [card for card in catalog.cards if features.evolution_stages[card.card_id] == 2]
+    assert two_stage
+    for card in two_stage:
+        for evolved in catalog.cards_by_name(card.evolution.target_name):
+            assert features.evolution_stages[evolved.card_id] <= 1
+    print(f"  ✅ 进化链阶段数正确（{len(two_stage)}张卡可进化两次）")
+
+
+def test_gap_matches_player():
+    """测试缺口计算与Player.get_shortfall / get_ball_gap一致"""
+    features = get_card_catalog().features
+    game = SplendorPokemonGame(["P1", "P2"], seed=3)
+    player = game.players[0]
+    player.balls.counts[:] = [1, 0, 2, 1, 0, 1]
+    player.display_area.extend(get_card_catalog().cards_by_level(1)[:4])
+    for card in get_card_catalog().cards:
+        row = features.row(card)
+        hand, permanent = player.balls.counts, player.display_area.vector
+        assert features.ball_gap(row, hand, permanent) == player.get_ball_gap(card)
+        shortfall = player.get_shortfall(card)
+        assert dict(features.shortfall(row, hand, permanent)) == {slot: short for slot, short in enumerate(shortfall) if short}
+    print("  ✅ 缺口计算与玩家一致")
+
+
+def test_foreign_cards():
+    """测试目录卡牌拷贝和跨进程传递后仍是同一个对象、复用目录行，目录外构造的卡牌追加新行"""
+    features = get_card_catalog().features
+    card = get_card_catalog().cards[0]
+    assert copy.deepcopy(card) is card and pickle.loads(pickle.dumps(card)) is card
+    assert features.row(pickle.loads(pickle.dumps(card))) == card.card_id
+
+    custom = PokemonCard(card.card_id, "测试卡", 1, Rarity.NORMAL, 3,
+                         {BallType.RED: 2, BallType.BLUE: 1}, {BallType.RED: 1})
+    row = features.row(custom)
+    assert row != card.card_id and features.row(custom) == row
+    assert features.cost_total[row] == 3 and features.point_weight[row] == 4
+    assert features.cost_slots[row] == (BallType.RED.slot, BallType.BLUE.slot)
+    restored = pickle.loads(pickle.dumps(custom))  # 目录外卡牌按内容重建
+    assert restored == custom and restored is not custom and restored is not card
+    print("  ✅ 目录外卡牌追加新行")
+
+
+if __name__ == '__main__':
+    test_features_match_cards()
+    test_evolution_stages()
+    test_gap_matches_player()
+    test_foreign_cards()
+    print("\n✅ 卡牌静态特征表测试全部通过")
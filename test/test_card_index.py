@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡牌位置索引测试
+验证购买、预购、进化和直接修改场面/预购区列表后，card_id/名称索引与逐张扫描一致
+"""
+
+import sys
+import os
+import copy
+import pickle
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from splendor_pokemon import *
+from card_catalog import get_card_catalog
+from ai_player import AIPlayer
+from simulate import apply_ai_decision
+
+
+def _scan(game):
+    """逐张扫描得到的索引（旧实现的查找范围）"""
+    zones, names = {}, {}
+    rows = [((ZONE_TABLEAU, tier), cards) for tier, cards in game.tableau.items()]
+    rows.append(((ZONE_RARE, None), [game.rare_card] if game.rare_card else []))
+    rows.append(((ZONE_LEGENDARY, None), [game.legendary_card] if game.legendary_card else []))
+    rows += [((ZONE_RESERVED, seat), p.reserved_cards) for seat, p in enumerate(game.players)]
+    for key, cards in rows:
+        for card in cards:
+            zones.setdefault(card.card_id, []).append(key)
+            if card.card_id not in names.setdefault(card.name, []):
+                names[card.name].append(card.card_id)
+    return zones, names
+
+
+def _assert_index_consistent(game):
+    zones, names = _scan(game)
+    assert {k: sorted(v, key=str) for k, v in game.card_index.zones.items()} == \
+        {k: sorted(v, key=str) for k, v in zones.items()}
+    assert {k: sorted(v) for k, v in game.card_index.names.items()} == {k: sorted(v) for k, v in names.items()}
+
+
+def test_index_follows_ai_games():
+    """测试AI对局全程索引与扫描一致，查找结果与逐张扫描相同"""
+    for seed in range(6):
+        game = SplendorPokemonGame([f"机器人{i + 1}" for i in range(3)], seed=seed)
+        ais = [AIPlayer(AIPlayer.HARD, seed=seed + i) for i in range(3)]
+        for _ in range(200):
+            if game.game_over:
+                break
+            player = game.get_current_player()
+            apply_ai_decision(game, player, ais[game.current_player_index].make_decision(game, player))
+            game.check_evolution()
+            _assert_index_consistent(game)
+
+            for tier, cards in game.tableau.items():
+                for slot, card in enumerate(cards):
+                    assert game.find_card_by_id(card.card_id) is card
+                    assert game.locate_card(card.card_id) == (ZONE_TABLEAU, tier, slot)
+            for slot, card in enumerate(player.reserved_cards):
+                assert game.find_card_by_id(card.card_id, player) is card
+                assert game.locate_card(card.card_id, player) == (ZONE_RESERVED, game.current_player_index, slot)
+                assert game.find_card_by_id(card.card_id) is None  # 不提供玩家时不查预购区
+            game.end_turn()
+    print("  ✅ AI对局中索引一致")
+
+
+def test_index_follows_list_mutations():
+    """测试直接修改场面/预购区列表（测试和调试接口的用法）时索引同步"""
+    catalog = get_card_catalog()
+    game = SplendorPokemonGame(["训练家", "对手"], seed=3)
+    player = game.players[0]
+    extra = catalog.cards_by_level(1)[:3]
+
+    game.tableau[1].append(extra[0])
+    game.tableau[2].insert(0, extra[1])
+    player.reserved_cards.append(extra[2])
+    _assert_index_consistent(game)
+    assert game.find_card_by_name(extra[2].name, player) is not None
+
+    game.tableau[1].remove(extra[0])
+    del game.tableau[2][0]
+    game.tableau[3][1:3] = []
+    player.reserved_cards = [extra[0]]
+    game.rare_card = None
+    _assert_index_consistent(game)
+    assert game.find_card_by_id(extra[0].card_id, player) is extra[0]
+    assert game.find_card_by_id(extra[2].card_id, player) is None
+
+    game.tableau[1] = list(extra)
+    game.tableau[2].clear()
+    _assert_index_consistent(game)
+    print("  ✅ 列表修改时索引同步")
+
+
+def test_find_by_name_order_and_evolution():
+    """测试按名称查找的优先级（场上 → 稀有/传说 → 预购区）以及进化后移除目标卡"""
+    catalog = get_card_catalog()
+    base_card = next(card for card in catalog.cards_by_level(1) if card.evolution)
+    target_card = catalog.cards_by_name(base_card.evolution.target_name)[0]
+
+    game = SplendorPokemonGame(["训练家", "对手"], seed=5)
+    player = game.players[0]
+    for cards in game.tableau.values():
+        for card in list(cards):
+            if card.name == target_card.name:
+                cards.remove(card)
+    player.reserved_cards.append(target_card)
+    assert game.find_card_by_name(target_card.name) is None
+    assert game.find_card_by_name(target_card.name, player) is target_card
+
+    player.display_area.append(base_card)
+    for ball, required in base_card.evolution.required_balls.items():
+        for i in range(required):
+            player.display_area.append(PokemonCard(
+                card_id=9000 + i, name="测试折扣", level=1, rarity=Rarity.NORMAL,
+                victory_points=0, cost={}, permanent_balls={ball: 1}))
+    game.check_evolution()
+    assert target_card in player.display_area
+    assert target_card not in player.reserved_cards
+    _assert_index_consistent(game)
+    print("  ✅ 按名称查找与进化移除正确")
+
+
+def test_index_survives_copy():
+    """测试拷贝和跨进程序列化后索引随之拷贝且保持一致"""
+    game = SplendorPokemonGame(["训练家", "对手"], seed=8)
+    game.reserve_card(game.tableau[1][2])
+    for clone in (copy.deepcopy(game), pickle.loads(pickle.dumps(game))):
+        assert clone.card_index is not game.card_index
+        assert clone.tableau[1].card_index is clone.card_index
+        _assert_index_consistent(clone)
+        clone.players[1].balls[BallType.MASTER] = 20
+        clone.current_player_index = 1
+        assert clone.buy_card(clone.tableau[2][0])
+        _assert_index_consistent(clone)
+        _assert_index_consistent(game)
+    print("  ✅ 拷贝后索引一致")
+
+
+if __name__ == '__main__':
+    test_index_follows_ai_games()
+    test_index_follows_list_mutations()
+    test_find_by_name_order_and_evolution()
+    test_index_survives_copy()
+    print("\n✅ 卡牌位置索引测试全部通过")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡牌API片段缓存测试
+验证预拼好的片段与逐张拼装一致、游戏状态直接引用这些片段，以及目录外卡牌的处理
+"""
+
+import sys
+import os
+import copy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from splendor_pokemon import *
+from card_catalog import get_card_catalog
+from backend.app import GameRoom
+
+
+def test_payloads_match_cards():
+    """测试每张卡的片段字段与卡牌一致"""
+    payloads = get_card_catalog().payloads
+    for card in get_card_catalog().cards:
+        full = payloads.card(card)
+        assert list(full) == ["card_id", "name", "level", "rarity", "cost", "victory_points",
+                              "permanent_balls", "evolution_target", "evolution_requirement"]
+        assert full["card_id"] == card.card_id and full["rarity"] == card.rarity.value
+        assert full["cost"] == balls_to_json(card.cost)
+        assert full["permanent_balls"] == balls_to_json(card.permanent_balls)
+        assert full["evolution_target"] == (card.evolution.target_name if card.evolution else None)
+        assert payloads.reserved(card) == {k: v for k, v in full.items() if k != "rarity"}
+        assert "evolution_target" not in payloads.special(card)
+        assert payloads.card(copy.deepcopy(card)) is full  # 内容相同的拷贝复用缓存
+    print("  ✅ 片段与卡牌一致")
+
+
+def test_state_references_payloads():
+    """测试游戏状态中的卡牌直接引用缓存的片段"""
+    payloads = get_card_catalog().payloads
+    room = GameRoom("payload_test", "玩家A")
+    room.max_players = 2
+    room.add_player("玩家B")
+    assert room.start_game()
+    player = room.game.players[0]
+    player.reserved_cards.append(room.game.tableau[1][0])
+
+    state = room.get_game_state()
+    for tier, cards in room.game.tableau.items():
+        assert all(entry is payloads.card(card) for entry, card in zip(state["tableau"][str(tier)], cards))
+    assert state["player_states"][player.name]["reserved_cards"][0] is payloads.reserved(player.reserved_cards[0])
+    if room.game.rare_card:
+        assert state["rare_card"] is payloads.special(room.game.rare_card)
+    print("  ✅ 游戏状态引用缓存片段")
+
+
+def test_foreign_card_payload():
+    """测试目录外构造的卡牌按内容现拼"""
+    payloads = get_card_catalog().payloads
+    card = get_card_catalog().cards[0]
+    custom = PokemonCard(card.card_id, "测试卡", 1, Rarity.NORMAL, 3, {BallType.RED: 2}, {BallType.RED: 1})
+    full = payloads.card(custom)
+    assert full["name"] == "测试卡" and full["cost"] == {"红": 2}
+    assert payloads.card(card)["name"] == card.name
+    print("  ✅ 目录外卡牌现拼")
+
+
+if __name__ == '__main__':
+    test_payloads_match_cards()
+    test_state_references_payloads()
+    test_foreign_card_payload()
+    print("\n✅ 卡牌API片段缓存测试全部通过")
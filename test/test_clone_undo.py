@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对局拷贝与撤销测试
+验证clone()副本与原对局状态一致且互不影响，apply/undo往返后状态和卡牌位置索引完全恢复
+"""
+
+import sys
+import os
+import copy
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from splendor_pokemon import *
+from backend.ai_player import AIPlayer
+
+
+def _state(game):
+    """对局完整状态（卡牌按card_id、玩家按座位）"""
+    def ids(cards):
+        return [card.card_id if card else None for card in cards]
+
+    players = [(p.name, tuple(p.balls.counts), ids(p.display_area), ids(p.evolved_cards),
+                ids(p.reserved_cards), dict(p.get_permanent_balls()), tuple(p.display_area.vector),
+                p.victory_points, p.extra_victory_points, p.has_evolved_this_turn,
+                p.needs_return_balls, p.has_left) for p in game.players]
+    seat = game.players.index(game.winner) if game.winner else None
+    rankings = [s for s, _ in game.final_rankings] if game.final_rankings else None
+    return (players, tuple(game.ball_pool.counts),
+            [ids(game.tableau[tier]) for tier in (1, 2, 3)], ids([game.rare_card, game.legendary_card]),
+            [ids(deck) for deck in (game.deck_lv1, game.deck_lv2, game.deck_lv3, game.rare_deck, game.legendary_deck)],
+            game.current_player_index, game.game_over, seat, game.final_round_triggered,
+            game.final_round_starter, rankings)
+
+
+def _index(game):
+    """卡牌位置索引内容（与索引对象无关，便于比较）"""
+    return ({card_id: sorted(keys, key=str) for card_id, keys in game.card_index.zones.items()},
+            {name: sorted(card_ids) for name, card_ids in game.card_index.names.items()})
+
+
+def _rebuilt_index(game):
+    """按各区域重新建立索引（用于校验增量维护的结果）"""
+    index = CardIndex()
+    for tier, cards in game.tableau.items():
+        for card in cards:
+            index.add(card, (ZONE_TABLEAU, tier))
+    if game.rare_card:
+        index.add(game.rare_card, (ZONE_RARE, None))
+    if game.legendary_card:
+        index.add(game.legendary_card, (ZONE_LEGENDARY, None))
+    for seat, player in enumerate(game.players):
+        for card in player.reserved_cards:
+            index.add(card, (ZONE_RESERVED, seat))
+    return ({card_id: sorted(keys, key=str) for card_id, keys in index.zones.items()},
+            {name: sorted(card_ids) for name, card_ids in index.names.items()})
+
+
+def _play(game, ais, turns):
+    """用AI决策推进若干回合"""
+    for _ in range(turns):
+        if game.game_over:
+            break
+        player = game.get_current_player()
+        game.apply(Move.from_decision(ais[game.current_player_index].make_decision(game, player)))
+
+
+def test_clone_is_independent():
+    """测试副本与原对局状态一致，共享卡牌对象，修改互不影响"""
+    game = SplendorPokemonGame(["机器人1", "机器人2", "机器人3"], seed=3)
+    ais = [AIPlayer("困难", seed=seat) for seat in range(3)]
+    _play(game, ais, 30)
+
+    clone = game.clone()
+    assert _state(clone) == _state(game)
+    assert _index(clone) == _index(game) == _rebuilt_index(game)
+    assert clone.tableau[1][0] is game.tableau[1][0]
+    assert clone.rng.random() == game.rng.random()
+
+    before = _state(game)
+    _play(clone, [AIPlayer("困难", seed=seat) for seat in range(3)], 200)
+    assert clone.game_over
+    assert clone.winner in clone.players
+    assert _state(game) == before
+    assert _index(game) == _rebuilt_index(game)
+    assert _index(clone) == _rebuilt_index(clone)
+    print("  ✅ 副本状态一致且互不影响")
+
+
+def test_apply_undo_round_trip():
+    """测试apply/undo往返：逐步撤销回到每一步之前的状态"""
+    for seed in range(4):
+        game = SplendorPokemonGame(["机器人1", "机器人2", "玩家3"], seed=seed)
+        ais = [AIPlayer("困难", seed=seed * 10 + seat) for seat in range(3)]
+        history = []
+        while not game.game_over and len(history) < 300:
+            player = game.get_current_player()
+            move = Move.from_decision(ais[game.current_player_index].make_decision(game, player))
+            history.append((_state(game), _index(game), game.apply(move)))
+            assert _index(game) == _rebuilt_index(game)
+
+        for state, index, token in reversed(history):
+            game.undo(token)
+            assert _state(game) == state
+            assert _index(game) == index
+    print("  ✅ apply/undo往返恢复状态和索引")
+
+
+def test_apply_matches_direct_calls():
+    """测试apply与直接调用引擎方法的结果一致，非法行动只结束回合"""
+    game = SplendorPokemonGame(["P1", "P2"], seed=8)
+    direct = game.clone()
+
+    card = game.tableau[1][0]
+    token = game.apply(Move(MOVE_RESERVE_CARD, card_id=card.card_id))
+    assert token.applied
+    direct.reserve_card(direct.find_card_by_id(card.card_id))
+    direct.end_turn()
+    assert _state(game) == _state(direct)
+
+    before = _state(game)
+    token = game.apply(Move(MOVE_TAKE_BALLS, balls=(BallType.MASTER,)))
+    assert not token.applied
+    assert game.current_player_index == 0
+    game.undo(token)
+    assert _state(game) == before
+
+    decision = {"action": "take_balls", "data": {"ball_types": ["红", "蓝", "黄"]}}
+    assert Move.from_decision(decision) == Move(MOVE_TAKE_BALLS, (BallType.RED, BallType.BLUE, BallType.YELLOW))
+    assert Move.from_decision(None).action == MOVE_PASS
+    print("  ✅ apply与直接调用一致")
+
+
+def test_clone_faster_than_deepcopy():
+    """测试clone明显快于copy.deepcopy"""
+    game = SplendorPokemonGame(["机器人1", "机器人2", "机器人3", "机器人4"], seed=5)
+    _play(game, [AIPlayer("中等", seed=seat) for seat in range(4)], 20)
+
+    def timed(func, repeat=200):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func(game)
+        return time.perf_counter() - started
+
+    clone_time = timed(SplendorPokemonGame.clone)
+    deepcopy_time = timed(copy.deepcopy)
+    assert clone_time * 3 < deepcopy_time, (clone_time, deepcopy_time)
+    print(f"  ✅ clone比deepcopy快{deepcopy_time / clone_time:.0f}倍")
+
+
+if __name__ == '__main__':
+    test_clone_is_independent()
+    test_apply_undo_round_trip()
+    test_apply_matches_direct_calls()
+    test_clone_faster_than_deepcopy()
+    print("\n✅ 对局拷贝与撤销测试全部通过")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进化图测试
+验证目录加载时构建的进化图、按永久球向量判断门槛，以及引擎按图定位进化目标（含目录外卡牌的按名称查找）
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from splendor_pokemon import *
+from card_catalog import get_card_catalog
+
+
+def _discount_card(card_id, vector):
+    """提供指定永久球的目录外卡牌"""
+    balls = {BALL_TYPES[slot]: amount for slot, amount in enumerate(vector) if amount}
+    return PokemonCard(card_id, "折扣卡", 1, Rarity.NORMAL, 0, {}, balls)
+
+
+def _evolvable_pair():
+    catalog = get_card_catalog()
+    base = next(card for card in catalog.cards_by_level(1) if card.evolution)
+    target = catalog.cards_by_name(base.evolution.target_name)[0]
+    return base, target
+
+
+def test_graph_matches_names():
+    """测试进化图与按名称匹配一致"""
+    catalog = get_card_catalog()
+    graph = catalog.evolution
+    for card in catalog.cards:
+        if not card.evolution:
+            assert card.card_id not in graph.targets
+            continue
+        targets = graph.targets[card.card_id]
+        assert targets and {catalog.get(t).name for t in targets} == {card.evolution.target_name}
+        assert graph.required[card.card_id] == card.evolution.required_vector
+        for target_id in targets:
+            assert card.card_id in graph.bases[target_id]
+    print(f"  ✅ 进化图与名称匹配一致（{len(graph.targets)}张基础卡）")
+
+
+def test_check_evolution_by_graph():
+    """测试门槛不够时不进化，够了之后从场上取走目标卡完成进化"""
+    base, target = _evolvable_pair()
+    game = SplendorPokemonGame(["P1", "P2"], seed=1)
+    player = game.get_current_player()
+    if game.locate_card(target.card_id) is None:
+        game.tableau[target.level].append(target)
+    player.display_area.append(base)
+
+    assert game.evolution_options(player) == []
+    game.check_evolution()
+    assert base in player.display_area
+
+    player.display_area.append(_discount_card(9001, base.evolution.required_vector))
+    assert game.evolution_options(player) == [(base, target)]
+    game.check_evolution()
+    assert target in player.display_area and base in player.evolved_cards
+    assert game.locate_card(target.card_id) is None
+    assert game.evolution_options(player) == []  # 每回合最多进化1次
+    print("  ✅ 按永久球向量判断门槛并完成进化")
+
+
+def test_target_locations():
+    """测试进化目标只在场上和自己的预购区查找"""
+    base, target = _evolvable_pair()
+    game = SplendorPokemonGame(["P1", "P2"], seed=2)
+    player, other = game.players
+    for tier in (1, 2, 3):
+        game.tableau[tier][:] = [card for card in game.tableau[tier] if card.name != target.name]
+    player.display_area.extend([base, _discount_card(9002, base.evolution.required_vector)])
+
+    other.reserved_cards.append(target)
+    assert game.find_evolution_target(base, player) is None
+    assert game.evolution_options(player) == []
+
+    other.reserved_cards.remove(target)
+    player.reserved_cards.append(target)
+    assert game.find_evolution_target(base, player) is target
+    assert game.evolution_options(player) == [(base, target)]
+    print("  ✅ 只在场上和自己的预购区查找目标")
+
+
+def test_foreign_cards_by_name():
+    """测试目录外构造的进化卡按名称查找目标"""
+    game = SplendorPokemonGame(["训练家"], seed=3)
+    player = game.players[0]
+    base = PokemonCard(9101, "测试幼崽", 1, Rarity.NORMAL, 0, {}, {BallType.RED: 1},
+                       Evolution("测试成体", {BallType.RED: 1}))
+    target = PokemonCard(9102, "测试成体", 2, Rarity.NORMAL, 2, {BallType.RED: 3}, {BallType.RED: 1})
+    game.tableau[2].append(target)
+    player.display_area.append(base)
+
+    assert game.find_evolution_target(base, player) is target
+    game.check_evolution()
+    assert target in player.display_area and target not in game.tableau[2]
+    print("  ✅ 目录外卡牌按名称查找")
+
+
+if __name__ == '__main__':
+    test_graph_matches_names()
+    test_check_evolution_by_graph()
+    test_target_locations()
+    test_foreign_cards_by_name()
+    print("\n✅ 进化图测试全部通过")
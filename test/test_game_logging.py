@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结构化日志测试
+验证上下文字段输出、未开启级别不格式化、日志文件轮转，以及引擎日志的quiet开关
+"""
+
+import sys
+import os
+import io
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from splendor_pokemon import *
+from game_logging import LOGGER_ROOT, configure_logging, current_log_context, get_logger, log_context
+
+
+class _Lazy:
+    """记录是否被格式化"""
+
+    def __init__(self):
+        self.formatted = False
+
+    def __str__(self):
+        self.formatted = True
+        return "lazy"
+
+
+def _capture(level=logging.DEBUG):
+    """把splendor.*日志接到内存流"""
+    configure_logging(level=level, log_file="", console=True, console_level=level)
+    stream = io.StringIO()
+    handler = logging.getLogger(LOGGER_ROOT).handlers[0]
+    handler.setStream(stream)
+    return stream
+
+
+def _reset():
+    """恢复未配置时的默认行为，避免影响其他测试"""
+    root = logging.getLogger(LOGGER_ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(logging.NOTSET)
+    root.propagate = True
+
+
+def test_context_fields():
+    """测试log_context绑定的字段出现在输出中，嵌套时合并、退出后恢复"""
+    stream = _capture()
+    logger = get_logger("test")
+    try:
+        with log_context(room_id="R1", game_id="G1", turn=3):
+            with log_context(player="小智", turn=None):
+                assert current_log_context() == {"room_id": "R1", "game_id": "G1", "turn": 3, "player": "小智"}
+                logger.info("拿球")
+            logger.info("换人", extra={"player": "小霞"})
+        logger.info("空闲")
+    finally:
+        _reset()
+    lines = stream.getvalue().splitlines()
+    assert "[room=R1 game=G1 player=小智 turn=3] 拿球" in lines[0]
+    assert "[room=R1 game=G1 player=小霞 turn=3] 换人" in lines[1]
+    assert "[room=- game=- player=- turn=-] 空闲" in lines[2]
+    assert current_log_context() == {}
+    print("  ✅ 上下文字段输出")
+
+
+def test_disabled_level_is_noop():
+    """测试未开启的级别不格式化参数，控制台只输出console_level及以上"""
+    stream = _capture(level=logging.INFO)
+    logger = get_logger("test")
+    lazy = _Lazy()
+    try:
+        logger.debug("不输出 %s", lazy)
+        assert not lazy.formatted and stream.getvalue() == ""
+
+        configure_logging(level=logging.DEBUG, log_file="", console_level=logging.WARNING)
+        stream = io.StringIO()
+        logging.getLogger(LOGGER_ROOT).handlers[0].setStream(stream)
+        logger.info("刷屏")
+        logger.warning("告警")
+    finally:
+        _reset()
+    assert "刷屏" not in stream.getvalue() and "告警" in stream.getvalue()
+    print("  ✅ 未开启的级别为空操作")
+
+
+def test_rotating_file():
+    """测试日志写入文件并按大小轮转"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "logs", "splendor.log")
+        root = configure_logging(level=logging.INFO, log_file=path, console=False)
+        root.handlers[0].maxBytes = 512
+        try:
+            for i in range(50):
+                get_logger("test").info("第%d行", i)
+        finally:
+            _reset()
+        assert os.path.exists(path) and os.path.exists(path + ".1")
+        with open(path, encoding="utf-8") as f:
+            assert "第49行" in f.read()
+    print("  ✅ 日志文件轮转")
+
+
+def test_engine_log_respects_quiet():
+    """测试引擎日志带玩家字段，quiet的副本不记录"""
+    stream = _capture()
+    try:
+        game = SplendorPokemonGame(["P1", "P2"], seed=1)
+        game._log("%s 拿了球", "P1")
+        quiet = game.clone()
+        quiet.quiet = True
+        quiet._log("不应出现")
+    finally:
+        _reset()
+    output = stream.getvalue()
+    assert "player=P1 turn=-] P1 拿了球" in output and "不应出现" not in output
+    print("  ✅ 引擎日志遵守quiet")
+
+
+if __name__ == '__main__':
+    test_context_fields()
+    test_disabled_level_is_noop()
+    test_rotating_file()
+    test_engine_log_respects_quiet()
+    print("\n✅ 结构化日志测试全部通过")
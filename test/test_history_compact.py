@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+紧凑历史编码测试
+验证与整局JSON无损互转（含非标准字段）、体积缩小一个数量级，以及格式转换后索引指向新文件
+"""
+
+import sys
+import os
+import copy
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from game_history import CompactCodec, GameHistory, FORMAT_COMPACT, FORMAT_JSON
+from test_history_turn_file import _history
+
+
+def test_lossless_roundtrip():
+    """测试编码后解码与原字典相等，非标准的时间戳、状态和字段原样保留"""
+    data = _history("compact_1", turns=30).to_dict()
+    assert CompactCodec.decode(CompactCodec.encode(data)) == data
+
+    odd = copy.deepcopy(data)
+    odd["turns"][0]["actions"][0]["timestamp"] = "昨天"
+    odd["turns"][1]["actions"][0]["timestamp"] = "2025-01-01T00:00:00+08:00"
+    odd["turns"][2]["states_before"] = {}
+    odd["turns"][3]["player"] = "观战者"
+    odd["turns"][4]["note"] = "手动补录"
+    del odd["turns"][5]["states_after"]
+    odd["turns"][6]["actions"].append({"type": "evolve_card", "data": {}})
+    odd["turns"][7]["states_after"]["player"]["balls"] = {"蓝": 2}
+    decoded = CompactCodec.decode(CompactCodec.encode(odd))
+    assert decoded == odd
+    assert json.dumps(decoded, ensure_ascii=False) == json.dumps(odd, ensure_ascii=False)  # 字段顺序也一致
+    print("  ✅ 无损互转")
+
+
+def test_size_and_files():
+    """测试体积至少缩小10倍，文件可直接加载，转换后索引指向新文件"""
+    history = _history("compact_2", turns=200)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = history.save_to_file(tmp_dir, fmt=FORMAT_JSON)
+        compact_path = history.save_to_file(tmp_dir, fmt=FORMAT_COMPACT)
+        assert os.path.getsize(json_path) > 10 * os.path.getsize(compact_path)
+        assert GameHistory.load_from_file(compact_path).to_dict() == history.to_dict()
+        assert GameHistory.read_turn(compact_path, 100) == history.turns[99]
+
+        converted = GameHistory.convert_file(json_path, FORMAT_COMPACT, remove_source=True)
+        assert not os.path.exists(json_path)
+        assert GameHistory.find_history("compact_2", tmp_dir)["filepath"] == converted
+        assert GameHistory.read_data(converted) == history.to_dict()
+    print("  ✅ 体积缩小并可转换")
+
+
+if __name__ == '__main__':
+    test_lossless_roundtrip()
+    test_size_and_files()
+    print("\n✅ 紧凑历史编码测试全部通过")
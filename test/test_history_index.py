@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史记录索引测试
+验证保存时写入索引、按game_id查找、分页列表，以及索引缺失时从已有文件重建
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from game_history import GameHistory, HistoryIndex, INDEX_FILENAME
+
+
+def _save_games(history_dir, count):
+    """保存count局简单的历史记录，返回 game_id -> 文件路径"""
+    paths = {}
+    for i in range(count):
+        history = GameHistory(f"idx_{i}", f"room_{i}", ["玩家A", "玩家B"], 18, seed=i)
+        history.start_turn(1, "玩家A")
+        history.record_action("take_balls", {"ball_types": ["红", "蓝", "黄"]}, True, "拿球")
+        history.end_game("玩家A", [])
+        paths[history.game_id] = history.save_to_file(history_dir)
+    return paths
+
+
+def test_lookup_and_pagination():
+    """测试按game_id查找和分页（最新保存的在前）"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = _save_games(tmp_dir, 5)
+
+        summary = GameHistory.find_history("idx_3", tmp_dir)
+        assert summary["filepath"] == paths["idx_3"] and summary["players"] == ["玩家A", "玩家B"]
+        assert summary["total_turns"] == 1
+        assert GameHistory.find_history("idx_missing", tmp_dir) is None
+
+        page, total = GameHistory.list_histories(0, 2, tmp_dir)
+        assert total == 5 and [h["game_id"] for h in page] == ["idx_4", "idx_3"]
+        page, _ = GameHistory.list_histories(4, 2, tmp_dir)
+        assert [h["game_id"] for h in page] == ["idx_0"]
+        assert len(GameHistory.list_all_histories(tmp_dir)) == 5
+    print("  ✅ 按game_id查找和分页")
+
+
+def test_rebuild_and_stale_entries():
+    """测试索引文件缺失时从已有历史文件重建，文件被删除后查找返回None"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = _save_games(tmp_dir, 3)
+        os.remove(os.path.join(tmp_dir, INDEX_FILENAME))
+
+        assert GameHistory.find_history("idx_1", tmp_dir)["filepath"] == paths["idx_1"]
+        assert GameHistory.list_histories(history_dir=tmp_dir)[1] == 3
+
+        os.remove(paths["idx_2"])
+        assert GameHistory.find_history("idx_2", tmp_dir) is None
+        assert GameHistory.list_histories(history_dir=tmp_dir)[1] == 2
+        assert HistoryIndex.for_dir(tmp_dir).rebuild() == 2
+    print("  ✅ 索引重建和失效条目")
+
+
+if __name__ == '__main__':
+    test_lookup_and_pagination()
+    test_rebuild_and_stale_entries()
+    print("\n✅ 历史记录索引测试全部通过")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+逐回合历史文件测试
+验证逐回合格式与整局JSON内容一致、按回合号直接读取、概要只含回合号和玩家，以及索引收录
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from game_history import GameHistory, HistoryIndex, FORMAT_JSON, FORMAT_TURNS, INDEX_FILENAME
+
+
+def _history(game_id, turns=12):
+    history = GameHistory(game_id, "turn_room", ["玩家A", "玩家B"], 18, seed=7)
+    history.record_initial_state({"ball_pool": {"红": 7}, "tableau": {"1": []}, "player_states": {}})
+    for number in range(1, turns + 1):
+        player = "玩家A" if number % 2 else "玩家B"
+        history.start_turn(number, player)
+        history.record_state_before_action(player, {"balls": {"红": number}}, {"红": 7 - number % 7})
+        history.record_action("take_balls", {"ball_types": ["红", "蓝", "黄"]}, True, f"第{number}回合拿球")
+        history.record_state_after_action(player, {"balls": {"红": number + 1}}, {"红": 6 - number % 6})
+    history.end_game("玩家A", [{"rank": 1, "player_name": "玩家A", "victory_points": 18}])
+    return history
+
+
+def test_roundtrip_matches_json():
+    """测试两种格式读回的内容一致"""
+    history = _history("turns_1")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = history.save_to_file(tmp_dir, fmt=FORMAT_JSON)
+        turns_path = history.save_to_file(tmp_dir, fmt=FORMAT_TURNS)
+        assert turns_path.endswith(".jsonl")
+        assert GameHistory.read_data(turns_path) == GameHistory.read_data(json_path) == history.to_dict()
+        loaded = GameHistory.load_from_file(turns_path)
+        assert loaded.to_dict() == history.to_dict()
+        assert os.path.getsize(turns_path) < os.path.getsize(json_path)
+    print("  ✅ 逐回合格式与整局JSON一致")
+
+
+def test_read_single_turn():
+    """测试按回合号直接读取，以及概要"""
+    history = _history("turns_2")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = history.save_to_file(tmp_dir, fmt=FORMAT_TURNS)
+        for number in (1, 7, 12):
+            assert GameHistory.read_turn(path, number) == history.turns[number - 1]
+        assert GameHistory.read_turn(path, 99) is None
+
+        outline = GameHistory.read_outline(path)
+        assert outline["total_turns"] == 12 and outline["initial_state"] == history.initial_state
+        assert outline["turns"][6] == {"turn": 7, "player": "玩家A"}
+
+        json_path = history.save_to_file(tmp_dir, fmt=FORMAT_JSON)
+        assert GameHistory.read_turn(json_path, 7) == history.turns[6]
+        assert GameHistory.read_outline(json_path) == outline
+    print("  ✅ 按回合号直接读取")
+
+
+def test_index_scans_turn_files():
+    """测试重建索引时收录逐回合文件"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = _history("turns_3").save_to_file(tmp_dir, fmt=FORMAT_TURNS)
+        os.remove(os.path.join(tmp_dir, INDEX_FILENAME))
+        assert HistoryIndex.for_dir(tmp_dir).rebuild() == 1
+        summary = GameHistory.find_history("turns_3", tmp_dir)
+        assert summary["filepath"] == path and summary["total_turns"] == 12
+    print("  ✅ 索引收录逐回合文件")
+
+
+if __name__ == '__main__':
+    test_roundtrip_matches_json()
+    test_read_single_turn()
+    test_index_scans_turn_files()
+    print("\n✅ 逐回合历史文件测试全部通过")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史记录后台写入测试
+验证提交后由写入线程写文件和批量写数据库、提交的是快照、重复提交不重复计分、失败重试（含spool写入失败），以及崩溃后从spool重放
+"""
+
+import sys
+import os
+import copy
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from database import GameDatabase
+from game_history import GameHistory, FORMAT_TURNS
+from history_writer import HistoryWriter, SPOOL_SUFFIX
+
+
+def _history(game_id, turns=12):
+    history = GameHistory(game_id, "writer_room", ["玩家A", "玩家B"], 18, seed=7)
+    history.record_initial_state({"ball_pool": {"红": 7}, "tableau": {"1": []}, "player_states": {}})
+    for number in range(1, turns + 1):
+        player = "玩家A" if number % 2 else "玩家B"
+        history.start_turn(number, player)
+        history.record_state_before_action(player, {"balls": {"红": number}}, {"红": 7 - number % 7})
+        history.record_action("take_balls", {"ball_types": ["红", "蓝", "黄"]}, True, f"第{number}回合拿球")
+        history.record_state_after_action(player, {"balls": {"红": number + 1}}, {"红": 6 - number % 6})
+    history.end_game("玩家A", [{"rank": 1, "player_name": "玩家A", "victory_points": 18}])
+    return history
+
+
+def _participations(history):
+    return [
+        {"username": name, "game_id": history.game_id, "player_name": name, "final_rank": rank,
+         "final_score": 18 - rank, "is_winner": rank == 1, "game_start_time": history.start_time,
+         "game_end_time": history.end_time, "total_turns": len(history.turns)}
+        for rank, name in enumerate(history.players, 1)
+    ]
+
+
+class _FlakyDB:
+    """前failures次写入抛异常，之后转给真实数据库"""
+
+    def __init__(self, db, failures):
+        self.db = db
+        self.failures = failures
+
+    def record_game_participations(self, records):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("database is locked")
+        return self.db.record_game_participations(records)
+
+
+def _spooled(spool_dir):
+    return [name for name in os.listdir(spool_dir) if name.endswith(SPOOL_SUFFIX)] if os.path.isdir(spool_dir) else []
+
+
+def test_submit_writes_file_and_db():
+    """测试提交后写出历史文件、索引和参与记录，重复提交同一局不重复计分"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = GameDatabase(os.path.join(tmp_dir, "game.db"))
+        spool_dir = os.path.join(tmp_dir, "spool")
+        writer = HistoryWriter(db=db, spool_dir=spool_dir)
+        history = _history("writer_1")
+        writer.submit(history.to_dict(), _participations(history), history_dir=tmp_dir, fmt=FORMAT_TURNS)
+        writer.submit(history.to_dict(), _participations(history), history_dir=tmp_dir, fmt=FORMAT_TURNS)
+        assert writer.flush(10)
+
+        summary = GameHistory.find_history("writer_1", tmp_dir)
+        assert summary["filepath"].endswith(".jsonl")
+        assert GameHistory.read_data(summary["filepath"]) == history.to_dict()
+        records = db.get_user_game_history("玩家A")
+        assert len(records) == 1 and os.path.exists(records[0]["game_history_file"])
+        assert db.get_user_by_username("玩家A")["total_wins"] == 1
+        assert db.get_user_by_username("玩家B")["total_games"] == 1
+        assert _spooled(spool_dir) == []
+        assert writer.stats()["written"] == 2 and writer.stats()["queued"] == 0
+        writer.close()
+    print("  ✅ 后台写入文件和数据库")
+
+
+def test_retry_after_failure():
+    """测试数据库暂时失败时重试，重试写同一个文件"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = GameDatabase(os.path.join(tmp_dir, "game.db"))
+        writer = HistoryWriter(db=_FlakyDB(db, failures=2), spool_dir=os.path.join(tmp_dir, "spool"),
+                               retry_delay=0.01)
+        history = _history("writer_2")
+        writer.submit(history.to_dict(), _participations(history), history_dir=tmp_dir)
+        assert writer.flush(10)
+        stats = writer.stats()
+        assert stats["retries"] == 2 and stats["written"] == 1 and stats["failed"] == 0
+        assert len([name for name in os.listdir(tmp_dir) if name.startswith("game_")]) == 1
+        assert len(db.get_user_game_history("玩家B")) == 1
+        writer.close()
+    print("  ✅ 失败重试")
+
+
+def test_submit_snapshots_data():
+    """测试提交后历史记录继续变化不影响写入的内容（to_dict只是浅拷贝）"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writer = HistoryWriter(spool_dir=os.path.join(tmp_dir, "spool"))
+        history = _history("writer_4")
+        expected = copy.deepcopy(history.to_dict())
+        with writer._condition:  # 写入线程取任务前继续记录
+            writer.submit(history.to_dict(), history_dir=tmp_dir)
+            history.turns[0]["actions"].clear()
+            history.start_turn(13, "玩家B")
+        assert writer.flush(10)
+        assert GameHistory.read_data(GameHistory.find_history("writer_4", tmp_dir)["filepath"]) == expected
+        writer.close()
+    print("  ✅ 提交时保存快照")
+
+
+def test_spool_failure_retried():
+    """测试spool写入失败也按退避重试，始终失败时计为失败"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        spool_dir = os.path.join(tmp_dir, "spool")
+        with open(spool_dir, "w") as f:  # spool路径被文件占用，无法创建目录
+            f.write("")
+        writer = HistoryWriter(spool_dir=spool_dir, max_attempts=3, retry_delay=0.01)
+        writer.submit(_history("writer_5").to_dict(), history_dir=tmp_dir)
+        assert writer.flush(10)
+        stats = writer.stats()
+        assert stats["retries"] == 2 and stats["failed"] == 1 and stats["written"] == 0
+        assert GameHistory.find_history("writer_5", tmp_dir) is None
+
+        os.remove(spool_dir)  # 恢复后重试成功
+        writer.submit(_history("writer_6").to_dict(), history_dir=tmp_dir)
+        assert writer.flush(10)
+        assert writer.stats()["written"] == 1 and _spooled(spool_dir) == []
+        writer.close()
+    print("  ✅ spool写入失败重试")
+
+
+def test_spool_replay():
+    """测试重试用尽的任务留在spool中，下次启动时重放写入"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = GameDatabase(os.path.join(tmp_dir, "game.db"))
+        spool_dir = os.path.join(tmp_dir, "spool")
+        history = _history("writer_3")
+
+        broken = HistoryWriter(db=_FlakyDB(db, failures=100), spool_dir=spool_dir, max_attempts=2, retry_delay=0.01)
+        broken.submit(history.to_dict(), _participations(history), history_dir=tmp_dir)
+        assert broken.flush(10)
+        broken.close()
+        assert broken.stats()["failed"] == 1 and len(_spooled(spool_dir)) == 1
+        assert db.get_user_game_history("玩家A") == []
+
+        restarted = HistoryWriter(db=db, spool_dir=spool_dir)
+        assert restarted.recover() == 1
+        assert restarted.flush(10)
+        assert _spooled(spool_dir) == []
+        assert GameHistory.read_data(GameHistory.find_history("writer_3", tmp_dir)["filepath"]) == history.to_dict()
+        assert len(db.get_user_game_history("玩家A")) == 1
+        restarted.close()
+    print("  ✅ spool重放")
+
+
+if __name__ == '__main__':
+    test_submit_writes_file_and_db()
+    test_retry_after_failure()
+    test_submit_snapshots_data()
+    test_spool_failure_retried()
+    test_spool_replay()
+    print("\n✅ 历史记录后台写入测试全部通过")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合法行动列表测试
+验证legal_moves与引擎逐个尝试的结果完全一致、缓存随状态变化失效，以及AI随机拿球和预购接口只走合法行动
+"""
+
+import sys
+import os
+from itertools import combinations_with_replacement
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from splendor_pokemon import *
+from backend.ai_player import AIPlayer
+from backend import app as server
+
+
+def _brute_force(game):
+    """在副本上逐个尝试所有可能的行动，返回成功的行动集合"""
+    player = game.get_current_player()
+    candidates = []
+    for size in (1, 2, 3):
+        for balls in combinations_with_replacement(BALL_TYPES, size):
+            candidates.append(Move(MOVE_TAKE_BALLS, balls))
+    cards = [card for tier in (1, 2, 3) for card in game.tableau[tier]]
+    cards += [card for card in (game.rare_card, game.legendary_card) if card]
+    for card in cards + list(player.reserved_cards):
+        candidates.append(Move(MOVE_BUY_CARD, card_id=card.card_id))
+    for card in cards:
+        candidates.append(Move(MOVE_RESERVE_CARD, card_id=card.card_id))
+
+    legal = set()
+    for move in candidates:
+        if game.clone().perform_move(move):
+            legal.add(move)
+    return legal
+
+
+def test_matches_engine():
+    """测试AI对局中每个局面的合法行动与引擎逐个尝试一致"""
+    checked = 0
+    for seed in range(4):
+        game = SplendorPokemonGame(["机器人1", "机器人2", "机器人3"], seed=seed)
+        ais = [AIPlayer("困难", seed=seed * 10 + seat) for seat in range(3)]
+        while not game.game_over and checked < 150 * (seed + 1):
+            moves = game.legal_moves()
+            assert len(moves) == len(set(moves))
+            assert set(moves) == _brute_force(game)
+            for move in moves:
+                assert game.is_legal_move(move)
+                assert game.is_legal_move(move._replace(balls=tuple(reversed(move.balls))))
+            checked += 1
+            player = game.get_current_player()
+            game.apply(Move.from_decision(ais[game.current_player_index].make_decision(game, player)))
+    print(f"  ✅ {checked}个局面与引擎一致")
+
+
+def test_scarce_pool():
+    """测试球池只剩2种/1种颜色时的拿球方式"""
+    game = SplendorPokemonGame(["P1", "P2"], seed=1)
+    game.ball_pool.counts[:] = [0, 0, 0, 2, 5, 5]
+    takes = [move.balls for move in game.legal_moves() if move.action == MOVE_TAKE_BALLS]
+    assert takes == [(BallType.RED, BallType.RED), (BallType.BLUE, BallType.RED)]
+
+    game.ball_pool.counts[:] = [0, 0, 0, 0, 3, 5]
+    takes = [move.balls for move in game.legal_moves() if move.action == MOVE_TAKE_BALLS]
+    assert takes == [(BallType.RED,)]
+    print("  ✅ 球池不足时的拿法正确")
+
+
+def test_cache_invalidation():
+    """测试状态不变时复用缓存，直接修改球/场面/预购区后重新生成"""
+    game = SplendorPokemonGame(["P1", "P2"], seed=2)
+    player = game.get_current_player()
+    moves = game.legal_moves()
+    assert game.legal_moves() is moves
+    assert not game.buyable_cards()
+
+    card = game.tableau[1][0]
+    player.balls[BallType.MASTER] = 20
+    assert card in game.buyable_cards()
+    assert game.is_legal_move(Move(MOVE_BUY_CARD, card_id=card.card_id))
+
+    game.tableau[1].pop(0)
+    assert not game.is_legal_move(Move(MOVE_BUY_CARD, card_id=card.card_id))
+
+    player.reserved_cards = [card, game.tableau[2][0], game.tableau[2][1]]
+    assert game.is_legal_move(Move(MOVE_BUY_CARD, card_id=card.card_id))
+    assert not any(move.action == MOVE_RESERVE_CARD for move in game.legal_moves())
+
+    game.game_over = True
+    assert game.legal_moves() == ()
+    print("  ✅ 缓存随状态失效")
+
+
+def test_random_balls_legal():
+    """测试AI随机拿球只在合法拿法中选择（含球池只剩2色/1色）"""
+    game = SplendorPokemonGame(["P1", "P2"], seed=3)
+    ai = AIPlayer("简单", seed=3)
+    for counts in ([0, 7, 7, 7, 7, 5], [0, 0, 3, 2, 1, 5], [0, 0, 0, 2, 5, 5], [0, 0, 0, 0, 5, 5], [0, 0, 0, 0, 3, 5]):
+        game.ball_pool.counts[:] = counts
+        for _ in range(30):
+            balls = ai._get_random_balls(game)
+            assert game.is_legal_move(Move(MOVE_TAKE_BALLS, tuple(balls))), (counts, balls)
+    game.ball_pool.counts[:] = [0, 0, 0, 0, 0, 5]
+    assert ai._get_random_balls(game) == []
+    print("  ✅ AI随机拿球合法")
+
+
+def test_blind_flag_with_listed_card():
+    """测试blind但未指定等级时按场面卡牌预购：仍检查合法性，失败时返回失败而不是500"""
+    room = server.GameRoom("legal_reserve", "玩家A")
+    room.max_players = 2
+    room.add_player("玩家B")
+    assert room.start_game(seed=4)
+    with server.room_lock:
+        server.game_rooms["legal_reserve"] = room
+    try:
+        player = room.game.get_current_player()
+        player.reserved_cards = [room.game.deck_lv1.pop(), room.game.deck_lv1.pop(), room.game.deck_lv1.pop()]
+        card = room.game.tableau[1][0]
+        deck_size = len(room.game.deck_lv1)
+        client = server.app.test_client()
+        response = client.post("/api/rooms/legal_reserve/reserve_card",
+                               json={"player_name": player.name, "blind": True, "card": {"card_id": card.card_id}})
+        assert response.status_code == 200 and response.get_json()["success"] is False
+        assert room.game.tableau[1][0] is card and len(room.game.deck_lv1) == deck_size
+        assert room.history.turns[-1]["actions"][-1]["data"]["blind"] is False
+
+        player.reserved_cards.pop()
+        response = client.post("/api/rooms/legal_reserve/reserve_card",
+                               json={"player_name": player.name, "blind": True, "card": {"card_id": card.card_id}})
+        assert response.get_json()["success"] and card in player.reserved_cards
+    finally:
+        with server.room_lock:
+            server.remove_room("legal_reserve")
+    print("  ✅ 未指定等级的盲预购按场面卡牌校验")
+
+
+if __name__ == '__main__':
+    test_matches_engine()
+    test_scarce_pool()
+    test_cache_invalidation()
+    test_random_balls_legal()
+    test_blind_flag_with_listed_card()
+    print("\n✅ 合法行动列表测试全部通过")
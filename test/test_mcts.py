@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+专家难度（蒙特卡洛树搜索）测试
+验证搜索遵守思考时间、不修改原对局、按迭代次数可复现、多进程并行合并统计，以及专家AI能下完整局
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from splendor_pokemon import *
+from mcts import mcts_search, shutdown_pool
+from backend.ai_player import AIPlayer
+from simulate import apply_ai_decision
+
+
+def _snapshot(game):
+    return ([tuple(p.balls.counts) for p in game.players], tuple(game.ball_pool.counts),
+            [[c.card_id for c in game.tableau[tier]] for tier in (1, 2, 3)],
+            [c.card_id for c in game.deck_lv1], game.current_player_index)
+
+
+def test_search_respects_budget():
+    """测试按毫秒预算停止，返回合法行动且不修改原对局"""
+    game = SplendorPokemonGame(["机器人1", "机器人2", "机器人3"], seed=4)
+    before = _snapshot(game)
+    move, stats = mcts_search(game, budget_ms=150, seed=1)
+    assert game.is_legal_move(move)
+    assert stats["elapsed_ms"] < 150 + 50, stats
+    assert stats["rollouts"] > 10 and stats["rollouts_per_second"] > 0
+    assert _snapshot(game) == before
+    print(f"  ✅ 预算内完成{stats['rollouts']}次模拟（{stats['rollouts_per_second']:.0f}次/秒）")
+
+
+def test_iterations_reproducible():
+    """测试只按迭代次数停止时同一种子结果相同"""
+    game = SplendorPokemonGame(["机器人1", "机器人2"], seed=9)
+    move1, stats1 = mcts_search(game, budget_ms=None, max_iterations=200, seed=5)
+    move2, stats2 = mcts_search(game, budget_ms=None, max_iterations=200, seed=5)
+    assert move1 == move2
+    assert stats1["rollouts"] == stats2["rollouts"] == 200
+    print("  ✅ 按迭代次数可复现")
+
+
+def test_parallel_search():
+    """测试多进程根并行：各进程的模拟次数合并"""
+    game = SplendorPokemonGame(["机器人1", "机器人2"], seed=3)
+    try:
+        move, stats = mcts_search(game, budget_ms=None, max_iterations=100, seed=2, workers=2)
+    finally:
+        shutdown_pool()
+    assert game.is_legal_move(move)
+    assert stats["rollouts"] == 200 and stats["workers"] == 2
+    print("  ✅ 多进程并行合并统计")
+
+
+def test_expert_plays_full_game():
+    """测试专家AI（短思考时间）与困难AI下完整局"""
+    game = SplendorPokemonGame(["机器人1", "机器人2"], seed=11)
+    ais = [AIPlayer(AIPlayer.EXPERT, seed=1, time_budget_ms=20), AIPlayer(AIPlayer.HARD, seed=2)]
+    turns = 0
+    while not game.game_over and turns < 300:
+        player = game.get_current_player()
+        ai = ais[game.current_player_index]
+        started = time.perf_counter()
+        decision = ai.make_decision(game, player)
+        applied = apply_ai_decision(game, player, decision)
+        if ai.difficulty == AIPlayer.EXPERT:
+            assert (time.perf_counter() - started) * 1000 < 20 + 50
+            assert ai.last_search_stats["rollouts"] > 0
+            assert applied
+        game.end_turn()
+        turns += 1
+    assert game.game_over
+    print(f"  ✅ 专家AI完成对局（{turns}步）")
+
+
+if __name__ == '__main__':
+    test_search_respects_budget()
+    test_iterations_reproducible()
+    test_parallel_search()
+    test_expert_plays_full_game()
+    print("\n✅ 专家难度测试全部通过")
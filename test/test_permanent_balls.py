@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+永久球合计测试
+验证展示区增删卡牌（购买、进化、直接修改列表）后永久球合计与逐张累加一致
+"""
+
+import sys
+import os
+import copy
+import pickle
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from splendor_pokemon import *
+from card_catalog import get_card_catalog
+
+
+def _recount(player):
+    """逐张累加永久球（旧实现）"""
+    permanent = {ball: 0 for ball in BallType if ball != BallType.MASTER}
+    for card in player.display_area:
+        for ball, count in card.permanent_balls.items():
+            if ball != BallType.MASTER:
+                permanent[ball] += count
+    return permanent
+
+
+def test_counter_follows_list_mutations():
+    """测试直接修改展示区列表时合计同步"""
+    cards = get_card_catalog().cards_by_level(1)[:6]
+    player = Player("训练家")
+
+    for card in cards[:4]:
+        player.display_area.append(card)
+    assert dict(player.get_permanent_balls()) == _recount(player)
+
+    player.display_area.remove(cards[0])
+    player.display_area.insert(0, cards[4])
+    player.display_area.pop()
+    player.display_area[1] = cards[5]
+    del player.display_area[0]
+    player.display_area += [cards[0]]
+    assert dict(player.get_permanent_balls()) == _recount(player)
+
+    player.display_area = list(cards)
+    assert isinstance(player.display_area, DisplayArea)
+    assert dict(player.get_permanent_balls()) == _recount(player)
+
+    player.display_area.clear()
+    assert sum(player.get_permanent_balls().values()) == 0
+    print("  ✅ 列表修改时合计同步")
+
+
+def test_counter_follows_buy_and_evolve():
+    """测试购买和进化后合计正确"""
+    catalog = get_card_catalog()
+    base_card = next(card for card in catalog.cards_by_level(1) if card.evolution)
+    target_card = catalog.cards_by_name(base_card.evolution.target_name)[0]
+
+    game = SplendorPokemonGame(["训练家", "对手"], seed=1)
+    player = game.players[0]
+    player.balls[BallType.MASTER] = 20
+    assert game.buy_card(base_card)
+    assert dict(player.get_permanent_balls()) == _recount(player)
+
+    for ball, required in base_card.evolution.required_balls.items():
+        for _ in range(required):
+            player.display_area.append(PokemonCard(
+                card_id=9000 + len(player.display_area), name="测试折扣", level=1,
+                rarity=Rarity.NORMAL, victory_points=0, cost={}, permanent_balls={ball: 1}))
+    assert player.evolve(base_card, target_card)
+    assert base_card not in player.display_area
+    assert dict(player.get_permanent_balls()) == _recount(player)
+    print("  ✅ 购买/进化后合计正确")
+
+
+def test_view_is_read_only_and_survives_copy():
+    """测试返回只读视图，拷贝和跨进程序列化后合计保持一致"""
+    player = Player("训练家")
+    player.display_area.extend(get_card_catalog().cards_by_level(2)[:3])
+
+    try:
+        player.get_permanent_balls()[BallType.RED] = 99
+        assert False, "永久球视图应为只读"
+    except TypeError:
+        pass
+
+    for clone in (copy.deepcopy(player), pickle.loads(pickle.dumps(player))):
+        assert dict(clone.get_permanent_balls()) == _recount(player)
+        clone.display_area.pop()
+        assert dict(clone.get_permanent_balls()) == _recount(clone)
+        assert dict(player.get_permanent_balls()) == _recount(player)
+    print("  ✅ 只读视图，拷贝后一致")
+
+
+if __name__ == '__main__':
+    test_counter_follows_list_mutations()
+    test_counter_follows_buy_and_evolve()
+    test_view_is_read_only_and_survives_copy()
+    print("\n✅ 永久球合计测试全部通过")
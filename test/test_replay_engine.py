@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对局重演测试
+验证按动作日志重演出的每回合牌面与实际对局一致（含AI回合、预购、盲预购、进化、放回球）、
+关键帧让跳转只重演不超过K个回合，以及复盘接口返回完整牌面
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from splendor_pokemon import *
+from ai_service import AIDecisionService
+from game_state import board_state
+from history_writer import HistoryWriter
+from replay_engine import ReplayEngine, ReplayError
+from backend import app as server
+
+HUMAN = "玩家A"
+
+
+def _without_last_action(board):
+    """重演的last_action是记录的动作说明，比较时去掉"""
+    return {**board, "player_states": {
+        name: {k: v for k, v in state.items() if k != "last_action"} for name, state in board["player_states"].items()
+    }}
+
+
+def _human_turn(client, room, human_turns):
+    """人类玩家一回合：能买就买，每4回合预购一次（交替盲预购），否则拿球；之后按需进化、放回球"""
+    room_id = room.room_id
+    game = room.game
+    player = game.get_current_player()
+    moves = game.legal_moves()
+    buy = next((m for m in moves if m.action == MOVE_BUY_CARD), None)
+    take = next((m for m in moves if m.action == MOVE_TAKE_BALLS), None)
+    if buy:
+        client.post(f"/api/rooms/{room_id}/buy_card", json={"player_name": HUMAN, "card": {"card_id": buy.card_id}})
+    elif human_turns % 4 == 3 and len(player.reserved_cards) < 3:
+        if human_turns % 8 == 3 and game.deck_lv1:
+            client.post(f"/api/rooms/{room_id}/reserve_card", json={"player_name": HUMAN, "blind": True, "level": 1})
+        else:
+            card = game.tableau[1][0]
+            client.post(f"/api/rooms/{room_id}/reserve_card", json={"player_name": HUMAN, "card": {"card_id": card.card_id}})
+    elif take:
+        client.post(f"/api/rooms/{room_id}/take_gems",
+                    json={"player_name": HUMAN, "gem_types": [ball.value for ball in take.balls]})
+
+    options = game.evolution_options(player)
+    if options:
+        client.post(f"/api/rooms/{room_id}/evolve_card", json={"player_name": HUMAN, "card_id": options[0][0].card_id})
+
+    if player.needs_return_balls:
+        excess = player.get_total_balls() - 10
+        returned = {}
+        for ball in sorted(BallType, key=lambda b: -player.balls[b]):
+            amount = min(excess, player.balls[ball])
+            if amount:
+                returned[ball.value] = amount
+                excess -= amount
+        client.post(f"/api/rooms/{room_id}/return_balls", json={"player_name": HUMAN, "balls_to_return": returned})
+
+    client.post(f"/api/rooms/{room_id}/end_turn", json={"player_name": HUMAN})
+
+
+def _play_game(room_id, seed, max_turns=400):
+    """人类对AI打一整局，返回房间和每回合结束时的实际牌面"""
+    room = server.GameRoom(room_id, HUMAN)
+    room.max_players = 2
+    room.add_player("机器人·训练家·小智", is_ai=True, ai_difficulty="中等")
+    assert room.start_game(seed=seed)
+    with server.room_lock:
+        server.game_rooms[room_id] = room
+
+    client = server.app.test_client()
+    boards = [_without_last_action(board_state(room.game))]
+    human_turns = 0
+    while not room.game.game_over and len(boards) <= max_turns:
+        if room.is_ai_player(room.game.get_current_player().name):
+            server.execute_ai_turn(room_id)
+        else:
+            _human_turn(client, room, human_turns)
+            human_turns += 1
+        boards.append(_without_last_action(board_state(room.game)))
+    return room, boards
+
+
+def test_replay_matches_live_game():
+    """测试每回合重演出的牌面与实际对局一致，AI回合也有动作记录"""
+    original_service, original_writer, original_dir = server.ai_service, server.history_writer, server.HISTORY_DIR
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server.ai_service = AIDecisionService(workers=0)
+        server.history_writer = HistoryWriter(spool_dir=os.path.join(tmp_dir, "spool"))
+        server.HISTORY_DIR = tmp_dir
+        try:
+            room, boards = _play_game("replay_room", seed=13)
+            assert room.game.game_over
+            data = room.history.to_dict()
+            assert len(data["turns"]) == len(boards) - 1
+            ai_turns = [turn for turn in data["turns"] if turn["player"] != HUMAN]
+            assert ai_turns and all(turn["actions"] and turn["states_after"] for turn in ai_turns)
+            kinds = {(action["type"], action["data"].get("blind")) for turn in data["turns"]
+                     for action in turn["actions"] if action["result"]}
+            assert {("take_balls", None), ("buy_card", None), ("reserve_card", False), ("reserve_card", True),
+                    ("evolve_card", None), ("return_balls", None)} <= kinds
+
+            engine = ReplayEngine(data, keyframe_interval=7)
+            for turn, expected in enumerate(boards):
+                assert _without_last_action(engine.state_at(turn)) == expected, f"第{turn}回合不一致"
+            assert engine.keyframe_count() == (len(boards) - 1) // 7 + 1
+
+            # 对局结束后后台保存，复盘接口从文件重演
+            assert server.history_writer.flush(10)
+            client = server.app.test_client()
+            response = client.get(f"/api/history/{data['game_id']}/board/{len(boards) - 1}").get_json()
+            assert response["success"] and response["total_turns"] == len(boards) - 1
+            assert _without_last_action(response["board"]) == boards[-1]
+            assert response["board"]["game_over"] and response["board"]["winner"] == room.game.winner.name
+            assert client.get(f"/api/history/{data['game_id']}/board/{len(boards) + 5}").status_code == 404
+        finally:
+            server.history_writer.close(10)
+            server.ai_service, server.history_writer, server.HISTORY_DIR = original_service, original_writer, original_dir
+            with server.room_lock:
+                server.remove_room("replay_room")
+    print(f"  ✅ {len(boards) - 1}个回合的牌面与实际对局一致")
+
+
+def test_leave_and_abort_replayed():
+    """测试玩家退出和所有真人退出也记录在动作日志中，重演结果一致"""
+    original_writer, original_dir = server.history_writer, server.HISTORY_DIR
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server.history_writer = HistoryWriter(spool_dir=os.path.join(tmp_dir, "spool"))
+        server.HISTORY_DIR = tmp_dir
+        room = server.GameRoom("replay_leave", HUMAN)
+        room.max_players = 3
+        room.add_player("玩家B")
+        room.add_player("玩家C")
+        assert room.start_game(seed=21)
+        with server.room_lock:
+            server.game_rooms["replay_leave"] = room
+        client = server.app.test_client()
+        try:
+            first, second, third = room.players
+            client.post("/api/rooms/replay_leave/leave", json={"player_name": second})  # 非当前玩家退出
+            client.post("/api/rooms/replay_leave/end_turn", json={"player_name": first})
+            assert room.game.get_current_player().name == third
+            middle = _without_last_action(board_state(room.game))
+            client.post("/api/rooms/replay_leave/leave", json={"player_name": third})  # 当前玩家退出
+            client.post("/api/rooms/replay_leave/leave", json={"player_name": first})  # 最后一名真人退出
+            assert room.game.game_over
+
+            engine = ReplayEngine(room.history.to_dict())
+            assert _without_last_action(engine.state_at(1)) == middle
+            final = engine.state_at(engine.total_turns)
+            assert final["game_over"] and all(state["has_left"] for state in final["player_states"].values())
+            assert final["rankings"] == room.game.get_final_rankings()
+        finally:
+            server.history_writer.close(10)
+            server.history_writer, server.HISTORY_DIR = original_writer, original_dir
+            with server.room_lock:
+                if "replay_leave" in server.game_rooms:
+                    server.remove_room("replay_leave")
+    print("  ✅ 退出和中止对局可重演")
+
+
+def test_keyframes_bound_seek_cost():
+    """测试关键帧按间隔生成，跳转只重演不超过K个回合"""
+    names = ["机器人1", "机器人2"]  # 机器人超过10个球时自动弃球
+    game = SplendorPokemonGame(names, seed=3)
+    data = {"game_id": "kf", "players": names, "victory_points_goal": 18, "seed": 3,
+            "initial_state": {}, "turns": []}
+    for number in range(1, 41):
+        move = next((m for m in game.legal_moves() if m.action == MOVE_TAKE_BALLS), None)
+        if move is None:
+            break
+        player = game.get_current_player().name
+        assert game.take_balls(list(move.balls))
+        game.end_turn()
+        data["turns"].append({"turn": number, "player": player, "states_before": {},
+                              "actions": [{"type": "take_balls", "data": {"ball_types": [b.value for b in move.balls]},
+                                           "result": True, "message": "拿取球"}],
+                              "states_after": {"ball_pool": game.ball_pool.to_json()}})
+    total = len(data["turns"])
+
+    engine = ReplayEngine(data, keyframe_interval=5)
+    applied = []
+    original = engine._apply_turn
+    engine._apply_turn = lambda g, n: (applied.append(n), original(g, n))
+    engine.state_at(total)
+    assert engine.keyframe_count() == total // 5 + 1
+    applied.clear()
+    engine.state_at(total - 1)
+    assert len(applied) <= 4
+    assert engine.state_at(total)["ball_pool"] == game.ball_pool.to_json()
+
+    data["turns"][2]["states_after"]["ball_pool"] = {}
+    try:
+        ReplayEngine(data).state_at(total)
+        assert False, "球池不一致时应报错"
+    except ReplayError:
+        pass
+    try:
+        ReplayEngine(dict(data, seed=None))
+        assert False, "没有种子时应报错"
+    except ReplayError:
+        pass
+    print("  ✅ 关键帧限制跳转代价")
+
+
+if __name__ == '__main__':
+    test_replay_matches_live_game()
+    test_leave_and_abort_replayed()
+    test_keyframes_bound_seek_cost()
+    print("\n✅ 对局重演测试全部通过")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+房间推送通道测试
+"""
+
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from backend.room_events import RoomEventBroker
+
+
+def test_publish_wakes_subscriber():
+    """测试发布后订阅者立即收到最新状态"""
+    broker = RoomEventBroker()
+    seq = broker.subscribe("room1")
+    assert broker.has_subscribers("room1")
+
+    def publish_later():
+        time.sleep(0.1)
+        broker.publish("room1", '{"turn_number": 2}')
+
+    threading.Thread(target=publish_later).start()
+    new_seq, payload, closed = broker.wait("room1", seq, timeout=5)
+
+    assert not closed
+    assert new_seq == seq + 1
+    assert payload == '{"turn_number": 2}'
+    broker.unsubscribe("room1")
+    assert not broker.has_subscribers("room1")
+    print("  ✅ 发布后订阅者被唤醒")
+
+
+def test_wait_timeout_returns_no_payload():
+    """测试无变化时超时返回（用于心跳）"""
+    broker = RoomEventBroker()
+    seq = broker.subscribe("room1")
+    new_seq, payload, closed = broker.wait("room1", seq, timeout=0.05)
+    assert (new_seq, payload, closed) == (seq, None, False)
+    print("  ✅ 无变化时超时返回")
+
+
+def test_publish_without_subscribers_is_noop():
+    """测试没有订阅者时不保留通道"""
+    broker = RoomEventBroker()
+    broker.publish("room1", "{}")
+    assert not broker.has_subscribers("room1")
+    assert broker.subscriber_count() == 0
+    print("  ✅ 无订阅者时发布为空操作")
+
+
+def test_close_ends_stream():
+    """测试房间删除时订阅者收到关闭通知"""
+    broker = RoomEventBroker()
+    seq = broker.subscribe("room1")
+
+    def close_later():
+        time.sleep(0.1)
+        broker.close("room1")
+
+    threading.Thread(target=close_later).start()
+    _, payload, closed = broker.wait("room1", seq, timeout=5)
+    assert closed and payload is None
+
+    # 关闭后再等待也立即返回关闭
+    _, _, closed = broker.wait("room1", seq, timeout=5)
+    assert closed
+    broker.unsubscribe("room1")
+    print("  ✅ 房间删除后推送结束")
+
+
+if __name__ == '__main__':
+    test_publish_wakes_subscriber()
+    test_wait_timeout_returns_no_payload()
+    test_publish_without_subscribers_is_noop()
+    test_close_ends_stream()
+    print("\n✅ 房间推送通道测试全部通过")
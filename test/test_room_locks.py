@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+房间锁测试
+验证一个房间持锁（如AI长时间思考）时其他房间的请求不受阻塞
+"""
+
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from backend.app import app, game_rooms, room_lock, GameRoom, locked_room, remove_room
+
+
+def _register_room(room_id):
+    room = GameRoom(room_id, f"{room_id}_玩家A")
+    room.max_players = 2
+    room.add_player(f"{room_id}_玩家B")
+    assert room.start_game()
+    with room_lock:
+        game_rooms[room_id] = room
+    return room
+
+
+def test_rooms_do_not_block_each_other():
+    """测试房间A持锁时房间B的请求立即返回，房间A的请求等待"""
+    room_a = _register_room("lock_a")
+    _register_room("lock_b")
+    client = app.test_client()
+    finished = {}
+
+    def request_state(room_id):
+        client.get(f"/api/rooms/{room_id}/state")
+        finished[room_id] = time.monotonic()
+
+    try:
+        with room_a.lock:
+            started = time.monotonic()
+            thread_a = threading.Thread(target=request_state, args=("lock_a",))
+            thread_a.start()
+            request_state("lock_b")
+            assert finished["lock_b"] - started < 0.5
+            time.sleep(0.2)
+            assert "lock_a" not in finished
+        thread_a.join(timeout=5)
+        assert "lock_a" in finished
+    finally:
+        with room_lock:
+            remove_room("lock_a")
+            remove_room("lock_b")
+    print("  ✅ 不同房间互不阻塞")
+
+
+def test_removed_room_is_not_returned():
+    """测试查找后被删除的房间在取得房间锁时视为不存在"""
+    room = _register_room("lock_c")
+    results = []
+
+    def lookup():
+        with locked_room("lock_c") as found:
+            results.append(found)
+
+    with room.lock:
+        thread = threading.Thread(target=lookup)
+        thread.start()
+        time.sleep(0.1)  # lookup已通过注册表查找，正在等待房间锁
+        with room_lock:
+            remove_room("lock_c")
+    thread.join(timeout=5)
+    assert results == [None]
+    print("  ✅ 已删除房间视为不存在")
+
+
+if __name__ == '__main__':
+    test_rooms_do_not_block_each_other()
+    test_removed_room_is_not_returned()
+    print("\n✅ 房间锁测试全部通过")
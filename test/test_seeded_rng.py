@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对局种子测试
+验证同一种子发牌、座位和AI决策完全可复现，并且不依赖全局random
+"""
+
+import sys
+import os
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from splendor_pokemon import *
+from backend.ai_player import AIPlayer
+from backend.game_history import GameHistory
+from backend.app import GameRoom
+
+
+def _deal(game):
+    """发牌结果（各牌堆和场面的card_id）"""
+    return ([c.card_id for c in game.deck_lv1], [c.card_id for c in game.deck_lv2],
+            [c.card_id for c in game.deck_lv3],
+            {tier: [c.card_id for c in cards] for tier, cards in game.tableau.items()},
+            game.rare_card.card_id, game.legendary_card.card_id)
+
+
+def test_same_seed_same_deal():
+    """测试同一种子发牌相同，不同种子发牌不同"""
+    game1 = SplendorPokemonGame(["P1", "P2"], seed=123)
+    game2 = SplendorPokemonGame(["P1", "P2"], seed=123)
+    game3 = SplendorPokemonGame(["P1", "P2"], seed=124)
+    assert game1.seed == 123
+    assert _deal(game1) == _deal(game2)
+    assert _deal(game1) != _deal(game3)
+    print("  ✅ 同种子发牌相同")
+
+
+def test_global_random_untouched():
+    """测试开局和AI决策不消耗全局random"""
+    random.seed(7)
+    expected = random.random()
+
+    random.seed(7)
+    game = SplendorPokemonGame(["机器人1", "机器人2"], seed=5)
+    ai = AIPlayer("中等", seed=9)
+    for _ in range(5):
+        ai.make_decision(game, game.get_current_player())
+    assert random.random() == expected
+    print("  ✅ 不依赖全局random")
+
+
+def test_ai_decisions_reproducible():
+    """测试同一种子的AI决策序列相同"""
+    def decisions(seed):
+        game = SplendorPokemonGame(["机器人1", "机器人2"], seed=seed)
+        ai = AIPlayer("简单", seed=seed)
+        return [ai.make_decision(game, game.get_current_player()) for _ in range(10)]
+
+    assert decisions(11) == decisions(11)
+    print("  ✅ AI决策可复现")
+
+
+def test_room_seed_recorded_in_history():
+    """测试房间开局种子决定座位和发牌，并记录在历史中"""
+    def start_room(seed):
+        room = GameRoom("seed_room", "玩家A")
+        room.max_players = 4
+        room.add_player("玩家B")
+        room.add_player("机器人·训练家·小智", is_ai=True)
+        room.add_player("机器人·训练家·小霞", is_ai=True)
+        assert room.start_game(seed=seed)
+        return room
+
+    room1 = start_room(2024)
+    room2 = start_room(2024)
+    assert room1.players == room2.players
+    assert _deal(room1.game) == _deal(room2.game)
+    assert room1.history.seed == 2024
+    for name in room1.ai_players:
+        assert room1.ai_players[name].seed == room2.ai_players[name].seed
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = room1.history.save_to_file(tmp_dir)
+        loaded = GameHistory.load_from_file(filepath)
+    assert loaded.seed == 2024
+    assert loaded.players == room1.players
+    print("  ✅ 种子记录在历史中")
+
+
+if __name__ == '__main__':
+    test_same_seed_same_deal()
+    test_global_random_untouched()
+    test_ai_decisions_reproducible()
+    test_room_seed_recorded_in_history()
+    print("\n✅ 对局种子测试全部通过")
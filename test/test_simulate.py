@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自对弈模拟器测试
+验证结果CSV、同种子结果一致以及多进程运行
+"""
+
+import sys
+import os
+import csv
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulate import RESULT_FIELDS, play_game, run_simulation, seat_difficulties
+
+
+def test_same_seed_same_game():
+    """测试同一种子的对局结果完全一致"""
+    result1 = play_game(42, 3, ["中等", "困难"], 18)
+    result2 = play_game(42, 3, ["中等", "困难"], 18)
+    result1.pop("duration_ms")
+    result2.pop("duration_ms")
+    assert result1 == result2
+    assert result1["error"] == ""
+    print("  ✅ 同种子结果一致")
+
+
+def test_seat_rotation():
+    """测试难度按种子轮换座位"""
+    assert seat_difficulties(["简单", "困难"], 4, 0) == ["简单", "困难", "简单", "困难"]
+    assert seat_difficulties(["简单", "困难"], 4, 1) == ["困难", "简单", "困难", "简单"]
+    print("  ✅ 难度座位轮换")
+
+
+def test_run_simulation_writes_csv():
+    """测试批量运行写出每局一行的CSV（单进程和多进程）"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for workers in (1, 2):
+            output = os.path.join(tmp_dir, f"results_{workers}.csv")
+            summary = run_simulation(4, 2, ["中等"], 18, seed_start=10, workers=workers,
+                                     output=output, progress_every=0)
+            assert summary["games"] == 4
+            assert summary["games_per_second"] > 0
+
+            with open(output, encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            assert len(rows) == 4
+            assert set(rows[0].keys()) == set(RESULT_FIELDS)
+            assert sorted(int(row["seed"]) for row in rows) == [10, 11, 12, 13]
+    print("  ✅ 结果CSV写出")
+
+
+if __name__ == '__main__':
+    test_same_seed_same_game()
+    test_seat_rotation()
+    test_run_simulation_writes_csv()
+    print("\n✅ 自对弈模拟器测试全部通过")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+游戏状态版本号测试
+验证ETag/304、since增量响应，以及按版本缓存的状态
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from backend.app import app, game_rooms, room_lock, GameRoom, notify_room_changed, state_cache_stats
+
+
+def _create_started_room(room_id):
+    """创建一个两名人类玩家、已开局的房间"""
+    room = GameRoom(room_id, "玩家A")
+    room.max_players = 2
+    room.add_player("玩家B")
+    assert room.start_game()
+    with room_lock:
+        game_rooms[room_id] = room
+    with room.lock:
+        notify_room_changed(room)
+    return room
+
+
+def test_not_modified_when_version_unchanged():
+    """测试状态未变化时返回304"""
+    room = _create_started_room("ver_test1")
+    client = app.test_client()
+    try:
+        response = client.get("/api/rooms/ver_test1/state")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert response.get_json()["state_version"] == room.state_version
+
+        response = client.get("/api/rooms/ver_test1/state", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+        # 状态变化后ETag失效
+        with room.lock:
+            notify_room_changed(room)
+        response = client.get("/api/rooms/ver_test1/state", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+    finally:
+        del game_rooms["ver_test1"]
+    print("  ✅ 版本未变化时返回304")
+
+
+def test_since_returns_delta():
+    """测试since参数返回增量，并且合并后与全量状态一致"""
+    room = _create_started_room("ver_test2")
+    client = app.test_client()
+    try:
+        base = client.get("/api/rooms/ver_test2/state").get_json()
+        player_name = base["current_player"]
+
+        response = client.post("/api/rooms/ver_test2/take_gems",
+                               json={"player_name": player_name, "gem_types": ["红", "蓝", "黄"]})
+        assert response.get_json()["success"]
+
+        delta = client.get(f"/api/rooms/ver_test2/state?since={base['state_version']}").get_json()
+        assert delta["delta"] is True
+        assert delta["since"] == base["state_version"]
+        assert delta["state_version"] == room.state_version
+        assert "ball_pool" in delta["changed"]
+        assert player_name in delta["player_states"]
+        assert delta["tableau"] == {}  # 拿球不改变场面
+
+        # 按客户端规则合并增量
+        merged = dict(base)
+        merged.update(delta["changed"])
+        merged["state_version"] = delta["state_version"]
+        merged["player_states"] = {**base["player_states"], **delta["player_states"]}
+        full = client.get("/api/rooms/ver_test2/state").get_json()
+        assert merged == full
+
+        # 快照不存在的版本返回全量
+        response = client.get("/api/rooms/ver_test2/state?since=-1").get_json()
+        assert "delta" not in response
+    finally:
+        del game_rooms["ver_test2"]
+    print("  ✅ since返回增量")
+
+
+def test_state_cached_per_version():
+    """测试同一版本的多次轮询只序列化一次，状态变更后缓存作废"""
+    room = _create_started_room("ver_test3")
+    client = app.test_client()
+    try:
+        before = state_cache_stats.stats()
+        bodies = [client.get("/api/rooms/ver_test3/state").data for _ in range(4)]
+        after = state_cache_stats.stats()
+        assert len(set(bodies)) == 1
+        assert after["misses"] - before["misses"] == 1
+        assert after["hits"] - before["hits"] == 3
+
+        with room.lock:
+            state = room.cached_state()[0]
+            room.game.players[0].last_action = "测试"
+            notify_room_changed(room)
+            assert room.cached_state()[0] is not state
+        response = client.get("/api/rooms/ver_test3/state").get_json()
+        assert response["player_states"][room.game.players[0].name]["last_action"] == "测试"
+
+        health = client.get("/api/health").get_json()
+        assert health["state_cache"]["hits"] >= after["hits"]
+    finally:
+        del game_rooms["ver_test3"]
+    print("  ✅ 按版本缓存状态")
+
+
+if __name__ == '__main__':
+    test_not_modified_when_version_unchanged()
+    test_since_returns_delta()
+    test_state_cached_per_version()
+    print("\n✅ 状态版本号测试全部通过")
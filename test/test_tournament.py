@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI循环赛测试
+验证配置解析、对局表的座位轮换、检查点续跑（含写了一半的行），以及Elo拟合
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tournament import (Entrant, fit_elo, load_checkpoint, pairwise_outcomes, parse_entrant, play_match,
+                        rate, run_tournament, schedule)
+
+
+def test_parse_entrant():
+    """测试配置解析"""
+    assert parse_entrant("困难=困难") == Entrant("困难", "困难")
+    expert = parse_entrant("专家50=专家:time_budget_ms=50")
+    assert expert.options == (("time_budget_ms", 50.0),)
+    assert expert.create(seed=1).time_budget_ms == 50.0
+    for bad in ("困难", "x=大师", "x=专家:depth=3"):
+        try:
+            parse_entrant(bad)
+            assert False, f"应解析失败: {bad}"
+        except ValueError:
+            pass
+    print("  ✅ 配置解析")
+
+
+def test_schedule_rotations():
+    """测试每个阵容按座位轮换，同一副牌局所有阵容共用种子"""
+    a, b = Entrant("A", "简单"), Entrant("B", "中等")
+    matches = schedule([a, b], [2, 4], deals=2, seed_start=5)
+    two = [m for m in matches if len(m.seats) == 2]
+    assert [m.key for m in two] == ["2|A,B|5", "2|B,A|5", "2|A,B|6", "2|B,A|6"]
+    four = [m for m in matches if len(m.seats) == 4]
+    # AAAB/AABB/ABBB 各4种轮换 × 2副牌局
+    assert len(four) == 3 * 4 * 2 and len({m.key for m in matches}) == len(matches)
+    assert {m.seed for m in matches} == {5, 6}
+    print("  ✅ 对局表座位轮换")
+
+
+def test_checkpoint_resume():
+    """测试中断后续跑：跳过已完成的对局，丢弃写了一半的行，配置不一致时报错"""
+    entrants = [Entrant("A", "简单"), Entrant("B", "中等")]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "checkpoint.jsonl")
+        full = run_tournament(entrants, [2], deals=3, workers=1, checkpoint=path, progress_every=0)
+        assert len(full) == 6
+
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines[:3]) + "\n" + lines[3][:10])  # 配置头 + 2局 + 写了一半的行
+
+        resumed = run_tournament(entrants, [2], deals=3, workers=2, checkpoint=path, progress_every=0)
+        strip = lambda records: [{k: v for k, v in r.items() if k != "duration_ms"} for r in records]
+        assert strip(resumed) == strip(full)
+        with open(path, encoding="utf-8") as f:
+            assert len([json.loads(line) for line in f]) == 1 + 6
+
+        try:
+            load_checkpoint(path, {"entrants": []})
+            assert False, "配置不一致应报错"
+        except ValueError:
+            pass
+    print("  ✅ 检查点续跑")
+
+
+def test_elo_fit():
+    """测试Elo拟合：平均为1500，胜多者分高，平局拉平"""
+    outcomes = [("A", "B", 1.0)] * 30 + [("A", "B", 0.0)] * 10 + [("B", "C", 0.5)] * 20
+    ratings = fit_elo(["A", "B", "C"], outcomes)
+    assert abs(sum(ratings.values()) / 3 - 1500) < 1e-6
+    assert ratings["A"] > ratings["B"] and abs(ratings["B"] - ratings["C"]) < 20
+
+    records = [play_match(m) for m in schedule([Entrant("A", "简单"), Entrant("B", "困难")], [3], deals=2)]
+    assert all(sorted(r["places"]) == [1, 2, 3] for r in records if not r["deadlock"])
+    assert len(pairwise_outcomes(records)) == sum(2 for _ in records)  # 每局3人中只有2对不同配置
+    table = rate(["A", "B"], records, bootstrap=20)
+    assert [row["rank"] for row in table] == [1, 2]
+    for row in table:
+        assert row["ci_low"] <= row["rating"] <= row["ci_high"]
+    print(f"  ✅ Elo拟合（{table[0]['name']}: {table[0]['rating']}）")
+
+
+if __name__ == '__main__':
+    test_parse_entrant()
+    test_schedule_rotations()
+    test_checkpoint_resume()
+    test_elo_fit()
+    print("\n✅ AI循环赛测试全部通过")
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI循环赛 - 多组命名AI配置在相同的种子牌局上轮流对战，输出Elo等级分和置信区间，用于AI改动的回归比较
+
+- 每个阵容（2/3/4人，至少两种配置）在每副牌局上按座位轮换各打一局，消除先后手偏差
+- 结果逐局追加到检查点文件（JSON Lines），中断后用同一检查点重新运行会跳过已完成的对局
+- 名次两两拆成胜/负/平，用Bradley-Terry最大似然拟合Elo（与完成顺序无关），自助法估计95%置信区间
+
+使用方法：
+python tournament.py --ai 中等=中等 --ai 困难=困难 --ai 专家50=专家:time_budget_ms=50 \\
+    --players 2,3 --deals 50 --workers 8 --checkpoint tournament.jsonl --output ratings.csv
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+from itertools import combinations, combinations_with_replacement
+from multiprocessing import Pool
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from splendor_pokemon import SplendorPokemonGame, derive_seed
+from card_catalog import get_card_catalog
+from game_logging import configure_logging
+from ai_player import AIPlayer
+from simulate import _init_worker, _run_quietly, play_to_end
+
+BASE_RATING = 1500.0  # 平均等级分
+PRIOR_DRAWS = 1.0  # 每对配置之间虚拟的平局数（避免全胜/全负时等级分发散）
+BOOTSTRAP_SAMPLES = 200  # 自助法重抽样次数
+RATING_FIELDS = ["rank", "name", "rating", "ci_low", "ci_high", "games", "wins", "win_rate", "avg_place"]
+
+# 配置中可调的AIPlayer参数及其类型
+ENTRANT_OPTIONS = {"time_budget_ms": float}
+
+
+class Entrant(NamedTuple):
+    """参赛的AI配置：名称、难度和AIPlayer参数"""
+    name: str
+    difficulty: str
+    options: Tuple[Tuple[str, float], ...] = ()
+
+    def create(self, seed: int) -> AIPlayer:
+        # 对局已在进程池中并行，专家搜索不再另开进程
+        return AIPlayer(self.difficulty, seed=seed, search_workers=1, **dict(self.options))
+
+
+class Match(NamedTuple):
+    """一局对战：检查点中的唯一键、牌局种子、各座位的配置"""
+    key: str
+    seed: int
+    seats: Tuple[Entrant, ...]
+
+
+def parse_entrant(spec: str) -> Entrant:
+    """解析 名称=难度[:参数=值,...]，如 专家50=专家:time_budget_ms=50"""
+    name, sep, rest = spec.partition("=")
+    if not sep or not name.strip():
+        raise ValueError(f"配置格式应为 名称=难度[:参数=值,...]: {spec}")
+    difficulty, _, option_text = rest.partition(":")
+    difficulty = difficulty.strip()
+    if difficulty not in (AIPlayer.EASY, AIPlayer.MEDIUM, AIPlayer.HARD, AIPlayer.EXPERT):
+        raise ValueError(f"未知难度: {difficulty}")
+
+    options = []
+    for item in filter(None, (part.strip() for part in option_text.split(","))):
+        key, _, value = item.partition("=")
+        if key not in ENTRANT_OPTIONS:
+            raise ValueError(f"未知参数: {key}（可选: {', '.join(ENTRANT_OPTIONS)}）")
+        options.append((key, ENTRANT_OPTIONS[key](value)))
+    return Entrant(name.strip(), difficulty, tuple(sorted(options)))
+
+
+def schedule(entrants: Sequence[Entrant], player_counts: Sequence[int], deals: int,
+             seed_start: int = 0) -> List[Match]:
+    """循环赛对局表：每种人数的每个阵容（可重复配置，但至少两种）× 每副牌局 × 每种座位轮换"""
+    names = [entrant.name for entrant in entrants]
+    if len(set(names)) != len(names):
+        raise ValueError("配置名称重复")
+
+    matches = []
+    for num_players in player_counts:
+        for lineup in combinations_with_replacement(entrants, num_players):
+            if len({entrant.name for entrant in lineup}) < 2:
+                continue
+            rotations = []
+            for shift in range(num_players):
+                seats = lineup[shift:] + lineup[:shift]
+                if seats not in rotations:
+                    rotations.append(seats)
+            for seed in range(seed_start, seed_start + deals):
+                for seats in rotations:
+                    key = f"{num_players}|{','.join(entrant.name for entrant in seats)}|{seed}"
+                    matches.append(Match(key, seed, seats))
+    return matches
+
+
+def play_match(match: Match, victory_points: int = 18) -> Dict:
+    """运行一局对战，返回检查点记录（各座位的配置、分数和名次）"""
+    started = time.perf_counter()
+    num_players = len(match.seats)
+    # AI种子与模拟器、房间开局的派生方式一致
+    ai_players = [entrant.create(derive_seed(match.seed, f"ai:{seat}")) for seat, entrant in enumerate(match.seats)]
+    game = SplendorPokemonGame([f"机器人{seat + 1}" for seat in range(num_players)],
+                               victory_points=victory_points, seed=match.seed)
+    stats = play_to_end(game, ai_players)
+
+    scores = [player.get_victory_points() for player in game.players]
+    if game.game_over and game.final_rankings:
+        # 正常结束：按规则排名（同分时后手在前），名次各不相同
+        places = [0] * num_players
+        for place, (seat, _) in enumerate(game.final_rankings, 1):
+            places[seat] = place
+    else:
+        # 僵局/异常：按当前分数排名，同分并列
+        places = [1 + sum(other > score for other in scores) for score in scores]
+
+    return {
+        "key": match.key,
+        "seed": match.seed,
+        "seats": [entrant.name for entrant in match.seats],
+        "scores": scores,
+        "places": places,
+        "turns": stats["turns"],
+        "deadlock": int(not game.game_over and not stats["error"]),
+        "error": stats["error"],
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+
+def load_checkpoint(path: str, header: Dict) -> Dict[str, Dict]:
+    """读取检查点中已完成的对局（文件不存在时创建并写入配置头）
+
+    配置头与本次运行不一致时抛出ValueError；中断时写了一半的行会被丢弃（重写文件，之后继续追加）
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"tournament": header}, ensure_ascii=False) + "\n")
+        return {}
+
+    records = {}
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    lines = content.splitlines()
+    saved_header = json.loads(lines[0]).get("tournament")
+    if saved_header != header:
+        raise ValueError(f"检查点{path}的赛事配置与本次运行不一致")
+    valid = lines[:1]
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        records[record["key"]] = record
+        valid.append(line)
+    if len(valid) != len(lines) or not content.endswith("\n"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(valid) + "\n")
+    return records
+
+
+def _play_match_task(args) -> Dict:
+    return play_match(*args)
+
+
+def run_tournament(entrants: Sequence[Entrant], player_counts: Sequence[int] = (2,), deals: int = 10,
+                   seed_start: int = 0, victory_points: int = 18, workers: Optional[int] = None,
+                   checkpoint: Optional[str] = None, progress_every: int = 100) -> List[Dict]:
+    """
+    运行循环赛，返回全部对局记录（按对局表顺序）
+
+    提供checkpoint时每局完成后立即追加到文件，重新运行会跳过已完成的对局
+    """
+    matches = schedule(entrants, player_counts, deals, seed_start)
+    header = {
+        "entrants": [[entrant.name, entrant.difficulty, [list(option) for option in entrant.options]]
+                     for entrant in entrants],
+        "players": list(player_counts),
+        "deals": deals,
+        "seed_start": seed_start,
+        "victory_points": victory_points
+    }
+    done = load_checkpoint(checkpoint, header) if checkpoint else {}
+    pending = [(match, victory_points) for match in matches if match.key not in done]
+    if done:
+        print(f"  ♻️ 从检查点恢复 {len(matches) - len(pending)}/{len(matches)} 局")
+
+    workers = workers or os.cpu_count() or 1
+    checkpoint_file = open(checkpoint, "a", encoding="utf-8") if checkpoint else None
+    pool = None
+    started = time.perf_counter()
+    try:
+        if workers == 1 or len(pending) <= 1:
+            with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+                get_card_catalog()
+            results = (_run_quietly(play_match, task) for task in pending)
+        else:
+            pool = Pool(processes=workers, initializer=_init_worker)
+            chunksize = max(1, min(16, len(pending) // (workers * 8)))
+            results = pool.imap_unordered(_play_match_task, pending, chunksize=chunksize)
+
+        for finished, record in enumerate(results, 1):
+            done[record["key"]] = record
+            if checkpoint_file:
+                checkpoint_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                checkpoint_file.flush()
+            if progress_every and finished % progress_every == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  ⏳ {finished}/{len(pending)} 局，{finished / elapsed:.1f} 局/秒")
+
+        if pool:
+            pool.close()
+            pool.join()
+    finally:
+        if pool:
+            pool.terminate()
+        if checkpoint_file:
+            checkpoint_file.close()
+
+    return [done[match.key] for match in matches]
+
+
+def pairwise_outcomes(records: Sequence[Dict]) -> List[Tuple[str, str, float]]:
+    """把每局名次拆成两两对局结果 (配置A, 配置B, A的得分：胜1/平0.5/负0)，同名配置之间不计"""
+    outcomes = []
+    for record in records:
+        for a, b in combinations(range(len(record["seats"])), 2):
+            name_a, name_b = record["seats"][a], record["seats"][b]
+            if name_a == name_b:
+                continue
+            place_a, place_b = record["places"][a], record["places"][b]
+            outcomes.append((name_a, name_b, 1.0 if place_a < place_b else 0.5 if place_a == place_b else 0.0))
+    return outcomes
+
+
+def fit_elo(names: Sequence[str], outcomes: Sequence[Tuple[str, str, float]], iterations: int = 200) -> Dict[str, float]:
+    """Bradley-Terry最大似然（MM迭代），换算成平均为BASE_RATING的Elo等级分"""
+    index = {name: i for i, name in enumerate(names)}
+    size = len(names)
+    wins = [0.0] * size
+    games = [[0.0] * size for _ in range(size)]
+    for i, j in combinations(range(size), 2):
+        # 先验：每对之间一局虚拟平局
+        wins[i] += PRIOR_DRAWS / 2
+        wins[j] += PRIOR_DRAWS / 2
+        games[i][j] += PRIOR_DRAWS
+        games[j][i] += PRIOR_DRAWS
+    for name_a, name_b, score in outcomes:
+        i, j = index[name_a], index[name_b]
+        wins[i] += score
+        wins[j] += 1.0 - score
+        games[i][j] += 1.0
+        games[j][i] += 1.0
+
+    strength = [1.0] * size
+    for _ in range(iterations):
+        updated = []
+        for i in range(size):
+            denominator = sum(games[i][j] / (strength[i] + strength[j]) for j in range(size) if j != i)
+            updated.append(wins[i] / denominator if denominator else strength[i])
+        mean_log = sum(math.log(value) for value in updated) / size
+        strength = [value / math.exp(mean_log) for value in updated]
+
+    return {name: BASE_RATING + 400.0 * math.log10(strength[index[name]]) for name in names}
+
+
+def rate(names: Sequence[str], records: Sequence[Dict], bootstrap: int = BOOTSTRAP_SAMPLES,
+         seed: int = 0) -> List[Dict]:
+    """等级分表（按等级分降序）：等级分、按对局重抽样的95%置信区间、局数、第一名次数和平均名次"""
+    ratings = fit_elo(names, pairwise_outcomes(records))
+
+    rng = random.Random(seed)
+    samples = {name: [] for name in names}
+    for _ in range(bootstrap if records else 0):
+        resampled = [records[rng.randrange(len(records))] for _ in records]
+        for name, rating in fit_elo(names, pairwise_outcomes(resampled)).items():
+            samples[name].append(rating)
+
+    table = []
+    for name in names:
+        seated = [(record["places"][seat], len(record["seats"]))
+                  for record in records for seat, seat_name in enumerate(record["seats"]) if seat_name == name]
+        wins = sum(1 for place, _ in seated if place == 1)
+        values = sorted(samples[name])
+        table.append({
+            "name": name,
+            "rating": round(ratings[name], 1),
+            "ci_low": round(values[int(0.025 * (len(values) - 1))], 1) if values else round(ratings[name], 1),
+            "ci_high": round(values[int(math.ceil(0.975 * (len(values) - 1)))], 1) if values else round(ratings[name], 1),
+            "games": len(seated),
+            "wins": wins,
+            "win_rate": round(wins / len(seated), 3) if seated else 0.0,
+            "avg_place": round(sum(place for place, _ in seated) / len(seated), 2) if seated else 0.0
+        })
+    table.sort(key=lambda row: row["rating"], reverse=True)
+    for rank, row in enumerate(table, 1):
+        row["rank"] = rank
+    return table
+
+
+def main():
+    configure_logging(console=False)  # 批量对局不在控制台输出日志，需要时设置SPLENDOR_LOG_FILE
+    parser = argparse.ArgumentParser(description="AI循环赛（Elo等级分）")
+    parser.add_argument("--ai", action="append", required=True,
+                        help="参赛配置 名称=难度[:参数=值,...]，可重复（如 专家50=专家:time_budget_ms=50）")
+    parser.add_argument("--players", default="2", help="每局人数，逗号分隔（如 2,3,4）")
+    parser.add_argument("--deals", type=int, default=20, help="每个阵容的牌局数（每副牌局按座位轮换各打一局）")
+    parser.add_argument("--victory-points", type=int, default=18, help="胜利分数")
+    parser.add_argument("--seed-start", type=int, default=0, help="起始种子（第i副牌局使用 seed-start+i）")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认CPU核数，1为单进程）")
+    parser.add_argument("--checkpoint", default="tournament_checkpoint.jsonl", help="检查点文件（中断后可续跑）")
+    parser.add_argument("--output", default=None, help="等级分CSV文件")
+    args = parser.parse_args()
+
+    try:
+        entrants = [parse_entrant(spec) for spec in args.ai]
+        player_counts = [int(count) for count in args.players.split(",") if count.strip()]
+    except ValueError as e:
+        parser.error(str(e))
+    if len(entrants) < 2:
+        parser.error("至少需要两个参赛配置")
+    if any(count not in (2, 3, 4) for count in player_counts):
+        parser.error("每局人数只能是2/3/4")
+
+    total = len(schedule(entrants, player_counts, args.deals, args.seed_start))
+    print("=" * 60)
+    print(f"🏆 AI循环赛: {len(entrants)}个配置，{'/'.join(map(str, player_counts))}人局，"
+          f"每阵容{args.deals}副牌局，共{total}局")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    try:
+        records = run_tournament(entrants, player_counts, args.deals, args.seed_start, args.victory_points,
+                                 workers=args.workers, checkpoint=args.checkpoint,
+                                 progress_every=max(1, total // 10))
+    except ValueError as e:
+        parser.error(f"{e}（换一个检查点文件或删除旧文件）")
+    table = rate([entrant.name for entrant in entrants], records)
+
+    print(f"\n✅ 完成 {len(records)} 局，用时 {time.perf_counter() - started:.1f}秒，"
+          f"僵局: {sum(r['deadlock'] for r in records)}，异常: {sum(1 for r in records if r['error'])}")
+    for row in table:
+        print(f"  {row['rank']}. {row['name']}: {row['rating']:.0f} "
+              f"(95%区间 {row['ci_low']:.0f}~{row['ci_high']:.0f})，"
+              f"{row['games']}局，第一名 {row['wins']} 次（{row['win_rate'] * 100:.1f}%），平均名次 {row['avg_place']}")
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=RATING_FIELDS)
+            writer.writeheader()
+            writer.writerows(table)
+        print(f"📄 等级分已写入: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
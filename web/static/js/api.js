@@ -26,6 +26,11 @@ class SplendorAPI {
         try {
             const response = await fetch(url, config);
             
+            // 304：状态未变化（ETag命中），调用方沿用本地状态
+            if (response.status === 304) {
+                return null;
+            }
+            
             // 尝试解析JSON，处理空响应的情况
             let data;
             const text = await response.text();
@@ -205,9 +210,53 @@ class SplendorAPI {
 
     /**
      * 获取游戏状态
+     * 提供本地状态版本号时：状态未变化返回null（304），否则返回相对该版本的增量（delta: true）或全量状态
+     */
+    async getGameState(roomId, sinceVersion = null) {
+        if (sinceVersion === null || sinceVersion === undefined) {
+            return this.request(`/rooms/${roomId}/state`);
+        }
+        return this.request(`/rooms/${roomId}/state?since=${sinceVersion}`, {
+            headers: { 'If-None-Match': `"${roomId}-${sinceVersion}"` }
+        });
+    }
+
+    /**
+     * 订阅房间状态推送（Server-Sent Events）
+     * 返回EventSource实例；浏览器不支持时返回null，由调用方回退到轮询
      */
-    async getGameState(roomId) {
-        return this.request(`/rooms/${roomId}/state`);
+    subscribeRoomEvents(roomId, onState, onDeleted, onError) {
+        if (typeof EventSource === 'undefined') {
+            return null;
+        }
+
+        const source = new EventSource(`${this.baseURL}/rooms/${roomId}/events`);
+
+        source.addEventListener('state', (event) => {
+            let state;
+            try {
+                state = JSON.parse(event.data);
+            } catch (parseError) {
+                console.error('推送数据解析失败:', event.data);
+                return;
+            }
+            onState(state);
+        });
+
+        source.addEventListener('deleted', () => {
+            source.close();
+            if (onDeleted) {
+                onDeleted();
+            }
+        });
+
+        source.onerror = (event) => {
+            if (onError) {
+                onError(event, source);
+            }
+        };
+
+        return source;
     }
 
     /**
@@ -20,6 +20,9 @@ class GameUI {
         this.currentRoomId = null;
         this.currentPlayerName = null;
         this.pollingInterval = null;
+        this.eventSource = null;  // 房间状态推送通道（SSE），不可用时回退到轮询
+        this.updatesPaused = false;  // 显示通知期间暂停应用推送
+        this.pendingGameState = null;  // 暂停期间收到的最新状态
         this.controlledAI = null;  // 当前控制的AI玩家名称
         this.aiPlayers = [];  // 所有AI玩家列表
         this.hasPerformedMainAction = false;  // 是否已执行主要操作（买/拿/预购）
@@ -2088,6 +2091,20 @@ class GameUI {
      * 暂停轮询（显示通知时使用）
      */
     pausePollingForNotification() {
+        // 推送模式：暂停应用推送，4秒后应用期间收到的最新状态
+        if (this.eventSource) {
+            this.updatesPaused = true;
+            setTimeout(() => {
+                this.updatesPaused = false;
+                if (this.pendingGameState) {
+                    const state = this.pendingGameState;
+                    this.pendingGameState = null;
+                    this.applyGameState(state);
+                }
+            }, 4000);
+            return;
+        }
+
         if (this.pollingInterval) {
             clearInterval(this.pollingInterval);
             this.pollingInterval = null;
@@ -2104,12 +2121,44 @@ class GameUI {
     }
     
     /**
-     * 开始轮询游戏状态
+     * 开始接收游戏状态（优先推送通道，不可用时回退到轮询）
      */
     startPolling(roomId, playerName) {
+        this.stopPolling();
         this.currentRoomId = roomId;
         this.currentPlayerName = playerName;
         
+        this.eventSource = api.subscribeRoomEvents(
+            roomId,
+            (state) => this.handlePushedState(state),
+            () => {
+                this.stopPolling();
+                showToast('房间已被解散', 'info');
+            },
+            (event, source) => {
+                // 推送通道断开：关闭并回退到轮询
+                console.warn('状态推送通道断开，回退到轮询');
+                source.close();
+                if (this.eventSource === source) {
+                    this.eventSource = null;
+                    this.startIntervalPolling();
+                }
+            }
+        );
+        
+        if (!this.eventSource) {
+            this.startIntervalPolling();
+        }
+    }
+
+    /**
+     * 开始轮询游戏状态（推送通道的后备方案）
+     */
+    startIntervalPolling() {
+        if (this.pollingInterval) {
+            return;
+        }
+        
         // 立即获取一次
         this.pollGameState();
         
@@ -2120,9 +2169,15 @@ class GameUI {
     }
 
     /**
-     * 停止轮询
+     * 停止轮询和推送
      */
     stopPolling() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+        this.updatesPaused = false;
+        this.pendingGameState = null;
         if (this.pollingInterval) {
             clearInterval(this.pollingInterval);
             this.pollingInterval = null;
@@ -2134,25 +2189,74 @@ class GameUI {
      */
     async pollGameState() {
         try {
-            const response = await api.getGameState(this.currentRoomId);
-            if (response.status === 'playing') {
-                this.updateGameUI(response);
-                
-                // 检查游戏是否结束
-                if (response.game_over) {
-                    this.stopPolling();
-                    // 清除游戏会话
-                    if (typeof clearGameSession === 'function') {
-                        clearGameSession();
-                    }
-                    // 显示排名信息
-                    this.showFinalRankings(response.winner, response.rankings);
-                }
+            const base = this.currentGameState;
+            const sinceVersion = base && base.room_id === this.currentRoomId ? base.state_version : null;
+            const response = await api.getGameState(this.currentRoomId, sinceVersion);
+            if (!response) {
+                return;  // 状态未变化
             }
+            this.applyGameState(response.delta ? this.applyStateDelta(base, response) : response);
         } catch (error) {
             console.error('轮询游戏状态失败:', error);
         }
     }
+
+    /**
+     * 把服务器返回的增量合并到本地状态，返回新的完整状态（不修改原状态）
+     */
+    applyStateDelta(base, delta) {
+        const state = { ...base, ...delta.changed };
+        delta.removed.forEach(key => delete state[key]);
+        state.state_version = delta.state_version;
+
+        if (delta.player_states) {
+            state.player_states = { ...base.player_states, ...delta.player_states };
+            (delta.removed_players || []).forEach(name => delete state.player_states[name]);
+        }
+
+        if (delta.tableau) {
+            state.tableau = { ...base.tableau };
+            Object.entries(delta.tableau).forEach(([tier, tierDelta]) => {
+                const cards = (base.tableau[tier] || []).slice(0, tierDelta.size);
+                Object.entries(tierDelta.slots).forEach(([idx, card]) => {
+                    cards[Number(idx)] = card;
+                });
+                state.tableau[tier] = cards;
+            });
+        }
+        return state;
+    }
+
+    /**
+     * 处理推送的游戏状态（显示通知期间暂存，稍后应用）
+     */
+    handlePushedState(response) {
+        if (this.updatesPaused) {
+            this.pendingGameState = response;
+            return;
+        }
+        this.applyGameState(response);
+    }
+
+    /**
+     * 应用服务器返回的游戏状态（轮询和推送共用）
+     */
+    applyGameState(response) {
+        if (response.status === 'playing') {
+            this.updateGameUI(response);
+            
+            // 检查游戏是否结束
+            if (response.game_over) {
+                this.stopPolling();
+                // 清除游戏会话
+                if (typeof clearGameSession === 'function') {
+                    clearGameSession();
+                }
+                // 显示排名信息
+                this.showFinalRankings(response.winner, response.rankings);
+            }
+        }
+    }
 }
 
 // 全局实例
@@ -3,6 +3,9 @@
  */
 
 const API_BASE = '';
+const PAGE_SIZE = 50;  // 每次加载的条数
+
+let loadedHistories = [];  // 已加载的历史记录
 
 // 初始化
 document.addEventListener('DOMContentLoaded', () => {
@@ -10,20 +13,23 @@ document.addEventListener('DOMContentLoaded', () => {
 });
 
 /**
- * 加载历史记录列表
+ * 加载历史记录列表（more为true时加载下一页并追加）
  */
-async function loadHistoryList() {
+async function loadHistoryList(more = false) {
     const contentDiv = document.getElementById('history-content');
+    const offset = more ? loadedHistories.length : 0;
     
     try {
-        const response = await fetch(`${API_BASE}/api/history/list`);
+        const response = await fetch(`${API_BASE}/api/history/list?offset=${offset}&limit=${PAGE_SIZE}`);
         const data = await response.json();
         
         if (!data.success) {
             throw new Error(data.error || '加载失败');
         }
         
-        if (data.histories.length === 0) {
+        loadedHistories = more ? loadedHistories.concat(data.histories) : data.histories;
+        
+        if (loadedHistories.length === 0) {
             contentDiv.innerHTML = `
                 <div class="empty-state">
                     <div class="empty-state-icon">🎮</div>
@@ -35,7 +41,7 @@ async function loadHistoryList() {
         }
         
         // 渲染历史记录列表
-        renderHistoryList(data.histories);
+        renderHistoryList(loadedHistories, data.has_more);
         
     } catch (error) {
         console.error('加载历史记录失败:', error);
@@ -51,9 +57,9 @@ async function loadHistoryList() {
 }
 
 /**
- * 渲染历史记录列表
+ * 渲染历史记录列表（hasMore为true时在末尾显示"加载更多"）
  */
-function renderHistoryList(histories) {
+function renderHistoryList(histories, hasMore = false) {
     const contentDiv = document.getElementById('history-content');
     
     const listHTML = histories.map(history => {
@@ -104,7 +110,10 @@ function renderHistoryList(histories) {
         `;
     }).join('');
     
-    contentDiv.innerHTML = `<div class="history-list">${listHTML}</div>`;
+    const moreHTML = hasMore
+        ? `<button class="btn btn-primary" onclick="loadHistoryList(true)">加载更多</button>`
+        : '';
+    contentDiv.innerHTML = `<div class="history-list">${listHTML}</div>${moreHTML}`;
 }
 
 /**
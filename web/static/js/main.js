@@ -7,6 +7,7 @@ let currentRoom = null;
 let playerName = null;
 let isCreator = false;
 let roomPollingInterval = null;
+let roomEventSource = null;  // 房间状态推送通道（SSE），不可用时回退到轮询
 let userActiveGame = null;  // 用户的活跃游戏信息
 
 // 房间列表分页状态
@@ -478,6 +479,7 @@ function bindEventListeners() {
     document.getElementById('add-bot-easy-btn').addEventListener('click', () => handleAddBot('简单'));
     document.getElementById('add-bot-medium-btn').addEventListener('click', () => handleAddBot('中等'));
     document.getElementById('add-bot-hard-btn').addEventListener('click', () => handleAddBot('困难'));
+    document.getElementById('add-bot-expert-btn').addEventListener('click', () => handleAddBot('专家'));
     
     // 一键添加全部机器人按钮
     document.getElementById('add-all-bots-easy-btn').addEventListener('click', () => handleAddAllBots('简单'));
@@ -745,9 +747,39 @@ function showRoomScreen() {
 }
 
 /**
- * 开始房间轮询
+ * 开始接收房间信息（优先推送通道，不可用时回退到轮询）
  */
 function startRoomPolling() {
+    stopRoomPolling();
+    
+    roomEventSource = api.subscribeRoomEvents(
+        currentRoom,
+        (state) => renderRoomInfo(state),
+        () => handleRoomDissolved(),
+        (event, source) => {
+            // 推送通道断开：关闭并回退到轮询
+            console.warn('房间推送通道断开，回退到轮询');
+            source.close();
+            if (roomEventSource === source) {
+                roomEventSource = null;
+                startRoomIntervalPolling();
+            }
+        }
+    );
+    
+    if (!roomEventSource) {
+        startRoomIntervalPolling();
+    }
+}
+
+/**
+ * 开始房间轮询（推送通道的后备方案）
+ */
+function startRoomIntervalPolling() {
+    if (roomPollingInterval) {
+        return;
+    }
+    
     updateRoomInfo();
     
     roomPollingInterval = setInterval(() => {
@@ -756,131 +788,148 @@ function startRoomPolling() {
 }
 
 /**
- * 停止房间轮询
+ * 停止房间轮询和推送
  */
 function stopRoomPolling() {
+    if (roomEventSource) {
+        roomEventSource.close();
+        roomEventSource = null;
+    }
     if (roomPollingInterval) {
         clearInterval(roomPollingInterval);
         roomPollingInterval = null;
     }
 }
 
+/**
+ * 房间已解散：返回大厅
+ */
+function handleRoomDissolved() {
+    showToast('房间已被解散', 'info');
+    stopRoomPolling();
+    switchScreen('lobby-screen');
+    resetGame();
+}
+
 /**
  * 更新房间信息
  */
 async function updateRoomInfo() {
     try {
         const state = await api.getGameState(currentRoom);
-        
-        // 更新玩家列表
-        const playersList = document.getElementById('players-list');
-        playersList.innerHTML = '';
-        state.players.forEach((player, index) => {
-            const li = document.createElement('li');
-            li.className = 'player-item';
-            
-            // 玩家名称
-            const nameSpan = document.createElement('span');
-            nameSpan.textContent = player;
-            if (index === 0) {
-                nameSpan.textContent += ' 👑';  // 房主标记
-            }
-            // 机器人标记
-            if (player.includes('机器人')) {
-                nameSpan.textContent += ' 🤖';
-            }
-            li.appendChild(nameSpan);
-            
-            // 如果是房主，且不是自己，显示踢出按钮
-            if (isCreator && player !== playerName) {
-                const kickBtn = document.createElement('button');
-                kickBtn.className = 'btn btn-small btn-danger';
-                kickBtn.textContent = '踢出';
-                kickBtn.style.marginLeft = '10px';
-                kickBtn.onclick = () => handleKickPlayer(player);
-                li.appendChild(kickBtn);
-            }
-            
-            playersList.appendChild(li);
-        });
-        
-        // 更新玩家计数显示
-        const maxPlayers = state.max_players || 4;  // 后端应该总是返回，这里只是兜底
-        const victoryPoints = state.victory_points || 18;  // 后端应该总是返回，这里只是兜底
-        document.getElementById('player-count').textContent = `${state.players.length}/${maxPlayers}`;
-        
-        // 显示/隐藏配置面板（仅房主可见）
-        const configPanel = document.getElementById('game-config-panel');
-        const maxPlayersSelect = document.getElementById('max-players-select');
-        const victoryPointsInput = document.getElementById('victory-points-input');
-        
-        if (isCreator) {
-            configPanel.style.display = 'block';
-            // 只在未被用户修改时更新（检查是否聚焦）
-            if (document.activeElement !== maxPlayersSelect && document.activeElement !== victoryPointsInput) {
-                maxPlayersSelect.value = maxPlayers;
-                victoryPointsInput.value = victoryPoints;
-            }
-        } else {
-            configPanel.style.display = 'none';
+        renderRoomInfo(state);
+    } catch (error) {
+        console.error('更新房间信息失败:', error);
+        // 如果房间不存在了（可能被删除），返回大厅
+        if (error.message.includes('房间不存在')) {
+            handleRoomDissolved();
         }
+    }
+}
+
+/**
+ * 渲染房间信息（轮询和推送共用）
+ */
+function renderRoomInfo(state) {
+    // 更新玩家列表
+    const playersList = document.getElementById('players-list');
+    playersList.innerHTML = '';
+    state.players.forEach((player, index) => {
+        const li = document.createElement('li');
+        li.className = 'player-item';
         
-        // 更新开始游戏按钮 - 必须达到设置的人数才能开始
-        const startBtn = document.getElementById('start-game-btn');
-        console.log('=== 检查开始按钮状态 ===');
-        console.log('当前玩家名:', playerName);
-        console.log('房主名称:', state.creator_name);
-        console.log('isCreator变量:', isCreator);
-        console.log('玩家数量:', state.players.length);
-        console.log('最大玩家数:', maxPlayers);
-        console.log('玩家列表:', state.players);
-        console.log('房间状态:', state.status);
-        
-        // 从服务器返回的状态判断是否为房主（更可靠）
-        const actuallyIsCreator = (state.creator_name === playerName);
-        if (actuallyIsCreator !== isCreator) {
-            console.warn('⚠️ isCreator变量与服务器状态不一致！');
-            console.warn('isCreator变量:', isCreator);
-            console.warn('服务器判断:', actuallyIsCreator);
-            // 修正isCreator变量
-            isCreator = actuallyIsCreator;
+        // 玩家名称
+        const nameSpan = document.createElement('span');
+        nameSpan.textContent = player;
+        if (index === 0) {
+            nameSpan.textContent += ' 👑';  // 房主标记
+        }
+        // 机器人标记
+        if (player.includes('机器人')) {
+            nameSpan.textContent += ' 🤖';
         }
+        li.appendChild(nameSpan);
         
-        if (isCreator && state.players.length === maxPlayers) {
-            console.log('✅ 启用开始按钮');
-            startBtn.disabled = false;
-            // 如果不是正在启动中，确保按钮文本正确
-            if (!isStartingGame) {
-                startBtn.textContent = '开始游戏';
-            }
-        } else {
-            console.log('❌ 禁用开始按钮, 原因:', !isCreator ? '不是房主' : '人数不足');
-            startBtn.disabled = true;
-            // 如果不是正在启动中，确保按钮文本正确
-            if (!isStartingGame) {
-                startBtn.textContent = '开始游戏';
-            }
+        // 如果是房主，且不是自己，显示踢出按钮
+        if (isCreator && player !== playerName) {
+            const kickBtn = document.createElement('button');
+            kickBtn.className = 'btn btn-small btn-danger';
+            kickBtn.textContent = '踢出';
+            kickBtn.style.marginLeft = '10px';
+            kickBtn.onclick = () => handleKickPlayer(player);
+            li.appendChild(kickBtn);
         }
         
-        // 如果游戏已经开始，且应该自动跳转，切换到游戏界面
-        if (state.status === 'playing' && shouldAutoJoinGame) {
-            console.log('🎮 检测到游戏已开始，准备跳转到游戏界面');
-            stopRoomPolling();
-            isStartingGame = false;  // 重置标志
-            shouldAutoJoinGame = false;  // 重置自动跳转标志
-            switchScreen('game-screen');
-            gameUI.startPolling(currentRoom, playerName);
-            showToast(`游戏开始！当前玩家: ${state.current_player}`, 'success');
+        playersList.appendChild(li);
+    });
+    
+    // 更新玩家计数显示
+    const maxPlayers = state.max_players || 4;  // 后端应该总是返回，这里只是兜底
+    const victoryPoints = state.victory_points || 18;  // 后端应该总是返回，这里只是兜底
+    document.getElementById('player-count').textContent = `${state.players.length}/${maxPlayers}`;
+    
+    // 显示/隐藏配置面板（仅房主可见）
+    const configPanel = document.getElementById('game-config-panel');
+    const maxPlayersSelect = document.getElementById('max-players-select');
+    const victoryPointsInput = document.getElementById('victory-points-input');
+    
+    if (isCreator) {
+        configPanel.style.display = 'block';
+        // 只在未被用户修改时更新（检查是否聚焦）
+        if (document.activeElement !== maxPlayersSelect && document.activeElement !== victoryPointsInput) {
+            maxPlayersSelect.value = maxPlayers;
+            victoryPointsInput.value = victoryPoints;
         }
-    } catch (error) {
-        console.error('更新房间信息失败:', error);
-        // 如果房间不存在了（可能被删除），返回大厅
-        if (error.message.includes('房间不存在')) {
-            showToast('房间已被解散', 'info');
-            stopRoomPolling();
-            switchScreen('lobby-screen');
-            resetGame();
+    } else {
+        configPanel.style.display = 'none';
+    }
+    
+    // 更新开始游戏按钮 - 必须达到设置的人数才能开始
+    const startBtn = document.getElementById('start-game-btn');
+    console.log('=== 检查开始按钮状态 ===');
+    console.log('当前玩家名:', playerName);
+    console.log('房主名称:', state.creator_name);
+    console.log('isCreator变量:', isCreator);
+    console.log('玩家数量:', state.players.length);
+    console.log('最大玩家数:', maxPlayers);
+    console.log('玩家列表:', state.players);
+    console.log('房间状态:', state.status);
+    
+    // 从服务器返回的状态判断是否为房主（更可靠）
+    const actuallyIsCreator = (state.creator_name === playerName);
+    if (actuallyIsCreator !== isCreator) {
+        console.warn('⚠️ isCreator变量与服务器状态不一致！');
+        console.warn('isCreator变量:', isCreator);
+        console.warn('服务器判断:', actuallyIsCreator);
+        // 修正isCreator变量
+        isCreator = actuallyIsCreator;
+    }
+    
+    if (isCreator && state.players.length === maxPlayers) {
+        console.log('✅ 启用开始按钮');
+        startBtn.disabled = false;
+        // 如果不是正在启动中，确保按钮文本正确
+        if (!isStartingGame) {
+            startBtn.textContent = '开始游戏';
         }
+    } else {
+        console.log('❌ 禁用开始按钮, 原因:', !isCreator ? '不是房主' : '人数不足');
+        startBtn.disabled = true;
+        // 如果不是正在启动中，确保按钮文本正确
+        if (!isStartingGame) {
+            startBtn.textContent = '开始游戏';
+        }
+    }
+    
+    // 如果游戏已经开始，且应该自动跳转，切换到游戏界面
+    if (state.status === 'playing' && shouldAutoJoinGame) {
+        console.log('🎮 检测到游戏已开始，准备跳转到游戏界面');
+        stopRoomPolling();
+        isStartingGame = false;  // 重置标志
+        shouldAutoJoinGame = false;  // 重置自动跳转标志
+        switchScreen('game-screen');
+        gameUI.startPolling(currentRoom, playerName);
+        showToast(`游戏开始！当前玩家: ${state.current_player}`, 'success');
     }
 }
 
@@ -3,8 +3,9 @@
  */
 
 const API_BASE = '';
-let currentHistory = null;
+let currentHistory = null;  // 概要：turns中未加载的回合只有回合号和玩家
 let currentTurnIndex = 0;
+const boardCache = {};  // 回合号 -> 该回合结束时的完整牌面（服务端按动作日志重演）
 
 /**
  * 计算轮次信息
@@ -43,7 +44,8 @@ document.addEventListener('DOMContentLoaded', () => {
  */
 async function loadGameHistory(gameId) {
     try {
-        const response = await fetch(`${API_BASE}/api/history/${gameId}`);
+        // 先取概要，回合内容在翻到时再逐个获取
+        const response = await fetch(`${API_BASE}/api/history/${gameId}?outline=1`);
         const data = await response.json();
         
         if (!data.success) {
@@ -181,7 +183,6 @@ function showTurn(index) {
     }
     
     currentTurnIndex = index;
-    const turn = currentHistory.turns[index];
     
     // 更新选择器
     document.getElementById('turn-selector').value = index;
@@ -193,8 +194,37 @@ function showTurn(index) {
     // 更新回合列表高亮
     renderTurnList();
     
-    // 渲染回合详情
-    renderTurnDetail(turn);
+    // 渲染回合详情（快速翻页时只渲染最后停留的回合），并预取下一回合
+    loadTurn(index).then(turn => {
+        if (currentTurnIndex === index) {
+            renderTurnDetail(turn);
+            showBoard(index, turn.turn);
+        }
+        if (index + 1 < currentHistory.turns.length) {
+            loadTurn(index + 1).catch(() => {});
+        }
+    }).catch(error => {
+        console.error('加载回合失败:', error);
+        document.getElementById('turn-detail').innerHTML = `<p style="color: #e74c3c;">${error.message}</p>`;
+    });
+}
+
+/**
+ * 获取回合内容（已加载的直接返回）
+ */
+async function loadTurn(index) {
+    const turn = currentHistory.turns[index];
+    if (turn.actions) {
+        return turn;
+    }
+    
+    const response = await fetch(`${API_BASE}/api/history/${currentHistory.game_id}/turn/${turn.turn}`);
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error || '加载回合失败');
+    }
+    currentHistory.turns[index] = data.turn;
+    return data.turn;
 }
 
 /**
@@ -260,6 +290,12 @@ function renderTurnDetail(turn) {
                 .map(([k, v]) => `${ballEmojis[k] || k}×${v}`)
                 .join(' ');
             dataDisplay = `放回球: ${balls || '无'}`;
+        } else if (action.type === 'player_left') {
+            actionIcon = '🚪';
+            dataDisplay = `${action.data.player} 退出游戏`;
+        } else if (action.type === 'game_aborted') {
+            actionIcon = '🏁';
+            dataDisplay = action.message || '对局中止';
         } else {
             actionIcon = '❓';
             dataDisplay = `未知动作类型: ${action.type}`;
@@ -345,6 +381,86 @@ function renderTurnDetail(turn) {
                 ${stateBeforeHTML}
                 ${stateAfterHTML}
             </div>
+            
+            <div class="replay-board" id="turn-board">
+                <p style="color: #95a5a6;">正在加载回合结束时的牌面...</p>
+            </div>
+        </div>
+    `;
+}
+
+/**
+ * 获取回合结束时的完整牌面（已加载的直接返回）
+ */
+async function loadBoard(turnNumber) {
+    if (boardCache[turnNumber]) {
+        return boardCache[turnNumber];
+    }
+    
+    const response = await fetch(`${API_BASE}/api/history/${currentHistory.game_id}/board/${turnNumber}`);
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error || '加载牌面失败');
+    }
+    boardCache[turnNumber] = data.board;
+    return data.board;
+}
+
+/**
+ * 显示回合结束时的牌面（翻页后仍停留在该回合时才渲染）
+ */
+function showBoard(index, turnNumber) {
+    loadBoard(turnNumber).then(board => {
+        if (currentTurnIndex === index) {
+            renderBoard(board);
+        }
+    }).catch(error => {
+        const boardDiv = document.getElementById('turn-board');
+        if (boardDiv && currentTurnIndex === index) {
+            boardDiv.innerHTML = `<p style="color: #95a5a6;">${error.message}</p>`;
+        }
+    });
+}
+
+/**
+ * 渲染完整牌面：球池、场上卡牌、稀有/传说和各玩家状态
+ */
+function renderBoard(board) {
+    const boardDiv = document.getElementById('turn-board');
+    if (!boardDiv) {
+        return;
+    }
+    
+    const formatCard = card => `${card.name} (Lv${card.level}, ${card.victory_points}VP)`;
+    const tiersHTML = ['3', '2', '1'].map(tier => `
+        <div class="replay-state-item">
+            <span class="replay-state-label">Lv${tier}（牌堆${board[`lv${tier}_deck_size`]}张）</span>
+            <span class="replay-state-value">${(board.tableau[tier] || []).map(formatCard).join('、') || '无'}</span>
+        </div>
+    `).join('');
+    
+    const playersHTML = Object.entries(board.player_states).map(([name, state]) => `
+        <div class="replay-state-item">
+            <span class="replay-state-label">${name}${name === board.current_player && !board.game_over ? ' 👉' : ''}${state.has_left ? '（已退出）' : ''}</span>
+            <span class="replay-state-value">${state.victory_points} VP ｜ ${formatBalls(state.balls)} ｜ 卡牌${state.display_area.length}张 ｜ 预购${state.reserved_cards.length}张</span>
+        </div>
+    `).join('');
+    
+    boardDiv.innerHTML = `
+        <h4>🗺️ 回合结束时的牌面</h4>
+        <div class="replay-state-box">
+            <div class="replay-state-item">
+                <span class="replay-state-label">球池</span>
+                <span class="replay-state-value">${formatBalls(board.ball_pool)}</span>
+            </div>
+            ${tiersHTML}
+            <div class="replay-state-item">
+                <span class="replay-state-label">稀有 / 传说</span>
+                <span class="replay-state-value">${board.rare_card ? formatCard(board.rare_card) : '无'} / ${board.legendary_card ? formatCard(board.legendary_card) : '无'}</span>
+            </div>
+        </div>
+        <div class="replay-state-box">
+            ${playersHTML}
         </div>
     `;
 }
@@ -383,7 +499,9 @@ function formatActionType(type) {
         'evolve': '进化',
         'EVOLVE_CARD': '进化',
         'evolve_card': '进化',
-        'return_balls': '放回球'
+        'return_balls': '放回球',
+        'player_left': '退出游戏',
+        'game_aborted': '对局中止'
     };
     return typeNames[type] || type;
 }
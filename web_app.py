@@ -15,6 +15,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
 # 导入后端API
 from backend.app import app as backend_app, game_rooms, room_lock, GameRoom, cleanup_thread
+from game_logging import configure_logging
 
 # 创建Web应用
 app = Flask(__name__, 
@@ -89,6 +90,9 @@ if __name__ == '__main__':
     print("=" * 60)
     print()
     
+    # 日志级别/文件由 SPLENDOR_LOG_LEVEL / SPLENDOR_LOG_FILE 控制
+    configure_logging()
+    
     # 启动服务器
     # 0.0.0.0 允许外部访问
     app.run(host='0.0.0.0', port=PORT, debug=True, threaded=True)